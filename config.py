@@ -22,6 +22,23 @@ class Config:
     TWITTER_CLIENT_ID = os.getenv('TWITTER_CLIENT_ID')
     TWITTER_CLIENT_SECRET = os.getenv('TWITTER_CLIENT_SECRET')
     
+    # Identidad verificada de la cuenta: se cachea en disco para no llamar a get_me() en cada arranque
+    TWITTER_IDENTITY_CACHE = os.getenv('TWITTER_IDENTITY_CACHE', 'state/twitter_identity.json')  # Vacío = sin caché
+    TWITTER_IDENTITY_TTL_HOURS = float(os.getenv('TWITTER_IDENTITY_TTL_HOURS', '24'))
+    
+    # URL base de la API (vacío = la real); --dry-run la apunta al sustituto local
+    TWITTER_API_BASE_URL = os.getenv('TWITTER_API_BASE_URL', '')
+    DRY_RUN_DATABASE_URL = os.getenv('DRY_RUN_DATABASE_URL', 'sqlite:///state/dry_run.db')
+    DRY_RUN_LATENCY_MS = float(os.getenv('DRY_RUN_LATENCY_MS', '50'))  # Retardo de cada respuesta simulada
+    DRY_RUN_ERROR_RATE = float(os.getenv('DRY_RUN_ERROR_RATE', '0'))  # Probabilidad de un 503 simulado
+    
+    # Publicaciones cada 24 horas hasta que la API informe la cuota real (plan Free: 17; 0 = sin límite local)
+    TWITTER_DAILY_POST_CAP = int(os.getenv('TWITTER_DAILY_POST_CAP', '17'))
+    
+    # Varias cuentas en un mismo proceso (vacío = solo la cuenta de TWITTER_*); cada
+    # cuenta se configura con ACCOUNT_<NOMBRE>_TWITTER_API_KEY, ..._LANGUAGE, etc.
+    ACCOUNTS = [name.strip() for name in os.getenv('ACCOUNTS', '').split(',') if name.strip()]
+    
     # Configuración de la aplicación
     TWITTER_USERNAME = os.getenv('TWITTER_USERNAME', 'ztech')
     POSTING_SCHEDULE = os.getenv('POSTING_SCHEDULE', '12:00,18:00').split(',')
@@ -29,6 +46,7 @@ class Config:
     
     # Configuración de contenido
     MAX_TWEET_LENGTH = int(os.getenv('MAX_TWEET_LENGTH', '280'))
+    THREAD_MAX_PARTS = int(os.getenv('THREAD_MAX_PARTS', '10'))  # Partes máximas de un hilo
     HASHTAGS = os.getenv('HASHTAGS', '#tecnologia #innovacion #AI #programacion').split()
     CONTENT_SOURCES = os.getenv('CONTENT_SOURCES', 'rss,reddit,newsapi,youtube,tiktok,instagram,linkedin,medium,devto').split(',')
     
@@ -63,6 +81,12 @@ class Config:
     # Configuración de engagement
     USE_CONTROVERSIAL_TITLES = os.getenv('USE_CONTROVERSIAL_TITLES', 'true').lower() == 'true'
     USE_IMAGES = os.getenv('USE_IMAGES', 'true').lower() == 'true'
+    
+    # Imágenes: caché local por contenido y reutilización de media_id subidos
+    MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR', 'state/media')
+    MEDIA_WORKERS = int(os.getenv('MEDIA_WORKERS', '2'))  # Descargas y procesado en paralelo
+    MEDIA_MAX_DIMENSION = int(os.getenv('MEDIA_MAX_DIMENSION', '2048'))  # Lado mayor en píxeles
+    MEDIA_JPEG_QUALITY = int(os.getenv('MEDIA_JPEG_QUALITY', '85'))
     MIN_CONTENT_LENGTH = int(os.getenv('MIN_CONTENT_LENGTH', '150'))
     
     # Configuración de idiomas por región
@@ -162,6 +186,68 @@ class Config:
     
     # Base de datos
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///ztech_bot.db')
+    DATABASE_POOL_MIN = int(os.getenv('DATABASE_POOL_MIN', '1'))  # Solo PostgreSQL
+    DATABASE_POOL_MAX = int(os.getenv('DATABASE_POOL_MAX', '5'))
+    
+    # Escritura diferida: las escrituras de la ruta de publicación se confirman en lotes
+    DB_FLUSH_INTERVAL = float(os.getenv('DB_FLUSH_INTERVAL', '1.0'))  # Segundos máximos en cola
+    DB_SYNC_INTERVAL = float(os.getenv('DB_SYNC_INTERVAL', '30'))  # Segundos entre fsync
+    DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', '500'))
+    
+    # Retención: días a conservar por tabla (0 = sin caducidad) y archivo de lo eliminado
+    RETENTION_PROCESSED_DAYS = int(os.getenv('RETENTION_PROCESSED_DAYS', '30'))
+    RETENTION_TWEETS_DAYS = int(os.getenv('RETENTION_TWEETS_DAYS', '0'))
+    RETENTION_STATS_DAYS = int(os.getenv('RETENTION_STATS_DAYS', '30'))
+    RETENTION_CANDIDATES_DAYS = int(os.getenv('RETENTION_CANDIDATES_DAYS', '7'))
+    RETENTION_OUTBOX_DAYS = int(os.getenv('RETENTION_OUTBOX_DAYS', '30'))
+    RETENTION_CHUNK_SIZE = int(os.getenv('RETENTION_CHUNK_SIZE', '500'))
+    RETENTION_VACUUM_PAGES = int(os.getenv('RETENTION_VACUUM_PAGES', '1000'))
+    RETENTION_TIME = os.getenv('RETENTION_TIME', '03:30')
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')  # Vacío para no archivar
+    
+    # Paquete de estado: se restaura al arrancar y se guarda al salir (vacío = desactivado)
+    STATE_BUNDLE_PATH = os.getenv('STATE_BUNDLE_PATH', '')
+    
+    # Cola de candidatos: la ingesta prepara tweets y la publicación los reclama
+    INGEST_INTERVAL_MINUTES = int(os.getenv('INGEST_INTERVAL_MINUTES', '30'))
+    CANDIDATE_TTL_HOURS = int(os.getenv('CANDIDATE_TTL_HOURS', '12'))
+    CANDIDATE_RENDER_LIMIT = int(os.getenv('CANDIDATE_RENDER_LIMIT', '10'))  # Tweets preparados por ingesta
+    CANDIDATE_CLAIM_TIMEOUT_MINUTES = int(os.getenv('CANDIDATE_CLAIM_TIMEOUT_MINUTES', '30'))
+    
+    # Bandeja de salida: reintentos con backoff exponencial y jitter
+    OUTBOX_INTERVAL_MINUTES = int(os.getenv('OUTBOX_INTERVAL_MINUTES', '5'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+    OUTBOX_BASE_DELAY_SECONDS = float(os.getenv('OUTBOX_BASE_DELAY_SECONDS', '30'))
+    OUTBOX_MAX_DELAY_SECONDS = float(os.getenv('OUTBOX_MAX_DELAY_SECONDS', '3600'))
+    OUTBOX_TIMELINE_CHECK_SIZE = int(os.getenv('OUTBOX_TIMELINE_CHECK_SIZE', '20'))  # Tweets propios a revisar
+    OUTBOX_SENDING_TIMEOUT_MINUTES = int(os.getenv('OUTBOX_SENDING_TIMEOUT_MINUTES', '10'))
+    
+    # Métricas: muestreo por lotes de 100 tweets con cadencia decreciente según la edad
+    METRICS_INTERVAL_MINUTES = int(os.getenv('METRICS_INTERVAL_MINUTES', '15'))
+    METRICS_MAX_REQUESTS = int(os.getenv('METRICS_MAX_REQUESTS', '5'))  # Consultas por ciclo
+    METRICS_MAX_AGE_DAYS = int(os.getenv('METRICS_MAX_AGE_DAYS', '30'))
+    
+    # Recencia: evita publicaciones programadas demasiado seguidas
+    MIN_POST_INTERVAL_MINUTES = int(os.getenv('MIN_POST_INTERVAL_MINUTES', '60'))
+    CURATED_MIN_INTERVAL_DAYS = int(os.getenv('CURATED_MIN_INTERVAL_DAYS', '6'))
+    
+    # Deduplicación de noticias casi idénticas (SimHash)
+    SIMHASH_MAX_DISTANCE = int(os.getenv('SIMHASH_MAX_DISTANCE', '8'))
+    SIMHASH_INDEX_SIZE = int(os.getenv('SIMHASH_INDEX_SIZE', '5000'))
+    
+    # Evitar repetir contenido generado (hacks, protips, etc.)
+    GENERATED_REPOST_WINDOW_DAYS = int(os.getenv('GENERATED_REPOST_WINDOW_DAYS', '30'))
+    GENERATED_MAX_ATTEMPTS = int(os.getenv('GENERATED_MAX_ATTEMPTS', '5'))
+    
+    # Guardia contra tweets casi idénticos a los publicados recientemente
+    DUPLICATE_GUARD_SIZE = int(os.getenv('DUPLICATE_GUARD_SIZE', '200'))
+    DUPLICATE_GUARD_JACCARD = float(os.getenv('DUPLICATE_GUARD_JACCARD', '0.6'))
+    DUPLICATE_GUARD_CONTAINMENT = float(os.getenv('DUPLICATE_GUARD_CONTAINMENT', '0.8'))
+    
+    # Agrupación de noticias en historias (MinHash + LSH)
+    STORY_CLUSTER_THRESHOLD = float(os.getenv('STORY_CLUSTER_THRESHOLD', '0.5'))
+    MINHASH_PERMUTATIONS = int(os.getenv('MINHASH_PERMUTATIONS', '128'))
+    LSH_BANDS = int(os.getenv('LSH_BANDS', '32'))
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -318,9 +404,18 @@ class Config:
             'TWITTER_BEARER_TOKEN'
         ]
         
+        # Con varias cuentas, cada una trae sus credenciales de usuario
+        if cls.ACCOUNTS:
+            required_vars = ['TWITTER_BEARER_TOKEN'] + [
+                f"ACCOUNT_{name.upper()}_{var}"
+                for name in cls.ACCOUNTS
+                for var in ('TWITTER_API_KEY', 'TWITTER_API_SECRET',
+                            'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET')
+            ]
+        
         missing_vars = []
         for var in required_vars:
-            if not getattr(cls, var):
+            if not (getattr(cls, var, None) or os.getenv(var)):
                 missing_vars.append(var)
         
         if missing_vars:
@@ -10,6 +10,8 @@ obteniendo información de múltiples fuentes RSS, APIs de noticias y Reddit.
 
 import sys
 import argparse
+import functools
+from datetime import datetime
 from pathlib import Path
 from loguru import logger
 
@@ -18,6 +20,15 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 from config import Config
 from bot import ZTechBot
+from twitter_standin import start_dry_run
+
+def print_rate_limits(rate_limits: dict, indent: str = "  "):
+    """Imprime el estado de rate limits de una cuenta"""
+    for endpoint, limit_info in rate_limits.items():
+        remaining = '?' if limit_info['remaining'] is None else limit_info['remaining']
+        reset = limit_info['reset']
+        reset = f" (se recarga {datetime.fromtimestamp(reset):%d/%m %H:%M})" if reset else ""
+        print(f"{indent}{endpoint}: {remaining}/{limit_info['limit'] or '?'}{reset}")
 
 def main():
     """Función principal del bot"""
@@ -27,7 +38,7 @@ def main():
     
     parser.add_argument(
         '--mode',
-        choices=['single', 'continuous', 'test', 'stats', 'cleanup'],
+        choices=['single', 'continuous', 'test', 'stats', 'ingest', 'metrics', 'cleanup', 'restore'],
         default='continuous',
         help='Modo de ejecución del bot'
     )
@@ -39,6 +50,30 @@ def main():
         help='Tipo de publicación (auto = selección automática)'
     )
     
+    parser.add_argument(
+        '--account',
+        default=None,
+        help='En modo single, publicar solo con esta cuenta de ACCOUNTS (por defecto todas a la vez)'
+    )
+    
+    parser.add_argument(
+        '--archive',
+        default=Config.ARCHIVE_DIR,
+        help='Archivo o directorio a reimportar en modo restore'
+    )
+    
+    parser.add_argument(
+        '--refresh-rate-limits',
+        action='store_true',
+        help='En modo stats, consultar a la API el estado de rate limits en lugar de usar el guardado'
+    )
+    
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Usar un sustituto local de la API de Twitter y una base de datos aparte'
+    )
+    
     parser.add_argument(
         '--config-check',
         action='store_true',
@@ -47,6 +82,10 @@ def main():
     
     args = parser.parse_args()
     
+    standin = None
+    if args.dry_run:
+        standin = start_dry_run()
+    
     # Verificar configuración
     if not Config.validate_config():
         logger.error("❌ Configuración inválida. Revisa el archivo .env")
@@ -56,6 +95,7 @@ def main():
         logger.info("✅ Configuración válida")
         return 0
     
+    bot = None
     try:
         # Inicializar bot
         bot = ZTechBot()
@@ -75,17 +115,27 @@ def main():
             # Modo de publicación única
             logger.info(f"📝 Modo de publicación única ({args.post_type})")
             
+            accounts = bot.accounts
+            if args.account:
+                accounts = [account for account in bot.accounts if account.name == args.account]
+                if not accounts:
+                    logger.error(f"❌ Cuenta desconocida: {args.account}")
+                    return 1
+            
             if args.post_type == 'auto':
                 # Selección automática del tipo
-                success = bot.run_single_post()
+                job = bot.run_single_post
             elif args.post_type == 'curated':
-                success = bot.run_curated_post()
+                job = bot.run_curated_post
             elif args.post_type in ['hacks', 'protips', 'top_lists', 'curiosities', 'controversial', 'history', 'trends', 'reviews']:
                 # Contenido generado
-                success = bot._post_generated_content(args.post_type)
+                job = functools.partial(bot._post_generated_content, args.post_type)
             else:
                 # Noticias (single)
-                success = bot.run_single_post()
+                job = bot.run_single_post
+            
+            # Una publicación por cuenta, todas a la vez
+            success = all(bot.run_for_accounts(job, accounts).values())
             
             if success:
                 logger.info("✅ Publicación completada exitosamente")
@@ -97,7 +147,7 @@ def main():
         elif args.mode == 'stats':
             # Mostrar estadísticas
             logger.info("📊 Obteniendo estadísticas del bot...")
-            stats = bot.get_stats()
+            stats = bot.get_stats(refresh_rate_limits=args.refresh_rate_limits)
             
             if stats:
                 print("\n" + "="*50)
@@ -120,12 +170,47 @@ def main():
                     for tweet in recent_tweets:
                         print(f"  {tweet['published_at']}: {tweet['content'][:50]}...")
                 
-                # Rate limits
-                rate_limits = stats.get('rate_limits', {})
-                if rate_limits:
-                    print("\n⏱️ Estado de rate limits:")
-                    for endpoint, limit_info in rate_limits.items():
-                        print(f"  {endpoint}: {limit_info['remaining']}/{limit_info['limit']}")
+                # Desgloses desde los agregados
+                by_post_type = stats.get('by_post_type', [])
+                if by_post_type:
+                    print("\n🗂️ Por tipo de publicación (7 días):")
+                    for row in by_post_type:
+                        print(f"  {row['post_type']}: {row['tweets']} tweets, "
+                              f"{row['likes']} likes, {row['retweets']} retweets")
+                
+                by_source = stats.get('by_source', [])
+                if by_source:
+                    print("\n📰 Por fuente (7 días):")
+                    for row in by_source[:10]:
+                        print(f"  {row['source']}: {row['tweets']} tweets, {row['likes']} likes")
+                
+                by_hour = stats.get('by_hour', [])
+                if by_hour:
+                    print("\n🕐 Por hora de publicación (UTC, 7 días):")
+                    for row in by_hour:
+                        print(f"  {row['hour']}:00: {row['tweets']} tweets, {row['likes']} likes")
+                
+                # Bandeja de salida
+                outbox = stats.get('outbox', [])
+                if outbox or stats.get('outbox_pending'):
+                    print(f"\n📬 Bandeja de salida (24 h, {stats.get('outbox_pending', 0)} pendientes):")
+                    for row in outbox:
+                        print(f"  {row['hour']}:00: {row['sent']} enviados, {row['failed']} fallidos, "
+                              f"{row['attempts']} intentos, éxito {row['success_rate']:.0%}")
+                
+                # Rate limits (de cada cuenta si hay varias)
+                accounts = stats.get('accounts', {})
+                if accounts:
+                    print("\n👥 Cuentas:")
+                    for label, account in accounts.items():
+                        print(f"  {label} (@{account['username']}, {account['language']}): "
+                              f"{account['posts_today']} publicaciones hoy")
+                        print_rate_limits(account['rate_limits'], indent="    ")
+                else:
+                    rate_limits = stats.get('rate_limits', {})
+                    if rate_limits:
+                        print("\n⏱️ Estado de rate limits:")
+                        print_rate_limits(rate_limits)
                 
                 print("="*50)
                 return 0
@@ -133,6 +218,20 @@ def main():
                 logger.error("❌ Error obteniendo estadísticas")
                 return 1
         
+        elif args.mode == 'ingest':
+            # Llenar la cola de candidatos sin publicar
+            logger.info("📥 Ingiriendo contenido en la cola de candidatos...")
+            enqueued = bot.ingest_candidates()
+            logger.info(f"✅ Ingesta completada: {enqueued} candidatos encolados")
+            return 0
+        
+        elif args.mode == 'metrics':
+            # Muestrear las métricas de los tweets publicados
+            logger.info("📊 Recolectando métricas de engagement...")
+            results = bot.collect_metrics()
+            logger.info(f"✅ {results['sampled']} tweets muestreados en {results['requests']} consultas")
+            return 0
+        
         elif args.mode == 'cleanup':
             # Limpiar datos antiguos
             logger.info("🧹 Limpiando datos antiguos...")
@@ -140,6 +239,13 @@ def main():
             logger.info("✅ Limpieza completada")
             return 0
         
+        elif args.mode == 'restore':
+            # Reimportar datos archivados
+            logger.info(f"📥 Reimportando archivo desde {args.archive}...")
+            total = bot.restore_archive(args.archive)
+            logger.info(f"✅ {total} filas reimportadas")
+            return 0
+        
         else:  # continuous
             # Modo continuo
             logger.info("🔄 Iniciando bot en modo continuo...")
@@ -152,6 +258,12 @@ def main():
     except Exception as e:
         logger.error(f"❌ Error inesperado: {e}")
         return 1
+    finally:
+        if bot:
+            # Confirmar las escrituras diferidas antes de salir
+            bot.close()
+        if standin:
+            standin.stop()
 
 if __name__ == "__main__":
     exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark de rendimiento de la base de datos del bot ZTech
+Compara inserciones y consultas abriendo una conexión por operación
+(comportamiento anterior) frente a DatabaseManager con conexiones persistentes
+
+Uso: python scripts/benchmark_database.py [número de filas]
+"""
+import sys
+import time
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from loguru import logger
+from database import DatabaseManager
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS processed_content (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT UNIQUE,
+        source TEXT NOT NULL,
+        source_url TEXT,
+        title TEXT,
+        summary TEXT,
+        processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        used BOOLEAN DEFAULT FALSE
+    )
+"""
+
+def _rows(count: int):
+    """Genera filas de prueba"""
+    return [
+        (f"hash_{i}", "RSS_bench", f"https://example.com/{i}", f"Título {i}", f"Resumen de prueba {i}")
+        for i in range(count)
+    ]
+
+def _report(label: str, count: int, elapsed: float) -> float:
+    """Imprime y devuelve operaciones por segundo"""
+    rate = count / elapsed if elapsed else float('inf')
+    print(f"  {label:<46} {rate:>12,.0f} ops/s")
+    return rate
+
+def bench_connection_per_call(db_path: str, rows) -> tuple:
+    """Conexión nueva por operación en modo rollback-journal"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(SCHEMA)
+
+    start = time.perf_counter()
+    for row in rows:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO processed_content
+                (content_hash, source, source_url, title, summary)
+                VALUES (?, ?, ?, ?, ?)
+            """, row)
+            conn.commit()
+    insert_rate = _report("insert (conexión por llamada)", len(rows), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for row in rows:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("SELECT COUNT(*) FROM processed_content WHERE content_hash = ?",
+                         (row[0],)).fetchone()
+    lookup_rate = _report("lookup (conexión por llamada)", len(rows), time.perf_counter() - start)
+    return insert_rate, lookup_rate
+
+def bench_database_manager(db_path: str, rows) -> tuple:
+    """DatabaseManager con conexión persistente, WAL y pragmas ajustados"""
+    db = DatabaseManager(db_path)
+
+    start = time.perf_counter()
+    for content_hash, source, source_url, title, summary in rows:
+        db.save_processed_content(content_hash, source, source_url, title, summary)
+    insert_rate = _report("insert (DatabaseManager)", len(rows), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for row in rows:
+        db.was_processed_since(row[0], days=1)
+    lookup_rate = _report("lookup (DatabaseManager)", len(rows), time.perf_counter() - start)
+
+    db.close()
+    return insert_rate, lookup_rate
+
+def bench_bulk_insert(db_path: str, rows) -> float:
+    """Inserción de todo el lote en una sola transacción con executemany"""
+    db = DatabaseManager(db_path)
+    items = [
+        {'content_hash': content_hash, 'source': source, 'source_url': source_url,
+         'title': title, 'summary': summary}
+        for content_hash, source, source_url, title, summary in rows
+    ]
+
+    start = time.perf_counter()
+    db.save_processed_content_many(items)
+    rate = _report("insert en lote (save_processed_content_many)", len(rows), time.perf_counter() - start)
+
+    db.close()
+    return rate
+
+def main():
+    """Función principal del benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rows = _rows(count)
+    logger.remove()  # Silenciar logs por operación
+
+    print(f"📊 Benchmark de base de datos ({count} filas)")
+    print("=" * 64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_connection_per_call(str(Path(tmp) / "before.db"), rows)
+        after = bench_database_manager(str(Path(tmp) / "after.db"), rows)
+        bulk = bench_bulk_insert(str(Path(tmp) / "bulk.db"), rows)
+
+    print("=" * 64)
+    print(f"  Mejora insert: x{after[0] / before[0]:.1f}   Mejora lookup: x{after[1] / before[1]:.1f}")
+    print(f"  Mejora insert en lote: x{bulk / before[0]:.1f}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
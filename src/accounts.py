@@ -0,0 +1,203 @@
+"""
+Cuentas de Twitter del bot ZTech
+Cada perfil tiene sus credenciales, idioma, horario, pesos de tipos de
+publicación y cuota diaria; todas las cuentas de un proceso comparten la
+ingesta, la deduplicación y los generadores de contenido
+"""
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import Config
+
+# Credenciales de usuario que cada cuenta con nombre debe traer
+ACCOUNT_CREDENTIALS = ('TWITTER_API_KEY', 'TWITTER_API_SECRET', 'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET')
+
+_ACCOUNT_NAME = re.compile(r'^[a-z0-9_]+$')
+
+
+def parse_post_type_weights(value: str) -> Dict[str, float]:
+    """
+    Lee pesos de tipos de publicación con el formato "single:0.5,hacks:0.2"
+
+    Args:
+        value: Pares tipo:peso separados por comas
+
+    Returns:
+        Diccionario tipo -> peso
+
+    Raises:
+        ValueError: Si un tipo no existe o un peso no es un número positivo
+    """
+    weights = {}
+    for pair in value.split(','):
+        if not pair.strip():
+            continue
+        post_type, _, weight = pair.partition(':')
+        post_type = post_type.strip()
+        if post_type not in Config.POST_TYPES:
+            raise ValueError(f"Tipo de publicación desconocido: {post_type}")
+        weights[post_type] = float(weight)
+        if weights[post_type] <= 0:
+            raise ValueError(f"El peso de {post_type} debe ser positivo")
+    if not weights:
+        raise ValueError("Pesos de tipos de publicación vacíos")
+    return weights
+
+
+class AccountProfile:
+    """Credenciales y preferencias de publicación de una cuenta"""
+
+    def __init__(self, name: str = '', api_key: str = None, api_secret: str = None,
+                 access_token: str = None, access_token_secret: str = None, bearer_token: str = None,
+                 username: str = None, language: str = 'es', posting_schedule: List[str] = None,
+                 post_type_weights: Dict[str, float] = None, daily_post_cap: int = None,
+                 identity_cache: str = None):
+        """
+        Inicializa un perfil de cuenta
+
+        Los valores omitidos se toman de la configuración global, así que
+        AccountProfile() es la cuenta de las variables TWITTER_*.
+
+        Args:
+            name: Nombre de la cuenta ('' = la cuenta de TWITTER_*, que
+                conserva el estado guardado antes de haber varias cuentas)
+            api_key: API key de la app
+            api_secret: API secret de la app
+            access_token: Token de acceso de la cuenta
+            access_token_secret: Secreto del token de acceso
+            bearer_token: Bearer token de la app
+            username: Nombre de usuario (solo informativo)
+            language: Idioma de sus publicaciones ('es' o 'en')
+            posting_schedule: Horarios de publicación (HH:MM)
+            post_type_weights: Pesos de cada tipo de publicación
+            daily_post_cap: Publicaciones cada 24 horas (0 = sin límite local)
+            identity_cache: Archivo de la caché de identidad ('' = sin caché)
+        """
+        self.name = name
+        self.api_key = api_key if name else api_key or Config.TWITTER_API_KEY
+        self.api_secret = api_secret if name else api_secret or Config.TWITTER_API_SECRET
+        self.access_token = access_token if name else access_token or Config.TWITTER_ACCESS_TOKEN
+        self.access_token_secret = (access_token_secret if name
+                                    else access_token_secret or Config.TWITTER_ACCESS_TOKEN_SECRET)
+        self.bearer_token = bearer_token or Config.TWITTER_BEARER_TOKEN
+        self.username = username or Config.TWITTER_USERNAME
+        self.language = language
+        self.posting_schedule = [slot.strip() for slot in posting_schedule or Config.POSTING_SCHEDULE]
+        self.post_type_weights = post_type_weights or Config.POST_TYPE_WEIGHTS
+        self.daily_post_cap = Config.TWITTER_DAILY_POST_CAP if daily_post_cap is None else daily_post_cap
+        if identity_cache is None:
+            identity_cache = self._default_identity_cache(name)
+        self.identity_cache = identity_cache
+
+    @property
+    def label(self) -> str:
+        """Nombre para los logs"""
+        return self.name or 'principal'
+
+    @staticmethod
+    def _default_identity_cache(name: str) -> str:
+        """Caché de identidad propia de cada cuenta junto a la global"""
+        if not name or not Config.TWITTER_IDENTITY_CACHE:
+            return Config.TWITTER_IDENTITY_CACHE
+        path = Path(Config.TWITTER_IDENTITY_CACHE)
+        return str(path.with_name(f"{path.stem}_{name}{path.suffix}"))
+
+    @classmethod
+    def from_env(cls, name: str) -> 'AccountProfile':
+        """
+        Crea el perfil de una cuenta a partir de sus variables ACCOUNT_<NOMBRE>_*
+
+        Args:
+            name: Nombre de la cuenta (minúsculas, dígitos y _)
+
+        Returns:
+            Perfil de la cuenta
+
+        Raises:
+            ValueError: Si el nombre no es válido, faltan credenciales o
+                algún valor no se puede leer
+        """
+        if not _ACCOUNT_NAME.match(name):
+            raise ValueError(f"Nombre de cuenta no válido: {name!r} (usa minúsculas, dígitos y _)")
+
+        prefix = f"ACCOUNT_{name.upper()}_"
+        missing = [prefix + var for var in ACCOUNT_CREDENTIALS if not os.getenv(prefix + var)]
+        if missing:
+            raise ValueError(f"Faltan credenciales de la cuenta {name}: {', '.join(missing)}")
+
+        schedule = os.getenv(prefix + 'POSTING_SCHEDULE')
+        weights = os.getenv(prefix + 'POST_TYPE_WEIGHTS')
+        daily_post_cap = os.getenv(prefix + 'TWITTER_DAILY_POST_CAP')
+        return cls(
+            name=name,
+            api_key=os.getenv(prefix + 'TWITTER_API_KEY'),
+            api_secret=os.getenv(prefix + 'TWITTER_API_SECRET'),
+            access_token=os.getenv(prefix + 'TWITTER_ACCESS_TOKEN'),
+            access_token_secret=os.getenv(prefix + 'TWITTER_ACCESS_TOKEN_SECRET'),
+            bearer_token=os.getenv(prefix + 'TWITTER_BEARER_TOKEN'),
+            username=os.getenv(prefix + 'TWITTER_USERNAME'),
+            language=os.getenv(prefix + 'LANGUAGE', 'es'),
+            posting_schedule=schedule.split(',') if schedule else None,
+            post_type_weights=parse_post_type_weights(weights) if weights else None,
+            daily_post_cap=int(daily_post_cap) if daily_post_cap else None,
+            identity_cache=os.getenv(prefix + 'TWITTER_IDENTITY_CACHE')
+        )
+
+
+def load_accounts(names: Optional[List[str]] = None) -> List[AccountProfile]:
+    """
+    Carga los perfiles de las cuentas configuradas
+
+    Args:
+        names: Nombres de las cuentas (por defecto Config.ACCOUNTS)
+
+    Returns:
+        Perfiles en el orden configurado; sin nombres, solo la cuenta de TWITTER_*
+
+    Raises:
+        ValueError: Si un nombre se repite o un perfil no es válido
+    """
+    names = Config.ACCOUNTS if names is None else names
+    if not names:
+        return [AccountProfile()]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Cuentas repetidas en ACCOUNTS: {', '.join(names)}")
+    return [AccountProfile.from_env(name) for name in names]
+
+
+class AccountPublisher:
+    """Componentes con los que el bot publica en una cuenta"""
+
+    def __init__(self, profile: AccountProfile, twitter, outbox, threads,
+                 content_generator, enhanced_processor, ai_generator):
+        """
+        Agrupa los componentes de una cuenta
+
+        Args:
+            profile: Perfil de la cuenta
+            twitter: Cliente de Twitter con sus credenciales y su cuota
+            outbox: Bandeja de salida de la cuenta
+            threads: Publicador de hilos sobre esa bandeja
+            content_generator: Generador de contenido en su idioma
+            enhanced_processor: Procesador de artículos en su idioma
+            ai_generator: Generador con IA en su idioma
+        """
+        self.profile = profile
+        self.twitter = twitter
+        self.outbox = outbox
+        self.threads = threads
+        self.content_generator = content_generator
+        self.enhanced_processor = enhanced_processor
+        self.ai_generator = ai_generator
+
+    @property
+    def name(self) -> str:
+        """Nombre de la cuenta ('' = la cuenta de TWITTER_*)"""
+        return self.profile.name
+
+    @property
+    def label(self) -> str:
+        """Nombre para los logs"""
+        return self.profile.label
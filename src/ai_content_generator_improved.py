@@ -647,10 +647,7 @@ Crea 1-2 versiones de este tweet de reseña detallado."""
         # Agregar variación para evitar duplicados
         content = self._add_variation(content)
         
-        # Para contenido mejorado, limitar a 280 caracteres para Twitter
-        if len(content) > 280:
-            content = content[:280-3] + "..."
-        
+        # El contenido largo no se trunca: el bot lo publica como hilo
         return content
     
     def _add_variation(self, content: str) -> str:
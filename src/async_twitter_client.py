@@ -0,0 +1,390 @@
+"""
+Cliente asíncrono de Twitter API v2 para el bot ZTech
+Ofrece los mismos métodos que TwitterClient como corrutinas sobre un pool de
+conexiones httpx, para solapar consultas de métricas, timelines, búsquedas
+y publicaciones de varias cuentas. Comparte el gestor de rate limits con el
+cliente síncrono, así que ambos gastan de la misma cuota
+"""
+import platform
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+import tweepy
+from loguru import logger
+from oauthlib.oauth1 import Client as OAuth1Client
+
+from accounts import AccountProfile
+from config import Config
+from rate_limiter import POST_TWEET_ENDPOINT, RateLimiter, RateLimitExceeded, endpoint_key
+from twitter_client import TWEET_LOOKUP_BATCH_SIZE
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logger.warning("⚠️ httpx no disponible, el cliente asíncrono de Twitter no funcionará")
+
+_API_HOST = 'https://api.twitter.com'
+
+# Excepción de tweepy para cada código de error, como en el cliente síncrono
+_HTTP_ERRORS = {
+    400: tweepy.BadRequest,
+    401: tweepy.Unauthorized,
+    403: tweepy.Forbidden,
+    404: tweepy.NotFound,
+    429: tweepy.TooManyRequests,
+}
+
+
+def _as_requests_response(response: 'httpx.Response') -> requests.Response:
+    """Convierte una respuesta de httpx para construir las excepciones de tweepy"""
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers.update(response.headers)
+    converted._content = response.content
+    converted.url = str(response.url)
+    return converted
+
+
+class AsyncTwitterClient:
+    """Cliente asíncrono para Twitter API v2 con pool de conexiones"""
+
+    def __init__(self, rate_limiter: RateLimiter = None, identity: Dict = None,
+                 max_connections: int = 10, timeout: float = 15, account: AccountProfile = None):
+        """
+        Inicializa el cliente (la sesión HTTP se abre en la primera llamada)
+
+        Args:
+            rate_limiter: Gestor de rate limits compartido (por defecto, uno propio)
+            identity: Identidad ya verificada de la cuenta (evita users/me)
+            max_connections: Conexiones simultáneas del pool
+            timeout: Segundos máximos por petición
+            account: Cuenta con la que firmar (por defecto la de TWITTER_*)
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx no está instalado. Ejecuta: pip install httpx")
+
+        self.account = account or AccountProfile()
+        self.rate_limiter = rate_limiter or RateLimiter(daily_post_cap=self.account.daily_post_cap)
+        self.identity = identity
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._http = None
+        self.user_agent = f"Python/{platform.python_version()} httpx/{httpx.__version__} ZTechBot"
+
+    @classmethod
+    def from_client(cls, twitter, **kwargs) -> 'AsyncTwitterClient':
+        """
+        Crea un cliente asíncrono que comparte cuenta, cuota e identidad con uno síncrono
+
+        Args:
+            twitter: TwitterClient ya creado
+            **kwargs: Resto de argumentos del constructor
+
+        Returns:
+            Cliente asíncrono
+        """
+        return cls(rate_limiter=twitter.rate_limiter, identity=twitter.identity, account=twitter.account, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Cierra las conexiones del pool"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def wait_time(self, endpoint: str = POST_TWEET_ENDPOINT) -> float:
+        """
+        Indica cuánto falta para poder llamar a un endpoint, sin bloquear
+
+        Args:
+            endpoint: Clave del endpoint (por defecto, publicar un tweet)
+
+        Returns:
+            Segundos de espera (0 si la llamada puede hacerse ya)
+        """
+        return self.rate_limiter.wait_time(endpoint)
+
+    async def _request(self, method: str, route: str, params: Dict = None, json: Dict = None,
+                       user_auth: bool = False) -> Dict:
+        """
+        Ejecuta una petición si hay cuota y la contabiliza con sus cabeceras
+
+        Args:
+            method: Método HTTP
+            route: Ruta de la API (p. ej. /2/tweets)
+            params: Parámetros de la query string
+            json: Cuerpo JSON
+            user_auth: Firmar con OAuth 1.0a (contexto de usuario) en lugar
+                del bearer token, igual que tweepy
+
+        Returns:
+            Cuerpo JSON de la respuesta
+
+        Raises:
+            RateLimitExceeded: Si la cuota local está agotada
+            tweepy.HTTPException: Si la API responde con un error
+            httpx.HTTPError: Si falla la conexión
+        """
+        if not Config.validate_config():
+            raise ValueError("Configuración de Twitter API incompleta")
+
+        endpoint = endpoint_key(method, route)
+        if not self.rate_limiter.try_acquire(endpoint):
+            raise RateLimitExceeded(endpoint, self.rate_limiter.wait_time(endpoint))
+
+        url = (Config.TWITTER_API_BASE_URL.rstrip('/') or _API_HOST) + route
+        if params:
+            url += '?' + urlencode({key: value for key, value in params.items() if value is not None})
+
+        headers = {'User-Agent': self.user_agent}
+        if user_auth:
+            oauth = OAuth1Client(self.account.api_key, client_secret=self.account.api_secret,
+                                 resource_owner_key=self.account.access_token,
+                                 resource_owner_secret=self.account.access_token_secret)
+            url, signed, _ = oauth.sign(url, http_method=method)
+            headers.update(signed)
+        else:
+            headers['Authorization'] = f"Bearer {self.account.bearer_token}"
+
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        response = await self._http.request(method, url, headers=headers, json=json)
+        self.rate_limiter.update_from_headers(endpoint, response.headers)
+
+        if response.status_code >= 500:
+            raise tweepy.TwitterServerError(_as_requests_response(response))
+        if not 200 <= response.status_code < 300:
+            raise _HTTP_ERRORS.get(response.status_code, tweepy.HTTPException)(_as_requests_response(response))
+        return response.json()
+
+    async def get_identity(self) -> Optional[Dict]:
+        """
+        Obtiene la identidad de la cuenta autenticada (users/me la primera vez)
+
+        Returns:
+            Diccionario con id y username, o None si no se pudo verificar
+        """
+        if self.identity is None:
+            data = (await self._request('GET', '/2/users/me', user_auth=True)).get('data')
+            if data:
+                self.identity = {'id': str(data['id']), 'username': data['username']}
+        return self.identity
+
+    async def post_tweet(self, content: str, reply_to: Optional[str] = None) -> Optional[Dict]:
+        """
+        Publica un tweet
+
+        Args:
+            content: Contenido del tweet
+            reply_to: ID del tweet al que responder (opcional)
+
+        Returns:
+            Diccionario con información del tweet publicado o None si falla
+        """
+        try:
+            return await self.publish(content, reply_to)
+
+        except RateLimitExceeded as e:
+            logger.warning(f"⏳ Cuota de publicación agotada, disponible en {e.retry_after / 60:.0f} minutos")
+            return None
+        except tweepy.TooManyRequests:
+            wait = self.wait_time(POST_TWEET_ENDPOINT)
+            logger.warning(f"⚠️ Límite de rate limit alcanzado, disponible en {wait / 60:.0f} minutos")
+            return None
+        except tweepy.Unauthorized:
+            logger.error("❌ Error de autorización - verifica las credenciales")
+            return None
+        except tweepy.Forbidden:
+            logger.error("❌ Tweet prohibido - posible contenido duplicado o spam")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error al publicar tweet: {e}")
+            return None
+
+    async def publish(self, content: str, reply_to: Optional[str] = None,
+                      media_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Publica un tweet propagando los errores
+
+        Args:
+            content: Contenido del tweet
+            reply_to: ID del tweet al que responder (opcional)
+            media_ids: IDs de imágenes ya subidas (opcional)
+
+        Returns:
+            Diccionario con información del tweet publicado
+
+        Raises:
+            RateLimitExceeded: Si la cuota local está agotada
+            tweepy.TweepyException: Si la API rechaza o no confirma el tweet
+            httpx.HTTPError: Si falla la conexión
+        """
+        if len(content) > Config.MAX_TWEET_LENGTH:
+            logger.warning(f"⚠️ Tweet muy largo ({len(content)} chars), truncando...")
+            content = content[:Config.MAX_TWEET_LENGTH-3] + "..."
+
+        body = {'text': content}
+        if reply_to:
+            body['reply'] = {'in_reply_to_tweet_id': str(reply_to)}
+        if media_ids:
+            body['media'] = {'media_ids': [str(media_id) for media_id in media_ids]}
+
+        data = (await self._request('POST', '/2/tweets', json=body, user_auth=True)).get('data')
+        if not data:
+            raise tweepy.TweepyException("No se recibió respuesta del tweet")
+
+        logger.info(f"✅ Tweet publicado: {data['id']}")
+        return {
+            'id': data['id'],
+            'text': content,
+            'created_at': data.get('created_at'),
+            'public_metrics': data.get('public_metrics', {})
+        }
+
+    async def get_tweet_metrics(self, tweet_id: str) -> Optional[Dict]:
+        """
+        Obtiene métricas de un tweet
+
+        Args:
+            tweet_id: ID del tweet
+
+        Returns:
+            Diccionario con métricas del tweet
+        """
+        try:
+            response = await self._request('GET', f"/2/tweets/{tweet_id}",
+                                           params={'tweet.fields': 'public_metrics,created_at'})
+            if response.get('data'):
+                tweet = tweepy.Tweet(response['data'])
+                return {'id': tweet.id, 'metrics': tweet.public_metrics, 'created_at': tweet.created_at}
+            return None
+
+        except Exception as e:
+            logger.error(f"❌ Error al obtener métricas del tweet {tweet_id}: {e}")
+            return None
+
+    async def get_tweets_metrics(self, tweet_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene las métricas de hasta 100 tweets con una sola llamada
+
+        Args:
+            tweet_ids: IDs de los tweets (máximo TWEET_LOOKUP_BATCH_SIZE)
+
+        Returns:
+            Diccionario tweet_id -> public_metrics; los tweets borrados o
+            inaccesibles no aparecen
+
+        Raises:
+            RateLimitExceeded: Si la cuota de consultas está agotada
+            tweepy.TweepyException: Si la API falla
+        """
+        if len(tweet_ids) > TWEET_LOOKUP_BATCH_SIZE:
+            raise ValueError(f"Máximo {TWEET_LOOKUP_BATCH_SIZE} tweets por consulta")
+        if not tweet_ids:
+            return {}
+
+        response = await self._request('GET', '/2/tweets', params={
+            'ids': ','.join(str(tweet_id) for tweet_id in tweet_ids), 'tweet.fields': 'public_metrics'
+        })
+        return {str(tweet['id']): tweet.get('public_metrics') or {} for tweet in response.get('data') or []}
+
+    async def search_tweets(self, query: str, max_results: int = 10) -> List[Dict]:
+        """
+        Busca tweets con una consulta específica
+
+        Args:
+            query: Consulta de búsqueda
+            max_results: Número máximo de resultados
+
+        Returns:
+            Lista de tweets encontrados
+        """
+        try:
+            response = await self._request('GET', '/2/tweets/search/recent', params={
+                'query': query,
+                'max_results': min(max_results, 100),
+                'tweet.fields': 'created_at,public_metrics,author_id'
+            })
+            return [
+                {
+                    'id': tweet.id,
+                    'text': tweet.text,
+                    'created_at': tweet.created_at,
+                    'author_id': tweet.author_id,
+                    'metrics': tweet.public_metrics
+                }
+                for tweet in map(tweepy.Tweet, response.get('data') or [])
+            ]
+
+        except Exception as e:
+            logger.error(f"❌ Error en búsqueda de tweets: {e}")
+            return []
+
+    async def get_user_timeline(self, username: str, max_tweets: int = 20) -> List[Dict]:
+        """
+        Obtiene timeline de un usuario
+
+        Args:
+            username: Nombre de usuario (sin @)
+            max_tweets: Número máximo de tweets
+
+        Returns:
+            Lista de tweets del usuario
+        """
+        try:
+            user = (await self._request('GET', f"/2/users/by/username/{username}")).get('data')
+            if not user:
+                logger.error(f"❌ Usuario @{username} no encontrado")
+                return []
+
+            response = await self._request('GET', f"/2/users/{user['id']}/tweets", params={
+                'max_results': min(max_tweets, 100),
+                'tweet.fields': 'created_at,public_metrics'
+            })
+            return [
+                {
+                    'id': tweet.id,
+                    'text': tweet.text,
+                    'created_at': tweet.created_at,
+                    'metrics': tweet.public_metrics
+                }
+                for tweet in map(tweepy.Tweet, response.get('data') or [])
+            ]
+
+        except Exception as e:
+            logger.error(f"❌ Error al obtener timeline de @{username}: {e}")
+            return []
+
+    async def get_own_recent_tweets(self, max_tweets: int = 20) -> List[Dict]:
+        """
+        Obtiene los últimos tweets de la cuenta autenticada
+
+        Args:
+            max_tweets: Número máximo de tweets (entre 5 y 100)
+
+        Returns:
+            Lista de tweets con id y text, del más reciente al más antiguo
+
+        Raises:
+            tweepy.TweepyException: Si la API falla (quien llama decide si reintentar)
+        """
+        identity = await self.get_identity()
+        response = await self._request('GET', f"/2/users/{identity['id']}/tweets", params={
+            'max_results': max(5, min(max_tweets, 100)),
+            'tweet.fields': 'created_at'
+        })
+        return [{'id': str(tweet.id), 'text': tweet.text, 'created_at': tweet.created_at}
+                for tweet in map(tweepy.Tweet, response.get('data') or [])]
@@ -2,14 +2,18 @@
 Bot principal de Twitter ZTech
 Orquesta todas las funcionalidades del bot automatizado
 """
+import math
 import schedule
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Set, Tuple
 from loguru import logger
 from pathlib import Path
 
+from accounts import AccountPublisher, load_accounts
 from config import Config
 from database import DatabaseManager
 from twitter_client import TwitterClient
@@ -19,6 +23,15 @@ from enhanced_content_processor import EnhancedContentProcessor
 from content_generator import ContentGenerator
 from ai_content_generator_improved import AIContentGeneratorImproved
 from expanded_content_sources import ExpandedContentSources
+from content_dedup import SimHashIndex, canonical_url, fingerprint_text, guess_language
+from publish_guard import DuplicateTweetGuard
+from write_behind import WriteBehindQueue
+from retention import RetentionEngine
+from state_bundle import export_state, import_state
+from outbox import Outbox
+from thread_publisher import ThreadPublisher
+from metrics_collector import MetricsCollector
+from media_pipeline import MediaPipeline
 
 class ZTechBot:
     """Bot principal de Twitter ZTech"""
@@ -26,13 +39,61 @@ class ZTechBot:
     def __init__(self):
         """Inicializa el bot con todos sus componentes"""
         self.db = DatabaseManager()
-        self.twitter = TwitterClient()
+        self.writer = WriteBehindQueue(
+            self.db,
+            flush_interval=Config.DB_FLUSH_INTERVAL,
+            sync_interval=Config.DB_SYNC_INTERVAL,
+            max_batch=Config.DB_WRITE_BATCH_SIZE
+        )
+        self._restore_state()
+        
+        # Estado en memoria compartido por los hilos de publicación de las cuentas
+        self._lock = threading.RLock()
+        self._ingest_lock = threading.Lock()
+        
+        # Una cuenta por perfil configurado; la primera es la principal (imágenes y métricas)
+        clients = [TwitterClient(self.db, profile) for profile in load_accounts()]
+        self.twitter = clients[0]
+        self.media = None
+        if Config.USE_IMAGES:
+            self.media = MediaPipeline(
+                self.db,
+                self.twitter,
+                cache_dir=Config.MEDIA_CACHE_DIR,
+                workers=Config.MEDIA_WORKERS,
+                max_dimension=Config.MEDIA_MAX_DIMENSION,
+                quality=Config.MEDIA_JPEG_QUALITY,
+                additional_owners=self._media_owners if len(clients) > 1 else None
+            )
+        self._generators = {}
+        self.accounts = [self._build_account(twitter) for twitter in clients]
+        
+        # Un hilo por cuenta durante toda la vida del bot (cada hilo conserva su conexión)
+        self._executor = None
+        if len(self.accounts) > 1:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.accounts), thread_name_prefix='account')
+        
+        # Accesos directos a la cuenta principal
+        primary = self.accounts[0]
+        self.outbox = primary.outbox
+        self.threads = primary.threads
+        self.enhanced_processor = primary.enhanced_processor
+        self.content_generator = primary.content_generator
+        self.ai_generator = primary.ai_generator
+        
+        self.metrics_collector = MetricsCollector(
+            self.db,
+            self.twitter,
+            max_requests=Config.METRICS_MAX_REQUESTS,
+            max_age_days=Config.METRICS_MAX_AGE_DAYS
+        )
         self.content_aggregator = ContentAggregator()
+        self.content_aggregator.load_feed_states(self.db.get_feed_states())
         self.content_processor = ContentProcessor()
-        self.enhanced_processor = EnhancedContentProcessor()
-        self.content_generator = ContentGenerator()
-        self.ai_generator = AIContentGeneratorImproved()
         self.expanded_sources = ExpandedContentSources()
+        self._simhash_index = None
+        self._tweet_guard = None
+        self._closed = False
         
         # Configurar logging
         self._setup_logging()
@@ -45,8 +106,70 @@ class ZTechBot:
             'last_run': None
         }
         
+        if len(self.accounts) > 1:
+            logger.info(f"👥 Cuentas: {', '.join(account.label for account in self.accounts)}")
         logger.info("🤖 Bot ZTech inicializado correctamente")
     
+    def _build_account(self, twitter: TwitterClient) -> AccountPublisher:
+        """
+        Crea la bandeja de salida y los generadores de una cuenta
+        
+        Las cuentas con el mismo idioma comparten generadores.
+        
+        Args:
+            twitter: Cliente de Twitter de la cuenta
+            
+        Returns:
+            Componentes de publicación de la cuenta
+        """
+        profile = twitter.account
+        outbox = Outbox(
+            self.db,
+            twitter,
+            on_sent=self._on_tweet_sent,
+            on_failed=self._on_tweet_failed,
+            max_attempts=Config.OUTBOX_MAX_ATTEMPTS,
+            base_delay=Config.OUTBOX_BASE_DELAY_SECONDS,
+            max_delay=Config.OUTBOX_MAX_DELAY_SECONDS,
+            timeline_check_size=Config.OUTBOX_TIMELINE_CHECK_SIZE,
+            sending_timeout_minutes=Config.OUTBOX_SENDING_TIMEOUT_MINUTES,
+            media=self.media,
+            account=profile.name
+        )
+        threads = ThreadPublisher(
+            outbox,
+            max_length=Config.MAX_TWEET_LENGTH,
+            max_parts=Config.THREAD_MAX_PARTS
+        )
+        if profile.language not in self._generators:
+            self._generators[profile.language] = (
+                ContentGenerator(profile.language),
+                EnhancedContentProcessor(profile.language),
+                AIContentGeneratorImproved(profile.language)
+            )
+        return AccountPublisher(profile, twitter, outbox, threads, *self._generators[profile.language])
+    
+    def _media_owners(self) -> List[str]:
+        """IDs de las demás cuentas, que pueden usar las imágenes que sube la principal"""
+        owners = []
+        for account in self.accounts[1:]:
+            identity = account.twitter.identity or account.twitter.get_identity()
+            if identity:
+                owners.append(identity['id'])
+        return owners
+    
+    def _processor_for(self, language: Optional[str]) -> EnhancedContentProcessor:
+        """Procesador de artículos de la primera cuenta con ese idioma (o de la principal)"""
+        for account in self.accounts:
+            if account.profile.language == language:
+                return account.enhanced_processor
+        return self.enhanced_processor
+    
+    @staticmethod
+    def _candidate_language(account: AccountPublisher) -> Optional[str]:
+        """Idioma de los candidatos de una cuenta (la de TWITTER_* los publica todos)"""
+        return account.profile.language if account.name else None
+    
     def _setup_logging(self):
         """Configura el sistema de logging"""
         # Crear directorio de logs si no existe
@@ -74,189 +197,663 @@ class ZTechBot:
             colorize=True
         )
     
-    def run_single_post(self) -> bool:
+    def run_single_post(self, account: AccountPublisher = None) -> bool:
         """
         Ejecuta una sola publicación de tweet
         
+        Args:
+            account: Cuenta que publica (por defecto la principal)
+            
         Returns:
-            True si se publicó exitosamente, False en caso contrario
+            True si se publicó (o quedó en la bandeja de salida para
+            reintentarse), False en caso contrario
         """
+        account = account or self.accounts[0]
         try:
-            logger.info("🚀 Iniciando publicación de tweet...")
+            logger.info(f"🚀 Iniciando publicación de tweet ({account.label})...")
+            
+            if self._post_quota_exhausted(account):
+                return False
+            
+            # Lo que quedó pendiente de un intento anterior ocupa este hueco
+            if account.outbox.process()['sent']:
+                return True
             
             # Seleccionar tipo de publicación
-            post_type = self._select_post_type()
+            post_type = self._select_post_type(account)
             logger.info(f"📝 Tipo de publicación seleccionado: {post_type}")
             
             # Generar contenido según el tipo
             if post_type in ['hacks', 'protips', 'top_lists', 'curiosities', 'controversial', 'history', 'trends', 'reviews']:
-                return self._post_generated_content(post_type)
+                return self._post_generated_content(post_type, account)
             
-            # Obtener contenido fresco para noticias
-            fresh_content = self.content_aggregator.get_fresh_content(hours=24)
+            # Reclamar el mejor candidato de la cola (sin depender de las fuentes)
+            candidate = self._claim_publishable_candidate(account)
+            if not candidate:
+                # Cola vacía: ingerir una vez en línea como respaldo
+                logger.info("📭 Cola de candidatos vacía, ingiriendo contenido...")
+                self.ingest_candidates()
+                candidate = self._claim_publishable_candidate(account)
             
-            if not fresh_content:
-                logger.warning("⚠️ No hay contenido fresco disponible")
+            if not candidate:
+                logger.warning("⚠️ Ninguna historia produjo un tweet publicable")
                 return False
             
-            # Filtrar contenido ya procesado
-            unprocessed_content = []
-            for article in fresh_content:
-                content_hash = article.get('content_hash')
-                if content_hash and not self.db.is_content_processed(content_hash):
-                    unprocessed_content.append(article)
+            selected_story = candidate['story']
+            selected_article = selected_story['representative']
+            tweet_content = candidate['tweet_text']
+            logger.info(f"🧩 Historia seleccionada con {selected_story['size']} artículos: "
+                        f"{selected_article.get('title', '')[:60]}")
             
-            if not unprocessed_content:
-                logger.info("ℹ️ Todo el contenido ya fue procesado")
-                return False
+            # Publicar tweet (el resto se completa en _on_tweet_sent)
+            outcome = self._publish_tweet(tweet_content, {
+                'post_type': 'single',
+                'source': selected_article.get('source'),
+                'source_url': selected_article.get('source_url'),
+                'language': guess_language(tweet_content),
+                'candidate_ids': [candidate['id']],
+                'stories': [selected_story],
+                'media_url': account.enhanced_processor.get_image_url(
+                    selected_article.get('title', ''), selected_article.get('summary', '')
+                )
+            }, account)
             
-            # Verificar que no sea contenido duplicado
-            selected_article = None
-            for article in unprocessed_content:
-                article_link = article.get('link', '').strip()
-                if article_link and not self.db.is_content_processed(article_link):
-                    selected_article = article
-                    break
+            if outcome is None:
+                # Devolver el candidato a la cola para el siguiente intento
+                self._release_candidates([candidate])
+            return self._report_outcome(outcome, "Tweet")
+                
+        except Exception as e:
+            self.stats['errors_count'] += 1
+            logger.error(f"❌ Error en publicación: {e}")
+            return False
+    
+    def ingest_candidates(self) -> int:
+        """
+        Obtiene contenido fresco y encola sus historias como candidatos a publicar
+        
+        Las historias más populares se convierten en tweet durante la ingesta,
+        de modo que la publicación solo tiene que reclamar el primero de la cola;
+        el resto se encola sin tweet y se genera al reclamarlo. Cada candidato
+        guarda su idioma y se redacta con el procesador de ese idioma.
+        
+        Una sola ingesta alimenta a todas las cuentas; si varias se quedan sin
+        candidatos a la vez, la segunda espera a la primera en lugar de
+        descargar los feeds otra vez.
+        
+        Returns:
+            Número de candidatos encolados
+        """
+        if not self._ingest_lock.acquire(blocking=False):
+            with self._ingest_lock:
+                return 0
+        try:
+            return self._ingest_candidates()
+        finally:
+            self._ingest_lock.release()
+    
+    def _ingest_candidates(self) -> int:
+        """Ingesta de candidatos (con _ingest_lock tomado)"""
+        try:
+            self.db.expire_candidates(Config.CANDIDATE_CLAIM_TIMEOUT_MINUTES)
             
-            if not selected_article:
-                logger.warning("⚠️ Todos los artículos ya han sido procesados")
-                return False
+            # Obtener contenido fresco agrupado en historias
+            stories = self.content_aggregator.get_fresh_stories(hours=24)
             
-            # Procesar artículo a tweet con procesador mejorado
-            tweet_content = self.enhanced_processor.process_article_to_tweet(selected_article)
+            if not stories:
+                logger.warning("⚠️ No hay contenido fresco disponible")
+                self._save_feed_states()
+                return 0
             
-            if not tweet_content:
-                logger.warning("⚠️ No se pudo procesar el artículo a tweet")
-                return False
+            # Filtrar historias ya procesadas (por hash, enlace o casi duplicado)
+            # Verificar hashes y enlaces de todas las historias en una sola consulta
+            processed_keys = self.writer.get_processed_keys(
+                key
+                for story in stories
+                for article in story['articles']
+                for key in (article.get('content_hash'), canonical_url(article.get('link')))
+            )
             
-            # Validar tweet
-            if not self.content_processor.validate_tweet(tweet_content):
-                logger.warning("⚠️ Tweet no válido")
-                return False
+            unprocessed_stories = []
+            processed_stories = []
+            for story in stories:
+                if self._is_story_processed(story, processed_keys):
+                    processed_stories.append(story)
+                else:
+                    unprocessed_stories.append(story)
             
-            # Publicar tweet
-            tweet_result = self.twitter.post_tweet(tweet_content)
-            
-            if tweet_result:
-                # Guardar en base de datos
-                self.db.save_published_tweet(
-                    tweet_id=tweet_result['id'],
-                    content=tweet_content,
-                    source=selected_article.get('source'),
-                    source_url=selected_article.get('source_url'),
-                    engagement_data=tweet_result.get('public_metrics')
-                )
+            # Registrar de una vez las nuevas versiones de historias ya publicadas
+            # para no volver a compararlas en la siguiente ejecución
+            if processed_stories:
+                self._mark_stories_processed(processed_stories)
+            
+            if not unprocessed_stories:
+                logger.info("ℹ️ Todo el contenido ya fue procesado")
+                self._save_feed_states()
+                return 0
+            
+            # Las historias ya encoladas solo actualizan su prioridad (sin volver a
+            # generar el tweet); las nuevas más populares se convierten en tweet ya
+            queued = self.db.get_candidate_hashes(
+                story['representative'].get('content_hash') for story in unprocessed_stories
+            )
+            expires_at = datetime.utcnow() + timedelta(hours=Config.CANDIDATE_TTL_HOURS)
+            candidates = []
+            rendered = 0
+            for story in unprocessed_stories:
+                representative = story['representative']
+                language = guess_language(f"{representative.get('title', '')} {representative.get('summary', '')}")
+                tweet_text = None
                 
-                # Marcar contenido como procesado
-                self.db.save_processed_content(
-                    content_hash=selected_article.get('content_hash'),
-                    source=selected_article.get('source'),
-                    source_url=selected_article.get('source_url'),
-                    title=selected_article.get('title'),
-                    summary=selected_article.get('summary')
-                )
+                # Más allá del límite el tweet se genera al reclamarlo; encolarlas
+                # igualmente evita perderlas cuando avanza la marca de agua del feed
+                if representative.get('content_hash') not in queued and rendered < Config.CANDIDATE_RENDER_LIMIT:
+                    rendered += 1
+                    tweet_text = self._processor_for(language).process_article_to_tweet(representative)
+                    
+                    if not tweet_text or not self.content_processor.validate_tweet(tweet_text):
+                        logger.warning("⚠️ No se pudo procesar el artículo a un tweet válido")
+                        continue
                 
-                # Actualizar estadísticas
-                self.stats['tweets_published'] += 1
-                self.stats['content_processed'] += 1
+                candidates.append({
+                    'content_hash': representative.get('content_hash'),
+                    'story': story,
+                    'tweet_text': tweet_text,
+                    'source': representative.get('source'),
+                    'source_url': representative.get('source_url'),
+                    # Más artículos primero; a igual tamaño, más fuentes distintas
+                    'priority': story['size'] + story.get('sources', 1) / 100,
+                    'expires_at': expires_at,
+                    'language': language
+                })
+            
+            enqueued = self.db.enqueue_candidates(candidates)
+            
+            # Descargar ya las imágenes de los tweets preparados, fuera de la ruta de publicación
+            if self.media:
+                self.media.prefetch(
+                    self.enhanced_processor.get_image_url(
+                        candidate['story']['representative'].get('title', ''),
+                        candidate['story']['representative'].get('summary', '')
+                    )
+                    for candidate in candidates if candidate['tweet_text']
+                )
+            # Solo ahora es seguro avanzar los validadores y marcas de agua de los feeds
+            self._save_feed_states()
+            logger.info(f"📥 {enqueued} candidatos encolados "
+                        f"({self.db.count_pending_candidates()} pendientes)")
+            return enqueued
+            
+        except Exception as e:
+            logger.error(f"❌ Error en ingesta de contenido: {e}")
+            return 0
+    
+    def _save_feed_states(self):
+        """Guarda el estado de los feeds y solo entonces lo da por bueno en memoria"""
+        self.db.save_feed_states(self.content_aggregator.get_feed_states())
+        self.content_aggregator.commit_feed_states()
+    
+    def _claim_publishable_candidate(self, account: AccountPublisher = None) -> Optional[Dict]:
+        """
+        Reclama el mejor candidato que todavía se pueda publicar
+        
+        Args:
+            account: Cuenta que lo publicará (por defecto la principal)
+            
+        Returns:
+            Candidato reclamado con 'story' y 'tweet_text', o None si no hay
+        """
+        claimed = self._claim_publishable_candidates(1, account=account)
+        return claimed[0] if claimed else None
+    
+    def _claim_publishable_candidates(self, count: int, render: bool = True,
+                                      account: AccountPublisher = None) -> List[Dict]:
+        """
+        Reclama los mejores candidatos que todavía se puedan publicar
+        
+        Los candidatos cuya historia se publicó mientras esperaban en la cola,
+        o cuyo tweet choca con la guardia de duplicados, se caducan.
+        
+        Args:
+            count: Número de candidatos a reclamar
+            render: Generar y verificar el tweet de cada candidato
+            account: Cuenta que los publicará (por defecto la principal); solo
+                reclama candidatos en su idioma
+            
+        Returns:
+            Candidatos reclamados (menos de count si la cola se agota)
+        """
+        account = account or self.accounts[0]
+        publishable = []
+        while len(publishable) < count:
+            claimed = self.db.claim_candidates(count - len(publishable),
+                                               language=self._candidate_language(account))
+            if not claimed:
+                break
+            
+            for candidate in claimed:
+                story = candidate['story']
+                processed_keys = self.writer.get_processed_keys(
+                    key
+                    for article in story['articles']
+                    for key in (article.get('content_hash'), canonical_url(article.get('link')))
+                )
+                if self._is_story_processed(story, processed_keys):
+                    self.db.mark_candidate(candidate['id'], 'expired')
+                    continue
                 
-                logger.info(f"✅ Tweet publicado exitosamente: {tweet_result['id']}")
-                return True
-            else:
-                self.stats['errors_count'] += 1
-                logger.error("❌ Error al publicar tweet")
-                return False
+                if render:
+                    if not candidate['tweet_text']:
+                        candidate['tweet_text'] = account.enhanced_processor.process_article_to_tweet(
+                            story['representative']
+                        )
+                    tweet_text = candidate['tweet_text']
+                    if not tweet_text or not self.content_processor.validate_tweet(tweet_text) \
+                            or self._is_duplicate_tweet(tweet_text):
+                        self.db.mark_candidate(candidate['id'], 'expired')
+                        continue
                 
-        except Exception as e:
-            self.stats['errors_count'] += 1
-            logger.error(f"❌ Error en publicación: {e}")
-            return False
+                publishable.append(candidate)
+        
+        return publishable
     
-    def run_curated_post(self) -> bool:
+    def run_curated_post(self, account: AccountPublisher = None) -> bool:
         """
         Ejecuta una publicación curada con múltiples artículos
         
+        Args:
+            account: Cuenta que publica (por defecto la principal)
+            
         Returns:
             True si se publicó exitosamente, False en caso contrario
         """
+        account = account or self.accounts[0]
         try:
-            logger.info("📚 Iniciando publicación curada...")
+            logger.info(f"📚 Iniciando publicación curada ({account.label})...")
+            
+            if self._post_quota_exhausted(account):
+                return False
             
-            # Obtener contenido fresco
-            fresh_content = self.content_aggregator.get_fresh_content(hours=24)
+            # Tomar las historias más populares de la cola de candidatos
+            if self.db.count_pending_candidates(language=self._candidate_language(account)) < 3:
+                self.ingest_candidates()
+            candidates = self._claim_publishable_candidates(3, render=False, account=account)
             
-            if len(fresh_content) < 3:
+            if len(candidates) < 3:
+                self._release_candidates(candidates)
                 logger.warning("⚠️ No hay suficiente contenido para publicación curada")
-                return self.run_single_post()  # Fallback a publicación simple
+                return self.run_single_post(account)  # Fallback a publicación simple
             
-            # Crear tweet curado
-            curated_tweet = self.content_processor.create_curated_tweet(fresh_content)
+            stories = [candidate['story'] for candidate in candidates]
+            
+            # Crear tweet curado con las historias más populares
+            curated_tweet = self.content_processor.create_curated_tweet(stories, language=account.profile.language)
             
             if not curated_tweet:
+                self._release_candidates(candidates)
                 logger.warning("⚠️ No se pudo crear tweet curado")
                 return False
             
             # Validar tweet
             if not self.content_processor.validate_tweet(curated_tweet):
+                self._release_candidates(candidates)
                 logger.warning("⚠️ Tweet curado no válido")
                 return False
             
-            # Publicar tweet
-            tweet_result = self.twitter.post_tweet(curated_tweet)
-            
-            if tweet_result:
-                # Guardar en base de datos
-                self.db.save_published_tweet(
-                    tweet_id=tweet_result['id'],
-                    content=curated_tweet,
-                    source="curated",
-                    source_url="",
-                    engagement_data=tweet_result.get('public_metrics')
-                )
-                
-                # Marcar artículos como procesados
-                for article in fresh_content[:3]:
-                    if article.get('content_hash'):
-                        self.db.save_processed_content(
-                            content_hash=article.get('content_hash'),
-                            source=article.get('source'),
-                            source_url=article.get('source_url'),
-                            title=article.get('title'),
-                            summary=article.get('summary')
-                        )
-                
-                self.stats['tweets_published'] += 1
-                self.stats['content_processed'] += 3
-                
-                logger.info(f"✅ Tweet curado publicado: {tweet_result['id']}")
-                return True
-            else:
-                self.stats['errors_count'] += 1
-                logger.error("❌ Error al publicar tweet curado")
-                return False
+            # Publicar tweet (el resto se completa en _on_tweet_sent)
+            outcome = self._publish_tweet(curated_tweet, {
+                'post_type': 'curated',
+                'source': "curated",
+                'source_url': "",
+                'language': guess_language(curated_tweet),
+                'candidate_ids': [candidate['id'] for candidate in candidates],
+                'stories': stories
+            }, account)
+            
+            if outcome is None:
+                self._release_candidates(candidates)
+            return self._report_outcome(outcome, "Tweet curado")
                 
         except Exception as e:
             self.stats['errors_count'] += 1
             logger.error(f"❌ Error en publicación curada: {e}")
             return False
     
+    def _release_candidates(self, candidates: List[Dict]):
+        """Devuelve a la cola candidatos reclamados que no se publicaron"""
+        for candidate in candidates:
+            self.db.mark_candidate(candidate['id'], 'pending')
+    
+    def _get_tweet_guard(self) -> DuplicateTweetGuard:
+        """
+        Obtiene la guardia de duplicados, cargándola desde la base de datos la primera vez
+        
+        Returns:
+            Guardia con los últimos tweets publicados
+        """
+        with self._lock:
+            if self._tweet_guard is None:
+                self._tweet_guard = DuplicateTweetGuard(
+                    max_tweets=Config.DUPLICATE_GUARD_SIZE,
+                    jaccard_threshold=Config.DUPLICATE_GUARD_JACCARD,
+                    containment_threshold=Config.DUPLICATE_GUARD_CONTAINMENT
+                )
+                self.writer.flush()
+                self._tweet_guard.add_many(self.db.get_recent_tweet_texts(limit=Config.DUPLICATE_GUARD_SIZE))
+                logger.debug(f"Guardia de duplicados cargada con {len(self._tweet_guard)} tweets")
+            return self._tweet_guard
+    
+    def _is_duplicate_tweet(self, content: str) -> bool:
+        """Consulta la guardia de duplicados (compartida por todas las cuentas)"""
+        with self._lock:
+            return bool(self._get_tweet_guard().check(content))
+    
+    def _publish_tweet(self, content: str, payload: Dict, account: AccountPublisher = None) -> Optional[str]:
+        """
+        Publica un tweet a través de la bandeja de salida si no es casi idéntico a uno reciente
+        
+        El tweet se guarda antes del primer intento; si este falla por un
+        error transitorio, el trabajador de la bandeja lo reintenta más tarde.
+        Un texto que no cabe en un tweet se publica como hilo.
+        Los candidatos incluidos pasan a la bandeja y no vuelven a la cola.
+        
+        Args:
+            content: Texto del tweet
+            payload: Datos para _on_tweet_sent (post_type, source, source_url,
+                language y opcionalmente candidate_ids, stories y generated)
+            account: Cuenta que publica (por defecto la principal)
+            
+        Returns:
+            'sent', 'retried' (pendiente en la bandeja) o 'failed', o None si
+            la guardia de duplicados lo rechazó
+        """
+        account = account or self.accounts[0]
+        if self._is_duplicate_tweet(content):
+            return None
+        
+        item_id = account.threads.enqueue(content, payload)
+        if item_id is None:
+            return None
+        for candidate_id in payload.get('candidate_ids', []):
+            self.db.mark_candidate(candidate_id, 'posted')
+        
+        return account.outbox.send(item_id) or 'retried'
+    
+    def _report_outcome(self, outcome: Optional[str], label: str) -> bool:
+        """
+        Registra el resultado de una publicación
+        
+        Args:
+            outcome: Resultado de _publish_tweet
+            label: Tipo de tweet para el log
+            
+        Returns:
+            True si se publicó o quedó en la bandeja de salida para reintentarse
+        """
+        if outcome == 'sent':
+            logger.info(f"✅ {label} publicado exitosamente")
+            return True
+        
+        if outcome is not None:
+            self.stats['errors_count'] += 1
+        if outcome == 'retried':
+            logger.warning(f"📮 {label} en la bandeja de salida, se reintentará")
+            return True
+        logger.error(f"❌ Error al publicar {label.lower()}")
+        return False
+    
+    def _on_tweet_sent(self, item: Dict, tweet_result: Dict):
+        """
+        Completa una publicación cuando la bandeja de salida confirma el envío
+        
+        Args:
+            item: Elemento de la bandeja de salida con su payload
+            tweet_result: Información del tweet publicado
+        """
+        payload = item['payload']
+        content = item['content']
+        
+        # Las respuestas de un hilo no son publicaciones nuevas: cuenta solo la primera parte
+        thread = payload.get('thread')
+        if thread and thread['position'] > 0:
+            logger.info(f"🧵 Parte {thread['position'] + 1}/{len(thread['parts'])} del hilo "
+                        f"{thread['root_id']} publicada: {tweet_result['id']}")
+            return
+        
+        for candidate_id in payload.get('candidate_ids', []):
+            self.db.mark_candidate(candidate_id, 'posted', tweet_id=tweet_result['id'])
+        
+        # Guardar en base de datos (en segundo plano)
+        self.writer.save_published_tweet(
+            tweet_id=tweet_result['id'],
+            content=content,
+            source=payload.get('source'),
+            source_url=payload.get('source_url'),
+            engagement_data=tweet_result.get('public_metrics'),
+            post_type=payload.get('post_type'),
+            language=payload.get('language'),
+            account=item.get('account', '')
+        )
+        with self._lock:
+            self._get_tweet_guard().add(tweet_result['id'], content)
+        
+        # Marcar todos los artículos de las historias como procesados y usados
+        stories = payload.get('stories', [])
+        if stories:
+            self._mark_stories_processed(stories, used=True)
+        
+        # Contenido generado: marcar con huella estable del contenido
+        generated = payload.get('generated')
+        if generated:
+            self.writer.save_processed_content(
+                content_hash=generated['content_hash'],
+                source=payload.get('source'),
+                source_url="",
+                title=generated['title'],
+                summary=generated['summary'],
+                refresh=True
+            )
+        
+        # Actualizar estadísticas
+        with self._lock:
+            self.stats['tweets_published'] += 1
+            self.stats['content_processed'] += sum(story['size'] for story in stories)
+        logger.info(f"🐦 Publicación {payload.get('post_type')} completada: {tweet_result['id']}")
+    
+    def _on_tweet_failed(self, item: Dict):
+        """Descarta los candidatos de un tweet que la bandeja de salida no pudo enviar"""
+        thread = item['payload'].get('thread')
+        if thread and thread['position'] > 0:
+            logger.error(f"❌ Hilo {thread['root_id']} interrumpido en la parte "
+                         f"{thread['position'] + 1}/{len(thread['parts'])}")
+        for candidate_id in item['payload'].get('candidate_ids', []):
+            self.db.mark_candidate(candidate_id, 'expired')
+    
+    def process_outbox(self) -> Dict[str, int]:
+        """
+        Envía los tweets de las bandejas de salida cuyo reintento venció
+        
+        Las bandejas de las distintas cuentas se procesan a la vez.
+        
+        Returns:
+            Diccionario con el número de elementos 'sent', 'retried' y 'failed'
+        """
+        results = {'sent': 0, 'retried': 0, 'failed': 0}
+        for account_results in self.run_for_accounts(self._process_account_outbox).values():
+            for outcome, count in account_results.items():
+                results[outcome] += count
+        return results
+    
+    @staticmethod
+    def _process_account_outbox(account: AccountPublisher) -> Dict[str, int]:
+        """Procesa la bandeja de salida de una cuenta si tiene cuota"""
+        if account.twitter.wait_time() > 0:
+            return {'sent': 0, 'retried': 0, 'failed': 0}
+        return account.outbox.process()
+    
+    def run_for_accounts(self, job, accounts: List[AccountPublisher] = None) -> Dict[str, Any]:
+        """
+        Ejecuta una tarea para varias cuentas a la vez, un hilo por cuenta
+        
+        Cada cuenta publica con su propio cliente y su propia cuota, así que
+        una cuenta sin cuota o con la API lenta no retrasa a las demás. Los
+        hilos se reutilizan entre llamadas, por lo que job no debe volver a
+        llamar a run_for_accounts.
+        
+        Args:
+            job: Función que recibe la cuenta (p. ej. run_single_post)
+            accounts: Cuentas (por defecto todas)
+            
+        Returns:
+            Diccionario nombre de la cuenta -> resultado de job
+        """
+        accounts = accounts or self.accounts
+        if len(accounts) == 1:
+            return {accounts[0].label: job(accounts[0])}
+        
+        # Cargar los índices compartidos antes de que los hilos compitan por ellos
+        self._get_tweet_guard()
+        self._get_simhash_index()
+        
+        futures = {account.label: self._executor.submit(job, account) for account in accounts}
+        return {label: future.result() for label, future in futures.items()}
+    
+    def collect_metrics(self) -> Dict[str, int]:
+        """
+        Muestrea las métricas de los tweets publicados cuya muestra venció
+        
+        Returns:
+            Diccionario con 'requests', 'sampled' y 'missing'
+        """
+        try:
+            self.writer.flush()
+            return self.metrics_collector.collect()
+            
+        except Exception as e:
+            logger.error(f"❌ Error recolectando métricas: {e}")
+            return {'requests': 0, 'sampled': 0, 'missing': 0}
+    
+    def _get_simhash_index(self) -> SimHashIndex:
+        """
+        Obtiene el índice SimHash, cargándolo desde la base de datos la primera vez
+        
+        Returns:
+            Índice de huellas del contenido procesado reciente
+        """
+        with self._lock:
+            if self._simhash_index is None:
+                self._simhash_index = SimHashIndex(max_distance=Config.SIMHASH_MAX_DISTANCE)
+                self.writer.flush()
+                self._simhash_index.add_many(self.db.get_recent_simhashes(limit=Config.SIMHASH_INDEX_SIZE))
+                logger.debug(f"Índice SimHash cargado con {len(self._simhash_index)} huellas")
+            return self._simhash_index
+    
+    def _is_story_processed(self, story: Dict, processed_keys: Set[str]) -> bool:
+        """
+        Verifica si alguna noticia de la historia ya fue procesada
+        
+        Args:
+            story: Historia agrupada por el ContentAggregator
+            processed_keys: Hashes y enlaces ya procesados (de get_processed_keys)
+            
+        Returns:
+            True si la historia ya fue publicada o es casi duplicada
+        """
+        index = self._get_simhash_index()
+        
+        for article in story['articles']:
+            if article.get('content_hash') in processed_keys:
+                return True
+            
+            if canonical_url(article.get('link')) in processed_keys:
+                return True
+            
+            with self._lock:
+                duplicate_of = index.is_near_duplicate(article.get('simhash') or 0)
+            if duplicate_of:
+                logger.debug(f"Artículo casi duplicado de {duplicate_of}: {article.get('title', '')[:60]}")
+                return True
+        
+        return False
+    
+    def _mark_stories_processed(self, stories: List[Dict], used: bool = False):
+        """
+        Guarda todos los artículos de las historias como procesados en un solo commit
+        
+        Args:
+            stories: Historias agrupadas por el ContentAggregator
+            used: Si las historias se usaron en un tweet publicado
+        """
+        articles = [article for story in stories for article in story['articles']]
+        if used:
+            articles = [dict(article, used=True) for article in articles]
+        self.writer.save_processed_content_many(articles)
+        
+        for article in articles:
+            self._remember_simhash(article)
+    
+    def _remember_simhash(self, article: Dict):
+        """Agrega la huella de un artículo procesado al índice en memoria"""
+        if article.get('simhash') and article.get('content_hash'):
+            with self._lock:
+                self._get_simhash_index().add(article['content_hash'], article['simhash'])
+    
     def schedule_posts(self):
         """Configura el horario de publicaciones automáticas"""
         logger.info("⏰ Configurando horarios de publicación...")
         
-        for schedule_time in Config.POSTING_SCHEDULE:
+        # Las cuentas que comparten horario publican a la vez
+        slots = {}
+        for account in self.accounts:
+            for schedule_time in account.profile.posting_schedule:
+                slots.setdefault(schedule_time, []).append(account)
+        
+        for schedule_time, accounts in slots.items():
             # Publicación simple
-            schedule.every().day.at(schedule_time).do(self._scheduled_post)
-            logger.info(f"📅 Publicación programada a las {schedule_time}")
+            schedule.every().day.at(schedule_time).do(self.run_for_accounts, self._scheduled_post, accounts)
+            if len(self.accounts) > 1:
+                logger.info(f"📅 Publicación programada a las {schedule_time} "
+                            f"({', '.join(account.label for account in accounts)})")
+            else:
+                logger.info(f"📅 Publicación programada a las {schedule_time}")
         
         # Publicación curada los viernes a las 17:00
-        schedule.every().friday.at("17:00").do(self._scheduled_curated_post)
+        schedule.every().friday.at("17:00").do(self.run_for_accounts, self._scheduled_curated_post)
         logger.info("📅 Publicación curada programada los viernes a las 17:00")
+        
+        # Ingesta periódica de candidatos, independiente de la publicación
+        schedule.every(Config.INGEST_INTERVAL_MINUTES).minutes.do(self.ingest_candidates)
+        logger.info(f"📅 Ingesta de contenido cada {Config.INGEST_INTERVAL_MINUTES} minutos")
+        
+        # Reintentos de la bandeja de salida e informe horario
+        schedule.every(Config.OUTBOX_INTERVAL_MINUTES).minutes.do(self.process_outbox)
+        schedule.every().hour.do(self.outbox.log_hourly_report)
+        logger.info(f"📅 Bandeja de salida cada {Config.OUTBOX_INTERVAL_MINUTES} minutos")
+        
+        # Muestreo de métricas por lotes
+        schedule.every(Config.METRICS_INTERVAL_MINUTES).minutes.do(self.collect_metrics)
+        logger.info(f"📅 Métricas de engagement cada {Config.METRICS_INTERVAL_MINUTES} minutos")
+        
+        # Limpieza diaria de datos caducados
+        schedule.every().day.at(Config.RETENTION_TIME).do(self.cleanup_old_data)
+        logger.info(f"📅 Limpieza de datos programada a las {Config.RETENTION_TIME}")
     
-    def _scheduled_post(self):
-        """Ejecuta publicación programada"""
-        logger.info("⏰ Ejecutando publicación programada...")
-        success = self.run_single_post()
+    def _scheduled_post(self, account: AccountPublisher = None):
+        """Ejecuta publicación programada de una cuenta (por defecto la principal)"""
+        account = account or self.accounts[0]
+        logger.info(f"⏰ Ejecutando publicación programada ({account.label})...")
+        
+        # Evitar dos publicaciones seguidas (p. ej. la inicial justo antes de un horario)
+        self.writer.flush()
+        last_post = self.db.get_last_post_time(account=account.name)
+        if last_post and datetime.utcnow() - last_post < timedelta(minutes=Config.MIN_POST_INTERVAL_MINUTES):
+            logger.info(f"⏭️ Última publicación a las {last_post:%H:%M} UTC, se omite este horario")
+            return
+        
+        if self._defer_if_rate_limited(self._scheduled_post, account):
+            return
+        
+        success = self.run_single_post(account)
         
         if success:
             logger.info("✅ Publicación programada completada")
@@ -265,10 +862,22 @@ class ZTechBot:
         
         self._update_daily_stats()
     
-    def _scheduled_curated_post(self):
-        """Ejecuta publicación curada programada"""
-        logger.info("⏰ Ejecutando publicación curada programada...")
-        success = self.run_curated_post()
+    def _scheduled_curated_post(self, account: AccountPublisher = None):
+        """Ejecuta publicación curada programada de una cuenta (por defecto la principal)"""
+        account = account or self.accounts[0]
+        logger.info(f"⏰ Ejecutando publicación curada programada ({account.label})...")
+        
+        self.writer.flush()
+        since = datetime.utcnow() - timedelta(days=Config.CURATED_MIN_INTERVAL_DAYS)
+        if self.db.has_posted_since(since, post_type='curated', account=account.name):
+            logger.info(f"⏭️ Ya hubo una publicación curada en los últimos "
+                        f"{Config.CURATED_MIN_INTERVAL_DAYS} días, se omite")
+            return
+        
+        if self._defer_if_rate_limited(self._scheduled_curated_post, account):
+            return
+        
+        success = self.run_curated_post(account)
         
         if success:
             logger.info("✅ Publicación curada programada completada")
@@ -277,19 +886,62 @@ class ZTechBot:
         
         self._update_daily_stats()
     
+    def _post_quota_exhausted(self, account: AccountPublisher = None) -> bool:
+        """Indica (sin bloquear) si la cuota de publicación de una cuenta está agotada ahora"""
+        account = account or self.accounts[0]
+        wait = account.twitter.wait_time()
+        if wait > 0:
+            logger.warning(f"⏳ Cuota de publicación de {account.label} agotada, "
+                           f"disponible en {math.ceil(wait / 60)} minutos")
+            return True
+        return False
+    
+    def _defer_if_rate_limited(self, job, account: AccountPublisher) -> bool:
+        """
+        Reprograma una publicación para cuando haya cuota, en lugar de dormir el hilo
+        
+        Mientras tanto el scheduler sigue ejecutando la ingesta, la limpieza
+        y las publicaciones de las demás cuentas.
+        
+        Args:
+            job: Tarea de publicación programada (recibe la cuenta)
+            account: Cuenta que publica
+            
+        Returns:
+            True si la publicación se pospuso
+        """
+        wait = account.twitter.wait_time()
+        if wait <= 0:
+            return False
+        
+        tag = f"deferred{job.__name__}{account.name}"
+        if not schedule.get_jobs(tag):
+            minutes = math.ceil(wait / 60)
+            schedule.every(minutes).minutes.do(self._run_deferred, job, tag, account).tag(tag)
+            logger.info(f"⏳ Cuota de publicación de {account.label} agotada, se reprograma en {minutes} minutos")
+        return True
+    
+    @staticmethod
+    def _run_deferred(job, tag: str, *args):
+        """Ejecuta una publicación pospuesta una sola vez"""
+        schedule.clear(tag)
+        job(*args)
+        return schedule.CancelJob
+    
     def _update_daily_stats(self):
         """Actualiza estadísticas diarias en la base de datos"""
-        self.db.update_daily_stats(
-            tweets_published=self.stats['tweets_published'],
-            content_processed=self.stats['content_processed'],
-            errors_count=self.stats['errors_count']
-        )
-        
-        # Resetear estadísticas del día
-        self.stats['tweets_published'] = 0
-        self.stats['content_processed'] = 0
-        self.stats['errors_count'] = 0
-        self.stats['last_run'] = datetime.now()
+        with self._lock:
+            self.writer.update_daily_stats(
+                tweets_published=self.stats['tweets_published'],
+                content_processed=self.stats['content_processed'],
+                errors_count=self.stats['errors_count']
+            )
+            
+            # Resetear estadísticas del día
+            self.stats['tweets_published'] = 0
+            self.stats['content_processed'] = 0
+            self.stats['errors_count'] = 0
+            self.stats['last_run'] = datetime.now()
     
     def run_continuous(self):
         """Ejecuta el bot en modo continuo"""
@@ -298,11 +950,18 @@ class ZTechBot:
         # Configurar horarios
         self.schedule_posts()
         
-        # Ejecutar una publicación inicial si es la primera vez del día
-        if not self._has_posted_today():
+        # Llenar la cola de candidatos antes del primer horario
+        self.ingest_candidates()
+        
+        # Publicación inicial de las cuentas que aún no publicaron hoy (todas a la vez)
+        pending = [account for account in self.accounts if not self._has_posted_today(account)]
+        if pending:
             logger.info("🌅 Primera ejecución del día, publicando...")
-            self.run_single_post()
+            self.run_for_accounts(self.run_single_post, pending)
             self._update_daily_stats()
+        else:
+            posts_today = self.db.count_posts_since(self._start_of_today_utc())
+            logger.info(f"ℹ️ Ya hay {posts_today} publicaciones hoy, se espera al siguiente horario")
         
         # Loop principal
         try:
@@ -316,48 +975,123 @@ class ZTechBot:
             logger.error(f"❌ Error en loop principal: {e}")
         finally:
             self._update_daily_stats()
+            self.close()
             logger.info("📊 Estadísticas finales guardadas")
     
-    def _has_posted_today(self) -> bool:
-        """Verifica si ya se publicó algo hoy"""
+    def close(self):
+        """Confirma las escrituras pendientes, guarda el paquete de estado y cierra la base de datos"""
+        # run_continuous y main() cierran el bot: solo la primera llamada hace el trabajo
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        if self.media:
+            self.media.close()
+        self.writer.close()
+        if Config.STATE_BUNDLE_PATH:
+            try:
+                export_state(self.db, Config.STATE_BUNDLE_PATH, dedup_days=self._dedup_days(),
+                             tweet_limit=Config.DUPLICATE_GUARD_SIZE)
+            except Exception as e:
+                logger.error(f"❌ Error guardando el paquete de estado: {e}")
+        self.db.close()
+    
+    def _restore_state(self):
+        """Restaura el paquete de estado (ejecutores que arrancan con la base vacía)"""
+        if not Config.STATE_BUNDLE_PATH:
+            return
         try:
-            today = datetime.now().date()
-            recent_tweets = self.db.get_published_tweets(limit=10)
-            
-            for tweet in recent_tweets:
-                tweet_date = datetime.fromisoformat(tweet['published_at']).date()
-                if tweet_date == today:
-                    return True
-            
-            return False
+            import_state(self.db, Config.STATE_BUNDLE_PATH)
+        except Exception as e:
+            logger.error(f"❌ Error restaurando el paquete de estado, se arranca en frío: {e}")
+    
+    @staticmethod
+    def _dedup_days() -> int:
+        """Días de contenido procesado necesarios para deduplicar"""
+        return max(Config.RETENTION_PROCESSED_DAYS, Config.GENERATED_REPOST_WINDOW_DAYS)
+    
+    def _has_posted_today(self, account: AccountPublisher = None) -> bool:
+        """Verifica si ya se publicó algo hoy (día local), en una cuenta o en cualquiera"""
+        try:
+            self.writer.flush()
+            return self.db.has_posted_since(self._start_of_today_utc(),
+                                            account=account.name if account else None)
             
         except Exception as e:
             logger.error(f"❌ Error verificando publicaciones del día: {e}")
             return False
     
-    def get_stats(self) -> Dict:
-        """Obtiene estadísticas del bot"""
+    @staticmethod
+    def _start_of_today_utc() -> datetime:
+        """Medianoche local de hoy expresada en UTC, como las fechas guardadas"""
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return datetime.utcfromtimestamp(midnight.timestamp())
+    
+    def get_stats(self, refresh_rate_limits: bool = False) -> Dict:
+        """
+        Obtiene estadísticas del bot
+        
+        No llama a la API: los rate limits salen del último estado observado.
+        
+        Args:
+            refresh_rate_limits: Consultar a la API el estado de rate limits
+            
+        Returns:
+            Diccionario con las estadísticas (vacío si hubo un error)
+        """
         try:
+            self.writer.flush()
             daily_stats = self.db.get_daily_stats(days=7)
             recent_tweets = self.db.get_published_tweets(limit=5)
             
+            # Desgloses de la última semana desde las tablas de agregados
+            since = datetime.utcnow() - timedelta(days=7)
+            
             return {
                 'daily_stats': daily_stats,
                 'recent_tweets': recent_tweets,
+                'by_post_type': self.db.get_rollup_stats('daily', since, group_by=('post_type',)),
+                'by_source': self.db.get_rollup_stats('daily', since, group_by=('source',)),
+                'by_hour': self.db.get_rollup_stats('hourly', since, group_by=('hour',)),
+                'outbox': self.outbox.report(hours=24),
+                'outbox_pending': self.db.count_pending_outbox(),
                 'current_stats': self.stats,
-                'rate_limits': self.twitter.get_rate_limit_status()
+                'rate_limits': self.twitter.get_rate_limit_status(refresh=refresh_rate_limits),
+                'accounts': self._account_stats(refresh_rate_limits) if len(self.accounts) > 1 else {}
             }
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo estadísticas: {e}")
             return {}
     
+    def _account_stats(self, refresh_rate_limits: bool = False) -> Dict[str, Dict]:
+        """
+        Obtiene publicaciones de hoy y rate limits de cada cuenta
+        
+        Args:
+            refresh_rate_limits: Consultar a la API el estado de rate limits
+            
+        Returns:
+            Diccionario nombre de la cuenta -> {'username', 'language', 'posts_today', 'rate_limits'}
+        """
+        today = self._start_of_today_utc()
+        return {
+            account.label: {
+                'username': account.profile.username,
+                'language': account.profile.language,
+                'posts_today': self.db.count_posts_since(today, account=account.name),
+                'rate_limits': account.twitter.get_rate_limit_status(refresh=refresh_rate_limits)
+            }
+            for account in self.accounts
+        }
+    
     def test_connection(self) -> bool:
-        """Prueba la conexión con Twitter API"""
+        """Prueba la conexión con Twitter API de todas las cuentas"""
         try:
             logger.info("🔍 Probando conexión con Twitter API...")
             
-            if self.twitter.validate_credentials():
+            if all([account.twitter.validate_credentials() for account in self.accounts]):
                 logger.info("✅ Conexión con Twitter API exitosa")
                 return True
             else:
@@ -368,92 +1102,170 @@ class ZTechBot:
             logger.error(f"❌ Error probando conexión: {e}")
             return False
     
-    def cleanup_old_data(self):
-        """Limpia datos antiguos de la base de datos"""
+    def _get_retention_engine(self) -> RetentionEngine:
+        """Crea el motor de retención con la configuración actual"""
+        return RetentionEngine(
+            self.db,
+            archive_dir=Config.ARCHIVE_DIR or None,
+            chunk_size=Config.RETENTION_CHUNK_SIZE,
+            vacuum_pages=Config.RETENTION_VACUUM_PAGES
+        )
+    
+    def cleanup_old_data(self) -> Dict[str, int]:
+        """
+        Archiva y elimina los datos caducados según las políticas de retención
+        
+        Returns:
+            Filas eliminadas por tabla
+        """
         try:
             logger.info("🧹 Iniciando limpieza de datos antiguos...")
-            self.db.cleanup_old_data(days_to_keep=30)
+            self.writer.flush()
+            self.db.expire_candidates(Config.CANDIDATE_CLAIM_TIMEOUT_MINUTES)
+            
+            deleted = self._get_retention_engine().run({
+                # Nunca borrar dentro de la ventana anti-repetición del contenido generado
+                'processed_content': self._dedup_days() if Config.RETENTION_PROCESSED_DAYS > 0 else 0,
+                'published_tweets': Config.RETENTION_TWEETS_DAYS,
+                'engagement_samples': Config.RETENTION_TWEETS_DAYS,
+                'bot_stats': Config.RETENTION_STATS_DAYS,
+                'content_candidates': Config.RETENTION_CANDIDATES_DAYS,
+                'outbox': Config.RETENTION_OUTBOX_DAYS,
+            })
             logger.info("✅ Limpieza completada")
+            return deleted
             
         except Exception as e:
             logger.error(f"❌ Error en limpieza: {e}")
+            return {}
+    
+    def restore_archive(self, path: str) -> int:
+        """
+        Reimporta datos archivados para recuperar el estado de deduplicación
+        
+        Args:
+            path: Archivo o directorio de archivo
+            
+        Returns:
+            Número de filas leídas
+        """
+        try:
+            self.writer.flush()
+            total = self._get_retention_engine().import_archive(path)
+            
+            # Recargar los índices en memoria con lo importado
+            self._simhash_index = None
+            self._tweet_guard = None
+            return total
+            
+        except Exception as e:
+            logger.error(f"❌ Error importando archivo: {e}")
+            return 0
     
-    def _select_post_type(self) -> str:
+    def _select_post_type(self, account: AccountPublisher = None) -> str:
         """
-        Selecciona el tipo de publicación basado en los pesos configurados
+        Selecciona el tipo de publicación basado en los pesos de la cuenta
         
+        Args:
+            account: Cuenta que publica (por defecto la principal)
+            
         Returns:
             Tipo de publicación seleccionado
         """
         import random
         
-        types = list(Config.POST_TYPE_WEIGHTS.keys())
-        weights = list(Config.POST_TYPE_WEIGHTS.values())
+        post_type_weights = (account or self.accounts[0]).profile.post_type_weights
+        types = list(post_type_weights.keys())
+        weights = list(post_type_weights.values())
         
         return random.choices(types, weights=weights)[0]
     
-    def _post_generated_content(self, post_type: str) -> bool:
+    def _generate_candidate(self, post_type: str, account: AccountPublisher) -> Tuple[Optional[str], str]:
+        """
+        Genera un contenido candidato en el idioma de la cuenta, con IA si está disponible
+        
+        Args:
+            post_type: Tipo de contenido a generar
+            account: Cuenta que lo publicará
+            
+        Returns:
+            Tupla (contenido o None, nombre del generador)
+        """
+        if Config.USE_AI_CONTENT and account.ai_generator.is_available():
+            logger.info(f"🤖 Generando contenido con IA: {post_type}")
+            tweet_content = account.ai_generator.generate_content(post_type)
+            if tweet_content:
+                logger.info("✅ Contenido generado con IA")
+                return tweet_content, "AIContentGenerator"
+            logger.warning("⚠️ IA no pudo generar contenido")
+        
+        # Si IA no está disponible o falló, usar generador tradicional
+        logger.info(f"📝 Generando contenido tradicional: {post_type}")
+        return account.content_generator.generate_content(post_type), "ContentGenerator"
+    
+    def _post_generated_content(self, post_type: str, account: AccountPublisher = None) -> bool:
         """
         Publica contenido generado (hacks, protips, etc.)
         
         Args:
             post_type: Tipo de contenido a generar
+            account: Cuenta que publica (por defecto la principal)
             
         Returns:
             True si se publicó exitosamente, False en caso contrario
         """
+        account = account or self.accounts[0]
         try:
-            # Intentar generar con IA primero si está disponible
+            # No gastar llamadas de IA si no se va a poder publicar
+            if self._post_quota_exhausted(account):
+                return False
+            
+            # Generar contenido evitando repetir lo publicado dentro de la ventana
             tweet_content = None
-            source = "ContentGenerator"
-            
-            if Config.USE_AI_CONTENT and self.ai_generator.is_available():
-                logger.info(f"🤖 Generando contenido con IA: {post_type}")
-                logger.info(f"🔧 USE_AI_CONTENT: {Config.USE_AI_CONTENT}")
-                logger.info(f"🔧 AI disponible: {self.ai_generator.is_available()}")
-                tweet_content = self.ai_generator.generate_content(post_type)
-                if tweet_content:
-                    source = "AIContentGenerator"
-                    logger.info("✅ Contenido generado con IA")
-                else:
-                    logger.warning("⚠️ IA no pudo generar contenido")
+            source = None
+            content_hash = None
             
-            # Si IA no está disponible o falló, usar generador tradicional
-            if not tweet_content:
-                logger.info(f"📝 Generando contenido tradicional: {post_type}")
-                tweet_content = self.content_generator.generate_content(post_type)
+            for _ in range(Config.GENERATED_MAX_ATTEMPTS):
+                candidate, candidate_source = self._generate_candidate(post_type, account)
+                
+                if not candidate:
+                    break
+                
+                candidate_hash = f"generated_{fingerprint_text(candidate)}"
+                if self.writer.was_processed_since(candidate_hash, days=Config.GENERATED_REPOST_WINDOW_DAYS):
+                    logger.info(f"🔁 Contenido {post_type} ya publicado en los últimos "
+                                f"{Config.GENERATED_REPOST_WINDOW_DAYS} días, regenerando...")
+                    continue
+                
+                tweet_content, source, content_hash = candidate, candidate_source, candidate_hash
+                break
             
             if not tweet_content:
-                logger.warning(f"⚠️ No se pudo generar contenido para {post_type}")
+                logger.warning(f"⚠️ No se pudo generar contenido nuevo para {post_type}")
                 return False
             
             # Verificar que el contenido no esté vacío
-            if not tweet_content or len(tweet_content.strip()) < 10:
+            if len(tweet_content.strip()) < 10:
                 logger.error("❌ Contenido generado muy corto o vacío")
                 return False
             
-            # Publicar tweet
-            success = self.twitter.post_tweet(tweet_content)
-            
-            if success:
-                # Marcar como procesado con hash único
-                import datetime
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                content_hash = f"generated_{post_type}_{timestamp}_{hash(tweet_content)}"
-                self.db.save_processed_content(
-                    content_hash=content_hash,
-                    source=source,
-                    source_url="",
-                    title=f"Generated {post_type} - {timestamp}",
-                    summary=tweet_content[:200] + "..." if len(tweet_content) > 200 else tweet_content
-                )
-                
+            # Publicar tweet (el resto se completa en _on_tweet_sent)
+            outcome = self._publish_tweet(tweet_content, {
+                'post_type': post_type,
+                'source': source,
+                'source_url': "",
+                'language': account.content_generator.language,
+                'generated': {
+                    'content_hash': content_hash,
+                    'title': f"Generated {post_type}",
+                    'summary': tweet_content[:200] + "..." if len(tweet_content) > 200 else tweet_content
+                }
+            }, account)
+            
+            if outcome == 'sent':
                 logger.success(f"✅ Tweet generado publicado exitosamente: {post_type} ({source})")
-                self.stats['tweets_published'] += 1
                 return True
-            else:
-                logger.error("❌ Error al publicar tweet generado")
-                return False
+            return self._report_outcome(outcome, "Tweet generado")
                 
         except Exception as e:
             logger.error(f"❌ Error en _post_generated_content: {e}")
@@ -0,0 +1,295 @@
+"""
+Módulo de deduplicación de contenido para el bot ZTech
+Detecta noticias casi duplicadas entre distintas fuentes usando SimHash
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+SIMHASH_BITS = 64
+
+# Palabras vacías frecuentes en inglés y español que no aportan al tema
+STOPWORDS = {
+    'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'is',
+    'are', 'was', 'its', 'it', 'this', 'that', 'by', 'at', 'as', 'from', 'be',
+    'el', 'la', 'los', 'las', 'un', 'una', 'y', 'o', 'de', 'del', 'en', 'con',
+    'por', 'para', 'que', 'se', 'su', 'sus', 'al', 'es', 'lo', 'como', 'mas'
+}
+
+
+# Palabras frecuentes que distinguen el español del inglés en textos cortos
+_LANGUAGE_MARKERS = {
+    'es': {'el', 'la', 'los', 'las', 'de', 'del', 'que', 'y', 'en', 'un', 'una', 'para',
+           'con', 'por', 'es', 'su', 'al', 'lo', 'como', 'mas', 'pero', 'tu', 'te', 'nuevo'},
+    'en': {'the', 'of', 'and', 'to', 'in', 'is', 'for', 'with', 'on', 'that', 'this',
+           'it', 'you', 'your', 'are', 'was', 'new', 'how', 'why', 'what', 'from'},
+}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza texto para comparación: minúsculas, sin acentos, sin HTML
+    ni puntuación y con espacios colapsados
+
+    Args:
+        text: Texto a normalizar
+
+    Returns:
+        Texto normalizado
+    """
+    if not text:
+        return ""
+
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'https?://\S+', ' ', text)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide texto normalizado en tokens significativos
+
+    Args:
+        text: Texto a tokenizar
+
+    Returns:
+        Lista de tokens sin palabras vacías
+    """
+    return [t for t in normalize_text(text).split() if t not in STOPWORDS and len(t) > 1]
+
+
+# Parámetros de seguimiento que no cambian el artículo al que apunta un enlace
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'cmpid', 'ncid', 'sr_share'}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normaliza un enlace para reconocer el mismo artículo con distintas URLs
+
+    Quita el esquema, el prefijo www., el fragmento, la barra final y los
+    parámetros de seguimiento (utm_*, fbclid...), y ordena el resto.
+
+    Args:
+        url: Enlace del artículo
+
+    Returns:
+        Enlace canónico, o cadena vacía si no hay enlace
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit(('', host, parts.path.rstrip('/'), urlencode(query), '')).lstrip('/')
+
+
+def guess_language(text: str, default: str = 'es') -> str:
+    """
+    Estima si un texto está en español o en inglés por sus palabras frecuentes
+
+    Args:
+        text: Texto a analizar
+        default: Idioma cuando no hay palabras suficientes para decidir
+
+    Returns:
+        Código del idioma ('es' o 'en')
+    """
+    words = normalize_text(text).split()
+    scores = {language: sum(word in markers for word in words)
+              for language, markers in _LANGUAGE_MARKERS.items()}
+    if scores['es'] == scores['en']:
+        return default
+    return max(scores, key=scores.get)
+
+
+def fingerprint_text(text: str) -> str:
+    """
+    Calcula una huella estable (igual entre procesos y ejecuciones) de un texto
+
+    Ignora hashtags, emojis, puntuación, mayúsculas y acentos, de modo que
+    las variaciones cosméticas de un mismo contenido producen la misma huella.
+
+    Args:
+        text: Texto a identificar
+
+    Returns:
+        Huella BLAKE2b de 128 bits en hexadecimal
+    """
+    text = re.sub(r'#[\w:]+', ' ', text or '')
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _hash64(feature: str) -> int:
+    """Hash estable de 64 bits para una característica"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def compute_simhash(text: str) -> int:
+    """
+    Calcula la huella SimHash de 64 bits de un texto
+
+    Cada palabra significativa es una característica ponderada por su
+    frecuencia, de modo que pequeñas diferencias de redacción solo cambian
+    unos pocos bits.
+
+    Args:
+        text: Texto (normalmente título + resumen)
+
+    Returns:
+        Huella SimHash como entero sin signo de 64 bits
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return 0
+
+    features: Dict[str, int] = {}
+    for token in tokens:
+        features[token] = features.get(token, 0) + 1
+
+    vector = [0] * SIMHASH_BITS
+    for feature, weight in features.items():
+        feature_hash = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            if feature_hash >> bit & 1:
+                vector[bit] += weight
+            else:
+                vector[bit] -= weight
+
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if vector[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Número de bits distintos entre dos huellas"""
+    return bin(first ^ second).count('1')
+
+
+def simhash_to_db(fingerprint: int) -> int:
+    """Convierte una huella sin signo al rango INTEGER con signo de SQLite"""
+    return fingerprint - (1 << SIMHASH_BITS) if fingerprint >= 1 << (SIMHASH_BITS - 1) else fingerprint
+
+
+def simhash_from_db(value: int) -> int:
+    """Convierte un INTEGER con signo de la base de datos a huella sin signo"""
+    return value + (1 << SIMHASH_BITS) if value < 0 else value
+
+
+class SimHashIndex:
+    """
+    Índice por bandas para buscar huellas SimHash cercanas
+
+    Divide cada huella en ``max_distance + 1`` bandas. Por el principio del
+    palomar, dos huellas a distancia de Hamming <= max_distance coinciden
+    exactamente en al menos una banda, así que solo se comparan los
+    candidatos que comparten alguna banda en lugar de todo el histórico.
+    """
+
+    def __init__(self, max_distance: int = 8):
+        """
+        Inicializa el índice
+
+        Args:
+            max_distance: Distancia de Hamming máxima para considerar duplicado
+        """
+        self.max_distance = max_distance
+        self.num_bands = max_distance + 1
+        self.band_bits = [SIMHASH_BITS // self.num_bands] * self.num_bands
+        for i in range(SIMHASH_BITS % self.num_bands):
+            self.band_bits[i] += 1
+        self.bands: List[Dict[int, Set[str]]] = [{} for _ in range(self.num_bands)]
+        self.fingerprints: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        """Extrae el valor de cada banda de la huella"""
+        keys = []
+        shift = 0
+        for bits in self.band_bits:
+            keys.append(fingerprint >> shift & ((1 << bits) - 1))
+            shift += bits
+        return keys
+
+    def add(self, key: str, fingerprint: int):
+        """
+        Agrega una huella al índice
+
+        Args:
+            key: Identificador del contenido (p. ej. content_hash)
+            fingerprint: Huella SimHash
+        """
+        if key in self.fingerprints:
+            self.remove(key)
+        self.fingerprints[key] = fingerprint
+        for band, band_key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(band_key, set()).add(key)
+
+    def add_many(self, items: Iterable[Tuple[str, int]]):
+        """Agrega varias huellas (key, fingerprint) al índice"""
+        for key, fingerprint in items:
+            self.add(key, fingerprint)
+
+    def remove(self, key: str):
+        """Elimina una huella del índice"""
+        fingerprint = self.fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for band, band_key in zip(self.bands, self._band_keys(fingerprint)):
+            bucket = band.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del band[band_key]
+
+    def find_near_duplicates(self, fingerprint: int) -> List[Tuple[str, int]]:
+        """
+        Busca huellas cercanas a la dada
+
+        Args:
+            fingerprint: Huella SimHash a consultar
+
+        Returns:
+            Lista de (key, distancia) ordenada por distancia
+        """
+        candidates: Set[str] = set()
+        for band, band_key in zip(self.bands, self._band_keys(fingerprint)):
+            candidates.update(band.get(band_key, ()))
+
+        matches = []
+        for key in candidates:
+            distance = hamming_distance(fingerprint, self.fingerprints[key])
+            if distance <= self.max_distance:
+                matches.append((key, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def is_near_duplicate(self, fingerprint: int) -> Optional[str]:
+        """
+        Indica si la huella tiene un duplicado cercano en el índice
+
+        Args:
+            fingerprint: Huella SimHash a consultar
+
+        Returns:
+            Key del duplicado más cercano o None
+        """
+        if not fingerprint:
+            return None
+        matches = self.find_near_duplicates(fingerprint)
+        return matches[0][0] if matches else None
@@ -8,6 +8,13 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from loguru import logger
 from config import Config
+from thread_publisher import split_thread
+
+# Encabezado del tweet curado por idioma
+CURATED_HEADERS = {
+    'es': "📚 Resumen tecnológico del día:\n\n",
+    'en': "📚 Today's tech roundup:\n\n",
+}
 
 class ContentProcessor:
     """Procesador de contenido para generar tweets"""
@@ -149,18 +156,19 @@ class ContentProcessor:
         
         return tweet
     
-    def _create_simple_tweet(self, title: str, link: str, source: str) -> str:
+    def _create_simple_tweet(self, title: str, link: str, source: str, language: str = 'es') -> str:
         """Crea un tweet simple cuando el contenido es muy largo"""
         clean_title = self._clean_title(title)
+        hashtags = self._get_random_hashtags(language)
         
         # Calcular espacio disponible
-        base_length = len(link) + len(self._get_random_hashtags()) + 10
+        base_length = len(link) + len(hashtags) + 10
         available_length = self.max_length - base_length
         
         if len(clean_title) > available_length:
             clean_title = clean_title[:available_length-3] + "..."
         
-        tweet = f"📰 {clean_title}\n\n{link}\n\n{self._get_random_hashtags()}"
+        tweet = f"📰 {clean_title}\n\n{link}\n\n{hashtags}"
         
         return tweet
     
@@ -198,14 +206,18 @@ class ContentProcessor:
         
         return summary.strip()
     
-    def _get_random_hashtags(self) -> str:
-        """Obtiene hashtags aleatorios"""
+    def _get_random_hashtags(self, language: str = 'es') -> str:
+        """Obtiene hashtags aleatorios en el idioma indicado"""
         # Hashtags base siempre incluidos
-        base_hashtags = ['#tecnologia', '#innovacion']
+        if language == 'en':
+            base_hashtags = ['#technology', '#innovation']
+        else:
+            base_hashtags = ['#tecnologia', '#innovacion']
         
         # Hashtags adicionales aleatorios
         additional_hashtags = [
-            '#AI', '#programacion', '#desarrollo', '#startup', '#cybersecurity',
+            '#AI', '#programming' if language == 'en' else '#programacion',
+            '#development' if language == 'en' else '#desarrollo', '#startup', '#cybersecurity',
             '#datascience', '#machinelearning', '#blockchain', '#cloud', '#devops',
             '#webdev', '#mobile', '#gaming', '#fintech', '#edtech', '#healthtech'
         ]
@@ -222,23 +234,15 @@ class ContentProcessor:
         
         Args:
             articles: Lista de artículos
-            max_tweets: Número máximo de tweets en el hilo
+            max_tweets: Número máximo de artículos en el hilo
             
         Returns:
-            Lista de tweets para el hilo
+            Lista de tweets para el hilo (numerados si hay más de uno)
         """
         if not articles:
             return []
         
-        tweets = []
-        
-        # Primer tweet (introducción)
-        intro_tweet = f"🧵 Hilo de noticias tecnológicas de hoy:\n\n"
-        
-        # Agregar artículos hasta llenar el primer tweet
-        current_tweet = intro_tweet
-        article_count = 0
-        
+        items = []
         for article in articles[:max_tweets]:
             title = self._clean_title(article.get('title', ''))
             link = article.get('link', '')
@@ -247,37 +251,36 @@ class ContentProcessor:
                 continue
             
             # Formato: "1. Título - Enlace"
-            article_text = f"{article_count + 1}. {title}\n{link}\n\n"
-            
-            if len(current_tweet) + len(article_text) + len(self._get_random_hashtags()) < self.max_length:
-                current_tweet += article_text
-                article_count += 1
-            else:
-                break
+            items.append(f"{len(items) + 1}. {title}\n{link}")
         
-        if article_count > 0:
-            current_tweet += self._get_random_hashtags()
-            tweets.append(current_tweet)
+        if not items:
+            return []
         
-        return tweets
+        # Introducción, un bloque por artículo y hashtags; el hilo se corta entre bloques
+        text = "🧵 Hilo de noticias tecnológicas de hoy:\n\n" + "\n\n".join(items)
+        text += "\n\n" + self._get_random_hashtags()
+        return split_thread(text, self.max_length, max_parts=Config.THREAD_MAX_PARTS)
     
-    def create_curated_tweet(self, articles: List[Dict]) -> Optional[str]:
+    def create_curated_tweet(self, stories: List[Dict], language: str = 'es') -> Optional[str]:
         """
-        Crea un tweet curado con múltiples artículos
+        Crea un tweet curado con las historias más populares
         
         Args:
-            articles: Lista de artículos
+            stories: Lista de historias agrupadas (ver StoryClusterer.cluster).
+                También acepta artículos sueltos, tratados como historias de tamaño 1
+            language: Idioma del encabezado y los hashtags ('es' o 'en')
             
         Returns:
             Tweet curado o None
         """
-        if not articles:
+        if not stories:
             return None
         
-        # Seleccionar los 3 artículos más relevantes
-        selected_articles = articles[:3]
+        # Seleccionar las 3 historias cubiertas por más fuentes
+        ranked_stories = sorted(stories, key=lambda story: story.get('size', 1), reverse=True)
+        selected_articles = [story.get('representative', story) for story in ranked_stories[:3]]
         
-        tweet = "📚 Resumen tecnológico del día:\n\n"
+        tweet = CURATED_HEADERS.get(language, CURATED_HEADERS['es'])
         
         for i, article in enumerate(selected_articles, 1):
             title = self._clean_title(article.get('title', ''))
@@ -286,13 +289,18 @@ class ContentProcessor:
             if title and link:
                 tweet += f"{i}. {title}\n{link}\n\n"
         
-        tweet += self._get_random_hashtags()
+        tweet += self._get_random_hashtags(language)
         
         if len(tweet) <= self.max_length:
             return tweet
-        else:
-            # Si es muy largo, usar solo el primer artículo
+        elif language == 'es':
+            # Si es muy largo, usar solo la historia principal
             return self.process_article_to_tweet(selected_articles[0])
+        else:
+            # Las plantillas de process_article_to_tweet están en español
+            article = selected_articles[0]
+            return self._create_simple_tweet(article.get('title', ''), article.get('link', ''),
+                                             article.get('source', ''), language)
     
     def validate_tweet(self, tweet: str) -> bool:
         """
@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from loguru import logger
 from config import Config
+from content_dedup import compute_simhash
+from story_clustering import StoryClusterer
 
 class ContentSource:
     """Clase base para fuentes de contenido"""
@@ -32,6 +34,9 @@ class ContentSource:
         """
         Genera hash único para el contenido
         
+        MD5 ya es estable entre procesos y es la clave con la que están
+        guardados los artículos procesados, así que no se cambia.
+        
         Args:
             content: Contenido a hashear
             
@@ -40,6 +45,19 @@ class ContentSource:
         """
         return hashlib.md5(content.encode('utf-8')).hexdigest()
     
+    def generate_simhash(self, title: str, summary: str) -> int:
+        """
+        Genera la huella SimHash de título + resumen normalizados
+        
+        Args:
+            title: Título del artículo
+            summary: Resumen del artículo
+            
+        Returns:
+            Huella SimHash de 64 bits
+        """
+        return compute_simhash(f"{title or ''} {summary or ''}")
+    
     def clean_text(self, text: str) -> str:
         """
         Limpia y normaliza texto
@@ -72,18 +90,79 @@ class RSSContentSource(ContentSource):
         self.session.headers.update({
             'User-Agent': 'ZTech Bot 1.0 (Educational Content Aggregator)'
         })
+        # Validadores HTTP y fecha del artículo más reciente ya visto
+        self.etag = None
+        self.last_modified = None
+        self.watermark = None
+        # Hashes de los artículos ya vistos con fecha igual a la marca de agua
+        self.watermark_hashes = set()
+        # Estado de la última descarga, pendiente hasta que se guarde (ver commit_state)
+        self._pending = None
+    
+    def get_state(self) -> Dict:
+        """
+        Obtiene el estado incremental del feed para guardarlo
+        
+        Incluye lo avanzado por la última descarga aunque aún no se haya
+        confirmado con commit_state.
+        
+        Returns:
+            Diccionario con etag, last_modified y watermark (UTC como texto)
+        """
+        state = self._pending or {'etag': self.etag, 'last_modified': self.last_modified,
+                                  'watermark': self.watermark}
+        return dict(state, watermark=state['watermark'].strftime('%Y-%m-%d %H:%M:%S') if state['watermark'] else None)
+    
+    def commit_state(self):
+        """Aplica el estado de la última descarga una vez guardado (o procesado) su contenido"""
+        if self._pending:
+            self.etag = self._pending['etag']
+            self.last_modified = self._pending['last_modified']
+            self.watermark = self._pending['watermark']
+            self.watermark_hashes = self._pending['watermark_hashes']
+            self._pending = None
+    
+    def load_state(self, state: Dict):
+        """
+        Restaura el estado incremental guardado del feed
+        
+        Args:
+            state: Diccionario devuelto por get_state
+        """
+        self.etag = state.get('etag')
+        self.last_modified = state.get('last_modified')
+        watermark = state.get('watermark')
+        self.watermark = datetime.fromisoformat(str(watermark)) if watermark else None
+        self.watermark_hashes = set()
+        self._pending = None
     
     def fetch_content(self) -> List[Dict]:
         """
         Obtiene contenido del feed RSS
         
+        Solo descarga el feed si cambió (If-None-Match / If-Modified-Since) y
+        solo devuelve los artículos que no son anteriores a la marca de agua
+        (los de la misma fecha se distinguen por su hash). Los validadores y
+        la marca de agua nuevos quedan pendientes hasta commit_state, así que
+        si el contenido no llega a guardarse la siguiente descarga lo repite.
+        
         Returns:
-            Lista de artículos del RSS
+            Lista de artículos nuevos del RSS
         """
         try:
             logger.info(f"📡 Obteniendo contenido de RSS: {self.name}")
             
-            response = self.session.get(self.feed_url, timeout=30)
+            headers = {}
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+            
+            response = self.session.get(self.feed_url, timeout=30, headers=headers)
+            if response.status_code == 304:
+                logger.info(f"💤 Feed sin cambios: {self.name}")
+                self.last_fetch = datetime.now()
+                return []
             response.raise_for_status()
             
             feed = feedparser.parse(response.content)
@@ -103,6 +182,9 @@ class RSSContentSource(ContentSource):
                         'source_url': self.feed_url,
                         'content_hash': self.generate_content_hash(
                             entry.get('title', '') + entry.get('summary', '')
+                        ),
+                        'simhash': self.generate_simhash(
+                            entry.get('title', ''), entry.get('summary', '')
                         )
                     }
                     
@@ -113,6 +195,23 @@ class RSSContentSource(ContentSource):
                     logger.warning(f"⚠️ Error procesando artículo RSS: {e}")
                     continue
             
+            # Descartar lo ya visto y preparar la nueva marca de agua
+            articles = [article for article in articles if self._is_after_watermark(article)]
+            watermark, watermark_hashes = self.watermark, set(self.watermark_hashes)
+            for article in articles:
+                published = self._naive(article['published']) if article.get('published') else None
+                if not published or (watermark and published < watermark):
+                    continue
+                if published != watermark:
+                    watermark, watermark_hashes = published, set()
+                watermark_hashes.add(article['content_hash'])
+            self._pending = {
+                'etag': response.headers.get('ETag') or self.etag,
+                'last_modified': response.headers.get('Last-Modified') or self.last_modified,
+                'watermark': watermark,
+                'watermark_hashes': watermark_hashes,
+            }
+            
             self.last_fetch = datetime.now()
             logger.info(f"✅ Obtenidos {len(articles)} artículos de {self.name}")
             return articles
@@ -124,6 +223,21 @@ class RSSContentSource(ContentSource):
             logger.error(f"❌ Error inesperado en RSS {self.name}: {e}")
             return []
     
+    def _is_after_watermark(self, article: Dict) -> bool:
+        """Verifica si un artículo no es anterior al más reciente ya visto (ni es ese mismo)"""
+        published = article.get('published')
+        if not (self.watermark and published):
+            return True
+        published = self._naive(published)
+        if published == self.watermark:
+            return article['content_hash'] not in self.watermark_hashes
+        return published > self.watermark
+    
+    @staticmethod
+    def _naive(moment: datetime) -> datetime:
+        """Quita la zona horaria como hace el agregador al comparar fechas"""
+        return moment.replace(tzinfo=None) if moment.tzinfo is not None else moment
+    
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """
         Parsea fecha de string a datetime
@@ -224,6 +338,9 @@ class NewsAPIContentSource(ContentSource):
                         'source_url': article.get('url', ''),
                         'content_hash': self.generate_content_hash(
                             article.get('title', '') + article.get('description', '')
+                        ),
+                        'simhash': self.generate_simhash(
+                            article.get('title', ''), article.get('description', '')
                         )
                     }
                     
@@ -365,6 +482,9 @@ class RedditContentSource(ContentSource):
                                 'source_url': f"https://reddit.com/r/{subreddit}",
                                 'content_hash': self.generate_content_hash(
                                     post_data.get('title', '') + post_data.get('selftext', '')
+                                ),
+                                'simhash': self.generate_simhash(
+                                    post_data.get('title', ''), post_data.get('selftext', '')[:500]
                                 )
                             }
                             
@@ -412,6 +532,11 @@ class ContentAggregator:
     
     def __init__(self):
         self.sources = []
+        self.clusterer = StoryClusterer(
+            threshold=Config.STORY_CLUSTER_THRESHOLD,
+            num_perm=Config.MINHASH_PERMUTATIONS,
+            bands=Config.LSH_BANDS
+        )
         self._initialize_sources()
     
     def _initialize_sources(self):
@@ -433,6 +558,35 @@ class ContentAggregator:
         
         logger.info(f"📚 Inicializadas {len(self.sources)} fuentes de contenido")
     
+    def get_feed_states(self) -> Dict[str, Dict]:
+        """
+        Obtiene el estado incremental de los feeds RSS
+        
+        Returns:
+            Diccionario feed_url -> estado (ver RSSContentSource.get_state)
+        """
+        return {
+            source.feed_url: source.get_state()
+            for source in self.sources if isinstance(source, RSSContentSource)
+        }
+    
+    def commit_feed_states(self):
+        """Confirma el estado de la última descarga de los feeds RSS, ya guardado"""
+        for source in self.sources:
+            if isinstance(source, RSSContentSource):
+                source.commit_state()
+    
+    def load_feed_states(self, states: Dict[str, Dict]):
+        """
+        Restaura el estado incremental guardado de los feeds RSS
+        
+        Args:
+            states: Diccionario feed_url -> estado
+        """
+        for source in self.sources:
+            if isinstance(source, RSSContentSource) and source.feed_url in states:
+                source.load_state(states[source.feed_url])
+    
     def fetch_all_content(self) -> List[Dict]:
         """
         Obtiene contenido de todas las fuentes
@@ -490,3 +644,15 @@ class ContentAggregator:
         
         logger.info(f"🆕 Contenido fresco ({hours}h): {len(fresh_content)} artículos")
         return fresh_content
+    
+    def get_fresh_stories(self, hours: int = 24) -> List[Dict]:
+        """
+        Obtiene contenido fresco agrupado en historias
+        
+        Args:
+            hours: Número de horas hacia atrás
+            
+        Returns:
+            Lista de historias ordenadas por número de artículos
+        """
+        return self.clusterer.cluster(self.get_fresh_content(hours=hours))
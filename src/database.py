@@ -2,59 +2,199 @@
 Módulo de base de datos para el bot de Twitter ZTech
 Maneja el almacenamiento de tweets publicados y contenido procesado
 """
-import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 from loguru import logger
-from pathlib import Path
+
+from config import Config
+from content_dedup import canonical_url, simhash_to_db, simhash_from_db
+from storage_backends import create_backend
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("⚠️ NumPy no disponible, las consultas de engagement como arrays no funcionarán")
+
+# Claves por consulta en las verificaciones en lote (cada clave usa tres parámetros)
+_KEY_CHUNK_SIZE = 400
+
+# Columnas de engagement_samples y su clave en public_metrics de la API de Twitter
+ENGAGEMENT_METRICS = {
+    'likes': 'like_count',
+    'retweets': 'retweet_count',
+    'replies': 'reply_count',
+    'quotes': 'quote_count',
+    'impressions': 'impression_count',
+}
+
+_SAMPLE_INSERT = f"""
+    INSERT INTO engagement_samples 
+    (tweet_id, sampled_at, {', '.join(ENGAGEMENT_METRICS)})
+    VALUES (?, ?, {', '.join('?' * len(ENGAGEMENT_METRICS))})
+"""
+
+# Dos muestras del mismo tweet en el mismo segundo: queda la última
+_SAMPLE_UPSERT = _SAMPLE_INSERT + f"""
+    ON CONFLICT (tweet_id, sampled_at) DO UPDATE SET 
+    {', '.join(f'{column} = excluded.{column}' for column in ENGAGEMENT_METRICS)}
+"""
+
+
+# Tablas de agregados por granularidad y longitud del prefijo de fecha de cada cubo
+ROLLUP_TABLES = {
+    'hourly': ('rollup_hourly', 13),
+    'daily': ('rollup_daily', 10),
+}
+
+ROLLUP_DIMENSIONS = ('post_type', 'source', 'language')
+
+# Contadores de los agregados: tweets publicados y la última muestra de cada métrica
+ROLLUP_COUNTERS = ('tweets',) + tuple(ENGAGEMENT_METRICS)
+
+# Dimensiones por las que se puede agrupar get_rollup_stats
+_ROLLUP_GROUPS = {
+    'bucket': 'bucket',
+    'post_type': 'post_type',
+    'source': 'source',
+    'language': 'language',
+    'hour': 'substr(bucket, 12, 2)',
+}
+
+
+# Estados de content_candidates
+CANDIDATE_STATES = ('pending', 'claimed', 'posted', 'expired')
+
+_CANDIDATE_COLUMNS = "id, content_hash, story, tweet_text, source, source_url, priority, expires_at, language"
+
+# Estados de outbox
+OUTBOX_STATES = ('pending', 'sending', 'sent', 'failed')
+
+_OUTBOX_COLUMNS = "id, fingerprint, content, payload, attempts, ambiguous, created_at, account"
+
+
+def _utc_timestamp(moment: datetime) -> str:
+    """Formatea una fecha UTC como los valores de CURRENT_TIMESTAMP de SQLite"""
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def metrics_to_sample(public_metrics: Dict) -> Tuple[Optional[int], ...]:
+    """
+    Convierte public_metrics de la API en los valores de las columnas de engagement_samples
+    
+    Args:
+        public_metrics: Métricas públicas del tweet (like_count, retweet_count, ...)
+        
+    Returns:
+        Tupla con likes, retweets, replies, quotes e impressions
+    """
+    return tuple(public_metrics.get(key) for key in ENGAGEMENT_METRICS.values())
+
+
+def row_to_dict(row) -> Dict:
+    """
+    Convierte una fila en diccionario con fechas en el mismo formato en todos los backends
+    
+    Args:
+        row: Fila de un cursor con dict_rows=True
+        
+    Returns:
+        Diccionario con las columnas de la fila
+    """
+    result = dict(row)
+    for key, value in result.items():
+        if isinstance(value, datetime):
+            result[key] = _utc_timestamp(value)
+        elif isinstance(value, date):
+            result[key] = value.isoformat()
+    return result
+
 
 class DatabaseManager:
-    """Gestor de base de datos SQLite para el bot"""
+    """Gestor de base de datos del bot (SQLite o PostgreSQL según DATABASE_URL)"""
     
-    def __init__(self, db_path: str = "ztech_bot.db"):
+    def __init__(self, database_url: str = None):
         """
         Inicializa el gestor de base de datos
         
         Args:
-            db_path: Ruta al archivo de base de datos SQLite
+            database_url: URL de la base de datos (sqlite:///ruta.db, postgresql://...)
+                o ruta a un archivo SQLite. Por defecto Config.DATABASE_URL
         """
-        self.db_path = db_path
+        self.database_url = database_url or Config.DATABASE_URL
+        self.backend = create_backend(
+            self.database_url,
+            pool_min=Config.DATABASE_POOL_MIN,
+            pool_max=Config.DATABASE_POOL_MAX
+        )
         self.init_database()
     
+    def close(self):
+        """Cierra las conexiones persistentes a la base de datos"""
+        self.backend.close()
+    
+    def release_thread(self):
+        """Cierra la conexión del hilo actual (para hilos que terminan)"""
+        self.backend.release_thread()
+    
+    def sync(self):
+        """Fuerza a disco las escrituras confirmadas"""
+        try:
+            self.backend.sync()
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al sincronizar la base de datos: {e}")
+    
+    def reclaim_space(self, pages: int = 0):
+        """
+        Devuelve al sistema el espacio de las filas borradas
+        
+        Args:
+            pages: Páginas a liberar (0 para todas las libres)
+        """
+        try:
+            self.backend.reclaim_space(pages)
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al liberar espacio: {e}")
+    
     def init_database(self):
         """Inicializa las tablas de la base de datos"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            types = self.backend.column_types
+            
+            with self.backend.cursor() as cursor:
                 
                 # Tabla de tweets publicados
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS published_tweets (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id {pk},
                         tweet_id TEXT UNIQUE,
                         content TEXT NOT NULL,
                         source TEXT,
                         source_url TEXT,
                         published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         engagement_data TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        post_type TEXT,
+                        language TEXT
                     )
-                """)
+                """.format(**types))
                 
                 # Tabla de contenido procesado
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS processed_content (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id {pk},
                         content_hash TEXT UNIQUE,
                         source TEXT NOT NULL,
                         source_url TEXT,
                         title TEXT,
                         summary TEXT,
                         processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        used BOOLEAN DEFAULT FALSE
+                        used BOOLEAN DEFAULT FALSE,
+                        simhash {bigint}
                     )
-                """)
+                """.format(**types))
                 
                 # Tabla de configuración
                 cursor.execute("""
@@ -68,24 +208,438 @@ class DatabaseManager:
                 # Tabla de estadísticas
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS bot_stats (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id {pk},
                         date DATE,
                         tweets_published INTEGER DEFAULT 0,
                         content_processed INTEGER DEFAULT 0,
                         errors_count INTEGER DEFAULT 0,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
-                """)
+                """.format(**types))
                 
-                conn.commit()
-                logger.info("✅ Base de datos inicializada correctamente")
+                # Actualizar el esquema de bases de datos existentes
+                self._migrate(cursor)
                 
-        except sqlite3.Error as e:
+                logger.info(f"✅ Base de datos inicializada correctamente: {self.backend}")
+                
+        except self.backend.errors as e:
             logger.error(f"❌ Error al inicializar la base de datos: {e}")
             raise
     
+    def _migrate(self, cursor):
+        """
+        Aplica en orden las migraciones pendientes según la versión del esquema
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        current_version = self.backend.get_schema_version(cursor)
+        
+        migrations = [
+            self._migration_1_indexes,
+            self._migration_2_engagement_samples,
+            self._migration_3_rollups,
+            self._migration_4_post_type_index,
+            self._migration_5_content_candidates,
+            self._migration_6_links_and_feed_state,
+            self._migration_7_outbox,
+            self._migration_8_metrics_schedule,
+            self._migration_9_media_cache,
+            self._migration_10_rate_limits,
+            self._migration_11_accounts,
+            self._migration_12_drop_source_url_index,
+            self._migration_13_unique_engagement_samples,
+        ]
+        
+        for version, migration in enumerate(migrations, 1):
+            if current_version < version:
+                migration(cursor)
+                self.backend.set_schema_version(cursor, version)
+                logger.info(f"🔧 Esquema de base de datos actualizado a la versión {version}")
+    
+    def _migration_1_indexes(self, cursor):
+        """
+        Versión 1: columna simhash, índices por fecha y fecha única en bot_stats
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        self._ensure_column(cursor, 'processed_content', 'simhash', self.backend.column_types['bigint'])
+        
+        # Fusionar filas duplicadas de bot_stats antes de exigir fecha única
+        cursor.execute("""
+            UPDATE bot_stats SET
+                tweets_published = (SELECT SUM(b.tweets_published) FROM bot_stats b WHERE b.date = bot_stats.date),
+                content_processed = (SELECT SUM(b.content_processed) FROM bot_stats b WHERE b.date = bot_stats.date),
+                errors_count = (SELECT SUM(b.errors_count) FROM bot_stats b WHERE b.date = bot_stats.date)
+            WHERE id IN (
+                SELECT MIN(id) FROM bot_stats GROUP BY date HAVING COUNT(*) > 1
+            )
+        """)
+        cursor.execute("""
+            DELETE FROM bot_stats 
+            WHERE id NOT IN (SELECT MIN(id) FROM bot_stats GROUP BY date)
+        """)
+        
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bot_stats_date ON bot_stats(date)")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_published_tweets_published_at 
+            ON published_tweets(published_at)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_processed_content_processed_at 
+            ON processed_content(processed_at)
+        """)
+    
+    def _migration_2_engagement_samples(self, cursor):
+        """
+        Versión 2: serie temporal de engagement en columnas enteras
+        
+        Crea engagement_samples y convierte los JSON de published_tweets.engagement_data
+        en la primera muestra de cada tweet.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS engagement_samples (
+                id {pk},
+                tweet_id TEXT NOT NULL,
+                sampled_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                likes INTEGER,
+                retweets INTEGER,
+                replies INTEGER,
+                quotes INTEGER,
+                impressions INTEGER
+            )
+        """.format(**self.backend.column_types))
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_engagement_samples_tweet_sampled 
+            ON engagement_samples(tweet_id, sampled_at)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_engagement_samples_sampled_at 
+            ON engagement_samples(sampled_at)
+        """)
+        
+        cursor.execute("""
+            SELECT tweet_id, published_at, engagement_data FROM published_tweets 
+            WHERE engagement_data IS NOT NULL
+        """)
+        samples = []
+        for tweet_id, published_at, engagement_data in cursor.fetchall():
+            try:
+                metrics = json.loads(engagement_data)
+            except ValueError:
+                continue
+            if isinstance(metrics, dict) and metrics:
+                samples.append((tweet_id, published_at) + metrics_to_sample(metrics))
+        
+        if samples:
+            cursor.executemany(_SAMPLE_INSERT, samples)
+            logger.info(f"🔧 {len(samples)} registros de engagement migrados a engagement_samples")
+    
+    def _migration_3_rollups(self, cursor):
+        """
+        Versión 3: dimensiones de publicación y agregados por hora y por día
+        
+        Agrega post_type y language a published_tweets, crea rollup_hourly y
+        rollup_daily y los rellena con los tweets existentes y su última muestra.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        self._ensure_column(cursor, 'published_tweets', 'post_type', 'TEXT')
+        self._ensure_column(cursor, 'published_tweets', 'language', 'TEXT')
+        
+        counters = ',\n'.join(f"                {counter} INTEGER NOT NULL DEFAULT 0" for counter in ROLLUP_COUNTERS)
+        for table, _ in ROLLUP_TABLES.values():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket TEXT NOT NULL,
+                    post_type TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    language TEXT NOT NULL,
+{counters},
+                    PRIMARY KEY (bucket, post_type, source, language)
+                )
+            """)
+        
+        metric_columns = ', '.join(f"s.{column}" for column in ENGAGEMENT_METRICS)
+        cursor.execute(f"""
+            SELECT p.published_at, p.post_type, p.source, p.language, {metric_columns}
+            FROM published_tweets p
+            LEFT JOIN engagement_samples s ON s.id = (
+                SELECT id FROM engagement_samples 
+                WHERE tweet_id = p.tweet_id 
+                ORDER BY sampled_at DESC, id DESC 
+                LIMIT 1
+            )
+        """)
+        increments = [row[:4] + (1,) + tuple(value or 0 for value in row[4:]) for row in cursor.fetchall()]
+        self._bump_rollups(cursor, increments)
+        
+        if increments:
+            logger.info(f"🔧 {len(increments)} tweets agregados en los rollups")
+    
+    def _migration_4_post_type_index(self, cursor):
+        """
+        Versión 4: índice por tipo y fecha para las consultas de recencia
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_published_tweets_type_published_at 
+            ON published_tweets(post_type, published_at)
+        """)
+    
+    def _migration_5_content_candidates(self, cursor):
+        """
+        Versión 5: cola persistente de candidatos a publicar
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS content_candidates (
+                id {pk},
+                content_hash TEXT NOT NULL UNIQUE,
+                story TEXT NOT NULL,
+                tweet_text TEXT,
+                source TEXT,
+                source_url TEXT,
+                priority REAL NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP NOT NULL,
+                claimed_at TIMESTAMP,
+                posted_at TIMESTAMP,
+                tweet_id TEXT
+            )
+        """.format(**self.backend.column_types))
+        # Índice parcial: solo los pendientes, en el orden en que se reclaman
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_content_candidates_pending 
+            ON content_candidates(priority DESC, id) 
+            WHERE status = 'pending'
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_content_candidates_created_at 
+            ON content_candidates(created_at)
+        """)
+    
+    def _migration_6_links_and_feed_state(self, cursor):
+        """
+        Versión 6: enlace canónico de cada artículo y estado de los feeds
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        self._ensure_column(cursor, 'processed_content', 'link', 'TEXT')
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_processed_content_link 
+            ON processed_content(link)
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feed_state (
+                feed_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                watermark TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    
+    def _migration_7_outbox(self, cursor):
+        """
+        Versión 7: bandeja de salida persistente de tweets
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id {pk},
+                fingerprint TEXT NOT NULL,
+                content TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                ambiguous BOOLEAN NOT NULL DEFAULT FALSE,
+                next_attempt_at TIMESTAMP NOT NULL,
+                last_error TEXT,
+                tweet_id TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        """.format(**self.backend.column_types))
+        # Un mismo texto no puede estar dos veces en vuelo (idempotencia del encolado)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_in_flight 
+            ON outbox(fingerprint) 
+            WHERE status IN ('pending', 'sending')
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbox_due 
+            ON outbox(next_attempt_at) 
+            WHERE status = 'pending'
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbox_finished_at 
+            ON outbox(finished_at)
+        """)
+    
+    def _migration_8_metrics_schedule(self, cursor):
+        """
+        Versión 8: próxima muestra de métricas de cada tweet publicado
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        self._ensure_column(cursor, 'published_tweets', 'metrics_due_at', 'TIMESTAMP')
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_published_tweets_metrics_due 
+            ON published_tweets(metrics_due_at)
+        """)
+    
+    def _migration_9_media_cache(self, cursor):
+        """
+        Versión 9: imágenes descargadas y media_id subidos a Twitter
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS media_cache (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                media_id TEXT,
+                media_expires_at TIMESTAMP,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_cache_sha256 
+            ON media_cache(sha256)
+        """)
+    
+    def _migration_10_rate_limits(self, cursor):
+        """
+        Versión 10: último estado de rate limit observado por endpoint
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                endpoint TEXT PRIMARY KEY,
+                quota INTEGER,
+                remaining INTEGER,
+                reset_at {self.backend.column_types['bigint']},
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    
+    def _migration_11_accounts(self, cursor):
+        """
+        Versión 11: varias cuentas en un mismo proceso
+        
+        Los tweets, la bandeja de salida y los rate limits se separan por
+        cuenta ('' = la cuenta de TWITTER_*, dueña de las filas anteriores) y
+        los candidatos guardan su idioma para que cada cuenta tome los suyos.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        self._ensure_column(cursor, 'published_tweets', 'account', "TEXT NOT NULL DEFAULT ''")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_published_tweets_account 
+            ON published_tweets(account, published_at)
+        """)
+        self._ensure_column(cursor, 'content_candidates', 'language', 'TEXT')
+        
+        # El mismo texto puede estar en vuelo en dos cuentas distintas
+        self._ensure_column(cursor, 'outbox', 'account', "TEXT NOT NULL DEFAULT ''")
+        cursor.execute("DROP INDEX IF EXISTS idx_outbox_in_flight")
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_in_flight 
+            ON outbox(account, fingerprint) 
+            WHERE status IN ('pending', 'sending')
+        """)
+        
+        # La clave primaria pasa a ser (account, endpoint): se copia a una tabla nueva
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS rate_limits_by_account (
+                account TEXT NOT NULL DEFAULT '',
+                endpoint TEXT NOT NULL,
+                quota INTEGER,
+                remaining INTEGER,
+                reset_at {self.backend.column_types['bigint']},
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (account, endpoint)
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO rate_limits_by_account (endpoint, quota, remaining, reset_at, updated_at)
+            SELECT endpoint, quota, remaining, reset_at, updated_at FROM rate_limits
+        """)
+        cursor.execute("DROP TABLE rate_limits")
+        cursor.execute("ALTER TABLE rate_limits_by_account RENAME TO rate_limits")
+    
+    def _migration_12_drop_source_url_index(self, cursor):
+        """
+        Versión 12: elimina el índice de processed_content.source_url
+        
+        source_url es la URL del feed, no la del artículo, así que no sirve
+        para deduplicar; los enlaces se comparan con la columna link.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("DROP INDEX IF EXISTS idx_processed_content_source_url")
+    
+    def _migration_13_unique_engagement_samples(self, cursor):
+        """
+        Versión 13: una sola muestra de engagement por tweet y momento
+        
+        Con la clave única, reimportar un archivo de retención no duplica
+        las muestras. De los duplicados existentes se conserva el último
+        guardado, que es el que reflejan los agregados.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        cursor.execute("""
+            DELETE FROM engagement_samples 
+            WHERE id NOT IN (SELECT MAX(id) FROM engagement_samples GROUP BY tweet_id, sampled_at)
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_engagement_samples_tweet_sampled")
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_engagement_samples_tweet_sampled 
+            ON engagement_samples(tweet_id, sampled_at)
+        """)
+    
+    def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        """
+        Agrega una columna a una tabla existente si todavía no existe
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            table: Nombre de la tabla
+            column: Nombre de la columna
+            definition: Tipo y restricciones de la columna
+        """
+        if not self.backend.column_exists(cursor, table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"🔧 Columna {table}.{column} agregada")
+    
     def save_published_tweet(self, tweet_id: str, content: str, source: str = None, 
-                           source_url: str = None, engagement_data: Dict = None):
+                           source_url: str = None, engagement_data: Dict = None,
+                           post_type: str = None, language: str = None,
+                           published_at: str = None, account: str = ''):
         """
         Guarda un tweet publicado en la base de datos
         
@@ -94,32 +648,35 @@ class DatabaseManager:
             content: Contenido del tweet
             source: Fuente del contenido
             source_url: URL de la fuente
-            engagement_data: Datos de engagement del tweet
+            engagement_data: Métricas públicas del tweet al publicarlo (primera muestra)
+            post_type: Tipo de publicación (single, curated, hacks...)
+            language: Idioma del tweet
+            published_at: Fecha UTC de publicación (por defecto ahora)
+            account: Cuenta que lo publicó ('' = la de TWITTER_*)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO published_tweets 
-                    (tweet_id, content, source, source_url, engagement_data)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    tweet_id, 
-                    content, 
-                    source, 
-                    source_url, 
-                    json.dumps(engagement_data) if engagement_data else None
-                ))
-                conn.commit()
+            with self.backend.cursor() as cursor:
+                self._insert_published_tweets(cursor, [{
+                    'tweet_id': tweet_id,
+                    'content': content,
+                    'source': source,
+                    'source_url': source_url,
+                    'engagement_data': engagement_data,
+                    'post_type': post_type,
+                    'language': language,
+                    'published_at': published_at,
+                    'account': account
+                }], on_conflict="")
                 logger.info(f"✅ Tweet guardado en BD: {tweet_id}")
                 
-        except sqlite3.Error as e:
+        except self.backend.errors as e:
             logger.error(f"❌ Error al guardar tweet: {e}")
             raise
     
     def save_processed_content(self, content_hash: str, source: str, 
                              source_url: str = None, title: str = None, 
-                             summary: str = None):
+                             summary: str = None, simhash: int = None,
+                             refresh: bool = False):
         """
         Guarda contenido procesado para evitar duplicados
         
@@ -129,22 +686,211 @@ class DatabaseManager:
             source_url: URL de la fuente
             title: Título del contenido
             summary: Resumen del contenido
+            simhash: Huella SimHash de título + resumen (opcional)
+            refresh: Si ya existe, actualizar su fecha de procesamiento
         """
+        conflict_action = (
+            "DO UPDATE SET processed_at = CURRENT_TIMESTAMP" if refresh else "DO NOTHING"
+        )
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR IGNORE INTO processed_content 
-                    (content_hash, source, source_url, title, summary)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (content_hash, source, source_url, title, summary))
-                conn.commit()
+            with self.backend.cursor() as cursor:
+                cursor.execute(f"""
+                    INSERT INTO processed_content 
+                    (content_hash, source, source_url, title, summary, simhash)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(content_hash) {conflict_action}
+                """, (
+                    content_hash, source, source_url, title, summary,
+                    simhash_to_db(simhash) if simhash else None
+                ))
                 logger.debug(f"Contenido procesado guardado: {content_hash}")
                 
-        except sqlite3.Error as e:
+        except self.backend.errors as e:
             logger.error(f"❌ Error al guardar contenido procesado: {e}")
             raise
     
+    def save_published_tweets_many(self, tweets: List[Dict]) -> int:
+        """
+        Guarda varios tweets publicados en una sola transacción
+        
+        Args:
+            tweets: Lista de diccionarios con las claves de save_published_tweet
+                (tweet_id, content, source, source_url, engagement_data,
+                post_type, language, published_at, account)
+            
+        Returns:
+            Número de tweets guardados
+        """
+        if not tweets:
+            return 0
+        
+        try:
+            with self.backend.cursor() as cursor:
+                self._insert_published_tweets(cursor, tweets, on_conflict="ON CONFLICT(tweet_id) DO NOTHING")
+                logger.info(f"✅ {len(tweets)} tweets guardados en BD")
+                return len(tweets)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar tweets en lote: {e}")
+            raise
+    
+    def _insert_published_tweets(self, cursor, tweets: List[Dict], on_conflict: str):
+        """
+        Inserta tweets publicados junto con su primera muestra y sus agregados
+        
+        Args:
+            cursor: Cursor de la transacción activa
+            tweets: Diccionarios con las claves de save_published_tweet
+            on_conflict: Cláusula ON CONFLICT para tweet_id (vacía para fallar)
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        
+        # Con ON CONFLICT los tweets ya guardados no deben contar otra vez en los agregados
+        existing = self._existing_tweet_ids(cursor, [tweet['tweet_id'] for tweet in tweets]) if on_conflict else set()
+        
+        rows = []
+        samples = []
+        increments = []
+        for tweet in tweets:
+            if tweet['tweet_id'] in existing:
+                continue
+            existing.add(tweet['tweet_id'])
+            
+            published_at = tweet.get('published_at') or now
+            metrics = tweet.get('engagement_data') or {}
+            rows.append((
+                tweet['tweet_id'], tweet['content'], tweet.get('source'), tweet.get('source_url'),
+                tweet.get('post_type'), tweet.get('language'), published_at, tweet.get('account') or ''
+            ))
+            if metrics:
+                samples.append((tweet['tweet_id'], now) + metrics_to_sample(metrics))
+            increments.append(
+                (published_at, tweet.get('post_type'), tweet.get('source'), tweet.get('language'), 1)
+                + tuple(value or 0 for value in metrics_to_sample(metrics))
+            )
+        
+        if not rows:
+            return
+        
+        cursor.executemany(f"""
+            INSERT INTO published_tweets 
+            (tweet_id, content, source, source_url, post_type, language, published_at, account)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            {on_conflict}
+        """, rows)
+        if samples:
+            cursor.executemany(_SAMPLE_UPSERT, samples)
+        self._bump_rollups(cursor, increments)
+    
+    def _existing_tweet_ids(self, cursor, tweet_ids: List[str]) -> Set[str]:
+        """
+        Obtiene los IDs de tweet que ya están guardados
+        
+        Args:
+            cursor: Cursor de la transacción activa
+            tweet_ids: IDs a verificar
+            
+        Returns:
+            Subconjunto de los IDs presentes en published_tweets
+        """
+        existing = set()
+        for start in range(0, len(tweet_ids), _KEY_CHUNK_SIZE):
+            chunk = tweet_ids[start:start + _KEY_CHUNK_SIZE]
+            cursor.execute(
+                f"SELECT tweet_id FROM published_tweets WHERE tweet_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+    
+    def _bump_rollups(self, cursor, increments: List[Tuple]):
+        """
+        Suma incrementos a los agregados por hora y por día
+        
+        Args:
+            cursor: Cursor de la transacción activa
+            increments: Tuplas (published_at, post_type, source, language, tweets,
+                likes, retweets, replies, quotes, impressions); las dimensiones
+                vacías se agregan como 'unknown'
+        """
+        if not increments:
+            return
+        
+        updates = ',\n'.join(
+            f"                    {counter} = {{table}}.{counter} + excluded.{counter}" for counter in ROLLUP_COUNTERS
+        )
+        for table, prefix in ROLLUP_TABLES.values():
+            # Agrupar en memoria para enviar una sola fila por cubo
+            totals: Dict[Tuple, List[int]] = {}
+            for row in increments:
+                stamp = row[0] if isinstance(row[0], str) else _utc_timestamp(row[0])
+                bucket = stamp[:prefix] + (':00:00' if prefix == 13 else '')
+                key = (bucket,) + tuple(value or 'unknown' for value in row[1:4])
+                current = totals.setdefault(key, [0] * len(ROLLUP_COUNTERS))
+                for position, value in enumerate(row[4:]):
+                    current[position] += value
+            
+            rows = [key + tuple(values) for key, values in totals.items() if any(values)]
+            if rows:
+                cursor.executemany(f"""
+                    INSERT INTO {table} 
+                    (bucket, {', '.join(ROLLUP_DIMENSIONS)}, {', '.join(ROLLUP_COUNTERS)})
+                    VALUES (?, ?, ?, ?, {', '.join('?' * len(ROLLUP_COUNTERS))})
+                    ON CONFLICT(bucket, {', '.join(ROLLUP_DIMENSIONS)}) DO UPDATE SET
+{updates.format(table=table)}
+                """, rows)
+    
+    def save_processed_content_many(self, items: List[Dict], refresh: bool = False) -> int:
+        """
+        Guarda varios contenidos procesados en una sola transacción
+        
+        Args:
+            items: Lista de artículos o diccionarios con content_hash, source,
+                source_url, link (se guarda canónico), title, summary, simhash y
+                used (si se usó en un tweet). Los que no tienen content_hash se ignoran
+            refresh: Si ya existen, actualizar su fecha de procesamiento
+            
+        Returns:
+            Número de filas enviadas a la base de datos
+        """
+        rows = [
+            (
+                item['content_hash'],
+                item.get('source') or 'unknown',
+                item.get('source_url'),
+                item.get('title'),
+                item.get('summary'),
+                simhash_to_db(item['simhash']) if item.get('simhash') else None,
+                bool(item.get('used')),
+                canonical_url(item.get('link')) or None
+            )
+            for item in items if item.get('content_hash')
+        ]
+        if not rows:
+            return 0
+        
+        # Un contenido usado en un tweet queda marcado aunque ya se hubiera visto
+        conflict_action = (
+            "DO UPDATE SET processed_at = CURRENT_TIMESTAMP, used = (processed_content.used OR excluded.used)"
+            if refresh else "DO UPDATE SET used = TRUE WHERE excluded.used"
+        )
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.executemany(f"""
+                    INSERT INTO processed_content 
+                    (content_hash, source, source_url, title, summary, simhash, used, link)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(content_hash) {conflict_action}
+                """, rows)
+                logger.debug(f"{len(rows)} contenidos procesados guardados en lote")
+                return len(rows)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar contenido procesado en lote: {e}")
+            raise
+    
     def is_content_processed(self, content_hash: str) -> bool:
         """
         Verifica si el contenido ya fue procesado
@@ -156,8 +902,7 @@ class DatabaseManager:
             True si ya fue procesado, False en caso contrario
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self.backend.cursor() as cursor:
                 
                 # Verificar por hash del contenido
                 cursor.execute("""
@@ -169,153 +914,1274 @@ class DatabaseManager:
                 if count > 0:
                     return True
                 
-                # Verificar por enlace (para evitar duplicados de enlaces)
+                # Verificar por enlace del artículo (para evitar duplicados de enlaces)
                 cursor.execute("""
                     SELECT COUNT(*) FROM processed_content 
-                    WHERE content_url = ?
-                """, (content_hash,))
+                    WHERE link = ?
+                """, (canonical_url(content_hash),))
                 count = cursor.fetchone()[0]
                 
                 return count > 0
                 
-        except sqlite3.Error as e:
+        except self.backend.errors as e:
             logger.error(f"❌ Error al verificar contenido procesado: {e}")
             return False
     
-    def get_published_tweets(self, limit: int = 100) -> List[Dict]:
+    def get_processed_keys(self, keys: Iterable[str]) -> Set[str]:
         """
-        Obtiene tweets publicados recientes
+        Verifica en lote qué hashes o enlaces ya fueron procesados
+        
+        Resuelve todo el lote con una consulta por cada bloque de claves en
+        lugar de dos consultas por artículo.
         
         Args:
-            limit: Número máximo de tweets a obtener
+            keys: Hashes de contenido y/o enlaces (canónicos) a verificar
             
         Returns:
-            Lista de diccionarios con información de tweets
+            Subconjunto de las claves que ya están en processed_content
         """
+        pending = list(dict.fromkeys(key for key in keys if key))
+        found: Set[str] = set()
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM published_tweets 
-                    ORDER BY published_at DESC 
-                    LIMIT ?
-                """, (limit,))
-                
-                tweets = []
-                for row in cursor.fetchall():
-                    tweet = dict(row)
-                    if tweet['engagement_data']:
-                        tweet['engagement_data'] = json.loads(tweet['engagement_data'])
-                    tweets.append(tweet)
-                
-                return tweets
+            with self.backend.cursor() as cursor:
+                for start in range(0, len(pending), _KEY_CHUNK_SIZE):
+                    chunk = pending[start:start + _KEY_CHUNK_SIZE]
+                    placeholders = ', '.join('?' * len(chunk))
+                    cursor.execute(f"""
+                        SELECT content_hash, link FROM processed_content 
+                        WHERE content_hash IN ({placeholders}) OR link IN ({placeholders})
+                    """, chunk * 2)
+                    
+                    for row in cursor.fetchall():
+                        found.update(row)
+            
+            return found.intersection(pending)
                 
-        except sqlite3.Error as e:
-            logger.error(f"❌ Error al obtener tweets publicados: {e}")
-            return []
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al verificar contenido procesado en lote: {e}")
+            return set()
     
-    def update_daily_stats(self, tweets_published: int = 0, 
-                          content_processed: int = 0, errors_count: int = 0):
+    def was_processed_since(self, content_hash: str, days: float) -> bool:
         """
-        Actualiza las estadísticas diarias del bot
+        Verifica si el contenido se procesó dentro de la ventana indicada
+        
+        Usa el índice único de content_hash, por lo que la consulta no
+        depende del tamaño de la tabla.
         
         Args:
-            tweets_published: Número de tweets publicados hoy
-            content_processed: Número de contenidos procesados hoy
-            errors_count: Número de errores hoy
+            content_hash: Hash estable del contenido
+            days: Tamaño de la ventana en días
+            
+        Returns:
+            True si se procesó en los últimos `days` días
         """
         try:
-            today = datetime.now().date()
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Verificar si ya existe registro para hoy
+            with self.backend.cursor() as cursor:
                 cursor.execute("""
-                    SELECT id FROM bot_stats WHERE date = ?
-                """, (today,))
-                
-                if cursor.fetchone():
-                    # Actualizar registro existente
-                    cursor.execute("""
-                        UPDATE bot_stats 
-                        SET tweets_published = tweets_published + ?,
-                            content_processed = content_processed + ?,
-                            errors_count = errors_count + ?
-                        WHERE date = ?
-                    """, (tweets_published, content_processed, errors_count, today))
-                else:
-                    # Crear nuevo registro
-                    cursor.execute("""
-                        INSERT INTO bot_stats 
-                        (date, tweets_published, content_processed, errors_count)
-                        VALUES (?, ?, ?, ?)
-                    """, (today, tweets_published, content_processed, errors_count))
-                
-                conn.commit()
-                logger.info(f"📊 Estadísticas actualizadas para {today}")
+                    SELECT 1 FROM processed_content 
+                    WHERE content_hash = ? AND processed_at >= ?
+                """, (content_hash, _utc_timestamp(datetime.utcnow() - timedelta(days=days))))
                 
-        except sqlite3.Error as e:
-            logger.error(f"❌ Error al actualizar estadísticas: {e}")
+                return cursor.fetchone() is not None
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al verificar ventana de contenido procesado: {e}")
+            return False
     
-    def get_daily_stats(self, days: int = 7) -> List[Dict]:
+    def get_recent_simhashes(self, limit: int = 5000) -> List[Tuple[str, int]]:
         """
-        Obtiene estadísticas de los últimos días
+        Obtiene las huellas SimHash del contenido procesado más reciente
         
         Args:
-            days: Número de días hacia atrás
+            limit: Número máximo de huellas a obtener
             
         Returns:
-            Lista de estadísticas diarias
+            Lista de tuplas (content_hash, simhash sin signo)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            with self.backend.cursor() as cursor:
                 cursor.execute("""
-                    SELECT * FROM bot_stats 
-                    ORDER BY date DESC 
+                    SELECT content_hash, simhash FROM processed_content 
+                    WHERE simhash IS NOT NULL 
+                    ORDER BY id DESC 
                     LIMIT ?
-                """, (days,))
+                """, (limit,))
                 
-                return [dict(row) for row in cursor.fetchall()]
+                return [(row[0], simhash_from_db(row[1])) for row in cursor.fetchall()]
                 
-        except sqlite3.Error as e:
-            logger.error(f"❌ Error al obtener estadísticas: {e}")
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener huellas SimHash: {e}")
             return []
     
-    def cleanup_old_data(self, days_to_keep: int = 30):
+    def get_published_tweets(self, limit: int = 100) -> List[Dict]:
         """
-        Limpia datos antiguos de la base de datos
+        Obtiene tweets publicados recientes
         
         Args:
-            days_to_keep: Días de datos a mantener
+            limit: Número máximo de tweets a obtener
+            
+        Returns:
+            Lista de diccionarios con información de tweets
         """
+        metric_columns = ', '.join(f"s.{column} AS sample_{column}" for column in ENGAGEMENT_METRICS)
+        
         try:
-            cutoff_date = datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60)
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Limpiar contenido procesado antiguo
-                cursor.execute("""
-                    DELETE FROM processed_content 
-                    WHERE processed_at < ?
-                """, (cutoff_date,))
-                
-                deleted_content = cursor.rowcount
-                
-                # Limpiar estadísticas antiguas
-                cursor.execute("""
-                    DELETE FROM bot_stats 
-                    WHERE date < date('now', '-{} days')
-                """.format(days_to_keep))
+            with self.backend.cursor(dict_rows=True) as cursor:
+                # Última muestra de engagement de cada tweet por el índice (tweet_id, sampled_at)
+                cursor.execute(f"""
+                    SELECT p.*, s.id AS sample_id, {metric_columns}
+                    FROM (
+                        SELECT * FROM published_tweets 
+                        ORDER BY published_at DESC 
+                        LIMIT ?
+                    ) p
+                    LEFT JOIN engagement_samples s ON s.id = (
+                        SELECT id FROM engagement_samples 
+                        WHERE tweet_id = p.tweet_id 
+                        ORDER BY sampled_at DESC, id DESC 
+                        LIMIT 1
+                    )
+                    ORDER BY p.published_at DESC
+                """, (limit,))
                 
-                deleted_stats = cursor.rowcount
+                tweets = []
+                for row in cursor.fetchall():
+                    tweet = row_to_dict(row)
+                    has_sample = tweet.pop('sample_id') is not None
+                    metrics = {key: tweet.pop(f"sample_{column}") for column, key in ENGAGEMENT_METRICS.items()}
+                    tweet['engagement_data'] = metrics if has_sample else None
+                    tweets.append(tweet)
                 
-                conn.commit()
-                logger.info(f"🧹 Limpieza completada: {deleted_content} contenidos, {deleted_stats} estadísticas")
+                return tweets
                 
-        except sqlite3.Error as e:
-            logger.error(f"❌ Error en limpieza de datos: {e}")
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener tweets publicados: {e}")
+            return []
+    
+    def has_posted_since(self, since: datetime, post_type: str = None, account: str = None) -> bool:
+        """
+        Verifica si se publicó algún tweet desde una fecha
+        
+        Args:
+            since: Fecha UTC desde la que buscar
+            post_type: Tipo de publicación (por defecto cualquiera)
+            account: Cuenta que publicó (por defecto cualquiera)
+            
+        Returns:
+            True si hay al menos un tweet publicado desde esa fecha
+        """
+        where, params = self._recency_filter(since, post_type, account)
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute(f"SELECT 1 FROM published_tweets {where} LIMIT 1", params)
+                return cursor.fetchone() is not None
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al verificar publicaciones recientes: {e}")
+            return False
+    
+    def count_posts_since(self, since: datetime, post_type: str = None, account: str = None) -> int:
+        """
+        Cuenta los tweets publicados desde una fecha
+        
+        Args:
+            since: Fecha UTC desde la que contar
+            post_type: Tipo de publicación (por defecto cualquiera)
+            account: Cuenta que publicó (por defecto cualquiera)
+            
+        Returns:
+            Número de tweets publicados
+        """
+        where, params = self._recency_filter(since, post_type, account)
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM published_tweets {where}", params)
+                return cursor.fetchone()[0]
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al contar publicaciones recientes: {e}")
+            return 0
+    
+    def get_last_post_time(self, post_type: str = None, account: str = None) -> Optional[datetime]:
+        """
+        Obtiene la fecha del último tweet publicado
+        
+        Args:
+            post_type: Tipo de publicación (por defecto cualquiera)
+            account: Cuenta que publicó (por defecto cualquiera)
+            
+        Returns:
+            Fecha UTC del último tweet, o None si no hay ninguno
+        """
+        where, params = self._recency_filter(None, post_type, account)
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute(f"SELECT MAX(published_at) FROM published_tweets {where}", params)
+                last = cursor.fetchone()[0]
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener la última publicación: {e}")
+            return None
+        
+        if isinstance(last, str):
+            last = datetime.fromisoformat(last)
+        return last
+    
+    @staticmethod
+    def _recency_filter(since: Optional[datetime], post_type: Optional[str],
+                        account: Optional[str] = None) -> Tuple[str, tuple]:
+        """
+        Construye el filtro por fecha, tipo y cuenta sobre las columnas indexadas de published_tweets
+        
+        Args:
+            since: Fecha UTC mínima (None para no filtrar)
+            post_type: Tipo de publicación (None para no filtrar)
+            account: Cuenta (None para no filtrar)
+            
+        Returns:
+            Tupla (cláusula WHERE, parámetros)
+        """
+        conditions, params = [], []
+        if account is not None:
+            conditions.append("account = ?")
+            params.append(account)
+        if post_type:
+            conditions.append("post_type = ?")
+            params.append(post_type)
+        if since:
+            conditions.append("published_at >= ?")
+            params.append(_utc_timestamp(since))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, tuple(params)
+    
+    def enqueue_candidates(self, candidates: List[Dict]) -> int:
+        """
+        Agrega candidatos a la cola de publicación
+        
+        Un candidato que ya está en la cola y sigue pendiente actualiza su
+        prioridad y su historia (y su texto si se envía uno); conserva su
+        caducidad original.
+        
+        Args:
+            candidates: Diccionarios con content_hash, story, expires_at (UTC)
+                y opcionalmente tweet_text, source, source_url, priority y language
+            
+        Returns:
+            Número de candidatos enviados a la base de datos
+        """
+        rows = [
+            (
+                candidate['content_hash'],
+                json.dumps(candidate['story'], ensure_ascii=False, default=str),
+                candidate.get('tweet_text'),
+                candidate.get('source'),
+                candidate.get('source_url'),
+                float(candidate.get('priority') or 0),
+                _utc_timestamp(candidate['expires_at']),
+                candidate.get('language')
+            )
+            for candidate in candidates if candidate.get('content_hash')
+        ]
+        if not rows:
+            return 0
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO content_candidates 
+                    (content_hash, story, tweet_text, source, source_url, priority, expires_at, language)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(content_hash) DO UPDATE SET
+                        story = excluded.story,
+                        tweet_text = COALESCE(excluded.tweet_text, content_candidates.tweet_text),
+                        priority = excluded.priority
+                    WHERE content_candidates.status = 'pending'
+                """, rows)
+                logger.debug(f"{len(rows)} candidatos encolados")
+                return len(rows)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al encolar candidatos: {e}")
+            raise
+    
+    def get_candidate_hashes(self, content_hashes: Iterable[str]) -> Set[str]:
+        """
+        Obtiene cuáles de los hashes ya tienen candidato (en cualquier estado)
+        
+        Args:
+            content_hashes: Hashes de contenido a verificar
+            
+        Returns:
+            Subconjunto de los hashes presentes en content_candidates
+        """
+        pending = list({content_hash for content_hash in content_hashes if content_hash})
+        found = set()
+        
+        try:
+            with self.backend.cursor() as cursor:
+                for start in range(0, len(pending), _KEY_CHUNK_SIZE):
+                    chunk = pending[start:start + _KEY_CHUNK_SIZE]
+                    cursor.execute(f"""
+                        SELECT content_hash FROM content_candidates 
+                        WHERE content_hash IN ({', '.join('?' * len(chunk))})
+                    """, chunk)
+                    found.update(row[0] for row in cursor.fetchall())
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al verificar candidatos: {e}")
+        
+        return found
+    
+    def claim_candidate(self) -> Optional[Dict]:
+        """
+        Reclama atómicamente el candidato pendiente de mayor prioridad
+        
+        Returns:
+            Diccionario del candidato con la historia decodificada, o None si
+            no hay candidatos vigentes
+        """
+        claimed = self.claim_candidates(1)
+        return claimed[0] if claimed else None
+    
+    def claim_candidates(self, limit: int, language: str = None) -> List[Dict]:
+        """
+        Reclama atómicamente los candidatos pendientes de mayor prioridad
+        
+        Una sola sentencia elige los candidatos por el índice parcial de
+        pendientes y los marca como reclamados, así que dos procesos (o dos
+        cuentas) nunca reclaman el mismo.
+        
+        Args:
+            limit: Número máximo de candidatos a reclamar
+            language: Reclamar solo candidatos en este idioma (por defecto cualquiera)
+            
+        Returns:
+            Candidatos reclamados con la historia decodificada, de mayor a
+            menor prioridad
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        condition, params = ("AND language = ? ", (now, language)) if language else ("", (now,))
+        
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                # El CTE materializado evalúa el LIMIT una sola vez (PostgreSQL
+                # puede reevaluar una subconsulta dentro de IN y reclamar de más)
+                cursor.execute(f"""
+                    WITH picked AS MATERIALIZED (
+                        SELECT id FROM content_candidates 
+                        WHERE status = 'pending' AND expires_at > ? {condition}
+                        ORDER BY priority DESC, id 
+                        LIMIT ?{self.backend.skip_locked}
+                    )
+                    UPDATE content_candidates SET status = 'claimed', claimed_at = ?
+                    WHERE id IN (SELECT id FROM picked) AND status = 'pending'
+                    RETURNING {_CANDIDATE_COLUMNS}
+                """, params + (limit, now))
+                rows = cursor.fetchall()
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al reclamar candidatos: {e}")
+            return []
+        
+        candidates = []
+        for row in rows:
+            candidate = row_to_dict(row)
+            candidate['story'] = json.loads(candidate['story'])
+            candidates.append(candidate)
+        # RETURNING no garantiza el orden
+        candidates.sort(key=lambda candidate: (-candidate['priority'], candidate['id']))
+        return candidates
+    
+    def mark_candidate(self, candidate_id: int, status: str, tweet_id: str = None):
+        """
+        Cambia el estado de un candidato reclamado
+        
+        Args:
+            candidate_id: ID del candidato
+            status: 'posted', 'expired' o 'pending' (para devolverlo a la cola)
+            tweet_id: ID del tweet publicado (con status='posted')
+        """
+        if status not in CANDIDATE_STATES:
+            raise ValueError(f"Estado de candidato no válido: {status}")
+        
+        now = _utc_timestamp(datetime.utcnow())
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE content_candidates SET 
+                        status = ?,
+                        claimed_at = CASE WHEN ? = 'pending' THEN NULL ELSE claimed_at END,
+                        posted_at = CASE WHEN ? = 'posted' THEN ? ELSE posted_at END,
+                        tweet_id = COALESCE(?, tweet_id)
+                    WHERE id = ?
+                """, (status, status, status, now, tweet_id, candidate_id))
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al actualizar candidato {candidate_id}: {e}")
+    
+    def expire_candidates(self, claim_timeout_minutes: int = 30) -> Dict[str, int]:
+        """
+        Caduca los candidatos vencidos y libera los reclamados abandonados
+        
+        Args:
+            claim_timeout_minutes: Minutos tras los que un candidato reclamado
+                sin publicar vuelve a la cola (proceso caído a mitad)
+            
+        Returns:
+            Diccionario con el número de candidatos 'expired' y 'released'
+        """
+        now = datetime.utcnow()
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE content_candidates SET status = 'expired' 
+                    WHERE status = 'pending' AND expires_at <= ?
+                """, (_utc_timestamp(now),))
+                expired = cursor.rowcount
+                cursor.execute("""
+                    UPDATE content_candidates SET status = 'pending', claimed_at = NULL 
+                    WHERE status = 'claimed' AND claimed_at < ?
+                """, (_utc_timestamp(now - timedelta(minutes=claim_timeout_minutes)),))
+                released = cursor.rowcount
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al caducar candidatos: {e}")
+            return {'expired': 0, 'released': 0}
+        
+        if expired or released:
+            logger.info(f"⌛ Candidatos caducados: {expired}, liberados: {released}")
+        return {'expired': expired, 'released': released}
+    
+    def count_pending_candidates(self, language: str = None) -> int:
+        """
+        Cuenta los candidatos pendientes y vigentes
+        
+        Args:
+            language: Contar solo candidatos en este idioma (por defecto cualquiera)
+            
+        Returns:
+            Número de candidatos listos para reclamar
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        condition, params = ("AND language = ?", (now, language)) if language else ("", (now,))
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT COUNT(*) FROM content_candidates 
+                    WHERE status = 'pending' AND expires_at > ? {condition}
+                """, params)
+                return cursor.fetchone()[0]
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al contar candidatos: {e}")
+            return 0
+    
+    def get_feed_states(self) -> Dict[str, Dict]:
+        """
+        Obtiene los validadores HTTP y la marca de agua de cada feed
+        
+        Returns:
+            Diccionario feed_url -> {'etag', 'last_modified', 'watermark'}
+        """
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute("SELECT feed_url, etag, last_modified, watermark FROM feed_state")
+                return {row['feed_url']: row_to_dict(row) for row in cursor.fetchall()}
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener el estado de los feeds: {e}")
+            return {}
+    
+    def save_feed_states(self, states: Dict[str, Dict]) -> int:
+        """
+        Guarda los validadores HTTP y la marca de agua de cada feed
+        
+        Args:
+            states: Diccionario feed_url -> {'etag', 'last_modified', 'watermark'}
+            
+        Returns:
+            Número de feeds guardados
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        rows = [
+            (feed_url, state.get('etag'), state.get('last_modified'), state.get('watermark'), now)
+            for feed_url, state in states.items()
+        ]
+        if not rows:
+            return 0
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO feed_state (feed_url, etag, last_modified, watermark, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(feed_url) DO UPDATE SET
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified,
+                        watermark = excluded.watermark,
+                        updated_at = excluded.updated_at
+                """, rows)
+                return len(rows)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar el estado de los feeds: {e}")
+            return 0
+    
+    def enqueue_outbox(self, content: str, fingerprint: str, payload: Dict = None,
+                       account: str = '') -> Optional[int]:
+        """
+        Escribe un tweet en la bandeja de salida antes de intentar publicarlo
+        
+        Si el mismo texto ya está pendiente o enviándose en la cuenta, no se duplica.
+        
+        Args:
+            content: Texto del tweet
+            fingerprint: Huella estable del texto
+            payload: Datos para completar la publicación cuando se envíe
+            account: Cuenta que lo publicará ('' = la de TWITTER_*)
+            
+        Returns:
+            ID del elemento (el existente si ya estaba en vuelo)
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                return self._insert_outbox(cursor, content, fingerprint, payload, account)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al escribir en la bandeja de salida: {e}")
+            raise
+    
+    def _insert_outbox(self, cursor, content: str, fingerprint: str, payload: Optional[Dict],
+                       account: str = '') -> Optional[int]:
+        """
+        Inserta un elemento en la bandeja de salida dentro de la transacción activa
+        
+        Args:
+            cursor: Cursor de la transacción activa
+            content: Texto del tweet
+            fingerprint: Huella estable del texto
+            payload: Datos para completar la publicación
+            account: Cuenta que lo publicará
+            
+        Returns:
+            ID del elemento (el existente si ya estaba en vuelo)
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        cursor.execute("""
+            INSERT INTO outbox (account, fingerprint, content, payload, next_attempt_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        """, (account, fingerprint, content, json.dumps(payload or {}, ensure_ascii=False, default=str),
+              now, now, now))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        
+        cursor.execute("""
+            SELECT id FROM outbox 
+            WHERE account = ? AND fingerprint = ? AND status IN ('pending', 'sending')
+        """, (account, fingerprint))
+        row = cursor.fetchone()
+        logger.info(f"ℹ️ Tweet ya en la bandeja de salida: {row[0] if row else '?'}")
+        return row[0] if row else None
+    
+    def claim_outbox(self, limit: int = 10, item_id: int = None, account: str = None) -> List[Dict]:
+        """
+        Reclama atómicamente los tweets de la bandeja de salida listos para enviar
+        
+        Args:
+            limit: Número máximo de elementos a reclamar
+            item_id: Reclamar solo este elemento, aunque su reintento no haya
+                vencido (primer intento en línea)
+            account: Reclamar solo elementos de esta cuenta (por defecto de cualquiera)
+            
+        Returns:
+            Elementos reclamados (estado 'sending', con el intento ya contado)
+            con el payload decodificado, del más antiguo al más reciente
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        condition, params = ("id = ?", (item_id,)) if item_id is not None else ("next_attempt_at <= ?", (now,))
+        if account is not None:
+            condition += " AND account = ?"
+            params += (account,)
+        
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute(f"""
+                    WITH picked AS MATERIALIZED (
+                        SELECT id FROM outbox 
+                        WHERE status = 'pending' AND {condition} 
+                        ORDER BY next_attempt_at, id 
+                        LIMIT ?{self.backend.skip_locked}
+                    )
+                    UPDATE outbox SET status = 'sending', attempts = attempts + 1, updated_at = ?
+                    WHERE id IN (SELECT id FROM picked) AND status = 'pending'
+                    RETURNING {_OUTBOX_COLUMNS}
+                """, params + (limit, now))
+                rows = cursor.fetchall()
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al reclamar la bandeja de salida: {e}")
+            return []
+        
+        items = []
+        for row in rows:
+            item = row_to_dict(row)
+            item['payload'] = json.loads(item['payload'] or '{}')
+            item['ambiguous'] = bool(item['ambiguous'])
+            items.append(item)
+        items.sort(key=lambda item: item['id'])
+        return items
+    
+    def finish_outbox(self, item_id: int, status: str, tweet_id: str = None, error: str = None,
+                      follow_up: Optional[Tuple[str, str, Dict, str]] = None) -> Optional[int]:
+        """
+        Cierra un elemento de la bandeja de salida
+        
+        Args:
+            item_id: ID del elemento
+            status: 'sent' o 'failed'
+            tweet_id: ID del tweet publicado (con status='sent')
+            error: Último error (con status='failed')
+            follow_up: Tupla (content, fingerprint, payload, account) de un
+                elemento a encolar en la misma transacción, p. ej. la siguiente
+                parte de un hilo
+            
+        Returns:
+            ID del elemento encolado con follow_up, o None
+        """
+        if status not in ('sent', 'failed'):
+            raise ValueError(f"Estado final de la bandeja de salida no válido: {status}")
+        
+        now = _utc_timestamp(datetime.utcnow())
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE outbox SET status = ?, tweet_id = ?, last_error = COALESCE(?, last_error),
+                        updated_at = ?, finished_at = ?
+                    WHERE id = ?
+                """, (status, tweet_id, error, now, now, item_id))
+                if follow_up:
+                    return self._insert_outbox(cursor, *follow_up)
+                return None
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al cerrar el elemento {item_id} de la bandeja de salida: {e}")
+            return None
+    
+    def retry_outbox(self, item_id: int, next_attempt_at: datetime, error: str, ambiguous: bool,
+                     refund_attempt: bool = False):
+        """
+        Devuelve un elemento a la bandeja de salida para reintentarlo más tarde
+        
+        Args:
+            item_id: ID del elemento
+            next_attempt_at: Momento (UTC) del siguiente intento
+            error: Error del intento fallido
+            ambiguous: Si el tweet pudo publicarse pese al error
+            refund_attempt: No contar este intento (rechazo por cuota)
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE outbox SET status = 'pending', next_attempt_at = ?, last_error = ?,
+                        ambiguous = (ambiguous OR ?), attempts = attempts - ?, updated_at = ?
+                    WHERE id = ?
+                """, (_utc_timestamp(next_attempt_at), error, ambiguous, 1 if refund_attempt else 0,
+                      _utc_timestamp(datetime.utcnow()), item_id))
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al reprogramar el elemento {item_id} de la bandeja de salida: {e}")
+    
+    def recover_outbox(self, sending_timeout_minutes: int = 10) -> int:
+        """
+        Devuelve a pendientes los elementos abandonados a mitad de envío
+        
+        Un proceso que cayó durante la llamada a la API pudo haber publicado
+        el tweet, así que se marcan como ambiguos.
+        
+        Args:
+            sending_timeout_minutes: Minutos tras los que un envío se considera abandonado
+            
+        Returns:
+            Número de elementos recuperados
+        """
+        now = datetime.utcnow()
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE outbox SET status = 'pending', ambiguous = TRUE, next_attempt_at = ?, updated_at = ?
+                    WHERE status = 'sending' AND updated_at < ?
+                """, (_utc_timestamp(now), _utc_timestamp(now),
+                      _utc_timestamp(now - timedelta(minutes=sending_timeout_minutes))))
+                recovered = cursor.rowcount
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al recuperar la bandeja de salida: {e}")
+            return 0
+        
+        if recovered:
+            logger.warning(f"⚠️ {recovered} envíos abandonados vuelven a la bandeja de salida")
+        return recovered
+    
+    def count_pending_outbox(self) -> int:
+        """
+        Cuenta los tweets pendientes de enviar
+        
+        Returns:
+            Número de elementos pendientes o enviándose
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')")
+                return cursor.fetchone()[0]
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al contar la bandeja de salida: {e}")
+            return 0
+    
+    def get_outbox_report(self, since: datetime) -> List[Dict]:
+        """
+        Obtiene el rendimiento de la bandeja de salida por hora
+        
+        Args:
+            since: Fecha UTC desde la que contar los elementos cerrados
+            
+        Returns:
+            Lista por hora (UTC) con sent, failed, attempts y success_rate, de
+            la más antigua a la más reciente
+        """
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute("""
+                    SELECT status, attempts, finished_at FROM outbox 
+                    WHERE finished_at >= ?
+                """, (_utc_timestamp(since),))
+                rows = [row_to_dict(row) for row in cursor.fetchall()]
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener el informe de la bandeja de salida: {e}")
+            return []
+        
+        hours = {}
+        for row in rows:
+            hour = hours.setdefault(row['finished_at'][:13], {'sent': 0, 'failed': 0, 'attempts': 0})
+            hour[row['status']] += 1
+            hour['attempts'] += row['attempts']
+        
+        return [
+            {'hour': hour, **counts, 'success_rate': counts['sent'] / (counts['sent'] + counts['failed'])}
+            for hour, counts in sorted(hours.items())
+        ]
+    
+    def get_media(self, url: str) -> Optional[Dict]:
+        """
+        Obtiene la entrada de caché de una imagen por su URL de origen
+        
+        Args:
+            url: URL de la imagen
+            
+        Returns:
+            Diccionario con url, sha256, filename, media_id y media_expires_at, o None
+        """
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute("""
+                    SELECT url, sha256, filename, media_id, media_expires_at 
+                    FROM media_cache WHERE url = ?
+                """, (url,))
+                row = cursor.fetchone()
+                return row_to_dict(row) if row else None
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al consultar la caché de imágenes: {e}")
+            return None
+    
+    def save_media(self, url: str, sha256: str, filename: str):
+        """
+        Registra la imagen local de una URL
+        
+        Si el contenido de la URL cambió, el media_id anterior deja de valer.
+        
+        Args:
+            url: URL de la imagen
+            sha256: Hash del contenido descargado
+            filename: Nombre del archivo procesado en la caché local
+        """
+        now = _utc_timestamp(datetime.utcnow())
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO media_cache (url, sha256, filename, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET 
+                        media_id = CASE WHEN media_cache.sha256 = excluded.sha256 
+                            THEN media_cache.media_id END,
+                        media_expires_at = CASE WHEN media_cache.sha256 = excluded.sha256 
+                            THEN media_cache.media_expires_at END,
+                        sha256 = excluded.sha256, 
+                        filename = excluded.filename, 
+                        updated_at = excluded.updated_at
+                """, (url, sha256, filename, now))
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar en la caché de imágenes: {e}")
+    
+    def get_valid_media_id(self, sha256: str, valid_until: datetime) -> Optional[str]:
+        """
+        Busca un media_id subido para un contenido que siga vigente
+        
+        Args:
+            sha256: Hash del contenido de la imagen
+            valid_until: Fecha UTC hasta la que debe seguir vigente
+            
+        Returns:
+            media_id o None
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    SELECT media_id FROM media_cache 
+                    WHERE sha256 = ? AND media_id IS NOT NULL AND media_expires_at > ? 
+                    ORDER BY media_expires_at DESC 
+                    LIMIT 1
+                """, (sha256, _utc_timestamp(valid_until)))
+                row = cursor.fetchone()
+                return row[0] if row else None
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al consultar media_id: {e}")
+            return None
+    
+    def save_media_id(self, sha256: str, media_id: str, expires_at: datetime):
+        """
+        Guarda el media_id subido para todas las URLs con el mismo contenido
+        
+        Args:
+            sha256: Hash del contenido de la imagen
+            media_id: ID devuelto por Twitter
+            expires_at: Fecha UTC en la que Twitter descarta el media_id
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE media_cache SET media_id = ?, media_expires_at = ?, updated_at = ? 
+                    WHERE sha256 = ?
+                """, (media_id, _utc_timestamp(expires_at), _utc_timestamp(datetime.utcnow()), sha256))
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar media_id: {e}")
+    
+    def get_rate_limits(self, account: str = '') -> Dict[str, Dict]:
+        """
+        Obtiene el último estado de rate limit guardado de cada endpoint
+        
+        Args:
+            account: Cuenta dueña de las cuotas ('' = la de TWITTER_*)
+            
+        Returns:
+            Diccionario endpoint -> {'limit', 'remaining', 'reset', 'updated_at'}
+            (reset en epoch)
+        """
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute("""
+                    SELECT endpoint, quota, remaining, reset_at, updated_at 
+                    FROM rate_limits WHERE account = ?
+                """, (account,))
+                return {
+                    row['endpoint']: {
+                        'limit': row['quota'],
+                        'remaining': row['remaining'],
+                        'reset': row['reset_at'],
+                        'updated_at': row['updated_at']
+                    }
+                    for row in map(row_to_dict, cursor.fetchall())
+                }
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener rate limits guardados: {e}")
+            return {}
+    
+    def save_rate_limits(self, limits: Dict[str, Dict], account: str = ''):
+        """
+        Guarda el estado de rate limit de varios endpoints
+        
+        Args:
+            limits: Diccionario endpoint -> {'limit', 'remaining', 'reset'}
+            account: Cuenta dueña de las cuotas ('' = la de TWITTER_*)
+        """
+        if not limits:
+            return
+        
+        now = _utc_timestamp(datetime.utcnow())
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO rate_limits (account, endpoint, quota, remaining, reset_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (account, endpoint) DO UPDATE SET 
+                        quota = excluded.quota, 
+                        remaining = excluded.remaining, 
+                        reset_at = excluded.reset_at, 
+                        updated_at = excluded.updated_at
+                """, [(account, endpoint, state['limit'], state['remaining'], state['reset'], now)
+                      for endpoint, state in limits.items()])
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar rate limits: {e}")
+    
+    def get_recent_tweet_texts(self, limit: int = 200) -> List[Tuple[str, str]]:
+        """
+        Obtiene el texto de los últimos tweets publicados
+        
+        Args:
+            limit: Número máximo de tweets
+            
+        Returns:
+            Lista de tuplas (tweet_id, contenido) del más antiguo al más reciente
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    SELECT tweet_id, content FROM published_tweets 
+                    ORDER BY id DESC 
+                    LIMIT ?
+                """, (limit,))
+                
+                return list(reversed(cursor.fetchall()))
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener textos de tweets: {e}")
+            return []
+    
+    def get_tweets_due_for_metrics(self, now: datetime, published_since: datetime,
+                                   limit: int = 100) -> List[Tuple[str, datetime]]:
+        """
+        Obtiene los tweets cuya próxima muestra de métricas ya venció
+        
+        Los tweets sin muestra programada (recién publicados) vencen desde su
+        publicación.
+        
+        Args:
+            now: Momento UTC actual
+            published_since: Fecha UTC mínima de publicación a seguir muestreando
+            limit: Número máximo de tweets
+            
+        Returns:
+            Lista de tuplas (tweet_id, fecha UTC de publicación), las más atrasadas primero
+        """
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute("""
+                    SELECT tweet_id, published_at FROM published_tweets 
+                    WHERE published_at >= ? 
+                    AND (metrics_due_at IS NULL OR metrics_due_at <= ?) 
+                    ORDER BY COALESCE(metrics_due_at, published_at) 
+                    LIMIT ?
+                """, (_utc_timestamp(published_since), _utc_timestamp(now), limit))
+                rows = cursor.fetchall()
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener tweets pendientes de métricas: {e}")
+            return []
+        
+        return [
+            (tweet_id, datetime.fromisoformat(published_at) if isinstance(published_at, str) else published_at)
+            for tweet_id, published_at in rows
+        ]
+    
+    def schedule_metrics(self, schedule: List[Tuple[str, datetime]]) -> int:
+        """
+        Programa la próxima muestra de métricas de varios tweets en una sola transacción
+        
+        Args:
+            schedule: Lista de tuplas (tweet_id, fecha UTC de la próxima muestra)
+            
+        Returns:
+            Número de tweets programados
+        """
+        if not schedule:
+            return 0
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.executemany(
+                    "UPDATE published_tweets SET metrics_due_at = ? WHERE tweet_id = ?",
+                    [(_utc_timestamp(due_at), str(tweet_id)) for tweet_id, due_at in schedule]
+                )
+                return len(schedule)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al programar muestras de métricas: {e}")
+            raise
+    
+    def record_engagement_samples(self, samples: List[Tuple[str, Dict]],
+                                  sampled_at: datetime = None) -> int:
+        """
+        Guarda una muestra de métricas para varios tweets en una sola transacción
+        
+        Args:
+            samples: Lista de tuplas (tweet_id, public_metrics)
+            sampled_at: Momento UTC de la muestra (por defecto ahora)
+            
+        Returns:
+            Número de muestras guardadas
+        """
+        timestamp = _utc_timestamp(sampled_at or datetime.utcnow())
+        rows = [
+            (str(tweet_id), timestamp) + metrics_to_sample(metrics)
+            for tweet_id, metrics in samples if metrics
+        ]
+        if not rows:
+            return 0
+        
+        try:
+            with self.backend.cursor() as cursor:
+                increments = self._engagement_increments(cursor, rows)
+                cursor.executemany(_SAMPLE_UPSERT, rows)
+                self._bump_rollups(cursor, increments)
+                logger.debug(f"{len(rows)} muestras de engagement guardadas")
+                return len(rows)
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al guardar muestras de engagement: {e}")
+            raise
+    
+    def _engagement_increments(self, cursor, rows: List[Tuple]) -> List[Tuple]:
+        """
+        Calcula cuánto cambian los agregados con nuevas muestras de engagement
+        
+        Los agregados guardan la suma de la última muestra de cada tweet, así
+        que cada muestra más reciente aporta la diferencia con la anterior al
+        cubo de la fecha de publicación del tweet.
+        
+        Args:
+            cursor: Cursor de la transacción activa (antes de insertar las muestras)
+            rows: Filas de engagement_samples a insertar
+            
+        Returns:
+            Incrementos en el formato de _bump_rollups
+        """
+        tweet_ids = list({row[0] for row in rows})
+        metric_columns = ', '.join(f"s.{column}" for column in ENGAGEMENT_METRICS)
+        
+        latest = {}
+        for start in range(0, len(tweet_ids), _KEY_CHUNK_SIZE):
+            chunk = tweet_ids[start:start + _KEY_CHUNK_SIZE]
+            cursor.execute(f"""
+                SELECT p.tweet_id, p.published_at, p.post_type, p.source, p.language, 
+                       s.sampled_at, {metric_columns}
+                FROM published_tweets p
+                LEFT JOIN engagement_samples s ON s.id = (
+                    SELECT id FROM engagement_samples 
+                    WHERE tweet_id = p.tweet_id 
+                    ORDER BY sampled_at DESC, id DESC 
+                    LIMIT 1
+                )
+                WHERE p.tweet_id IN ({', '.join('?' * len(chunk))})
+            """, chunk)
+            for tweet_id, published_at, post_type, source, language, sampled_at, *metrics in cursor.fetchall():
+                if isinstance(sampled_at, datetime):
+                    sampled_at = _utc_timestamp(sampled_at)
+                latest[tweet_id] = ((published_at, post_type, source, language), sampled_at or '',
+                                    [value or 0 for value in metrics])
+        
+        increments = []
+        for tweet_id, sampled_at, *metrics in rows:
+            if tweet_id not in latest:
+                continue  # Tweets que no publicó el bot no entran en los agregados
+            dimensions, previous_at, previous = latest[tweet_id]
+            if sampled_at < previous_at:
+                continue  # Una muestra más antigua no cambia la última
+            current = [value or 0 for value in metrics]
+            increments.append(dimensions + (0,) + tuple(new - old for new, old in zip(current, previous)))
+            latest[tweet_id] = (dimensions, sampled_at, current)
+        return increments
+    
+    def get_rollup_stats(self, granularity: str = 'daily', since: datetime = None,
+                         group_by: Iterable[str] = ('post_type',)) -> List[Dict]:
+        """
+        Obtiene estadísticas agregadas sin recorrer los tweets publicados
+        
+        Args:
+            granularity: 'hourly' o 'daily'
+            since: Fecha UTC desde la que contar (por defecto todo el historial)
+            group_by: Dimensiones por las que agrupar (bucket, post_type, source,
+                language y, con granularidad horaria, hour)
+            
+        Returns:
+            Lista de diccionarios con las dimensiones y los contadores sumados
+            (tweets, likes, retweets, replies, quotes, impressions)
+        """
+        if granularity not in ROLLUP_TABLES:
+            raise ValueError(f"Granularidad no soportada: {granularity}")
+        group_by = list(group_by)
+        unknown = [dimension for dimension in group_by if dimension not in _ROLLUP_GROUPS]
+        if unknown or ('hour' in group_by and granularity != 'hourly'):
+            raise ValueError(f"Agrupación no soportada: {', '.join(unknown) or 'hour'}")
+        
+        table, prefix = ROLLUP_TABLES[granularity]
+        columns = [f"{_ROLLUP_GROUPS[dimension]} AS {dimension}" for dimension in group_by]
+        columns += [f"SUM({counter}) AS {counter}" for counter in ROLLUP_COUNTERS]
+        where, params = "", ()
+        if since:
+            where, params = "WHERE bucket >= ?", (_utc_timestamp(since)[:prefix],)
+        group = f"GROUP BY {', '.join(_ROLLUP_GROUPS[dimension] for dimension in group_by)}" if group_by else ""
+        order = ', '.join(group_by) if {'bucket', 'hour'} & set(group_by) else 'tweets DESC'
+        
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute(f"""
+                    SELECT {', '.join(columns)} 
+                    FROM {table} 
+                    {where} 
+                    {group} 
+                    ORDER BY {order}
+                """, params)
+                
+                results = []
+                for row in cursor.fetchall():
+                    result = dict(row)
+                    for counter in ROLLUP_COUNTERS:
+                        result[counter] = int(result[counter] or 0)
+                    results.append(result)
+                return results
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener estadísticas agregadas: {e}")
+            return []
+    
+    def get_engagement_series(self, tweet_id: str) -> Dict[str, 'np.ndarray']:
+        """
+        Obtiene la evolución de las métricas de un tweet como arrays de NumPy
+        
+        Args:
+            tweet_id: ID del tweet
+            
+        Returns:
+            Diccionario con 'sampled_at' (datetime64[s]) y un array int64 por
+            métrica, ordenados por fecha. Las métricas ausentes valen 0
+        """
+        return self._query_engagement_arrays(
+            "WHERE tweet_id = ? ORDER BY sampled_at, id", (str(tweet_id),)
+        )
+    
+    def get_engagement_window(self, start: datetime, end: datetime = None) -> Dict[str, 'np.ndarray']:
+        """
+        Obtiene todas las muestras de un intervalo de tiempo como arrays de NumPy
+        
+        Args:
+            start: Inicio del intervalo (UTC, incluido)
+            end: Fin del intervalo (UTC, excluido); por defecto sin límite
+            
+        Returns:
+            Diccionario con 'tweet_id', 'sampled_at' (datetime64[s]) y un array
+            int64 por métrica, ordenados por fecha
+        """
+        params = (_utc_timestamp(start), _utc_timestamp(end or datetime.utcnow() + timedelta(days=1)))
+        return self._query_engagement_arrays(
+            "WHERE sampled_at >= ? AND sampled_at < ? ORDER BY sampled_at, id", params,
+            include_tweet_id=True
+        )
+    
+    def _query_engagement_arrays(self, where: str, params: tuple,
+                                 include_tweet_id: bool = False) -> Dict[str, 'np.ndarray']:
+        """
+        Ejecuta una consulta sobre engagement_samples y la devuelve por columnas
+        
+        Args:
+            where: Filtro y orden de la consulta
+            params: Parámetros del filtro
+            include_tweet_id: Incluir el array de IDs de tweet
+            
+        Returns:
+            Diccionario de arrays de NumPy, uno por columna
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy no está instalado. Ejecuta: pip install numpy")
+        
+        metric_columns = ', '.join(f"COALESCE({column}, 0)" for column in ENGAGEMENT_METRICS)
+        
+        try:
+            with self.backend.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT tweet_id, sampled_at, {metric_columns} 
+                    FROM engagement_samples 
+                    {where}
+                """, params)
+                rows = cursor.fetchall()
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener muestras de engagement: {e}")
+            rows = []
+        
+        columns = list(zip(*rows)) or [()] * (2 + len(ENGAGEMENT_METRICS))
+        arrays = {'sampled_at': np.array(columns[1], dtype='datetime64[s]')}
+        if include_tweet_id:
+            arrays['tweet_id'] = np.array(columns[0], dtype=str)
+        for position, column in enumerate(ENGAGEMENT_METRICS, 2):
+            arrays[column] = np.array(columns[position], dtype=np.int64)
+        return arrays
+    
+    def update_daily_stats(self, tweets_published: int = 0, 
+                          content_processed: int = 0, errors_count: int = 0):
+        """
+        Actualiza las estadísticas diarias del bot
+        
+        Args:
+            tweets_published: Número de tweets publicados hoy
+            content_processed: Número de contenidos procesados hoy
+            errors_count: Número de errores hoy
+        """
+        try:
+            today = datetime.now().date().isoformat()
+            
+            with self.backend.cursor() as cursor:
+                
+                # Insertar o acumular en una sola sentencia atómica
+                cursor.execute("""
+                    INSERT INTO bot_stats 
+                    (date, tweets_published, content_processed, errors_count)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(date) DO UPDATE SET
+                        tweets_published = bot_stats.tweets_published + excluded.tweets_published,
+                        content_processed = bot_stats.content_processed + excluded.content_processed,
+                        errors_count = bot_stats.errors_count + excluded.errors_count
+                """, (today, tweets_published, content_processed, errors_count))
+                
+                logger.info(f"📊 Estadísticas actualizadas para {today}")
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al actualizar estadísticas: {e}")
+    
+    def get_daily_stats(self, days: int = 7) -> List[Dict]:
+        """
+        Obtiene estadísticas de los últimos días
+        
+        Args:
+            days: Número de días hacia atrás
+            
+        Returns:
+            Lista de estadísticas diarias
+        """
+        try:
+            with self.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute("""
+                    SELECT * FROM bot_stats 
+                    ORDER BY date DESC 
+                    LIMIT ?
+                """, (days,))
+                
+                return [row_to_dict(row) for row in cursor.fetchall()]
+                
+        except self.backend.errors as e:
+            logger.error(f"❌ Error al obtener estadísticas: {e}")
+            return []
@@ -9,6 +9,7 @@ from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from loguru import logger
 from config import Config
+from content_dedup import fingerprint_text
 
 class ExpandedContentSources:
     """Agregador de fuentes expandido para contenido diverso"""
@@ -40,7 +41,7 @@ class ExpandedContentSources:
                     'source': 'YouTube',
                     'content_type': 'hacks',
                     'published_date': datetime.now() - timedelta(hours=2),
-                    'content_hash': f"youtube_{hash('hacks_video_1')}"
+                    'content_hash': f"youtube_{fingerprint_text('hacks_video_1')}"
                 },
                 {
                     'title': '💻 Top 5 Programming Languages to Learn in 2024',
@@ -49,7 +50,7 @@ class ExpandedContentSources:
                     'source': 'YouTube',
                     'content_type': 'top_lists',
                     'published_date': datetime.now() - timedelta(hours=4),
-                    'content_hash': f"youtube_{hash('top_lists_video_1')}"
+                    'content_hash': f"youtube_{fingerprint_text('top_lists_video_1')}"
                 },
                 {
                     'title': '🤖 AI Revolution: What You Need to Know',
@@ -58,7 +59,7 @@ class ExpandedContentSources:
                     'source': 'YouTube',
                     'content_type': 'controversial',
                     'published_date': datetime.now() - timedelta(hours=6),
-                    'content_hash': f"youtube_{hash('controversial_video_1')}"
+                    'content_hash': f"youtube_{fingerprint_text('controversial_video_1')}"
                 }
             ]
             
@@ -88,7 +89,7 @@ class ExpandedContentSources:
                     'source': 'TikTok',
                     'content_type': 'hacks',
                     'published_date': datetime.now() - timedelta(hours=1),
-                    'content_hash': f"tiktok_{hash('hacks_tiktok_1')}"
+                    'content_hash': f"tiktok_{fingerprint_text('hacks_tiktok_1')}"
                 },
                 {
                     'title': '💡 Programming Tip: Use This Shortcut!',
@@ -97,7 +98,7 @@ class ExpandedContentSources:
                     'source': 'TikTok',
                     'content_type': 'protips',
                     'published_date': datetime.now() - timedelta(hours=3),
-                    'content_hash': f"tiktok_{hash('protips_tiktok_1')}"
+                    'content_hash': f"tiktok_{fingerprint_text('protips_tiktok_1')}"
                 },
                 {
                     'title': '🤯 Tech Fact: You Wont Believe This!',
@@ -106,7 +107,7 @@ class ExpandedContentSources:
                     'source': 'TikTok',
                     'content_type': 'curiosities',
                     'published_date': datetime.now() - timedelta(hours=5),
-                    'content_hash': f"tiktok_{hash('curiosities_tiktok_1')}"
+                    'content_hash': f"tiktok_{fingerprint_text('curiosities_tiktok_1')}"
                 }
             ]
             
@@ -136,7 +137,7 @@ class ExpandedContentSources:
                     'source': 'Instagram',
                     'content_type': 'reviews',
                     'published_date': datetime.now() - timedelta(hours=2),
-                    'content_hash': f"instagram_{hash('reviews_insta_1')}"
+                    'content_hash': f"instagram_{fingerprint_text('reviews_insta_1')}"
                 },
                 {
                     'title': '🚀 Startup Story: From Zero to Million',
@@ -145,7 +146,7 @@ class ExpandedContentSources:
                     'source': 'Instagram',
                     'content_type': 'trends',
                     'published_date': datetime.now() - timedelta(hours=4),
-                    'content_hash': f"instagram_{hash('trends_insta_1')}"
+                    'content_hash': f"instagram_{fingerprint_text('trends_insta_1')}"
                 }
             ]
             
@@ -175,7 +176,7 @@ class ExpandedContentSources:
                     'source': 'LinkedIn',
                     'content_type': 'protips',
                     'published_date': datetime.now() - timedelta(hours=3),
-                    'content_hash': f"linkedin_{hash('protips_linkedin_1')}"
+                    'content_hash': f"linkedin_{fingerprint_text('protips_linkedin_1')}"
                 },
                 {
                     'title': '🏢 Industry Analysis: Tech Market Trends 2024',
@@ -184,7 +185,7 @@ class ExpandedContentSources:
                     'source': 'LinkedIn',
                     'content_type': 'trends',
                     'published_date': datetime.now() - timedelta(hours=6),
-                    'content_hash': f"linkedin_{hash('trends_linkedin_1')}"
+                    'content_hash': f"linkedin_{fingerprint_text('trends_linkedin_1')}"
                 }
             ]
             
@@ -214,7 +215,7 @@ class ExpandedContentSources:
                     'source': 'Medium',
                     'content_type': 'protips',
                     'published_date': datetime.now() - timedelta(hours=4),
-                    'content_hash': f"medium_{hash('protips_medium_1')}"
+                    'content_hash': f"medium_{fingerprint_text('protips_medium_1')}"
                 },
                 {
                     'title': '🔒 Cybersecurity: Protecting Your Digital Life',
@@ -223,7 +224,7 @@ class ExpandedContentSources:
                     'source': 'Medium',
                     'content_type': 'hacks',
                     'published_date': datetime.now() - timedelta(hours=8),
-                    'content_hash': f"medium_{hash('hacks_medium_1')}"
+                    'content_hash': f"medium_{fingerprint_text('hacks_medium_1')}"
                 }
             ]
             
@@ -253,7 +254,7 @@ class ExpandedContentSources:
                     'source': 'Dev.to',
                     'content_type': 'hacks',
                     'published_date': datetime.now() - timedelta(hours=2),
-                    'content_hash': f"devto_{hash('hacks_devto_1')}"
+                    'content_hash': f"devto_{fingerprint_text('hacks_devto_1')}"
                 },
                 {
                     'title': '🚀 Building Scalable Web Applications',
@@ -262,7 +263,7 @@ class ExpandedContentSources:
                     'source': 'Dev.to',
                     'content_type': 'protips',
                     'published_date': datetime.now() - timedelta(hours=5),
-                    'content_hash': f"devto_{hash('protips_devto_1')}"
+                    'content_hash': f"devto_{fingerprint_text('protips_devto_1')}"
                 }
             ]
             
@@ -0,0 +1,269 @@
+"""
+Canal de imágenes del bot ZTech
+Descarga cada imagen una sola vez a una caché local direccionada por
+contenido, la adapta a los límites de Twitter en un pool de trabajadores,
+la sube con el endpoint de medios v1.1 y reutiliza el media_id devuelto
+mientras siga vigente
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from loguru import logger
+
+from database import DatabaseManager
+
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+    logger.warning("⚠️ Pillow no disponible, las imágenes se subirán sin redimensionar si ya cumplen los límites")
+
+# Límite de Twitter para imágenes (las GIF animadas admiten 15 MB)
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+MAX_GIF_BYTES = 15 * 1024 * 1024
+
+# Tamaño máximo a descargar antes de procesar
+_MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+
+# Firma de los formatos admitidos -> extensión
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+def image_format(data: bytes) -> Optional[str]:
+    """
+    Detecta el formato de una imagen por su firma
+
+    Args:
+        data: Contenido de la imagen
+
+    Returns:
+        'jpg', 'png', 'gif', 'webp' o None si no es un formato admitido
+    """
+    for signature, extension in _SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def process_image(data: bytes, max_dimension: int = 2048, quality: int = 85,
+                  max_bytes: int = MAX_IMAGE_BYTES) -> Optional[Tuple[bytes, str]]:
+    """
+    Adapta una imagen a los límites de Twitter
+
+    Reduce el lado mayor a max_dimension y recomprime en JPEG (o PNG si
+    tiene transparencia) bajando la calidad hasta que quepa en max_bytes.
+    Las GIF se conservan tal cual para no perder la animación. Sin Pillow,
+    las imágenes que ya cumplen los límites se usan sin cambios.
+
+    Args:
+        data: Contenido original
+        max_dimension: Lado mayor máximo en píxeles
+        quality: Calidad JPEG inicial
+        max_bytes: Tamaño máximo del resultado
+
+    Returns:
+        Tupla (contenido, extensión) o None si la imagen no se puede usar
+    """
+    extension = image_format(data)
+    if extension is None:
+        return None
+    if extension == 'gif':
+        return (data, extension) if len(data) <= MAX_GIF_BYTES else None
+
+    if not PILLOW_AVAILABLE:
+        return (data, extension) if len(data) <= max_bytes else None
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        if len(data) <= max_bytes and max(image.size) <= max_dimension:
+            return data, extension
+
+        image.thumbnail((max_dimension, max_dimension))
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            output = io.BytesIO()
+            image.save(output, format='PNG', optimize=True)
+            if output.tell() <= max_bytes:
+                return output.getvalue(), 'png'
+
+        image = image.convert('RGB')
+        while quality >= 40:
+            output = io.BytesIO()
+            image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+            if output.tell() <= max_bytes:
+                return output.getvalue(), 'jpg'
+            quality -= 10
+    return None
+
+
+class MediaPipeline:
+    """Caché de imágenes locales y de media_id subidos a Twitter"""
+
+    def __init__(self, db: DatabaseManager, twitter, cache_dir: str = 'media_cache', workers: int = 2,
+                 max_dimension: int = 2048, quality: int = 85, download_timeout: float = 15,
+                 expiry_margin_minutes: int = 60,
+                 additional_owners: Optional[Callable[[], List[str]]] = None):
+        """
+        Inicializa el canal de imágenes
+
+        Args:
+            db: Gestor de base de datos
+            twitter: Cliente de Twitter (upload_media)
+            cache_dir: Directorio de la caché local
+            workers: Trabajadores que descargan y procesan imágenes
+            max_dimension: Lado mayor máximo en píxeles
+            quality: Calidad JPEG inicial
+            download_timeout: Segundos máximos por descarga
+            expiry_margin_minutes: Un media_id que caduca antes de este margen
+                se vuelve a subir
+            additional_owners: Función que devuelve los IDs de las otras cuentas
+                del proceso; el media_id subido vale para todas ellas
+        """
+        self.db = db
+        self.twitter = twitter
+        self.cache_dir = Path(cache_dir)
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.download_timeout = download_timeout
+        self.expiry_margin = timedelta(minutes=expiry_margin_minutes)
+        self.additional_owners = additional_owners
+        self.session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, urls: Iterable[str]) -> List[Future]:
+        """
+        Descarga y procesa imágenes en segundo plano
+
+        Args:
+            urls: URLs de las imágenes
+
+        Returns:
+            Futuros con la ruta local de cada imagen (o None)
+        """
+        return [self._submit(url) for url in dict.fromkeys(url for url in urls if url)]
+
+    def get_media_id(self, url: str) -> Optional[str]:
+        """
+        Obtiene un media_id vigente para una imagen, subiéndola solo si hace falta
+
+        Nunca lanza excepciones: si la imagen no se puede usar, el tweet se
+        publica sin ella.
+
+        Args:
+            url: URL de la imagen
+
+        Returns:
+            media_id o None
+        """
+        try:
+            entry = self.db.get_media(url)
+            if entry:
+                media_id = self.db.get_valid_media_id(entry['sha256'], datetime.utcnow() + self.expiry_margin)
+                if media_id:
+                    logger.debug(f"media_id reutilizado para {url}: {media_id}")
+                    return media_id
+
+            path = self._submit(url).result(timeout=self.download_timeout * 2)
+            if path is None:
+                return None
+            entry = self.db.get_media(url)
+
+            # Otra URL con el mismo contenido pudo subirlo ya
+            media_id = self.db.get_valid_media_id(entry['sha256'], datetime.utcnow() + self.expiry_margin)
+            if media_id:
+                return media_id
+
+            owners = self.additional_owners() if self.additional_owners else None
+            uploaded = self.twitter.upload_media(str(path), additional_owners=owners)
+            expires_at = datetime.utcnow() + timedelta(seconds=uploaded['expires_after_secs'])
+            self.db.save_media_id(entry['sha256'], uploaded['media_id'], expires_at)
+            return uploaded['media_id']
+
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo preparar la imagen {url}: {e}")
+            return None
+
+    def _submit(self, url: str) -> Future:
+        """Encola la preparación de una imagen, sin duplicar la que ya está en curso"""
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None or future.done():
+                future = self._executor.submit(self._prepare, url)
+                self._pending[url] = future
+            return future
+
+    def _prepare(self, url: str) -> Optional[Path]:
+        """
+        Deja una imagen lista en la caché local (se ejecuta en un trabajador)
+
+        Args:
+            url: URL de la imagen
+
+        Returns:
+            Ruta del archivo procesado o None si la imagen no se puede usar
+        """
+        try:
+            entry = self.db.get_media(url)
+            if entry and (self.cache_dir / entry['filename']).exists():
+                return self.cache_dir / entry['filename']
+
+            data = self._download(url)
+            sha256 = hashlib.sha256(data).hexdigest()
+
+            # Direccionada por contenido: otra URL con la misma imagen reutiliza el archivo
+            path = next(self.cache_dir.glob(f"{sha256}.*"), None)
+            if path is None:
+                processed = process_image(data, self.max_dimension, self.quality)
+                if processed is None:
+                    logger.warning(f"⚠️ Imagen no admitida o demasiado grande: {url}")
+                    return None
+                content, extension = processed
+                path = self.cache_dir / f"{sha256}.{extension}"
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_name(path.name + '.tmp')
+                temporary.write_bytes(content)
+                os.replace(temporary, path)
+                logger.info(f"🖼️ Imagen guardada en caché: {path.name} "
+                            f"({len(data) / 1024:.0f} KB -> {len(content) / 1024:.0f} KB)")
+
+            self.db.save_media(url, sha256, path.name)
+            return path
+
+        except Exception as e:
+            logger.warning(f"⚠️ Error descargando la imagen {url}: {e}")
+            return None
+
+    def _download(self, url: str) -> bytes:
+        """Descarga una imagen con límite de tamaño"""
+        with self.session.get(url, timeout=self.download_timeout, stream=True) as response:
+            response.raise_for_status()
+            data = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                data.extend(chunk)
+                if len(data) > _MAX_DOWNLOAD_BYTES:
+                    raise ValueError(f"imagen de más de {_MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB")
+            return bytes(data)
+
+    def close(self):
+        """Detiene los trabajadores, cancelando las descargas que aún no empezaron"""
+        # shutdown(cancel_futures=True) solo existe desde Python 3.9
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+        self._executor.shutdown(wait=False)
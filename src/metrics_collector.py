@@ -0,0 +1,116 @@
+"""
+Recolector de métricas de engagement del bot ZTech
+Consulta las métricas de los tweets publicados en lotes de hasta 100 IDs
+por llamada y vuelve a muestrear cada tweet con una cadencia que decae con
+su edad: a menudo en las primeras horas y rara vez pasada una semana
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+from database import DatabaseManager
+from rate_limiter import LOOKUP_TWEETS_ENDPOINT, RateLimitExceeded
+from twitter_client import TWEET_LOOKUP_BATCH_SIZE
+
+# Edad máxima del tweet -> intervalo entre muestras
+SAMPLING_CADENCE = (
+    (timedelta(hours=6), timedelta(minutes=30)),
+    (timedelta(days=1), timedelta(hours=2)),
+    (timedelta(days=3), timedelta(hours=6)),
+    (timedelta(days=7), timedelta(days=1)),
+)
+
+# Intervalo pasada la última edad de SAMPLING_CADENCE
+LATE_SAMPLING_INTERVAL = timedelta(days=7)
+
+
+def next_sample_at(published_at: datetime, sampled_at: datetime) -> datetime:
+    """
+    Calcula cuándo volver a muestrear un tweet según su edad
+
+    Args:
+        published_at: Fecha UTC de publicación del tweet
+        sampled_at: Fecha UTC de la muestra recién tomada
+
+    Returns:
+        Fecha UTC de la próxima muestra
+    """
+    age = sampled_at - published_at
+    for max_age, interval in SAMPLING_CADENCE:
+        if age < max_age:
+            return sampled_at + interval
+    return sampled_at + LATE_SAMPLING_INTERVAL
+
+
+class MetricsCollector:
+    """Muestreo periódico y por lotes de las métricas de los tweets publicados"""
+
+    def __init__(self, db: DatabaseManager, twitter, max_requests: int = 5, max_age_days: int = 30):
+        """
+        Inicializa el recolector
+
+        Args:
+            db: Gestor de base de datos
+            twitter: Cliente de Twitter (get_tweets_metrics y wait_time)
+            max_requests: Llamadas a la API por ciclo (cada una hasta 100 tweets)
+            max_age_days: Días tras la publicación durante los que se muestrea un tweet
+        """
+        self.db = db
+        self.twitter = twitter
+        self.max_requests = max_requests
+        self.max_age = timedelta(days=max_age_days)
+
+    def collect(self, now: datetime = None) -> Dict[str, int]:
+        """
+        Ejecuta un ciclo de muestreo sobre los tweets cuya muestra venció
+
+        Las muestras y la próxima fecha de cada tweet se guardan en bloque al
+        final del ciclo, también si la cuota se agota a mitad.
+
+        Args:
+            now: Momento UTC del ciclo (por defecto ahora)
+
+        Returns:
+            Diccionario con 'requests', 'sampled' y 'missing' (tweets que la
+            API ya no devuelve y dejan de muestrearse)
+        """
+        now = now or datetime.utcnow()
+        results = {'requests': 0, 'sampled': 0, 'missing': 0}
+
+        if self.twitter.wait_time(LOOKUP_TWEETS_ENDPOINT) > 0:
+            return results
+
+        due = self.db.get_tweets_due_for_metrics(now, now - self.max_age,
+                                                 limit=self.max_requests * TWEET_LOOKUP_BATCH_SIZE)
+        samples: List[Tuple[str, Dict]] = []
+        schedule: List[Tuple[str, datetime]] = []
+
+        for start in range(0, len(due), TWEET_LOOKUP_BATCH_SIZE):
+            batch = due[start:start + TWEET_LOOKUP_BATCH_SIZE]
+            try:
+                metrics = self.twitter.get_tweets_metrics([tweet_id for tweet_id, _ in batch])
+            except RateLimitExceeded as e:
+                logger.warning(f"⚠️ Muestreo de métricas interrumpido: {e}")
+                break
+            except Exception as e:
+                logger.error(f"❌ Error consultando métricas de {len(batch)} tweets: {e}")
+                break
+            results['requests'] += 1
+
+            for tweet_id, published_at in batch:
+                if tweet_id in metrics:
+                    samples.append((tweet_id, metrics[tweet_id]))
+                    schedule.append((tweet_id, next_sample_at(published_at, now)))
+                else:
+                    # Borrado o inaccesible: programarlo fuera de la ventana de muestreo
+                    schedule.append((tweet_id, published_at + self.max_age))
+                    results['missing'] += 1
+
+        results['sampled'] = self.db.record_engagement_samples(samples, sampled_at=now)
+        self.db.schedule_metrics(schedule)
+
+        if results['requests']:
+            logger.info(f"📊 Métricas: {results['sampled']} tweets muestreados en {results['requests']} "
+                        f"consultas ({results['missing']} ya no disponibles)")
+        return results
@@ -0,0 +1,284 @@
+"""
+Bandeja de salida persistente del bot ZTech
+Cada tweet se guarda en la base de datos antes de publicarse; un trabajador
+lo envía con reintentos (backoff exponencial con jitter) y, si un fallo
+anterior fue ambiguo, revisa el timeline propio antes de reintentar para no
+publicarlo dos veces
+"""
+import html
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import requests
+import tweepy
+from loguru import logger
+
+from content_dedup import fingerprint_text
+from database import DatabaseManager
+from rate_limiter import POST_TWEET_ENDPOINT, RateLimitExceeded
+from thread_publisher import next_thread_part
+
+# Errores con los que la API rechazó el tweet: reintentar no sirve
+_PERMANENT_ERRORS = (tweepy.BadRequest, tweepy.Unauthorized, tweepy.Forbidden, tweepy.NotFound)
+
+# Errores que ocurren antes de enviar la petición: el tweet seguro no salió
+_UNSENT_ERRORS = (requests.exceptions.ConnectTimeout,)
+
+_URL_PATTERN = re.compile(r'https?://\S+')
+
+
+def outbox_fingerprint(text: str) -> str:
+    """
+    Huella de un tweet comparable con el texto que devuelve el timeline
+
+    Ignora los enlaces (Twitter los reescribe como t.co) y las entidades
+    HTML escapadas.
+
+    Args:
+        text: Texto del tweet
+
+    Returns:
+        Huella estable del texto
+    """
+    return fingerprint_text(_URL_PATTERN.sub(' ', html.unescape(text or '')))
+
+
+class Outbox:
+    """Publicación de tweets con persistencia previa, reintentos e idempotencia"""
+
+    def __init__(self, db: DatabaseManager, twitter, on_sent: Callable[[Dict, Dict], None] = None,
+                 on_failed: Callable[[Dict], None] = None, max_attempts: int = 8,
+                 base_delay: float = 30, max_delay: float = 3600,
+                 timeline_check_size: int = 20, sending_timeout_minutes: int = 10, media=None,
+                 account: str = ''):
+        """
+        Inicializa la bandeja de salida
+
+        Args:
+            db: Gestor de base de datos
+            twitter: Cliente de Twitter (publish y get_own_recent_tweets)
+            on_sent: Función llamada con (elemento, tweet) tras cada envío,
+                para completar la publicación (guardar el tweet, marcar candidatos...)
+            on_failed: Función llamada con el elemento cuando se descarta
+            max_attempts: Intentos antes de dar un tweet por fallido
+            base_delay: Segundos de espera tras el primer fallo
+            max_delay: Tope de segundos entre intentos
+            timeline_check_size: Tweets propios a revisar tras un fallo ambiguo
+            sending_timeout_minutes: Minutos tras los que un envío sin cerrar
+                se considera abandonado por un proceso caído
+            media: Canal de imágenes (MediaPipeline) para los elementos con
+                media_url en el payload; el media_id se resuelve en cada intento
+            account: Cuenta de twitter; la bandeja solo envía sus elementos
+                ('' = la cuenta de TWITTER_*)
+        """
+        self.db = db
+        self.twitter = twitter
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeline_check_size = timeline_check_size
+        self.sending_timeout_minutes = sending_timeout_minutes
+        self.media = media
+        self.account = account
+
+    def enqueue(self, content: str, payload: Dict = None) -> Optional[int]:
+        """
+        Guarda un tweet en la bandeja de salida
+
+        Args:
+            content: Texto del tweet
+            payload: Datos para completar la publicación en on_sent
+
+        Returns:
+            ID del elemento
+        """
+        return self.db.enqueue_outbox(content, outbox_fingerprint(content), payload, account=self.account)
+
+    def send(self, item_id: int) -> Optional[str]:
+        """
+        Intenta enviar ya un elemento concreto (primer intento en línea)
+
+        Si es la primera parte de un hilo, sigue con las demás partes.
+
+        Args:
+            item_id: ID del elemento
+
+        Returns:
+            'sent' (todo enviado), 'retried' (queda pendiente de reintento) o
+            'failed', o None si el elemento no estaba pendiente
+        """
+        items = self.db.claim_outbox(limit=1, item_id=item_id)
+        return self._run(items[0]) if items else None
+
+    def process(self, limit: int = 10) -> Dict[str, int]:
+        """
+        Envía los elementos cuyo reintento ya venció
+
+        Args:
+            limit: Número máximo de elementos a procesar
+
+        Returns:
+            Diccionario con el número de elementos 'sent', 'retried' y 'failed'
+        """
+        self.db.recover_outbox(self.sending_timeout_minutes)
+        results = {'sent': 0, 'retried': 0, 'failed': 0}
+
+        for item in self.db.claim_outbox(limit=limit, account=self.account):
+            results[self._run(item)] += 1
+
+        if any(results.values()):
+            logger.info(f"📬 Bandeja de salida: {results['sent']} enviados, "
+                        f"{results['retried']} por reintentar, {results['failed']} fallidos")
+        return results
+
+    def _run(self, item: Dict) -> str:
+        """
+        Envía un elemento reclamado y, si es parte de un hilo, las partes siguientes
+
+        Args:
+            item: Elemento reclamado
+
+        Returns:
+            'sent', 'retried' o 'failed' (de la última parte intentada)
+        """
+        while True:
+            outcome = self._attempt(item)
+            if outcome != 'sent' or not item.get('follow_up_id'):
+                return outcome
+            items = self.db.claim_outbox(limit=1, item_id=item['follow_up_id'])
+            if not items:
+                return 'retried'
+            item = items[0]
+
+    def _attempt(self, item: Dict) -> str:
+        """
+        Ejecuta un intento de envío de un elemento reclamado
+
+        Args:
+            item: Elemento reclamado (attempts ya incluye este intento)
+
+        Returns:
+            'sent', 'retried' o 'failed'
+        """
+        if item['ambiguous']:
+            try:
+                tweet = self._find_in_timeline(item)
+            except RateLimitExceeded as e:
+                return self._retry(item, str(e), ambiguous=True, delay=e.retry_after, rate_limited=True)
+            except Exception as e:
+                # Sin poder comprobarlo, reintentar a ciegas podría duplicar el tweet
+                return self._retry(item, f"No se pudo revisar el timeline: {e}", ambiguous=True)
+            if tweet:
+                logger.info(f"🔎 El tweet {item['id']} de la bandeja de salida ya estaba publicado: {tweet['id']}")
+                return self._complete(item, tweet)
+
+        reply_to = item['payload'].get('thread', {}).get('reply_to')
+        media_id = None
+        if self.media and item['payload'].get('media_url'):
+            media_id = self.media.get_media_id(item['payload']['media_url'])
+        try:
+            tweet = self.twitter.publish(item['content'], reply_to=reply_to,
+                                         media_ids=[media_id] if media_id else None)
+        except RateLimitExceeded as e:
+            return self._retry(item, str(e), ambiguous=False, delay=e.retry_after, rate_limited=True)
+        except tweepy.TooManyRequests as e:
+            return self._retry(item, str(e), ambiguous=False, delay=self.twitter.wait_time(POST_TWEET_ENDPOINT),
+                               rate_limited=True)
+        except _PERMANENT_ERRORS as e:
+            return self._fail(item, str(e))
+        except _UNSENT_ERRORS as e:
+            return self._retry(item, str(e), ambiguous=False)
+        except Exception as e:
+            # Timeout de lectura, conexión cortada o error 5xx: pudo publicarse
+            return self._retry(item, str(e), ambiguous=True)
+
+        return self._complete(item, tweet)
+
+    def _find_in_timeline(self, item: Dict) -> Optional[Dict]:
+        """
+        Busca el texto de un elemento entre los últimos tweets propios
+
+        Args:
+            item: Elemento de la bandeja de salida
+
+        Returns:
+            Tweet encontrado o None
+        """
+        for tweet in self.twitter.get_own_recent_tweets(self.timeline_check_size):
+            if outbox_fingerprint(tweet['text']) == item['fingerprint']:
+                return {'id': tweet['id'], 'text': item['content'], 'public_metrics': {}}
+        return None
+
+    def _complete(self, item: Dict, tweet: Dict) -> str:
+        """Cierra un elemento enviado, encola la siguiente parte si es un hilo y completa su publicación"""
+        follow_up = next_thread_part(item, tweet['id'])
+        if follow_up:
+            content, payload = follow_up
+            follow_up = (content, outbox_fingerprint(content), payload, self.account)
+        item['follow_up_id'] = self.db.finish_outbox(item['id'], 'sent', tweet_id=tweet['id'], follow_up=follow_up)
+        if self.on_sent:
+            try:
+                self.on_sent(item, tweet)
+            except Exception as e:
+                # El tweet ya salió: no se reintenta por un fallo posterior
+                logger.error(f"❌ Error completando la publicación {tweet['id']}: {e}")
+        return 'sent'
+
+    def _retry(self, item: Dict, error: str, ambiguous: bool, delay: float = None,
+               rate_limited: bool = False) -> str:
+        """
+        Reprograma un elemento con backoff exponencial y jitter, o lo da por fallido
+
+        Los rechazos por cuota esperan hasta que la cuota vuelva y no cuentan
+        como intento.
+        """
+        if item['attempts'] >= self.max_attempts and not rate_limited:
+            return self._fail(item, error)
+
+        if delay is None:
+            # Jitter "igual": la mitad fija y la otra mitad aleatoria
+            backoff = min(self.max_delay, self.base_delay * 2 ** (item['attempts'] - 1))
+            delay = backoff / 2 + random.uniform(0, backoff / 2)
+
+        self.db.retry_outbox(item['id'], datetime.utcnow() + timedelta(seconds=delay), error, ambiguous,
+                             refund_attempt=rate_limited)
+        logger.warning(f"⚠️ Envío {item['id']} fallido (intento {item['attempts']}/{self.max_attempts}"
+                       f"{', ambiguo' if ambiguous else ''}), reintento en {delay:.0f} s: {error}")
+        return 'retried'
+
+    def _fail(self, item: Dict, error: str) -> str:
+        """Da un elemento por fallido definitivamente"""
+        self.db.finish_outbox(item['id'], 'failed', error=error)
+        logger.error(f"❌ Envío {item['id']} descartado tras {item['attempts']} intentos: {error}")
+        if self.on_failed:
+            try:
+                self.on_failed(item)
+            except Exception as e:
+                logger.error(f"❌ Error procesando el envío descartado {item['id']}: {e}")
+        return 'failed'
+
+    def report(self, hours: int = 24) -> List[Dict]:
+        """
+        Obtiene el rendimiento por hora de la bandeja de salida
+
+        Args:
+            hours: Horas hacia atrás a incluir
+
+        Returns:
+            Lista por hora con sent, failed, attempts y success_rate
+        """
+        return self.db.get_outbox_report(datetime.utcnow() - timedelta(hours=hours))
+
+    def log_hourly_report(self):
+        """Registra el rendimiento de la última hora"""
+        rows = self.report(hours=1)
+        sent = sum(row['sent'] for row in rows)
+        failed = sum(row['failed'] for row in rows)
+        attempts = sum(row['attempts'] for row in rows)
+        rate = f"{sent / (sent + failed):.0%}" if sent + failed else "n/d"
+        logger.info(f"📈 Bandeja de salida (última hora): {sent} enviados, {failed} fallidos, "
+                    f"{attempts} intentos, éxito {rate}, {self.db.count_pending_outbox()} pendientes")
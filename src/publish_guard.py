@@ -0,0 +1,144 @@
+"""
+Guardia de publicación para el bot ZTech
+Rechaza tweets casi idénticos a los publicados recientemente antes de
+llamar a la API (Twitter responde 403 a los duplicados)
+"""
+from collections import deque
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from loguru import logger
+
+from content_dedup import normalize_text
+
+
+def char_ngrams(text: str, n: int = 5) -> Set[str]:
+    """
+    Obtiene los n-gramas de caracteres de un texto normalizado
+
+    Args:
+        text: Texto del tweet
+        n: Tamaño de los n-gramas
+
+    Returns:
+        Conjunto de n-gramas
+    """
+    normalized = normalize_text(text)
+    if len(normalized) <= n:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+
+class DuplicateTweetGuard:
+    """
+    Índice invertido de n-gramas sobre los últimos N tweets publicados
+
+    Cada consulta solo recorre las listas de los n-gramas del candidato,
+    acumulando la intersección con cada tweet del histórico, por lo que el
+    coste no depende de cuántos tweets distintos hay en la ventana.
+    """
+
+    def __init__(self, max_tweets: int = 200, ngram_size: int = 5,
+                 jaccard_threshold: float = 0.6, containment_threshold: float = 0.8):
+        """
+        Inicializa la guardia
+
+        Args:
+            max_tweets: Número de tweets recientes a recordar
+            ngram_size: Tamaño de los n-gramas de caracteres
+            jaccard_threshold: Similitud de Jaccard a partir de la cual se rechaza
+            containment_threshold: Contención a partir de la cual se rechaza
+        """
+        self.max_tweets = max_tweets
+        self.ngram_size = ngram_size
+        self.jaccard_threshold = jaccard_threshold
+        self.containment_threshold = containment_threshold
+        self.postings: Dict[str, Set[str]] = {}
+        self.ngrams: Dict[str, Set[str]] = {}
+        self.order = deque()
+
+    def __len__(self) -> int:
+        return len(self.ngrams)
+
+    def add(self, tweet_id: str, text: str):
+        """
+        Agrega un tweet publicado al índice, descartando el más antiguo si hace falta
+
+        Args:
+            tweet_id: ID del tweet
+            text: Texto publicado
+        """
+        tweet_id = str(tweet_id)
+        if tweet_id in self.ngrams:
+            return
+
+        grams = char_ngrams(text, self.ngram_size)
+        self.ngrams[tweet_id] = grams
+        self.order.append(tweet_id)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(tweet_id)
+
+        while len(self.order) > self.max_tweets:
+            self._evict(self.order.popleft())
+
+    def add_many(self, tweets: Iterable[Tuple[str, str]]):
+        """Agrega varios tweets (tweet_id, texto) del más antiguo al más reciente"""
+        for tweet_id, text in tweets:
+            self.add(tweet_id, text)
+
+    def _evict(self, tweet_id: str):
+        """Elimina un tweet del índice"""
+        for gram in self.ngrams.pop(tweet_id, ()):
+            posting = self.postings.get(gram)
+            if posting:
+                posting.discard(tweet_id)
+                if not posting:
+                    del self.postings[gram]
+
+    def find_similar(self, text: str) -> Optional[Tuple[str, float, float]]:
+        """
+        Busca el tweet publicado más parecido al candidato
+
+        Args:
+            text: Texto candidato
+
+        Returns:
+            Tupla (tweet_id, jaccard, contención) o None si no hay coincidencias
+        """
+        grams = char_ngrams(text, self.ngram_size)
+        if not grams:
+            return None
+
+        overlaps: Dict[str, int] = {}
+        for gram in grams:
+            for tweet_id in self.postings.get(gram, ()):
+                overlaps[tweet_id] = overlaps.get(tweet_id, 0) + 1
+
+        best = None
+        for tweet_id, intersection in overlaps.items():
+            other_size = len(self.ngrams[tweet_id])
+            jaccard = intersection / (len(grams) + other_size - intersection)
+            containment = intersection / min(len(grams), other_size)
+            if best is None or (jaccard, containment) > (best[1], best[2]):
+                best = (tweet_id, jaccard, containment)
+        return best
+
+    def check(self, text: str) -> Optional[str]:
+        """
+        Verifica si un tweet candidato es casi duplicado de uno reciente
+
+        Args:
+            text: Texto candidato
+
+        Returns:
+            ID del tweet publicado que lo hace duplicado, o None si se puede publicar
+        """
+        match = self.find_similar(text)
+        if not match:
+            return None
+
+        tweet_id, jaccard, containment = match
+        if jaccard >= self.jaccard_threshold or containment >= self.containment_threshold:
+            logger.warning(f"🚫 Tweet casi duplicado de {tweet_id} "
+                           f"(jaccard={jaccard:.2f}, contención={containment:.2f})")
+            return tweet_id
+        return None
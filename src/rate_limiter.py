@@ -0,0 +1,304 @@
+"""
+Gestor de rate limits de Twitter para el bot ZTech
+Mantiene una cubeta de tokens por endpoint a partir de las cabeceras
+x-rate-limit-* de cada respuesta, más las cuotas diarias de publicación,
+y responde sin bloquear si una llamada puede hacerse ahora o cuándo podrá
+"""
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from loguru import logger
+
+# Endpoint de publicación y cubetas de sus cuotas de 24 horas
+POST_TWEET_ENDPOINT = 'POST /2/tweets'
+DAILY_APP_BUCKET = 'POST /2/tweets (24h app)'
+DAILY_USER_BUCKET = 'POST /2/tweets (24h usuario)'
+
+# Consulta de tweets por lotes de IDs
+LOOKUP_TWEETS_ENDPOINT = 'GET /2/tweets'
+
+# Prefijo de cabeceras -> cubeta que actualizan
+_HEADER_BUCKETS = {
+    'x-app-limit-24hour': DAILY_APP_BUCKET,
+    'x-user-limit-24hour': DAILY_USER_BUCKET,
+}
+
+_DAY_SECONDS = 24 * 3600
+
+
+class RateLimitExceeded(Exception):
+    """La llamada se rechazó localmente porque su cuota está agotada"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Rate limit agotado en {endpoint}, disponible en {retry_after:.0f} s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def endpoint_key(method: str, route: str) -> str:
+    """
+    Normaliza un endpoint para agrupar sus llamadas en una sola cubeta
+
+    Args:
+        method: Método HTTP
+        route: Ruta de la API (p. ej. /2/tweets/123)
+
+    Returns:
+        Clave del endpoint (p. ej. 'GET /2/tweets/:id')
+    """
+    route = re.sub(r'/by/username/[^/]+', '/by/username/:username', route)
+    route = re.sub(r'(?<=.)/\d+(?=/|$)', '/:id', route)  # Sin tocar la versión (/2)
+    return f"{method.upper()} {route}"
+
+
+class TokenBucket:
+    """Cuota de una ventana de rate limit: llamadas restantes hasta reset_at"""
+
+    def __init__(self, limit: Optional[int] = None, remaining: Optional[int] = None,
+                 reset_at: float = 0.0, window: float = 0.0):
+        """
+        Inicializa la cubeta
+
+        Args:
+            limit: Llamadas por ventana (None = desconocido)
+            remaining: Llamadas restantes en la ventana actual (None = desconocido)
+            reset_at: Epoch en que se recarga la cubeta (0 = sin ventana activa)
+            window: Duración en segundos de una ventana que se abre con la
+                primera llamada (solo para cuotas locales sin cabeceras)
+        """
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+        self.window = window
+
+    def _refill(self, now: float):
+        """Recarga la cubeta si su ventana ya terminó"""
+        if self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Segundos hasta que haya un token disponible (0 si ya lo hay)"""
+        self._refill(now)
+        if self.remaining is None or self.remaining > 0:
+            return 0.0
+        return max(0.0, self.reset_at - now)
+
+    def consume(self, now: float):
+        """Gasta un token de forma optimista, antes de conocer la respuesta"""
+        self._refill(now)
+        if self.remaining is not None:
+            self.remaining = max(0, self.remaining - 1)
+        if not self.reset_at and self.window:
+            self.reset_at = now + self.window
+
+    def update(self, limit: Optional[int], remaining: Optional[int], reset_at: Optional[float]):
+        """Sustituye el estado local por el que informa la API"""
+        if limit is not None:
+            self.limit = limit
+        if remaining is not None:
+            self.remaining = remaining
+        if reset_at is not None:
+            self.reset_at = reset_at
+
+
+class RateLimiter:
+    """Cubetas de tokens por endpoint alimentadas por las cabeceras de la API"""
+
+    def __init__(self, daily_post_cap: int = 0, on_update: Callable[[Dict[str, Dict]], None] = None):
+        """
+        Inicializa el gestor
+
+        Args:
+            daily_post_cap: Publicaciones permitidas cada 24 horas a nivel de
+                aplicación hasta que la API informe la cuota real (0 = sin
+                límite local)
+            on_update: Función que recibe el estado de las cubetas que la API
+                acaba de actualizar o que una llamada acaba de gastar en local
+                (para guardarlo fuera del proceso)
+        """
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.on_update = on_update
+        if daily_post_cap > 0:
+            self._buckets[DAILY_APP_BUCKET] = TokenBucket(
+                limit=daily_post_cap, remaining=daily_post_cap, window=_DAY_SECONDS
+            )
+
+    def _named_buckets_for(self, endpoint: str) -> List[Tuple[str, TokenBucket]]:
+        """Cubetas (con su nombre) que limitan una llamada al endpoint"""
+        names = [endpoint]
+        if endpoint == POST_TWEET_ENDPOINT:
+            names += [DAILY_APP_BUCKET, DAILY_USER_BUCKET]
+        return [(name, self._buckets[name]) for name in names if name in self._buckets]
+
+    def _buckets_for(self, endpoint: str) -> List[TokenBucket]:
+        """Cubetas que limitan una llamada al endpoint"""
+        return [bucket for _, bucket in self._named_buckets_for(endpoint)]
+
+    def wait_time(self, endpoint: str, now: Optional[float] = None) -> float:
+        """
+        Indica cuánto falta para poder llamar al endpoint, sin bloquear
+
+        Args:
+            endpoint: Clave del endpoint (ver endpoint_key)
+            now: Epoch actual (por defecto, time.time())
+
+        Returns:
+            Segundos de espera (0 si la llamada puede hacerse ya)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return max((bucket.wait_time(now) for bucket in self._buckets_for(endpoint)), default=0.0)
+
+    def can_call(self, endpoint: str, now: Optional[float] = None) -> bool:
+        """
+        Indica si el endpoint tiene cuota disponible ahora
+
+        Args:
+            endpoint: Clave del endpoint
+            now: Epoch actual (por defecto, time.time())
+
+        Returns:
+            True si la llamada puede hacerse sin esperar
+        """
+        return self.wait_time(endpoint, now) == 0
+
+    def try_acquire(self, endpoint: str, now: Optional[float] = None) -> bool:
+        """
+        Reserva un token para una llamada si todas sus cuotas lo permiten
+
+        Las cuotas locales (como el límite diario de publicaciones) solo
+        existen en este proceso, así que su consumo se notifica a on_update
+        para que la siguiente ejecución las restaure gastadas.
+
+        Args:
+            endpoint: Clave del endpoint
+            now: Epoch actual (por defecto, time.time())
+
+        Returns:
+            True si se reservó el token, False si alguna cuota está agotada
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            buckets = self._named_buckets_for(endpoint)
+            if any(bucket.wait_time(now) > 0 for _, bucket in buckets):
+                return False
+            for _, bucket in buckets:
+                bucket.consume(now)
+            consumed = {name: self._state(bucket) for name, bucket in buckets if bucket.window}
+
+        self._notify(consumed)
+        return True
+
+    def update_from_headers(self, endpoint: str, headers: Mapping[str, str]):
+        """
+        Actualiza las cubetas con las cabeceras de rate limit de una respuesta
+
+        Args:
+            endpoint: Clave del endpoint llamado
+            headers: Cabeceras HTTP de la respuesta (también las de un 429)
+        """
+        prefixes = {'x-rate-limit': endpoint}
+        if endpoint == POST_TWEET_ENDPOINT:
+            prefixes.update(_HEADER_BUCKETS)
+
+        observed = {}
+        for prefix, name in prefixes.items():
+            state = {
+                'limit': _header_int(headers, f"{prefix}-limit"),
+                'remaining': _header_int(headers, f"{prefix}-remaining"),
+                'reset': _header_int(headers, f"{prefix}-reset"),
+            }
+            if any(value is not None for value in state.values()):
+                observed[name] = state
+        self.update(observed)
+
+    def update(self, observed: Dict[str, Dict]):
+        """
+        Sustituye el estado de varias cubetas por el que informa la API
+
+        Args:
+            observed: Diccionario cubeta -> {'limit', 'remaining', 'reset'}
+                (los valores None se conservan)
+        """
+        if not observed:
+            return
+
+        with self._lock:
+            for name, state in observed.items():
+                self._buckets.setdefault(name, TokenBucket()).update(state['limit'], state['remaining'], state['reset'])
+                if state['remaining'] == 0:
+                    logger.warning(f"⚠️ Cuota agotada en {name} hasta "
+                                   f"{time.strftime('%H:%M', time.localtime(state['reset'] or 0))}")
+            updated = {name: self._state(self._buckets[name]) for name in observed}
+
+        self._notify(updated)
+
+    def _notify(self, states: Dict[str, Dict]):
+        """Entrega a on_update el estado de las cubetas que cambiaron"""
+        if not states or not self.on_update:
+            return
+        try:
+            self.on_update(states)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar el estado de rate limits: {e}")
+
+    def restore(self, saved: Dict[str, Dict], now: Optional[float] = None) -> int:
+        """
+        Carga el estado guardado por una ejecución anterior
+
+        Las ventanas que ya terminaron se cargan recargadas; las cubetas que
+        este proceso ya conoce no se tocan.
+
+        Args:
+            saved: Diccionario cubeta -> {'limit', 'remaining', 'reset'}
+            now: Epoch actual (por defecto, time.time())
+
+        Returns:
+            Número de cubetas cargadas
+        """
+        now = time.time() if now is None else now
+        restored = 0
+        with self._lock:
+            for name, state in saved.items():
+                bucket = self._buckets.get(name)
+                if bucket is not None and bucket.reset_at:
+                    continue
+                if bucket is None:
+                    bucket = self._buckets[name] = TokenBucket()
+                bucket.update(state['limit'], state['remaining'], state['reset'] or 0)
+                bucket._refill(now)
+                restored += 1
+        return restored
+
+    def status(self) -> Dict[str, Dict]:
+        """
+        Obtiene el estado conocido de cada cubeta
+
+        Returns:
+            Diccionario endpoint -> {'limit', 'remaining', 'reset'}
+        """
+        now = time.time()
+        with self._lock:
+            for bucket in self._buckets.values():
+                bucket._refill(now)
+            return {name: self._state(bucket) for name, bucket in sorted(self._buckets.items())}
+
+    @staticmethod
+    def _state(bucket: TokenBucket) -> Dict:
+        """Estado público de una cubeta"""
+        return {'limit': bucket.limit, 'remaining': bucket.remaining, 'reset': int(bucket.reset_at)}
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    """Lee una cabecera numérica, o None si falta o no es un número"""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
@@ -0,0 +1,267 @@
+"""
+Motor de retención y archivo para el bot ZTech
+Borra los datos caducados en bloques acotados usando los índices por fecha,
+los guarda antes en archivos comprimidos particionados por día y permite
+reimportarlos para recuperar el estado de deduplicación
+"""
+import gzip
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from database import DatabaseManager, row_to_dict
+
+try:
+    import zstandard
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+    logger.warning("⚠️ zstandard no disponible, los archivos se comprimirán con gzip")
+
+# Columna de fecha (indexada) por la que caduca cada tabla
+RETENTION_COLUMNS = {
+    'processed_content': 'processed_at',
+    'published_tweets': 'published_at',
+    'engagement_samples': 'sampled_at',
+    'bot_stats': 'date',
+    'content_candidates': 'created_at',
+    'outbox': 'finished_at',
+}
+
+# Condición adicional de las filas que pueden caducar en cada tabla
+RETENTION_FILTERS = {
+    # Los elementos en vuelo guardan la huella que evita publicar dos veces
+    'outbox': "status IN ('sent', 'failed')",
+}
+
+# Tablas que se archivan pero no se reimportan: sus filas no tienen una clave
+# única con la que ignorar las que ya existen
+ARCHIVE_ONLY = {'outbox'}
+
+ARCHIVE_SUFFIXES = ('.jsonl.zst', '.jsonl.gz')
+
+
+def _open_archive(path: Path, mode: str):
+    """
+    Abre un archivo de archivo comprimido en modo texto
+
+    Cada apertura en modo 'a' agrega un frame (zstd) o miembro (gzip) nuevo,
+    y la lectura recorre todos los frames del archivo.
+
+    Args:
+        path: Ruta del archivo .jsonl.zst o .jsonl.gz
+        mode: 'a' para agregar o 'r' para leer
+    """
+    if path.name.endswith('.zst'):
+        if not ZSTANDARD_AVAILABLE:
+            raise ImportError("zstandard no está instalado. Ejecuta: pip install zstandard")
+        raw = open(path, mode + 'b')
+        if mode == 'a':
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return _TextStream(stream)
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+class _TextStream:
+    """Adaptador de texto UTF-8 sobre los flujos binarios de zstandard"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text: str):
+        self._stream.write(text.encode('utf-8'))
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = b''
+        while True:
+            chunk = self._stream.read(1 << 16)
+            if not chunk:
+                break
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                yield line.decode('utf-8')
+        if buffer:
+            yield buffer.decode('utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._stream.close()
+
+
+class RetentionEngine:
+    """
+    Aplica las políticas de retención de la base de datos
+
+    Cada bloque se selecciona por la columna de fecha indexada, se archiva y
+    se borra en su propia transacción, de modo que la limpieza nunca bloquea
+    la base de datos durante mucho tiempo. Después se devuelve el espacio
+    libre al sistema con vacuum incremental.
+    """
+
+    def __init__(self, db: DatabaseManager, archive_dir: Optional[str] = "archive",
+                 chunk_size: int = 500, vacuum_pages: int = 1000):
+        """
+        Inicializa el motor de retención
+
+        Args:
+            db: Gestor de base de datos
+            archive_dir: Directorio de archivos (None para borrar sin archivar)
+            chunk_size: Filas borradas por transacción
+            vacuum_pages: Páginas liberadas por cada paso de vacuum incremental
+        """
+        self.db = db
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.chunk_size = chunk_size
+        self.vacuum_pages = vacuum_pages
+        self.archive_suffix = '.jsonl.zst' if ZSTANDARD_AVAILABLE else '.jsonl.gz'
+
+    def run(self, policies: Dict[str, int]) -> Dict[str, int]:
+        """
+        Aplica varias políticas de retención
+
+        Args:
+            policies: Días a conservar por tabla (0 o negativo para no caducar)
+
+        Returns:
+            Filas eliminadas por tabla
+        """
+        deleted = {}
+        for table, days in policies.items():
+            if days and days > 0:
+                deleted[table] = self.purge(table, days)
+
+        # Libera el resto de páginas vacías (y convierte una sola vez las bases antiguas)
+        self.db.reclaim_space()
+
+        logger.info(f"🧹 Retención aplicada: {deleted}")
+        return deleted
+
+    def purge(self, table: str, days_to_keep: int) -> int:
+        """
+        Archiva y elimina por bloques las filas más antiguas que la ventana
+
+        Args:
+            table: Tabla con política de retención
+            days_to_keep: Días de datos a conservar
+
+        Returns:
+            Número de filas eliminadas
+        """
+        column = RETENTION_COLUMNS[table]
+        condition = f"AND {RETENTION_FILTERS[table]}" if table in RETENTION_FILTERS else ""
+        cutoff = datetime.utcnow() - timedelta(days=days_to_keep)
+        cutoff_value = cutoff.date().isoformat() if column == 'date' else cutoff.strftime('%Y-%m-%d %H:%M:%S')
+
+        total = 0
+        while True:
+            with self.db.backend.cursor(dict_rows=True) as cursor:
+                cursor.execute(f"""
+                    SELECT * FROM {table}
+                    WHERE {column} < ? {condition}
+                    ORDER BY {column}
+                    LIMIT ?
+                """, (cutoff_value, self.chunk_size))
+                rows = [row_to_dict(row) for row in cursor.fetchall()]
+
+                if not rows:
+                    break
+
+                # Archivar antes de confirmar el borrado
+                if self.archive_dir:
+                    self._archive(table, column, rows)
+
+                ids = [row['id'] for row in rows]
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(ids))})", ids
+                )
+
+            total += len(rows)
+            self.db.reclaim_space(self.vacuum_pages)
+
+            if len(rows) < self.chunk_size:
+                break
+
+        if total:
+            logger.info(f"🗑️ {total} filas eliminadas de {table} (anteriores a {cutoff_value})")
+        return total
+
+    def _archive(self, table: str, column: str, rows: List[Dict]):
+        """
+        Agrega filas al archivo comprimido del día de cada una
+
+        Args:
+            table: Tabla de origen
+            column: Columna de fecha que decide la partición
+            rows: Filas a archivar
+        """
+        partitions: Dict[str, List[Dict]] = {}
+        for row in rows:
+            day = str(row.get(column) or 'unknown')[:10]
+            partitions.setdefault(day, []).append(row)
+
+        table_dir = self.archive_dir / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+
+        for day, day_rows in partitions.items():
+            with _open_archive(table_dir / f"{day}{self.archive_suffix}", 'a') as archive:
+                archive.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in day_rows))
+
+    def import_archive(self, path: str, table: Optional[str] = None) -> int:
+        """
+        Reimporta filas archivadas (por ejemplo para recuperar la deduplicación)
+
+        Las filas que ya existen se ignoran, así que importar dos veces el
+        mismo archivo no duplica datos. Las tablas de ARCHIVE_ONLY se omiten.
+
+        Args:
+            path: Archivo .jsonl.zst/.jsonl.gz o directorio de archivo
+            table: Tabla destino; por defecto el nombre del directorio del archivo
+
+        Returns:
+            Número de filas leídas
+        """
+        root = Path(path)
+        files = sorted(
+            file for suffix in ARCHIVE_SUFFIXES for file in root.rglob(f"*{suffix}")
+        ) if root.is_dir() else [root]
+
+        total = 0
+        for file in files:
+            target = table or file.parent.name
+            if target not in RETENTION_COLUMNS:
+                logger.warning(f"⚠️ Archivo ignorado, tabla desconocida: {file}")
+                continue
+            if target in ARCHIVE_ONLY:
+                logger.warning(f"⚠️ Archivo ignorado, {target} no se puede reimportar sin duplicar filas: {file}")
+                continue
+
+            with _open_archive(file, 'r') as archive:
+                rows = [json.loads(line) for line in archive if line.strip()]
+            for start in range(0, len(rows), self.chunk_size):
+                self._insert_rows(target, rows[start:start + self.chunk_size])
+            total += len(rows)
+            logger.info(f"📥 {len(rows)} filas importadas en {target} desde {file.name}")
+
+        return total
+
+    def _insert_rows(self, table: str, rows: List[Dict]):
+        """Inserta filas archivadas conservando sus fechas originales"""
+        with self.db.backend.cursor() as cursor:
+            cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+            # Solo columnas reales de la tabla; el id se vuelve a asignar
+            columns = [desc[0] for desc in cursor.description if desc[0] != 'id']
+            columns = [column for column in columns if any(column in row for row in rows)]
+
+            cursor.executemany(f"""
+                INSERT INTO {table} ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT DO NOTHING
+            """, [tuple(row.get(column) for column in columns) for row in rows])
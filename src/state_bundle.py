@@ -0,0 +1,184 @@
+"""
+Paquete de estado del bot ZTech
+Exporta el estado caliente (deduplicación, enlaces canónicos, estado de los
+feeds, cola de candidatos, bandeja de salida, media_id vigentes, rate
+limits observados y últimos tweets) a un único archivo comprimido y lo restaura al arrancar, para los
+ejecutores que empiezan cada vez con una base de datos vacía
+"""
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Tuple
+
+from loguru import logger
+
+from database import DatabaseManager, row_to_dict
+from retention import ZSTANDARD_AVAILABLE
+
+if ZSTANDARD_AVAILABLE:
+    import zstandard
+
+BUNDLE_VERSION = 1
+
+# Tablas incluidas en el paquete (las consultas están en _bundle_queries)
+BUNDLE_TABLES = ('processed_content', 'published_tweets', 'content_candidates', 'outbox', 'media_cache',
+                 'rate_limits', 'feed_state', 'bot_config')
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def _bundle_queries(dedup_days: int, tweet_limit: int) -> Dict[str, Tuple[str, tuple]]:
+    """
+    Consultas que seleccionan el estado caliente de cada tabla
+
+    Args:
+        dedup_days: Días de contenido procesado a conservar
+        tweet_limit: Número de tweets recientes a conservar
+
+    Returns:
+        Diccionario tabla -> (consulta, parámetros)
+    """
+    now = datetime.utcnow()
+    since = (now - timedelta(days=dedup_days)).strftime('%Y-%m-%d %H:%M:%S')
+    return {
+        # Filtro de deduplicación: hashes, enlaces canónicos y huellas SimHash
+        'processed_content': ("""
+            SELECT content_hash, source, source_url, link, simhash, used, processed_at
+            FROM processed_content WHERE processed_at >= ? ORDER BY processed_at
+        """, (since,)),
+        # Huellas de los últimos tweets para la guardia de duplicados y la recencia
+        'published_tweets': ("""
+            SELECT tweet_id, content, source, source_url, post_type, language, published_at, metrics_due_at,
+                account
+            FROM published_tweets ORDER BY published_at DESC LIMIT ?
+        """, (tweet_limit,)),
+        'content_candidates': ("""
+            SELECT content_hash, story, tweet_text, source, source_url, priority, created_at, expires_at,
+                language
+            FROM content_candidates WHERE status = 'pending' AND expires_at > ?
+        """, (now.strftime('%Y-%m-%d %H:%M:%S'),)),
+        # Tweets aún sin enviar: la siguiente ejecución los reintenta
+        'outbox': ("""
+            SELECT account, fingerprint, content, payload, status, attempts, ambiguous, next_attempt_at,
+                last_error, created_at, updated_at
+            FROM outbox WHERE status IN ('pending', 'sending')
+        """, ()),
+        # Imágenes con media_id aún vigente: la siguiente ejecución no las vuelve a subir
+        'media_cache': ("SELECT url, sha256, filename, media_id, media_expires_at, updated_at FROM media_cache "
+                        "WHERE media_expires_at > ?", (now.strftime('%Y-%m-%d %H:%M:%S'),)),
+        # Cuotas de la API (incluida la diaria de publicaciones) vistas en la última ejecución
+        'rate_limits': ("SELECT account, endpoint, quota, remaining, reset_at, updated_at FROM rate_limits", ()),
+        # ETags, Last-Modified y marcas de agua de los feeds
+        'feed_state': ("SELECT feed_url, etag, last_modified, watermark, updated_at FROM feed_state", ()),
+        # Estado genérico clave-valor del bot
+        'bot_config': ("SELECT key, value, updated_at FROM bot_config", ()),
+    }
+
+
+def export_state(db: DatabaseManager, path: str, dedup_days: int = 30,
+                 tweet_limit: int = 200) -> Dict[str, int]:
+    """
+    Guarda el estado caliente del bot en un archivo comprimido
+
+    El archivo se escribe primero en un temporal y se renombra, así que un
+    fallo a mitad nunca deja un paquete corrupto.
+
+    Args:
+        db: Gestor de base de datos
+        path: Ruta del paquete
+        dedup_days: Días de contenido procesado a incluir
+        tweet_limit: Número de tweets recientes a incluir
+
+    Returns:
+        Filas exportadas por tabla
+    """
+    started = time.perf_counter()
+    tables = {}
+
+    with db.backend.cursor(dict_rows=True) as cursor:
+        for table, (query, params) in _bundle_queries(dedup_days, tweet_limit).items():
+            cursor.execute(query, params)
+            rows = [row_to_dict(row) for row in cursor.fetchall()]
+            columns = [desc[0] for desc in cursor.description]
+            tables[table] = {
+                'columns': columns,
+                'rows': [[row[column] for column in columns] for row in rows]
+            }
+
+    payload = json.dumps({
+        'version': BUNDLE_VERSION,
+        'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'tables': tables
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    if ZSTANDARD_AVAILABLE:
+        data = zstandard.ZstdCompressor(level=10).compress(payload)
+    else:
+        data = gzip.compress(payload)
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(target.name + '.tmp')
+    temporary.write_bytes(data)
+    os.replace(temporary, target)
+
+    counts = {table: len(content['rows']) for table, content in tables.items()}
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"📦 Estado guardado en {target} ({len(data) / 1024:.1f} KB, {elapsed:.0f} ms): {counts}")
+    return counts
+
+
+def import_state(db: DatabaseManager, path: str) -> Dict[str, int]:
+    """
+    Restaura el estado caliente del bot desde un paquete
+
+    Las filas que ya existen se conservan, así que importar sobre una base
+    con datos no duplica ni pisa nada.
+
+    Args:
+        db: Gestor de base de datos
+        path: Ruta del paquete
+
+    Returns:
+        Filas leídas por tabla (vacío si el paquete no existe)
+    """
+    source = Path(path)
+    if not source.exists():
+        logger.info(f"ℹ️ Sin paquete de estado en {source}, se arranca en frío")
+        return {}
+
+    started = time.perf_counter()
+    data = source.read_bytes()
+    if data.startswith(_ZSTD_MAGIC):
+        if not ZSTANDARD_AVAILABLE:
+            raise ImportError("zstandard no está instalado. Ejecuta: pip install zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = gzip.decompress(data)
+
+    bundle = json.loads(data)
+    if bundle.get('version') != BUNDLE_VERSION:
+        logger.warning(f"⚠️ Versión de paquete de estado no soportada: {bundle.get('version')}")
+        return {}
+
+    counts = {}
+    with db.backend.cursor() as cursor:
+        for table, content in bundle['tables'].items():
+            columns = content['columns']
+            if table not in BUNDLE_TABLES or not all(column.isidentifier() for column in columns):
+                logger.warning(f"⚠️ Tabla desconocida en el paquete de estado: {table}")
+                continue
+            if content['rows']:
+                cursor.executemany(f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    VALUES ({', '.join('?' * len(columns))})
+                    ON CONFLICT DO NOTHING
+                """, [tuple(row) for row in content['rows']])
+            counts[table] = len(content['rows'])
+
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"♻️ Estado restaurado desde {source} ({elapsed:.0f} ms, creado {bundle['created_at']}): {counts}")
+    return counts
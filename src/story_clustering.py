@@ -0,0 +1,180 @@
+"""
+Módulo de agrupación de noticias en historias para el bot ZTech
+Agrupa artículos de distintas fuentes que cuentan la misma historia usando
+firmas MinHash y hashing sensible a la localidad (LSH) sobre los títulos
+"""
+import hashlib
+import random
+from typing import Dict, List, Set
+
+from loguru import logger
+
+from content_dedup import tokenize
+
+# Primo de Mersenne 2^61 - 1 para las permutaciones universales
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def title_shingles(title: str, size: int = 1) -> Set[str]:
+    """
+    Obtiene los shingles de palabras de un título normalizado
+
+    Args:
+        title: Título del artículo
+        size: Número de palabras por shingle
+
+    Returns:
+        Conjunto de shingles
+    """
+    tokens = tokenize(title)
+    if len(tokens) < size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Calcula firmas MinHash con permutaciones universales deterministas"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        """
+        Inicializa el generador de firmas
+
+        Args:
+            num_perm: Número de permutaciones (longitud de la firma)
+            seed: Semilla para generar las permutaciones
+        """
+        self.num_perm = num_perm
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: Set[str]) -> List[int]:
+        """
+        Calcula la firma MinHash de un conjunto de shingles
+
+        Args:
+            shingles: Conjunto de shingles
+
+        Returns:
+            Lista de num_perm valores mínimos
+        """
+        signature = [_MAX_HASH] * self.num_perm
+        for shingle in shingles:
+            base = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+            for i, (a, b) in enumerate(self.permutations):
+                value = ((a * base + b) % _MERSENNE_PRIME) & _MAX_HASH
+                if value < signature[i]:
+                    signature[i] = value
+        return signature
+
+    @staticmethod
+    def similarity(first: List[int], second: List[int]) -> float:
+        """Estima la similitud de Jaccard a partir de dos firmas"""
+        if not first or not second:
+            return 0.0
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+class _UnionFind:
+    """Estructura union-find para fusionar artículos en historias"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first: int, second: int):
+        root_first, root_second = self.find(first), self.find(second)
+        if root_first != root_second:
+            self.parent[max(root_first, root_second)] = min(root_first, root_second)
+
+
+class StoryClusterer:
+    """
+    Agrupa un lote de artículos en historias
+
+    Cada firma se divide en bandas; los artículos que comparten una banda
+    son candidatos y solo se fusionan si su similitud estimada supera el
+    umbral. El coste es lineal en el número de artículos.
+    """
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 1):
+        """
+        Inicializa el agrupador
+
+        Args:
+            threshold: Similitud de Jaccard mínima entre títulos de la misma historia
+            num_perm: Longitud de la firma MinHash
+            bands: Número de bandas LSH (debe dividir a num_perm)
+            shingle_size: Palabras por shingle de título
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=num_perm)
+
+    def cluster(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Agrupa artículos en historias
+
+        Args:
+            articles: Lista de artículos (ordenados por relevancia o fecha)
+
+        Returns:
+            Lista de historias ordenadas por tamaño. Cada historia contiene
+            'cluster_id', 'size', 'sources', 'articles' y 'representative';
+            el representante incluye además 'cluster_size'.
+        """
+        if not articles:
+            return []
+
+        signatures = [
+            self.hasher.signature(title_shingles(article.get('title', ''), self.shingle_size))
+            for article in articles
+        ]
+        union_find = _UnionFind(len(articles))
+
+        for band in range(self.bands):
+            start = band * self.rows
+            buckets: Dict[tuple, int] = {}
+            for index, signature in enumerate(signatures):
+                if signature[0] == _MAX_HASH:
+                    continue  # Título vacío
+                key = tuple(signature[start:start + self.rows])
+                first = buckets.setdefault(key, index)
+                if first != index and MinHasher.similarity(signatures[first], signature) >= self.threshold:
+                    union_find.union(first, index)
+
+        groups: Dict[int, List[int]] = {}
+        for index in range(len(articles)):
+            groups.setdefault(union_find.find(index), []).append(index)
+
+        stories = []
+        for root, members in groups.items():
+            story_articles = [articles[i] for i in members]
+            representative = dict(story_articles[0])
+            representative['cluster_size'] = len(members)
+            stories.append({
+                'cluster_id': articles[root].get('content_hash') or str(root),
+                'size': len(members),
+                'sources': len({article.get('source') for article in story_articles}),
+                'articles': story_articles,
+                'representative': representative
+            })
+
+        # Ordenar por popularidad manteniendo el orden original en empates
+        stories.sort(key=lambda story: story['size'], reverse=True)
+
+        logger.info(f"🧩 {len(articles)} artículos agrupados en {len(stories)} historias")
+        return stories
@@ -0,0 +1,168 @@
+"""
+Publicación de hilos del bot ZTech
+Divide un texto largo en partes numeradas por frases y lo publica como una
+cadena de respuestas a través de la bandeja de salida. Cada parte pendiente
+guarda en su payload el resto del hilo y el tweet al que responde, así que
+un fallo a mitad continúa desde la última parte publicada
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# Corte tras un signo de fin de frase o en un salto de línea, conservando el separador
+# (sin cortar tras la numeración de una lista, como "1. ")
+_SENTENCE_BREAK = re.compile(r'((?<=[^\d\s][.!?…])\s+|\n+)')
+
+
+def _pieces(text: str, limit: int) -> List[Tuple[str, str]]:
+    """
+    Separa un texto en frases de como máximo limit caracteres
+
+    Las frases más largas se cortan entre palabras (o a la fuerza si una
+    palabra no cabe).
+
+    Args:
+        text: Texto a separar
+        limit: Longitud máxima de cada trozo
+
+    Returns:
+        Lista de tuplas (trozo, separador que lo precedía)
+    """
+    tokens = _SENTENCE_BREAK.split(text.strip())
+    pieces = []
+    separator = ''
+    for index, token in enumerate(tokens):
+        if index % 2:
+            separator = token
+            continue
+        while len(token) > limit:
+            cut = token.rfind(' ', 0, limit + 1)
+            if cut <= 0:
+                cut = limit
+            pieces.append((token[:cut].rstrip(), separator))
+            token = token[cut:].lstrip()
+            separator = ' '
+        if token:
+            pieces.append((token, separator))
+    return pieces
+
+
+def _pack(pieces: List[Tuple[str, str]], limit: int) -> List[str]:
+    """Agrupa frases consecutivas en partes de como máximo limit caracteres"""
+    parts = []
+    current = ''
+    for piece, separator in pieces:
+        if current and len(current) + len(separator) + len(piece) <= limit:
+            current += separator + piece
+        else:
+            if current:
+                parts.append(current)
+            current = piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_thread(text: str, max_length: int = 280, max_parts: int = 10) -> List[str]:
+    """
+    Divide un texto en partes numeradas que caben en un tweet
+
+    Corta en los finales de frase y agrega a cada parte el sufijo " i/n".
+    Un texto que ya cabe en un tweet se devuelve tal cual.
+
+    Args:
+        text: Texto completo
+        max_length: Longitud máxima de cada tweet
+        max_parts: Número máximo de partes (las frases sobrantes se descartan)
+
+    Returns:
+        Lista de partes del hilo
+    """
+    text = text.strip()
+    if len(text) <= max_length:
+        return [text]
+
+    # El espacio reservado para la numeración depende de los dígitos del total
+    digits = 1
+    while True:
+        suffix_length = len(f" {'9' * digits}/{'9' * digits}")
+        parts = _pack(_pieces(text, max_length - suffix_length), max_length - suffix_length)
+        parts = parts[:max_parts]
+        if len(str(len(parts))) <= digits:
+            break
+        digits += 1
+
+    if len(parts) == 1:
+        return parts
+    return [f"{part} {index}/{len(parts)}" for index, part in enumerate(parts, 1)]
+
+
+def next_thread_part(item: Dict, tweet_id: str) -> Optional[Tuple[str, Dict]]:
+    """
+    Prepara la siguiente parte de un hilo tras publicar una parte
+
+    Args:
+        item: Elemento de la bandeja de salida recién enviado
+        tweet_id: ID del tweet publicado para ese elemento
+
+    Returns:
+        Tupla (texto, payload) de la siguiente parte, o None si el elemento
+        no es parte de un hilo o era la última
+    """
+    thread = item['payload'].get('thread')
+    if not thread:
+        return None
+
+    position = thread['position'] + 1
+    if position >= len(thread['parts']):
+        return None
+
+    payload = {
+        'post_type': item['payload'].get('post_type'),
+        'thread': {
+            'parts': thread['parts'],
+            'position': position,
+            'root_id': thread.get('root_id') or tweet_id,
+            'reply_to': tweet_id,
+        }
+    }
+    return thread['parts'][position], payload
+
+
+class ThreadPublisher:
+    """Encola textos largos como hilos en la bandeja de salida"""
+
+    def __init__(self, outbox, max_length: int = 280, max_parts: int = 10):
+        """
+        Inicializa el publicador de hilos
+
+        Args:
+            outbox: Bandeja de salida (Outbox)
+            max_length: Longitud máxima de cada tweet
+            max_parts: Número máximo de partes por hilo
+        """
+        self.outbox = outbox
+        self.max_length = max_length
+        self.max_parts = max_parts
+
+    def enqueue(self, content: str, payload: Dict = None) -> Optional[int]:
+        """
+        Guarda un texto en la bandeja de salida, como hilo si no cabe en un tweet
+
+        Solo se encola la primera parte; cada parte enviada encola la
+        siguiente en la misma transacción en la que se cierra.
+
+        Args:
+            content: Texto completo
+            payload: Datos para completar la publicación (los recibe la primera parte)
+
+        Returns:
+            ID del elemento de la primera parte
+        """
+        parts = split_thread(content, self.max_length, self.max_parts)
+        if len(parts) == 1:
+            return self.outbox.enqueue(parts[0], payload)
+
+        logger.info(f"🧵 Texto de {len(content)} caracteres dividido en un hilo de {len(parts)} partes")
+        return self.outbox.enqueue(parts[0], {**(payload or {}), 'thread': {'parts': parts, 'position': 0}})
@@ -2,52 +2,153 @@
 Cliente de Twitter API v2 para el bot ZTech
 Maneja la autenticación y publicación de tweets
 """
+import functools
+import hashlib
+import json
+import os
+import time
+import requests
 import tweepy
+from pathlib import Path
 from typing import Dict, Optional, List
 from loguru import logger
+from accounts import AccountProfile
 from config import Config
+from database import DatabaseManager
+from rate_limiter import POST_TWEET_ENDPOINT, RateLimiter, RateLimitExceeded, endpoint_key
+
+# Máximo de IDs por consulta de tweets (GET /2/tweets)
+TWEET_LOOKUP_BATCH_SIZE = 100
+
+# Familias de rate_limit_status (v1.1) que se guardan al refrescar
+_V1_RATE_LIMIT_FAMILIES = ('application', 'statuses', 'search', 'media')
+
+# Hosts de la API real que se redirigen a TWITTER_API_BASE_URL
+_TWITTER_HOSTS = ('https://api.twitter.com', 'https://upload.twitter.com')
+
+class RedirectedSession(requests.Session):
+    """Sesión que envía las peticiones de la API de Twitter a otra URL base (p. ej. el sustituto local)"""
+    
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+    
+    def request(self, method, url, *args, **kwargs):
+        for host in _TWITTER_HOSTS:
+            if url.startswith(host):
+                url = self.base_url + url[len(host):]
+                break
+        return super().request(method, url, *args, **kwargs)
+
+class RateLimitedClient(tweepy.Client):
+    """
+    Cliente v2 que consulta el gestor de rate limits antes de cada llamada y
+    lo alimenta con las cabeceras de cada respuesta, en lugar de dormir el
+    hilo con wait_on_rate_limit
+    """
+    
+    def __init__(self, *args, rate_limiter: RateLimiter, **kwargs):
+        kwargs['wait_on_rate_limit'] = False
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+    
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        """Ejecuta la petición si hay cuota; si no, lanza RateLimitExceeded"""
+        endpoint = endpoint_key(method, route)
+        if not self.rate_limiter.try_acquire(endpoint):
+            raise RateLimitExceeded(endpoint, self.rate_limiter.wait_time(endpoint))
+        
+        try:
+            response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+        except tweepy.HTTPException as e:
+            self.rate_limiter.update_from_headers(endpoint, e.response.headers)
+            raise
+        
+        self.rate_limiter.update_from_headers(endpoint, response.headers)
+        return response
 
 class TwitterClient:
     """Cliente para interactuar con Twitter API v2"""
     
-    def __init__(self):
-        """Inicializa el cliente de Twitter"""
-        self.client = None
-        self.api = None
-        self.authenticate()
+    def __init__(self, db: Optional[DatabaseManager] = None, account: Optional[AccountProfile] = None):
+        """
+        Inicializa el cliente de Twitter
+        
+        No hace ninguna petición: los clientes de tweepy se crean y la
+        identidad se verifica en el primer uso real de la API, así que los
+        modos que no publican arrancan sin tráfico hacia Twitter.
+        
+        Args:
+            db: Base de datos donde se guarda el estado de rate limit
+                observado (opcional; sin ella solo se conserva en memoria)
+            account: Cuenta con la que publicar (por defecto la de TWITTER_*);
+                cada cuenta tiene su propia cuota
+        """
+        self._client = None
+        self._api = None
+        self.identity = None
+        self.account = account or AccountProfile()
+        self.rate_limiter = RateLimiter(
+            daily_post_cap=self.account.daily_post_cap,
+            on_update=functools.partial(db.save_rate_limits, account=self.account.name) if db else None
+        )
+        if db:
+            restored = self.rate_limiter.restore(db.get_rate_limits(account=self.account.name))
+            if restored:
+                logger.debug(f"Estado de {restored} rate limits restaurado desde la base de datos")
+    
+    def wait_time(self, endpoint: str = POST_TWEET_ENDPOINT) -> float:
+        """
+        Indica cuánto falta para poder llamar a un endpoint, sin bloquear
+        
+        Args:
+            endpoint: Clave del endpoint (por defecto, publicar un tweet)
+            
+        Returns:
+            Segundos de espera (0 si la llamada puede hacerse ya)
+        """
+        return self.rate_limiter.wait_time(endpoint)
+    
+    def can_call(self, endpoint: str = POST_TWEET_ENDPOINT) -> bool:
+        """
+        Indica si un endpoint tiene cuota disponible ahora
+        
+        Args:
+            endpoint: Clave del endpoint (por defecto, publicar un tweet)
+            
+        Returns:
+            True si la llamada puede hacerse sin esperar
+        """
+        return self.rate_limiter.can_call(endpoint)
+    
+    @property
+    def client(self) -> tweepy.Client:
+        """Cliente de API v2, autenticado en el primer acceso"""
+        if self._client is None or self.identity is None:
+            self.authenticate()
+        return self._client
+    
+    @property
+    def api(self) -> tweepy.API:
+        """Cliente de API v1.1, autenticado en el primer acceso"""
+        if self._api is None or self.identity is None:
+            self.authenticate()
+        return self._api
     
     def authenticate(self):
         """
         Autentica con Twitter API usando las credenciales configuradas
+        
+        La identidad verificada se reutiliza desde la caché en disco mientras
+        no caduque, sin llamar a get_me().
         """
         try:
-            # Validar configuración
-            if not Config.validate_config():
-                raise ValueError("Configuración de Twitter API incompleta")
-            
-            # Crear cliente de Twitter API v2
-            self.client = tweepy.Client(
-                bearer_token=Config.TWITTER_BEARER_TOKEN,
-                consumer_key=Config.TWITTER_API_KEY,
-                consumer_secret=Config.TWITTER_API_SECRET,
-                access_token=Config.TWITTER_ACCESS_TOKEN,
-                access_token_secret=Config.TWITTER_ACCESS_TOKEN_SECRET,
-                wait_on_rate_limit=True
-            )
-            
-            # Crear cliente de API v1.1 para funcionalidades adicionales
-            auth = tweepy.OAuth1UserHandler(
-                Config.TWITTER_API_KEY,
-                Config.TWITTER_API_SECRET,
-                Config.TWITTER_ACCESS_TOKEN,
-                Config.TWITTER_ACCESS_TOKEN_SECRET
-            )
-            self.api = tweepy.API(auth, wait_on_rate_limit=True)
+            self._build_clients()
             
             # Verificar autenticación
-            user = self.client.get_me()
-            if user.data:
-                logger.info(f"✅ Autenticado como @{user.data.username}")
+            self.identity = self.get_identity()
+            if self.identity:
+                logger.info(f"✅ Autenticado como @{self.identity['username']}")
             else:
                 raise Exception("No se pudo verificar la autenticación")
                 
@@ -55,6 +156,125 @@ class TwitterClient:
             logger.error(f"❌ Error en autenticación de Twitter: {e}")
             raise
     
+    def _build_clients(self):
+        """Crea los clientes de tweepy (sin peticiones de red)"""
+        if self._client is not None and self._api is not None:
+            return
+        
+        # Validar configuración
+        if not Config.validate_config():
+            raise ValueError("Configuración de Twitter API incompleta")
+        
+        # Crear cliente de Twitter API v2 (los rate limits los gestiona rate_limiter)
+        self._client = RateLimitedClient(
+            bearer_token=self.account.bearer_token,
+            consumer_key=self.account.api_key,
+            consumer_secret=self.account.api_secret,
+            access_token=self.account.access_token,
+            access_token_secret=self.account.access_token_secret,
+            rate_limiter=self.rate_limiter
+        )
+        
+        # Crear cliente de API v1.1 para funcionalidades adicionales
+        auth = tweepy.OAuth1UserHandler(
+            self.account.api_key,
+            self.account.api_secret,
+            self.account.access_token,
+            self.account.access_token_secret
+        )
+        self._api = tweepy.API(auth)
+        
+        if Config.TWITTER_API_BASE_URL:
+            logger.info(f"🧪 API de Twitter redirigida a {Config.TWITTER_API_BASE_URL}")
+            self._client.session = RedirectedSession(Config.TWITTER_API_BASE_URL)
+            self._api.session = RedirectedSession(Config.TWITTER_API_BASE_URL)
+    
+    def get_identity(self, force: bool = False) -> Optional[Dict]:
+        """
+        Obtiene la identidad de la cuenta autenticada
+        
+        Usa la caché en disco si pertenece a las mismas credenciales y no ha
+        caducado; si no, llama a get_me() y la guarda.
+        
+        Args:
+            force: Ignorar la caché y verificar contra la API
+            
+        Returns:
+            Diccionario con id, username y verified_at, o None si las
+            credenciales no se pudieron verificar
+        """
+        fingerprint = self._credentials_fingerprint()
+        
+        if not force:
+            cached = self._load_identity(fingerprint)
+            if cached:
+                logger.debug(f"Identidad de Twitter desde caché: @{cached['username']}")
+                return cached
+        
+        self._build_clients()
+        user = self._client.get_me()
+        if not user.data:
+            return None
+        
+        identity = {
+            'id': str(user.data.id),
+            'username': user.data.username,
+            'verified_at': time.time(),
+            'fingerprint': fingerprint
+        }
+        self._save_identity(identity)
+        return identity
+    
+    def _credentials_fingerprint(self) -> str:
+        """Huella de las credenciales de usuario (la caché no guarda secretos)"""
+        material = f"{self.account.api_key}:{self.account.access_token}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+    
+    def _load_identity(self, fingerprint: str) -> Optional[Dict]:
+        """
+        Lee la identidad cacheada si sigue vigente
+        
+        Args:
+            fingerprint: Huella de las credenciales actuales
+            
+        Returns:
+            Identidad cacheada o None si no existe, caducó o es de otra cuenta
+        """
+        if not self.account.identity_cache:
+            return None
+        
+        try:
+            identity = json.loads(Path(self.account.identity_cache).read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Caché de identidad de Twitter ilegible: {e}")
+            return None
+        
+        age = time.time() - identity.get('verified_at', 0)
+        if identity.get('fingerprint') != fingerprint or age > Config.TWITTER_IDENTITY_TTL_HOURS * 3600:
+            return None
+        return identity
+    
+    def _save_identity(self, identity: Dict):
+        """
+        Guarda la identidad verificada en la caché en disco
+        
+        Args:
+            identity: Identidad devuelta por get_identity
+        """
+        if not self.account.identity_cache:
+            return
+        
+        try:
+            target = Path(self.account.identity_cache)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temporary = target.with_name(target.name + '.tmp')
+            temporary.write_text(json.dumps(identity), encoding='utf-8')
+            os.replace(temporary, target)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar la caché de identidad de Twitter: {e}")
+    
     def post_tweet(self, content: str, reply_to: Optional[str] = None) -> Optional[Dict]:
         """
         Publica un tweet
@@ -67,35 +287,14 @@ class TwitterClient:
             Diccionario con información del tweet publicado o None si falla
         """
         try:
-            # Validar longitud del tweet
-            if len(content) > Config.MAX_TWEET_LENGTH:
-                logger.warning(f"⚠️ Tweet muy largo ({len(content)} chars), truncando...")
-                content = content[:Config.MAX_TWEET_LENGTH-3] + "..."
-            
-            # Publicar tweet
-            response = self.client.create_tweet(
-                text=content,
-                in_reply_to_tweet_id=reply_to
-            )
-            
-            if response.data:
-                tweet_info = {
-                    'id': response.data['id'],
-                    'text': content,
-                    'created_at': response.data.get('created_at'),
-                    'public_metrics': response.data.get('public_metrics', {})
-                }
-                
-                logger.info(f"✅ Tweet publicado: {tweet_info['id']}")
-                logger.debug(f"Contenido: {content[:100]}...")
-                
-                return tweet_info
-            else:
-                logger.error("❌ No se recibió respuesta del tweet")
-                return None
+            return self.publish(content, reply_to)
                 
+        except RateLimitExceeded as e:
+            logger.warning(f"⏳ Cuota de publicación agotada, disponible en {e.retry_after / 60:.0f} minutos")
+            return None
         except tweepy.TooManyRequests:
-            logger.warning("⚠️ Límite de rate limit alcanzado, esperando...")
+            wait = self.wait_time(POST_TWEET_ENDPOINT)
+            logger.warning(f"⚠️ Límite de rate limit alcanzado, disponible en {wait / 60:.0f} minutos")
             return None
         except tweepy.Unauthorized:
             logger.error("❌ Error de autorización - verifica las credenciales")
@@ -107,6 +306,99 @@ class TwitterClient:
             logger.error(f"❌ Error al publicar tweet: {e}")
             return None
     
+    def publish(self, content: str, reply_to: Optional[str] = None,
+                media_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Publica un tweet propagando los errores, para quien necesita
+        distinguir un fallo definitivo de uno transitorio (la bandeja de salida)
+        
+        Args:
+            content: Contenido del tweet
+            reply_to: ID del tweet al que responder (opcional)
+            media_ids: IDs de imágenes ya subidas (opcional)
+            
+        Returns:
+            Diccionario con información del tweet publicado
+            
+        Raises:
+            RateLimitExceeded: Si la cuota local está agotada
+            tweepy.TweepyException: Si la API rechaza o no confirma el tweet
+            requests.RequestException: Si falla la conexión
+        """
+        # Validar longitud del tweet
+        if len(content) > Config.MAX_TWEET_LENGTH:
+            logger.warning(f"⚠️ Tweet muy largo ({len(content)} chars), truncando...")
+            content = content[:Config.MAX_TWEET_LENGTH-3] + "..."
+        
+        # Publicar tweet
+        response = self.client.create_tweet(
+            text=content,
+            in_reply_to_tweet_id=reply_to,
+            media_ids=media_ids
+        )
+        
+        if not response.data:
+            raise tweepy.TweepyException("No se recibió respuesta del tweet")
+        
+        tweet_info = {
+            'id': response.data['id'],
+            'text': content,
+            'created_at': response.data.get('created_at'),
+            'public_metrics': response.data.get('public_metrics', {})
+        }
+        
+        logger.info(f"✅ Tweet publicado: {tweet_info['id']}")
+        logger.debug(f"Contenido: {content[:100]}...")
+        
+        return tweet_info
+    
+    def upload_media(self, path: str, additional_owners: Optional[List[str]] = None) -> Dict:
+        """
+        Sube una imagen con el endpoint de medios de la API v1.1
+        
+        Args:
+            path: Ruta del archivo
+            additional_owners: IDs de otras cuentas que pueden usar el media_id
+            
+        Returns:
+            Diccionario con media_id y expires_after_secs (vigencia del ID)
+            
+        Raises:
+            tweepy.TweepyException: Si la API rechaza la imagen
+        """
+        media = self.api.media_upload(filename=path, additional_owners=additional_owners or None)
+        logger.info(f"🖼️ Imagen subida: {media.media_id_string}")
+        return {
+            'media_id': media.media_id_string,
+            'expires_after_secs': int(getattr(media, 'expires_after_secs', None) or 24 * 3600)
+        }
+    
+    def get_own_recent_tweets(self, max_tweets: int = 20) -> List[Dict]:
+        """
+        Obtiene los últimos tweets de la cuenta autenticada
+        
+        Usa la identidad cacheada, así que cuesta una sola llamada.
+        
+        Args:
+            max_tweets: Número máximo de tweets (entre 5 y 100)
+            
+        Returns:
+            Lista de tweets con id y text, del más reciente al más antiguo
+            
+        Raises:
+            tweepy.TweepyException: Si la API falla (quien llama decide si reintentar)
+        """
+        client = self.client
+        tweets = client.get_users_tweets(
+            id=self.identity['id'],
+            max_results=max(5, min(max_tweets, 100)),
+            tweet_fields=['created_at']
+        )
+        
+        if tweets.data:
+            return [{'id': str(tweet.id), 'text': tweet.text, 'created_at': tweet.created_at} for tweet in tweets.data]
+        return []
+    
     def get_tweet_metrics(self, tweet_id: str) -> Optional[Dict]:
         """
         Obtiene métricas de un tweet
@@ -135,6 +427,30 @@ class TwitterClient:
             logger.error(f"❌ Error al obtener métricas del tweet {tweet_id}: {e}")
             return None
     
+    def get_tweets_metrics(self, tweet_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene las métricas de hasta 100 tweets con una sola llamada
+        
+        Args:
+            tweet_ids: IDs de los tweets (máximo TWEET_LOOKUP_BATCH_SIZE)
+        
+        Returns:
+            Diccionario tweet_id -> public_metrics; los tweets borrados o
+            inaccesibles no aparecen
+        
+        Raises:
+            RateLimitExceeded: Si la cuota de consultas está agotada
+            tweepy.TweepyException: Si la API falla
+        """
+        if len(tweet_ids) > TWEET_LOOKUP_BATCH_SIZE:
+            raise ValueError(f"Máximo {TWEET_LOOKUP_BATCH_SIZE} tweets por consulta")
+        if not tweet_ids:
+            return {}
+        
+        response = self.client.get_tweets(ids=[str(tweet_id) for tweet_id in tweet_ids],
+                                          tweet_fields=['public_metrics'])
+        return {str(tweet.id): tweet.public_metrics or {} for tweet in response.data or []}
+    
     def search_tweets(self, query: str, max_results: int = 10) -> List[Dict]:
         """
         Busca tweets con una consulta específica
@@ -209,43 +525,59 @@ class TwitterClient:
             logger.error(f"❌ Error al obtener timeline de @{username}: {e}")
             return []
     
-    def get_rate_limit_status(self) -> Dict:
+    def get_rate_limit_status(self, refresh: bool = False) -> Dict:
         """
-        Obtiene el estado de los límites de rate limit
+        Obtiene el estado conocido de los rate limits, sin llamar a la API
+        
+        El estado se mantiene con las cabeceras de cada respuesta y se guarda
+        en la base de datos, así que sobrevive entre ejecuciones.
         
+        Args:
+            refresh: Consultar antes rate_limit_status de la API v1.1 (tiene
+                su propia cuota)
+            
         Returns:
-            Diccionario con información de rate limits
+            Diccionario endpoint -> {'limit', 'remaining', 'reset'}
+        """
+        if refresh:
+            self.refresh_rate_limits()
+        return self.rate_limiter.status()
+    
+    def refresh_rate_limits(self) -> int:
+        """
+        Actualiza el estado de rate limits con rate_limit_status de la API v1.1
+        
+        Returns:
+            Número de endpoints actualizados
         """
         try:
-            # Obtener límites de la API v1.1
-            limits = self.api.get_rate_limit_status()
-            
-            # Extraer información relevante
-            relevant_limits = {}
-            for endpoint, info in limits.items():
-                if 'tweets' in endpoint.lower() or 'search' in endpoint.lower():
-                    relevant_limits[endpoint] = {
-                        'limit': info.limit,
-                        'remaining': info.remaining,
-                        'reset': info.reset
-                    }
-            
-            return relevant_limits
-            
+            limits = self.api.rate_limit_status()
         except Exception as e:
-            logger.error(f"❌ Error al obtener estado de rate limits: {e}")
-            return {}
+            logger.error(f"❌ Error al refrescar el estado de rate limits: {e}")
+            return 0
+        
+        observed = {
+            f"GET /1.1{path}": {'limit': info['limit'], 'remaining': info['remaining'], 'reset': info['reset']}
+            for family, endpoints in limits.get('resources', {}).items() if family in _V1_RATE_LIMIT_FAMILIES
+            for path, info in endpoints.items()
+        }
+        self.rate_limiter.update(observed)
+        logger.info(f"🔄 Estado de {len(observed)} rate limits actualizado desde la API")
+        return len(observed)
     
-    def validate_credentials(self) -> bool:
+    def validate_credentials(self, force: bool = False) -> bool:
         """
         Valida que las credenciales funcionen correctamente
         
+        Args:
+            force: Verificar contra la API aunque haya una identidad cacheada
+            
         Returns:
             True si las credenciales son válidas, False en caso contrario
         """
         try:
-            user = self.client.get_me()
-            return user.data is not None
+            self.identity = self.get_identity(force=force)
+            return self.identity is not None
         except Exception as e:
             logger.error(f"❌ Error al validar credenciales: {e}")
             return False
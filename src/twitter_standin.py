@@ -0,0 +1,455 @@
+"""
+Sustituto local de la API de Twitter para el bot ZTech
+Servidor HTTP que implementa los endpoints v2 que usa el bot (users/me,
+crear, consultar y buscar tweets), la subida de medios y rate_limit_status
+de v1.1, con latencia, cabeceras de rate limit y errores configurables. El
+modo --dry-run apunta el cliente aquí para probar el flujo completo sin
+credenciales reales
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from loguru import logger
+
+from accounts import ACCOUNT_CREDENTIALS
+from config import Config
+from rate_limiter import POST_TWEET_ENDPOINT, endpoint_key
+
+# Ventana de los rate limits de la API v2
+RATE_LIMIT_WINDOW = 15 * 60
+
+# Llamadas por ventana de 15 minutos con contexto de usuario
+DEFAULT_LIMITS = {
+    'GET /2/users/me': 75,
+    'POST /2/tweets': 100,
+    'GET /2/tweets': 900,
+    'GET /2/tweets/:id': 900,
+    'GET /2/tweets/search/recent': 180,
+    'GET /2/users/:id/tweets': 900,
+    'GET /2/users/by/username/:username': 900,
+    'GET /1.1/application/rate_limit_status.json': 180,
+}
+
+# ID de la cuenta simulada
+ACCOUNT_ID = '1000000000000000001'
+
+_DUPLICATE_ERROR = "You are not allowed to create a Tweet with duplicate content."
+
+
+class TwitterStandIn:
+    """Servidor local que imita la API de Twitter"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, username: str = 'ztech',
+                 latency_ms: float = 0, error_rate: float = 0.0, limits: Dict[str, int] = None,
+                 daily_post_limit: Optional[int] = None, max_length: int = 280, seed: int = None):
+        """
+        Inicializa el sustituto (no escucha hasta start())
+
+        Args:
+            host: Interfaz en la que escuchar
+            port: Puerto (0 = uno libre)
+            username: Usuario de la cuenta simulada
+            latency_ms: Retardo añadido a cada respuesta
+            error_rate: Probabilidad de responder 503 a cualquier llamada
+            limits: Llamadas por ventana de 15 minutos por endpoint (se
+                combinan con DEFAULT_LIMITS)
+            daily_post_limit: Publicaciones por 24 horas informadas en las
+                cabeceras x-user-limit-24hour-* (None = sin cuota diaria)
+            max_length: Longitud máxima de un tweet
+            seed: Semilla del generador de errores aleatorios
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.daily_post_limit = daily_post_limit
+        self.max_length = max_length
+        self.tweets: Dict[str, Dict] = {}
+        self.media: Dict[str, int] = {}
+        self.requests: List[str] = []
+        self._windows: Dict[str, Tuple[int, float]] = {}
+        self._failures: List[Dict] = []
+        self._next_id = 1800000000000000000
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """URL base a la que apuntar TWITTER_API_BASE_URL"""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """
+        Empieza a atender peticiones en un hilo de fondo
+
+        Returns:
+            URL base del servidor
+        """
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.standin = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='twitter-standin', daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 Sustituto de la API de Twitter escuchando en {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        """Detiene el servidor"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, status: int = 503, count: int = 1, endpoint: str = None, commit: bool = False):
+        """
+        Programa errores para las próximas llamadas
+
+        Args:
+            status: Código HTTP a devolver
+            count: Número de llamadas que fallan
+            endpoint: Clave del endpoint afectado (None = cualquiera)
+            commit: En POST /2/tweets, crear el tweet antes de devolver el
+                error (respuesta perdida tras publicar)
+        """
+        with self._lock:
+            self._failures.extend({'status': status, 'endpoint': endpoint, 'commit': commit} for _ in range(count))
+
+    def handle(self, method: str, url: str, headers: Dict[str, str],
+               body: bytes) -> Tuple[int, Dict[str, str], Dict]:
+        """
+        Atiende una petición
+
+        Args:
+            method: Método HTTP
+            url: Ruta con query string
+            headers: Cabeceras de la petición
+            body: Cuerpo de la petición
+
+        Returns:
+            Tupla (código HTTP, cabeceras, cuerpo JSON)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        parts = urlsplit(url)
+        path = parts.path
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        endpoint = endpoint_key(method, path)
+
+        with self._lock:
+            self.requests.append(endpoint)
+            if 'authorization' not in {name.lower() for name in headers}:
+                return 401, {}, _error(401, "Unauthorized")
+
+            rate_headers, allowed = self._consume(endpoint)
+            if not allowed:
+                return 429, rate_headers, _error(429, "Too Many Requests")
+
+            failure = self._take_failure(endpoint)
+            if failure is None and self.error_rate and self._random.random() < self.error_rate:
+                failure = {'status': 503, 'commit': False}
+            if failure and not failure['commit']:
+                return failure['status'], rate_headers, _error(failure['status'], "Injected error")
+
+            status, payload = self._route(method, path, params, body)
+            if failure:
+                return failure['status'], rate_headers, _error(failure['status'], "Injected error")
+            return status, rate_headers, payload
+
+    def _consume(self, endpoint: str) -> Tuple[Dict[str, str], bool]:
+        """Gasta una llamada de la ventana del endpoint y genera sus cabeceras"""
+        now = time.time()
+        buckets = [('x-rate-limit', endpoint, self.limits.get(endpoint, 900), RATE_LIMIT_WINDOW)]
+        if endpoint == POST_TWEET_ENDPOINT and self.daily_post_limit is not None:
+            buckets.append(('x-user-limit-24hour', 'daily', self.daily_post_limit, 24 * 3600))
+
+        headers = {}
+        allowed = True
+        for prefix, name, limit, window in buckets:
+            used, reset_at = self._windows.get(name, (0, 0.0))
+            if now >= reset_at:
+                used, reset_at = 0, now + window
+            if used >= limit:
+                allowed = False
+            headers.update({
+                f"{prefix}-limit": str(limit),
+                f"{prefix}-remaining": str(max(0, limit - used - 1)),
+                f"{prefix}-reset": str(int(reset_at)),
+            })
+            self._windows[name] = (used, reset_at)
+
+        if allowed:
+            for _, name, _, _ in buckets:
+                used, reset_at = self._windows[name]
+                self._windows[name] = (used + 1, reset_at)
+        else:
+            headers.update({key: '0' for key in headers if key.endswith('-remaining')})
+        return headers, allowed
+
+    def _take_failure(self, endpoint: str) -> Optional[Dict]:
+        """Saca el siguiente error programado que aplica al endpoint"""
+        for index, failure in enumerate(self._failures):
+            if failure['endpoint'] in (None, endpoint):
+                return self._failures.pop(index)
+        return None
+
+    def _route(self, method: str, path: str, params: Dict[str, str], body: bytes) -> Tuple[int, Dict]:
+        """Resuelve la ruta y genera la respuesta"""
+        if method == 'GET' and path == '/2/users/me':
+            return 200, {'data': self._account()}
+
+        if method == 'GET' and path.startswith('/2/users/by/username/'):
+            username = path.rsplit('/', 1)[1]
+            if username.lower() != self.username.lower():
+                return 200, {'errors': [{'title': 'Not Found Error', 'detail': f"Could not find user: {username}"}]}
+            return 200, {'data': self._account()}
+
+        match = re.fullmatch(r'/2/users/(\d+)/tweets', path)
+        if method == 'GET' and match:
+            own = [tweet for tweet in self.tweets.values() if tweet['author_id'] == match.group(1)]
+            own = sorted(own, key=lambda tweet: int(tweet['id']), reverse=True)
+            return _listing(own[:int(params.get('max_results', 10))])
+
+        if method == 'POST' and path == '/2/tweets':
+            return self._create_tweet(json.loads(body or b'{}'))
+
+        if method == 'GET' and path == '/2/tweets':
+            ids = [tweet_id for tweet_id in params.get('ids', '').split(',') if tweet_id]
+            return _listing([self.tweets[tweet_id] for tweet_id in ids if tweet_id in self.tweets])
+
+        if method == 'GET' and path == '/2/tweets/search/recent':
+            terms = [term.lower() for term in params.get('query', '').split()
+                     if not term.startswith('-') and ':' not in term]
+            found = [tweet for tweet in self.tweets.values()
+                     if all(term in tweet['text'].lower() for term in terms)]
+            return _listing(found[-int(params.get('max_results', 10)):])
+
+        match = re.fullmatch(r'/2/tweets/(\d+)', path)
+        if method == 'GET' and match:
+            tweet = self.tweets.get(match.group(1))
+            if tweet is None:
+                return 200, {'errors': [{'title': 'Not Found Error', 'resource_id': match.group(1)}]}
+            return 200, {'data': _public(tweet)}
+
+        if method == 'POST' and path == '/1.1/media/upload.json':
+            media_id = self._new_id()
+            self.media[media_id] = len(body)
+            return 200, {'media_id': int(media_id), 'media_id_string': media_id,
+                         'size': len(body), 'expires_after_secs': 86400}
+
+        if method == 'GET' and path == '/1.1/application/rate_limit_status.json':
+            return 200, {'resources': self._rate_limit_resources()}
+
+        return 404, _error(404, f"Ruta no implementada: {method} {path}")
+
+    def _rate_limit_resources(self) -> Dict[str, Dict]:
+        """Estado de las ventanas con el formato de rate_limit_status (v1.1)"""
+        resources = {}
+        for name, (used, reset_at) in self._windows.items():
+            method, _, route = name.partition(' ')
+            if not route.startswith('/1.1/'):
+                continue
+            limit = self.limits.get(name, 900)
+            family = route.split('/')[2]
+            path = route[len('/1.1'):].rsplit('.json', 1)[0]
+            resources.setdefault(family, {})[path] = {
+                'limit': limit, 'remaining': max(0, limit - used), 'reset': int(reset_at)
+            }
+        return resources
+
+    def _account(self) -> Dict:
+        """Datos de la cuenta simulada"""
+        return {'id': ACCOUNT_ID, 'name': self.username.title(), 'username': self.username}
+
+    def _new_id(self) -> str:
+        """Genera un ID creciente, como los snowflake de Twitter"""
+        self._next_id += 1
+        return str(self._next_id)
+
+    def _create_tweet(self, request: Dict) -> Tuple[int, Dict]:
+        """Crea un tweet con las mismas validaciones que la API real"""
+        text = request.get('text', '')
+        if not text and not request.get('media'):
+            return 400, _error(400, "Invalid Request")
+        if len(text) > self.max_length:
+            return 403, _error(403, "Tweet text is too long.")
+        if any(tweet['text'] == text for tweet in self.tweets.values()):
+            return 403, _error(403, _DUPLICATE_ERROR)
+
+        reply_to = (request.get('reply') or {}).get('in_reply_to_tweet_id')
+        if reply_to is not None and reply_to not in self.tweets:
+            return 400, _error(400, "Reply to a Tweet that is deleted or not visible.")
+        media_ids = (request.get('media') or {}).get('media_ids') or []
+        if any(media_id not in self.media for media_id in media_ids):
+            return 400, _error(400, "Your media IDs are invalid.")
+
+        tweet_id = self._new_id()
+        self.tweets[tweet_id] = {
+            'id': tweet_id,
+            'text': text,
+            'author_id': ACCOUNT_ID,
+            'created_at': time.time(),
+            'in_reply_to': reply_to,
+            'media_ids': media_ids,
+        }
+        return 201, {'data': {'id': tweet_id, 'text': text, 'edit_history_tweet_ids': [tweet_id]}}
+
+
+def _public(tweet: Dict) -> Dict:
+    """Representación de un tweet en la API, con métricas que crecen con su edad"""
+    age_minutes = (time.time() - tweet['created_at']) / 60
+    likes = int(age_minutes ** 0.5 * 3)
+    data = {
+        'id': tweet['id'],
+        'text': tweet['text'],
+        'edit_history_tweet_ids': [tweet['id']],
+        'author_id': tweet['author_id'],
+        'created_at': datetime.fromtimestamp(tweet['created_at'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        'public_metrics': {
+            'like_count': likes,
+            'retweet_count': likes // 4,
+            'reply_count': likes // 8,
+            'quote_count': likes // 20,
+            'impression_count': likes * 40,
+        },
+    }
+    if tweet['in_reply_to']:
+        data['referenced_tweets'] = [{'type': 'replied_to', 'id': tweet['in_reply_to']}]
+    if tweet['media_ids']:
+        data['attachments'] = {'media_keys': [f"3_{media_id}" for media_id in tweet['media_ids']]}
+    return data
+
+
+def _listing(tweets: List[Dict]) -> Tuple[int, Dict]:
+    """Respuesta de una lista de tweets (sin data si está vacía, como la API)"""
+    if not tweets:
+        return 200, {'meta': {'result_count': 0}}
+    return 200, {'data': [_public(tweet) for tweet in tweets], 'meta': {'result_count': len(tweets)}}
+
+
+def _error(status: int, detail: str) -> Dict:
+    """Cuerpo de error con el formato de la API v2"""
+    return {'title': detail, 'detail': detail, 'status': status, 'errors': [{'message': detail}]}
+
+
+class _Server(ThreadingHTTPServer):
+    """Servidor con un hilo por conexión y cola de conexiones amplia para pruebas de carga"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Adaptador de http.server hacia TwitterStandIn.handle"""
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            status, headers, payload = self.server.standin.handle(self.command, self.path, dict(self.headers), body)
+        except Exception as e:
+            logger.error(f"❌ Error en el sustituto de la API: {e}")
+            status, headers, payload = 500, {}, _error(500, "Internal Server Error")
+
+        content = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Sustituto de la API: {format % args}")
+
+
+def start_dry_run(**options) -> TwitterStandIn:
+    """
+    Arranca el sustituto y configura el bot para usarlo
+
+    Redirige el cliente de Twitter al sustituto, rellena las credenciales
+    que falten (también las de cada cuenta de ACCOUNTS) con valores
+    ficticios y aparta la base de datos, la caché de identidad y el paquete
+    de estado para no mezclar nada con los reales.
+
+    Args:
+        **options: Argumentos para TwitterStandIn (por defecto, la latencia y
+            la tasa de errores de la configuración)
+
+    Returns:
+        Sustituto en marcha
+    """
+    options.setdefault('username', Config.TWITTER_USERNAME)
+    options.setdefault('latency_ms', Config.DRY_RUN_LATENCY_MS)
+    options.setdefault('error_rate', Config.DRY_RUN_ERROR_RATE)
+    standin = TwitterStandIn(**options)
+    Config.TWITTER_API_BASE_URL = standin.start()
+
+    for name in ('TWITTER_API_KEY', 'TWITTER_API_SECRET', 'TWITTER_BEARER_TOKEN',
+                 'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET'):
+        if not getattr(Config, name):
+            setattr(Config, name, 'dry-run')
+    for account in Config.ACCOUNTS:
+        prefix = f"ACCOUNT_{account.upper()}_"
+        for name in ACCOUNT_CREDENTIALS:
+            if not os.getenv(prefix + name):
+                os.environ[prefix + name] = 'dry-run'
+        os.environ[prefix + 'TWITTER_IDENTITY_CACHE'] = ''
+    Config.DATABASE_URL = Config.DRY_RUN_DATABASE_URL
+    Config.TWITTER_IDENTITY_CACHE = ''
+    Config.STATE_BUNDLE_PATH = ''
+    logger.info(f"🧪 Modo dry-run: Twitter simulado en {standin.base_url}, base de datos {Config.DATABASE_URL}")
+    return standin
+
+
+def main():
+    """Ejecuta el sustituto como proceso independiente (pruebas de carga)"""
+    parser = argparse.ArgumentParser(description="Sustituto local de la API de Twitter")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--username', default=Config.TWITTER_USERNAME)
+    parser.add_argument('--latency-ms', type=float, default=Config.DRY_RUN_LATENCY_MS)
+    parser.add_argument('--error-rate', type=float, default=Config.DRY_RUN_ERROR_RATE)
+    parser.add_argument('--daily-post-limit', type=int, default=None)
+    args = parser.parse_args()
+
+    standin = TwitterStandIn(host=args.host, port=args.port, username=args.username, latency_ms=args.latency_ms,
+                             error_rate=args.error_rate, daily_post_limit=args.daily_post_limit)
+    standin.start()
+    logger.info(f"👉 Exporta TWITTER_API_BASE_URL={standin.base_url} para usarlo")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Cola de escritura diferida (write-behind) para el bot ZTech
+Saca de la ruta de publicación las escrituras a la base de datos: un hilo
+en segundo plano las agrupa en lotes y las confirma, de modo que un disco
+lento o bloqueado no retrasa el siguiente trabajo
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from content_dedup import canonical_url
+from database import DatabaseManager
+
+# Reintentos de un lote fallido al cerrar antes de descartarlo
+_CLOSE_RETRIES = 3
+
+
+class WriteBehindQueue:
+    """
+    Cola de escrituras con un escritor en segundo plano
+
+    Las claves (hashes y enlaces) de las escrituras pendientes se mantienen
+    en memoria hasta que se confirman, y las consultas de deduplicación de
+    esta clase las tienen en cuenta, así que una lectura siempre ve lo que
+    ya se escribió aunque todavía no esté en la base de datos.
+    """
+
+    def __init__(self, db: DatabaseManager, flush_interval: float = 1.0,
+                 sync_interval: float = 30.0, max_batch: int = 500):
+        """
+        Inicializa la cola y arranca el hilo escritor
+
+        Args:
+            db: Gestor de base de datos donde se confirman los lotes
+            flush_interval: Segundos máximos que una escritura espera en la cola
+            sync_interval: Segundos entre volcados a disco (fsync) de la base de datos
+            max_batch: Operaciones a partir de las cuales se confirma sin esperar
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[str, Dict]] = []
+        self._in_flight = 0
+        self._pending_keys: Counter = Counter()
+        self._flush_requested = False
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    # Escrituras
+
+    def save_published_tweet(self, tweet_id: str, content: str, source: str = None,
+                             source_url: str = None, engagement_data: Dict = None,
+                             post_type: str = None, language: str = None, account: str = ''):
+        """Encola un tweet publicado (mismos argumentos que DatabaseManager.save_published_tweet)"""
+        self._enqueue('tweet', {
+            'tweet_id': tweet_id,
+            'content': content,
+            'source': source,
+            'source_url': source_url,
+            'engagement_data': engagement_data,
+            'post_type': post_type,
+            'language': language,
+            'account': account,
+            # La hora de publicación es la de ahora, no la del lote que la confirme
+            'published_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    def save_processed_content(self, content_hash: str, source: str,
+                               source_url: str = None, title: str = None,
+                               summary: str = None, simhash: int = None,
+                               refresh: bool = False):
+        """Encola contenido procesado (mismos argumentos que DatabaseManager.save_processed_content)"""
+        self._enqueue('refresh' if refresh else 'processed', {
+            'content_hash': content_hash,
+            'source': source,
+            'source_url': source_url,
+            'title': title,
+            'summary': summary,
+            'simhash': simhash
+        })
+
+    def save_processed_content_many(self, items: List[Dict]):
+        """Encola varios contenidos procesados (artículos con content_hash)"""
+        for item in items:
+            if item.get('content_hash'):
+                self._enqueue('processed', item)
+
+    def update_daily_stats(self, tweets_published: int = 0,
+                           content_processed: int = 0, errors_count: int = 0):
+        """Encola un incremento de las estadísticas diarias"""
+        self._enqueue('stats', {
+            'tweets_published': tweets_published,
+            'content_processed': content_processed,
+            'errors_count': errors_count
+        })
+
+    def _enqueue(self, kind: str, payload: Dict):
+        """Agrega una operación a la cola y registra sus claves como pendientes"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("La cola de escritura ya está cerrada")
+
+            self._queue.append((kind, payload))
+            self._pending_keys.update(self._keys(kind, payload))
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+
+    @staticmethod
+    def _keys(kind: str, payload: Dict) -> List[str]:
+        """Claves de deduplicación que aporta una operación"""
+        if kind not in ('processed', 'refresh'):
+            return []
+        # Las mismas columnas que consulta DatabaseManager.get_processed_keys (nunca la URL del feed)
+        keys = (payload.get('content_hash'), canonical_url(payload.get('link')))
+        return [key for key in keys if key]
+
+    # Lecturas con las escrituras pendientes
+
+    def get_processed_keys(self, keys: Iterable[str]) -> Set[str]:
+        """
+        Como DatabaseManager.get_processed_keys, incluyendo las escrituras pendientes
+
+        Args:
+            keys: Hashes de contenido y/o enlaces a verificar
+
+        Returns:
+            Subconjunto de las claves ya procesadas o pendientes de escribir
+        """
+        keys = [key for key in keys if key]
+        with self._cond:
+            pending = {key for key in keys if self._pending_keys[key] > 0}
+        return pending | self.db.get_processed_keys(key for key in keys if key not in pending)
+
+    def was_processed_since(self, content_hash: str, days: float) -> bool:
+        """Como DatabaseManager.was_processed_since, incluyendo las escrituras pendientes"""
+        with self._cond:
+            if self._pending_keys[content_hash] > 0:
+                return True
+        return self.db.was_processed_since(content_hash, days)
+
+    # Control del escritor
+
+    def flush(self, timeout: Optional[float] = 30.0) -> bool:
+        """
+        Confirma todas las escrituras pendientes y espera a que terminen
+
+        Args:
+            timeout: Segundos máximos de espera (None para esperar indefinidamente)
+
+        Returns:
+            True si la cola quedó vacía
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """
+        Confirma lo pendiente, sincroniza a disco y detiene el hilo escritor
+
+        Args:
+            timeout: Segundos máximos de espera
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+        if self._thread.is_alive():
+            logger.warning(f"⚠️ La cola de escritura no terminó a tiempo ({len(self)} operaciones pendientes)")
+
+    def _run(self):
+        """Bucle del hilo escritor"""
+        last_sync = time.monotonic()
+        failures = 0
+
+        while True:
+            with self._cond:
+                if not (self._closed or self._flush_requested or len(self._queue) >= self.max_batch):
+                    self._cond.wait(self.flush_interval)
+
+                batch, self._queue = self._queue, []
+                self._in_flight = len(batch)
+                self._flush_requested = False
+                closing = self._closed
+
+            failed = self._write(batch) if batch else []
+            failures = failures + 1 if failed else 0
+
+            with self._cond:
+                # Lo fallido vuelve al principio de la cola para el siguiente ciclo
+                self._queue[:0] = failed
+                self._in_flight = 0
+                failed_ids = {id(payload) for _, payload in failed}
+                for kind, payload in batch:
+                    if id(payload) not in failed_ids:
+                        self._pending_keys.subtract(self._keys(kind, payload))
+                self._pending_keys += Counter()  # Descarta las claves a cero
+                self._cond.notify_all()
+
+            if time.monotonic() - last_sync >= self.sync_interval:
+                self.db.sync()
+                last_sync = time.monotonic()
+
+            if closing:
+                if failed and failures < _CLOSE_RETRIES:
+                    time.sleep(min(self.flush_interval, 1.0))
+                    continue
+                if failed:
+                    logger.error(f"❌ Se descartan {len(failed)} escrituras que no se pudieron guardar")
+                break
+
+        self.db.sync()
+
+    def _write(self, batch: List[Tuple[str, Dict]]) -> List[Tuple[str, Dict]]:
+        """
+        Confirma un lote agrupando las operaciones por tipo
+
+        Args:
+            batch: Operaciones en orden de llegada
+
+        Returns:
+            Operaciones que no se pudieron escribir (para reintentarlas)
+        """
+        groups = ('tweet', 'processed', 'refresh', 'stats')
+        by_kind: Dict[str, List[Dict]] = {kind: [] for kind in groups}
+        for kind, payload in batch:
+            by_kind[kind].append(payload)
+
+        for position, kind in enumerate(groups):
+            items = by_kind[kind]
+            if not items:
+                continue
+            try:
+                if kind == 'tweet':
+                    self.db.save_published_tweets_many(items)
+                elif kind == 'processed':
+                    self.db.save_processed_content_many(items)
+                elif kind == 'refresh':
+                    self.db.save_processed_content_many(items, refresh=True)
+                else:
+                    self.db.update_daily_stats(**{
+                        field: sum(item[field] for item in items) for field in items[0]
+                    })
+            except Exception as e:
+                logger.error(f"❌ Error en escritura diferida ({kind}): {e}")
+                # Las escrituras son idempotentes salvo las estadísticas, que van al final
+                return [(k, p) for k in groups[position:] for p in by_kind[k]]
+
+        logger.debug(f"Escritura diferida: {len(batch)} operaciones confirmadas")
+        return []
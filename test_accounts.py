@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la publicación con varias cuentas
+"""
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from accounts import AccountProfile, load_accounts, parse_post_type_weights
+from bot import ZTechBot
+from config import Config
+from database import DatabaseManager
+from outbox import Outbox
+from rate_limiter import POST_TWEET_ENDPOINT, RateLimitExceeded
+from twitter_client import TwitterClient
+from twitter_standin import TwitterStandIn
+
+_OVERRIDES = ('ACCOUNTS', 'TWITTER_API_BASE_URL', 'TWITTER_BEARER_TOKEN', 'TWITTER_IDENTITY_CACHE',
+              'TWITTER_DAILY_POST_CAP')
+
+_ACCOUNT_ENV = {
+    'ACCOUNT_US_TWITTER_API_KEY': 'us-key',
+    'ACCOUNT_US_TWITTER_API_SECRET': 'us-secret',
+    'ACCOUNT_US_TWITTER_ACCESS_TOKEN': 'us-token',
+    'ACCOUNT_US_TWITTER_ACCESS_TOKEN_SECRET': 'us-token-secret',
+    'ACCOUNT_US_LANGUAGE': 'en',
+    'ACCOUNT_US_POSTING_SCHEDULE': '09:00, 15:00',
+    'ACCOUNT_US_POST_TYPE_WEIGHTS': 'hacks:0.7,trends:0.3',
+    'ACCOUNT_CO_TWITTER_API_KEY': 'co-key',
+    'ACCOUNT_CO_TWITTER_API_SECRET': 'co-secret',
+    'ACCOUNT_CO_TWITTER_ACCESS_TOKEN': 'co-token',
+    'ACCOUNT_CO_TWITTER_ACCESS_TOKEN_SECRET': 'co-token-secret',
+    'ACCOUNT_CO_TWITTER_DAILY_POST_CAP': '1',
+}
+
+def _with_accounts(test):
+    """Configura las cuentas us y co y restaura la configuración y el entorno"""
+    def wrapper():
+        saved = {name: getattr(Config, name) for name in _OVERRIDES}
+        saved_env = {name: os.environ.get(name) for name in _ACCOUNT_ENV}
+        os.environ.update(_ACCOUNT_ENV)
+        Config.ACCOUNTS = ['us', 'co']
+        Config.TWITTER_BEARER_TOKEN = 'dry-run'
+        Config.TWITTER_IDENTITY_CACHE = ''
+        Config.TWITTER_DAILY_POST_CAP = 0
+        try:
+            test()
+        finally:
+            for name, value in saved.items():
+                setattr(Config, name, value)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+@_with_accounts
+def test_load_profiles():
+    """Prueba la lectura de los perfiles desde el entorno"""
+    print("👥 Probando perfiles de cuentas...")
+
+    us, co = load_accounts()
+    assert (us.name, us.language, co.language) == ('us', 'en', 'es')
+    assert us.posting_schedule == ['09:00', '15:00']
+    assert co.posting_schedule == [slot.strip() for slot in Config.POSTING_SCHEDULE]
+    assert us.post_type_weights == {'hacks': 0.7, 'trends': 0.3}
+    assert co.post_type_weights == Config.POST_TYPE_WEIGHTS
+    assert (us.daily_post_cap, co.daily_post_cap) == (0, 1)
+    assert us.api_key == 'us-key' and us.bearer_token == 'dry-run'
+    assert Config.validate_config()
+
+    # Cada cuenta guarda su identidad en su propio archivo
+    Config.TWITTER_IDENTITY_CACHE = 'state/twitter_identity.json'
+    assert AccountProfile.from_env('us').identity_cache == 'state/twitter_identity_us.json'
+
+    # Sin cuentas con nombre queda solo la de las variables TWITTER_*
+    default, = load_accounts([])
+    assert default.name == '' and default.label == 'principal'
+
+    for names in (['us', 'us'], ['mx'], ['Mal-nombre']):
+        try:
+            load_accounts(names)
+            assert False, f"{names} debería rechazarse"
+        except ValueError:
+            pass
+    try:
+        parse_post_type_weights('memes:1')
+        assert False, "Un tipo desconocido debería rechazarse"
+    except ValueError:
+        pass
+
+    print("✅ Perfiles de cuentas correctos")
+
+@_with_accounts
+def test_per_account_quota():
+    """Prueba que cada cuenta gasta su propia cuota y tiene su propia bandeja"""
+    print("⏱️ Probando cuotas por cuenta...")
+
+    with tempfile.TemporaryDirectory() as tmp, TwitterStandIn() as standin:
+        Config.TWITTER_API_BASE_URL = standin.base_url
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        try:
+            us, co = (TwitterClient(db, profile) for profile in load_accounts())
+            us.publish("Tweet de la cuenta us")
+            co.publish("Tweet de la cuenta co")
+
+            # co agotó su límite diario local; us sigue publicando
+            try:
+                co.publish("Segundo tweet de co")
+                assert False, "La cuota de co debería estar agotada"
+            except RateLimitExceeded:
+                pass
+            us.publish("Segundo tweet de us")
+            assert co.wait_time() > 0 and us.wait_time() == 0
+
+            # El estado de las cuotas se guarda y se restaura por cuenta
+            assert POST_TWEET_ENDPOINT in db.get_rate_limits(account='us')
+            assert POST_TWEET_ENDPOINT in db.get_rate_limits(account='co')
+            assert db.get_rate_limits() == {}
+
+            # El mismo texto puede esperar en la bandeja de cada cuenta
+            outboxes = {twitter.account.name: Outbox(db, twitter, base_delay=0, account=twitter.account.name)
+                        for twitter in (us, co)}
+            for outbox in outboxes.values():
+                outbox.enqueue("Aviso para todas las cuentas")
+            assert [item['account'] for item in db.claim_outbox(10, account='co')] == ['co']
+        finally:
+            db.close()
+
+    print("✅ Cuotas por cuenta correctas")
+
+def test_account_threads_reused():
+    """Prueba que las cuentas se ejecutan siempre en los mismos hilos"""
+    print("🧵 Probando hilos por cuenta...")
+
+    # Bot sin clientes externos: solo lo que usa run_for_accounts
+    bot = ZTechBot.__new__(ZTechBot)
+    bot.accounts = [SimpleNamespace(label='us'), SimpleNamespace(label='co')]
+    bot._tweet_guard = bot._simhash_index = object()
+    bot._lock = threading.RLock()
+    bot._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='account')
+
+    threads = set()
+    for _ in range(50):
+        results = bot.run_for_accounts(lambda account: threading.current_thread().name)
+        assert set(results) == {'us', 'co'}
+        threads.update(results.values())
+    # Cada hilo nuevo abriría su propia conexión SQLite
+    assert len(threads) <= 2
+
+    bot._executor.shutdown(wait=True)
+    try:
+        bot.run_for_accounts(lambda account: None)
+        assert False, "El ejecutor cerrado no debería aceptar tareas"
+    except RuntimeError:
+        pass
+
+    print("✅ Hilos por cuenta reutilizados")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de varias cuentas...")
+    print("=" * 50)
+
+    test_load_profiles()
+    test_per_account_quota()
+    test_account_threads_reused()
+
+    print("\n🎉 ¡Todas las pruebas de varias cuentas pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
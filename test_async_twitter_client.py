@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el cliente asíncrono de Twitter
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import tweepy
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from async_twitter_client import HTTPX_AVAILABLE, AsyncTwitterClient
+from config import Config
+from rate_limiter import POST_TWEET_ENDPOINT
+from twitter_client import TwitterClient
+from twitter_standin import TwitterStandIn
+
+_OVERRIDES = ('TWITTER_API_BASE_URL', 'TWITTER_API_KEY', 'TWITTER_API_SECRET', 'TWITTER_BEARER_TOKEN',
+              'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET', 'TWITTER_IDENTITY_CACHE',
+              'TWITTER_DAILY_POST_CAP')
+
+def _point_to(standin: TwitterStandIn):
+    """Apunta la configuración al sustituto con credenciales ficticias"""
+    Config.TWITTER_API_BASE_URL = standin.base_url
+    for name in _OVERRIDES[1:6]:
+        setattr(Config, name, 'dry-run')
+    Config.TWITTER_IDENTITY_CACHE = ''
+    Config.TWITTER_DAILY_POST_CAP = 0
+
+def _with_config(test):
+    """Restaura la configuración modificada por la prueba y omite la prueba sin httpx"""
+    def wrapper():
+        if not HTTPX_AVAILABLE:
+            print(f"⏭️ httpx no instalado, se omite {test.__name__}")
+            return
+        saved = {name: getattr(Config, name) for name in _OVERRIDES}
+        try:
+            test()
+        finally:
+            for name, value in saved.items():
+                setattr(Config, name, value)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+@_with_config
+def test_concurrent_calls():
+    """Prueba que las llamadas se solapan en lugar de ir una tras otra"""
+    print("⚡ Probando llamadas concurrentes...")
+
+    with TwitterStandIn(latency_ms=200) as standin:
+        _point_to(standin)
+
+        async def scenario():
+            async with AsyncTwitterClient(max_connections=10) as twitter:
+                tweets = [await twitter.post_tweet(f"Tweet concurrente {i}") for i in range(2)]
+                started = time.perf_counter()
+                results = await asyncio.gather(
+                    *(twitter.get_tweet_metrics(tweet['id']) for tweet in tweets * 3),
+                    twitter.search_tweets("concurrente"),
+                    twitter.get_user_timeline("ztech"),
+                    twitter.get_own_recent_tweets(5),
+                )
+                return tweets, results, time.perf_counter() - started
+
+        tweets, results, elapsed = asyncio.run(scenario())
+        # 11 llamadas de 200 ms: en serie serían más de 2 s; solapadas, dos rondas (usuario y timeline)
+        assert elapsed < 1.2, f"Las llamadas no se solaparon ({elapsed:.2f} s)"
+        assert [metrics['id'] for metrics in results[:6]] == [int(tweet['id']) for tweet in tweets * 3]
+        assert len(results[6]) == 2 and len(results[7]) == 2
+        assert [tweet['id'] for tweet in results[8]] == [tweets[1]['id'], tweets[0]['id']]
+
+    print(f"✅ Llamadas concurrentes correctas ({elapsed:.2f} s)")
+
+@_with_config
+def test_shared_rate_limits():
+    """Prueba que el cliente asíncrono gasta de la misma cuota que el síncrono"""
+    print("🤝 Probando cuota compartida...")
+
+    with TwitterStandIn(limits={POST_TWEET_ENDPOINT: 2}) as standin:
+        _point_to(standin)
+        sync_twitter = TwitterClient()
+        sync_twitter.publish("Publicado por el cliente síncrono")
+
+        async def scenario():
+            async with AsyncTwitterClient.from_client(sync_twitter) as twitter:
+                first = await twitter.post_tweet("Publicado por el cliente asíncrono")
+                second = await twitter.post_tweet("Sin cuota")
+                return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first is not None and second is None
+        assert standin.requests.count(POST_TWEET_ENDPOINT) == 2  # El tercero no salió
+        assert sync_twitter.rate_limiter.status()[POST_TWEET_ENDPOINT]['remaining'] == 0
+
+    print("✅ Cuota compartida correcta")
+
+@_with_config
+def test_errors_match_sync_client():
+    """Prueba que los errores llegan como las mismas excepciones de tweepy"""
+    print("💥 Probando errores del cliente asíncrono...")
+
+    with TwitterStandIn() as standin:
+        _point_to(standin)
+
+        async def scenario():
+            errors = []
+            async with AsyncTwitterClient() as twitter:
+                await twitter.publish("Tweet único")
+                standin.fail_next(503, endpoint=POST_TWEET_ENDPOINT)
+                for content in ("Tweet tras un 503", "Tweet único"):
+                    try:
+                        await twitter.publish(content)
+                    except tweepy.HTTPException as e:
+                        errors.append(e)
+            return errors
+
+        unavailable, duplicate = asyncio.run(scenario())
+        assert isinstance(duplicate, tweepy.Forbidden) and 'duplicate' in str(duplicate)
+        assert isinstance(unavailable, tweepy.TwitterServerError)
+
+    print("✅ Errores del cliente asíncrono correctos")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del cliente asíncrono de Twitter...")
+    print("=" * 50)
+
+    test_concurrent_calls()
+    test_shared_rate_limits()
+    test_errors_match_sync_client()
+
+    print("\n🎉 ¡Todas las pruebas del cliente asíncrono pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -5,6 +5,7 @@ Verifica que todos los componentes funcionen correctamente
 """
 
 import sys
+import tempfile
 from pathlib import Path
 
 # Agregar src al path
@@ -32,11 +33,13 @@ def test_database():
     print("🗄️ Probando base de datos...")
     
     try:
-        db = DatabaseManager("test_bot.db")
-        print("✅ Base de datos inicializada correctamente")
-        
-        # Limpiar archivo de prueba
-        Path("test_bot.db").unlink(missing_ok=True)
+        # Directorio temporal: se eliminan también los archivos -wal y -shm
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(str(Path(tmp) / "test_bot.db"))
+            try:
+                print("✅ Base de datos inicializada correctamente")
+            finally:
+                db.close()
         return True
     except Exception as e:
         print(f"❌ Error en base de datos: {e}")
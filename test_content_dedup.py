@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la deduplicación de noticias con SimHash
+"""
+import sys
+import hashlib
+import random
+import sqlite3
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from content_dedup import (
+    SimHashIndex, canonical_url, compute_simhash, fingerprint_text, hamming_distance,
+    normalize_text, simhash_from_db, simhash_to_db
+)
+from content_sources import ContentSource
+from database import DatabaseManager
+
+def _remove_db(db_path: str):
+    """Elimina la base de datos de prueba y sus archivos WAL"""
+    for suffix in ("", "-wal", "-shm"):
+        Path(db_path + suffix).unlink(missing_ok=True)
+
+def test_normalize_text():
+    """Prueba la normalización de texto"""
+    print("🔤 Probando normalización de texto...")
+
+    assert normalize_text("<b>¡Apple lanza el iPhone!</b>") == "apple lanza el iphone"
+    assert normalize_text("Tecnología   Innovación") == "tecnologia innovacion"
+    assert normalize_text("") == ""
+
+    print("✅ Normalización correcta")
+
+def test_similar_articles_are_close():
+    """Prueba que la misma noticia redactada distinto queda cerca"""
+    print("📰 Probando noticias casi duplicadas...")
+
+    original = compute_simhash(
+        "OpenAI launches GPT-5 with improved reasoning. The new model beats "
+        "previous versions on coding and math benchmarks, the company said."
+    )
+    reworded = compute_simhash(
+        "OpenAI launches GPT-5 with improved reasoning! The new model beats "
+        "previous versions on coding and math benchmarks, the company says."
+    )
+    unrelated = compute_simhash(
+        "Samsung unveils foldable phone with larger battery and brighter "
+        "display at its annual Unpacked event in Seoul."
+    )
+
+    print(f"   Distancia similar: {hamming_distance(original, reworded)}")
+    print(f"   Distancia distinta: {hamming_distance(original, unrelated)}")
+    assert hamming_distance(original, reworded) <= 8
+    assert hamming_distance(original, unrelated) > 10
+
+    print("✅ SimHash distingue noticias similares y distintas")
+
+def test_simhash_index():
+    """Prueba el índice por bandas"""
+    print("🗂️ Probando índice SimHash...")
+
+    index = SimHashIndex(max_distance=3)
+    rng = random.Random(42)
+    for i in range(2000):
+        index.add(f"hash_{i}", rng.getrandbits(64))
+
+    target = rng.getrandbits(64)
+    index.add("target", target)
+
+    # Cambiar 3 bits repartidos en distintas bandas
+    near = target ^ (1 << 2) ^ (1 << 30) ^ (1 << 60)
+    assert index.is_near_duplicate(near) == "target"
+
+    # Cambiar 5 bits queda fuera del umbral
+    far = near ^ (1 << 10) ^ (1 << 45)
+    assert "target" not in [key for key, _ in index.find_near_duplicates(far)]
+
+    index.remove("target")
+    assert index.is_near_duplicate(near) is None
+
+    print("✅ Índice SimHash funcionando")
+
+def test_db_roundtrip():
+    """Prueba la conversión al rango de enteros de SQLite"""
+    print("🗄️ Probando conversión para base de datos...")
+
+    for value in [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1]:
+        stored = simhash_to_db(value)
+        assert -(1 << 63) <= stored < (1 << 63)
+        assert simhash_from_db(stored) == value
+
+    print("✅ Conversión correcta")
+
+def test_stable_fingerprint():
+    """Prueba que la huella ignora variaciones cosméticas"""
+    print("🔑 Probando huellas estables...")
+
+    base = "💡 HACK: Use Ctrl+F to find any text on any webpage!"
+    varied = "✨ HACK: use Ctrl+F to find any text on any webpage 🎯\n\n#tech #productivity #12:30"
+
+    assert fingerprint_text(base) == fingerprint_text(varied)
+    assert fingerprint_text(base) != fingerprint_text("💡 HACK: Alt+Tab switches apps")
+    # Valor fijo: no depende de la semilla de hash() del proceso
+    assert fingerprint_text("hacks_video_1") == fingerprint_text("hacks_video_1")
+    assert len(fingerprint_text(base)) == 32
+
+    # Los artículos de feeds conservan su hash MD5 para seguir coincidiendo con lo ya procesado
+    article = "Apple unveils iPhone 16https://techcrunch.com/iphone16"
+    assert ContentSource("RSS").generate_content_hash(article) == hashlib.md5(article.encode('utf-8')).hexdigest()
+
+    print("✅ Huellas estables")
+
+def test_canonical_url():
+    """Prueba que las variantes de un mismo enlace comparten URL canónica"""
+    print("🔗 Probando URLs canónicas...")
+
+    canonical = canonical_url("https://techcrunch.com/2024/story?a=1&b=2")
+    assert canonical_url("http://www.TechCrunch.com/2024/story/?b=2&a=1&utm_source=rss#comments") == canonical
+    assert canonical_url("https://techcrunch.com/2024/story?a=1&b=2&fbclid=x") == canonical
+    assert canonical_url("https://techcrunch.com/2024/other") != canonical
+    assert canonical_url("") == canonical_url(None) == ""
+
+    print("✅ URLs canónicas correctas")
+
+def test_repost_window():
+    """Prueba la consulta de ventana de contenido procesado"""
+    print("🗄️ Probando ventana de republicación...")
+
+    db_path = "test_dedup.db"
+    _remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        content_hash = f"generated_{fingerprint_text('💡 HACK: Alt+Tab switches apps')}"
+
+        assert not db.was_processed_since(content_hash, days=30)
+        db.save_processed_content(content_hash, "ContentGenerator", refresh=True)
+        assert db.was_processed_since(content_hash, days=30)
+
+        # Simular que se publicó hace 40 días y se vuelve a publicar
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE processed_content SET processed_at = datetime('now', '-40 days')")
+        assert not db.was_processed_since(content_hash, days=30)
+        db.save_processed_content(content_hash, "ContentGenerator", refresh=True)
+        assert db.was_processed_since(content_hash, days=30)
+    finally:
+        db.close()
+        _remove_db(db_path)
+
+    print("✅ Ventana de republicación correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de deduplicación...")
+    print("=" * 50)
+
+    test_normalize_text()
+    test_similar_articles_are_close()
+    test_simhash_index()
+    test_db_roundtrip()
+    test_stable_fingerprint()
+    test_canonical_url()
+    test_repost_window()
+
+    print("\n🎉 ¡Todas las pruebas de deduplicación pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
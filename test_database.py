@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el gestor de base de datos
+"""
+import sys
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from database import DatabaseManager
+
+DB_PATH = "test_database.db"
+
+def _fresh_db() -> DatabaseManager:
+    """Crea una base de datos de prueba vacía"""
+    _remove_db()
+    return DatabaseManager(DB_PATH)
+
+def _remove_db():
+    """Elimina la base de datos de prueba y sus archivos WAL"""
+    for suffix in ("", "-wal", "-shm"):
+        Path(DB_PATH + suffix).unlink(missing_ok=True)
+
+def test_connection_pragmas():
+    """Prueba que la conexión persistente usa WAL y pragmas ajustados"""
+    print("⚙️ Probando configuración de la conexión...")
+
+    db = _fresh_db()
+    try:
+        conn = db.backend.connection()
+        assert conn is db.backend.connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Conexión configurada")
+
+def test_concurrent_writers():
+    """Prueba escrituras y lecturas concurrentes desde varios hilos"""
+    print("🧵 Probando acceso concurrente...")
+
+    db = _fresh_db()
+    errors = []
+
+    def worker(worker_id: int):
+        try:
+            for i in range(100):
+                content_hash = f"w{worker_id}_{i}"
+                db.save_processed_content(content_hash, f"worker_{worker_id}")
+                assert db.was_processed_since(content_hash, days=1)
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, errors
+        count = db.backend.connection().execute("SELECT COUNT(*) FROM processed_content").fetchone()[0]
+        assert count == 400
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Acceso concurrente correcto")
+
+def test_thread_connections_released():
+    """Prueba que los hilos que terminan no dejan conexiones abiertas"""
+    print("🔌 Probando liberación de conexiones por hilo...")
+
+    db = _fresh_db()
+    try:
+        for i in range(50):
+            thread = threading.Thread(target=db.save_processed_content, args=(f"t{i}", "hilo"))
+            thread.start()
+            thread.join()
+        # Solo queda la conexión del hilo principal (la de la inicialización)
+        assert len(db.backend._connections) == 1
+
+        conn = db.backend.connection()
+        db.release_thread()
+        assert db.backend._connections == []
+        try:
+            conn.execute("SELECT 1")
+            assert False, "La conexión liberada debería estar cerrada"
+        except sqlite3.ProgrammingError:
+            pass
+        assert db.was_processed_since("t49", days=1)
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Conexiones por hilo liberadas")
+
+def test_migrates_legacy_database():
+    """Prueba la migración en sitio de una base de datos antigua"""
+    print("🔧 Probando migración de esquema...")
+
+    _remove_db()
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("""
+            CREATE TABLE bot_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date DATE,
+                tweets_published INTEGER DEFAULT 0,
+                content_processed INTEGER DEFAULT 0,
+                errors_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE processed_content (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT UNIQUE,
+                source TEXT NOT NULL,
+                source_url TEXT,
+                title TEXT,
+                summary TEXT,
+                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                used BOOLEAN DEFAULT FALSE
+            )
+        """)
+        conn.execute("CREATE INDEX idx_processed_content_source_url ON processed_content(source_url)")
+        conn.executemany(
+            "INSERT INTO bot_stats (date, tweets_published, content_processed, errors_count) VALUES (?, ?, ?, ?)",
+            [("2024-01-01", 1, 2, 0), ("2024-01-01", 2, 3, 1), ("2024-01-02", 5, 5, 5)]
+        )
+
+    db = DatabaseManager(DB_PATH)
+    try:
+        conn = db.backend.connection()
+        rows = conn.execute(
+            "SELECT date, tweets_published, content_processed, errors_count FROM bot_stats ORDER BY date"
+        ).fetchall()
+        assert rows == [("2024-01-01", 3, 5, 1), ("2024-01-02", 5, 5, 5)]
+
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(bot_stats)")}
+        assert "idx_bot_stats_date" in indexes
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(processed_content)")}
+        assert "simhash" in columns
+        # Los enlaces se comparan por link; source_url (la URL del feed) ya no se indexa
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(processed_content)")}
+        assert "idx_processed_content_link" in indexes
+        assert "idx_processed_content_source_url" not in indexes
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM published_tweets ORDER BY published_at DESC LIMIT 5"
+        ).fetchall()
+        assert "idx_published_tweets_published_at" in str(plan)
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Migración correcta")
+
+def test_daily_stats_upsert():
+    """Prueba que las estadísticas diarias se acumulan en una sola fila"""
+    print("📊 Probando estadísticas diarias...")
+
+    db = _fresh_db()
+    try:
+        db.update_daily_stats(tweets_published=1, content_processed=2)
+        db.update_daily_stats(tweets_published=1, errors_count=1)
+        stats = db.get_daily_stats(days=7)
+        assert len(stats) == 1
+        assert stats[0]['tweets_published'] == 2
+        assert stats[0]['content_processed'] == 2
+        assert stats[0]['errors_count'] == 1
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Estadísticas acumuladas")
+
+def test_bulk_writes():
+    """Prueba las escrituras en lote"""
+    print("📦 Probando escrituras en lote...")
+
+    db = _fresh_db()
+    try:
+        articles = [
+            {'content_hash': f"hash_{i}", 'source': 'RSS_test', 'title': f"Título {i}", 'simhash': (1 << 63) + i}
+            for i in range(500)
+        ]
+        articles.append({'title': 'Sin hash'})
+        assert db.save_processed_content_many(articles) == 500
+        # Repetir el lote no duplica filas
+        db.save_processed_content_many(articles)
+        assert len(db.get_recent_simhashes(limit=1000)) == 500
+        assert db.is_content_processed("hash_42")
+
+        tweets = [{'tweet_id': str(i), 'content': f"Tweet {i}", 'engagement_data': {'like_count': i}} for i in range(10)]
+        assert db.save_published_tweets_many(tweets) == 10
+        assert len(db.get_published_tweets(limit=50)) == 10
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Escrituras en lote correctas")
+
+def test_engagement_samples():
+    """Prueba la migración y consulta de la serie temporal de engagement"""
+    print("📈 Probando muestras de engagement...")
+
+    _remove_db()
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("""
+            CREATE TABLE published_tweets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tweet_id TEXT UNIQUE,
+                content TEXT NOT NULL,
+                source TEXT,
+                source_url TEXT,
+                published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                engagement_data TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute(
+            "INSERT INTO published_tweets (tweet_id, content, published_at, engagement_data) VALUES (?, ?, ?, ?)",
+            ("100", "Tweet antiguo", "2024-01-01 10:00:00", '{"like_count": 3, "retweet_count": 1, "reply_count": 0}')
+        )
+
+    db = DatabaseManager(DB_PATH)
+    try:
+        legacy = db.get_engagement_series("100")
+        assert legacy['likes'].tolist() == [3]
+        assert str(legacy['sampled_at'][0]) == "2024-01-01T10:00:00"
+
+        db.save_published_tweet("200", "Tweet nuevo", engagement_data={'like_count': 0, 'impression_count': 10})
+        start = datetime.utcnow()
+        for hour, likes in enumerate((5, 9, 12), 1):
+            db.record_engagement_samples(
+                [("200", {'like_count': likes, 'impression_count': 100 * hour}), ("100", {'like_count': 4})],
+                sampled_at=start + timedelta(hours=hour)
+            )
+
+        series = db.get_engagement_series("200")
+        assert series['likes'].tolist() == [0, 5, 9, 12]
+        assert series['likes'].dtype.kind == 'i'
+        assert series['impressions'][-1] == 300
+        assert series['retweets'].sum() == 0
+
+        window = db.get_engagement_window(start + timedelta(minutes=90))
+        assert window['tweet_id'].tolist() == ["200", "100", "200", "100"]
+        assert window['likes'].tolist() == [9, 4, 12, 4]
+
+        latest = {tweet['tweet_id']: tweet['engagement_data'] for tweet in db.get_published_tweets(limit=10)}
+        assert latest["200"]['like_count'] == 12
+        assert latest["100"]['like_count'] == 4
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Serie de engagement correcta")
+
+def test_rollups():
+    """Prueba que los agregados se mantienen al publicar y al muestrear"""
+    print("🧮 Probando agregados de estadísticas...")
+
+    db = _fresh_db()
+    try:
+        db.save_published_tweet("1", "Noticia", source="RSS_a", post_type="single", language="es",
+                                engagement_data={'like_count': 2}, published_at="2024-05-01 10:15:00")
+        db.save_published_tweets_many([
+            {'tweet_id': "2", 'content': "Truco", 'source': "AI", 'post_type': "hacks",
+             'language': "en", 'published_at': "2024-05-01 10:45:00"},
+            {'tweet_id': "3", 'content': "Otra", 'source': "RSS_a", 'post_type': "single",
+             'published_at': "2024-05-01 18:00:00"},
+        ])
+        # Repetir un tweet ya guardado no lo cuenta dos veces
+        db.save_published_tweets_many([{'tweet_id': "3", 'content': "Otra", 'post_type': "single"}])
+
+        now = datetime.utcnow()
+        db.record_engagement_samples([("1", {'like_count': 7}), ("2", {'like_count': 3}), ("x", {'like_count': 9})],
+                                     sampled_at=now)
+        db.record_engagement_samples([("1", {'like_count': 10, 'retweet_count': 1})], sampled_at=now + timedelta(hours=1))
+        # Una muestra anterior a la última no cambia los agregados
+        db.record_engagement_samples([("1", {'like_count': 1})], sampled_at=now - timedelta(hours=1))
+
+        by_type = {row['post_type']: row for row in db.get_rollup_stats('daily', group_by=('post_type',))}
+        assert (by_type['single']['tweets'], by_type['single']['likes'], by_type['single']['retweets']) == (2, 10, 1)
+        assert (by_type['hacks']['tweets'], by_type['hacks']['likes']) == (1, 3)
+
+        by_hour = db.get_rollup_stats('hourly', since=datetime(2024, 5, 1), group_by=('hour',))
+        assert [(row['hour'], row['tweets']) for row in by_hour] == [('10', 2), ('18', 1)]
+        languages = {row['language'] for row in db.get_rollup_stats(group_by=('language',))}
+        assert languages == {'es', 'en', 'unknown'}
+        assert db.get_rollup_stats(since=datetime(2024, 6, 1)) == []
+
+        # Los agregados coinciden con la última muestra de cada tweet
+        latest = sum(tweet['engagement_data']['like_count'] for tweet in db.get_published_tweets()
+                     if tweet['engagement_data'])
+        assert db.get_rollup_stats(group_by=())[0]['likes'] == latest == 13
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Agregados correctos")
+
+def test_recency_queries():
+    """Prueba las consultas de recencia sobre columnas indexadas"""
+    print("🕒 Probando consultas de recencia...")
+
+    db = _fresh_db()
+    try:
+        now = datetime.utcnow()
+        assert not db.has_posted_since(now - timedelta(days=1))
+        assert db.get_last_post_time() is None
+
+        # Más de 10 publicaciones: las antiguas no deben ocultar las de hoy
+        db.save_published_tweets_many([
+            {'tweet_id': str(i), 'content': f"Tweet {i}", 'post_type': 'single',
+             'published_at': (now - timedelta(days=2, minutes=i)).strftime('%Y-%m-%d %H:%M:%S')}
+            for i in range(15)
+        ])
+        db.save_published_tweet("curado", "Curado", post_type="curated",
+                                published_at=(now - timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S'))
+
+        assert db.has_posted_since(now - timedelta(days=1))
+        assert not db.has_posted_since(now - timedelta(hours=1))
+        assert db.count_posts_since(now - timedelta(days=3)) == 16
+        assert db.count_posts_since(now - timedelta(days=3), post_type='single') == 15
+        assert db.has_posted_since(now - timedelta(days=1), post_type='curated')
+        assert not db.has_posted_since(now - timedelta(days=1), post_type='single')
+        assert abs(db.get_last_post_time() - (now - timedelta(hours=3))) < timedelta(seconds=1)
+        assert db.get_last_post_time('single') < now - timedelta(days=2)
+
+        plan = db.backend.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM published_tweets WHERE post_type = ? AND published_at >= ?",
+            ('curated', '2024-01-01')
+        ).fetchall()
+        assert "idx_published_tweets_type_published_at" in str(plan)
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Consultas de recencia correctas")
+
+def test_candidate_queue():
+    """Prueba la cola de candidatos: prioridad, reclamo atómico y caducidad"""
+    print("📥 Probando cola de candidatos...")
+
+    db = _fresh_db()
+    try:
+        now = datetime.utcnow()
+        story = {'size': 1, 'articles': [{'content_hash': 'a0', 'title': 'Noticia'}], 'published': now}
+        db.enqueue_candidates([
+            {'content_hash': f"c{i}", 'story': dict(story, size=i), 'tweet_text': f"Tweet {i}",
+             'priority': i, 'expires_at': now + timedelta(hours=1)}
+            for i in range(1, 41)
+        ] + [{'content_hash': 'viejo', 'story': story, 'priority': 100, 'expires_at': now - timedelta(minutes=1)}])
+
+        # Reencolar un pendiente actualiza su prioridad y conserva el texto
+        db.enqueue_candidates([{'content_hash': 'c1', 'story': story, 'priority': 50,
+                                'expires_at': now + timedelta(hours=1)}])
+        first = db.claim_candidate()
+        assert (first['content_hash'], first['tweet_text']) == ('c1', "Tweet 1")
+        assert first['story']['articles'][0]['title'] == 'Noticia'
+        assert db.claim_candidate()['content_hash'] == 'c40'
+
+        plan = db.backend.connection().execute("""
+            EXPLAIN QUERY PLAN SELECT id FROM content_candidates 
+            WHERE status = 'pending' AND expires_at > ? ORDER BY priority DESC, id LIMIT 1
+        """, (now,)).fetchall()
+        assert "idx_content_candidates_pending" in str(plan)
+
+        # Varios hilos nunca reclaman el mismo candidato
+        claimed, errors = [], []
+
+        def worker():
+            try:
+                while (candidate := db.claim_candidate()):
+                    claimed.append(candidate['content_hash'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        assert len(claimed) == len(set(claimed)) == 38
+        assert db.count_pending_candidates() == 0
+
+        conn = db.backend.connection()
+        db.mark_candidate(first['id'], 'posted', tweet_id="999")
+        c2_id = conn.execute("SELECT id FROM content_candidates WHERE content_hash = 'c2'").fetchone()[0]
+        db.mark_candidate(c2_id, 'pending')
+        assert conn.execute("SELECT status, tweet_id FROM content_candidates WHERE id = ?",
+                            (first['id'],)).fetchone() == ('posted', "999")
+        assert db.count_pending_candidates() == 1
+        assert db.get_candidate_hashes(['c1', 'c2', 'nuevo']) == {'c1', 'c2'}
+
+        # Caducan los vencidos y vuelven a la cola los reclamados abandonados
+        with conn:
+            conn.execute("UPDATE content_candidates SET claimed_at = '2000-01-01 00:00:00' WHERE content_hash = 'c5'")
+        assert db.expire_candidates(claim_timeout_minutes=30) == {'expired': 1, 'released': 1}
+        assert db.count_pending_candidates() == 2
+        try:
+            db.mark_candidate(first['id'], 'publicado')
+            assert False, "Estado no válido aceptado"
+        except ValueError:
+            pass
+
+        # Los artículos usados en un tweet quedan marcados en processed_content
+        db.save_processed_content_many([{'content_hash': 'a0', 'source': 'RSS'}])
+        db.save_processed_content_many([{'content_hash': 'a0', 'source': 'RSS', 'used': True},
+                                        {'content_hash': 'a1', 'source': 'RSS'}])
+        used = dict(conn.execute("SELECT content_hash, used FROM processed_content"))
+        assert used == {'a0': 1, 'a1': 0}
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Cola de candidatos correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de base de datos...")
+    print("=" * 50)
+
+    test_connection_pragmas()
+    test_concurrent_writers()
+    test_thread_connections_released()
+    test_migrates_legacy_database()
+    test_daily_stats_upsert()
+    test_bulk_writes()
+    test_engagement_samples()
+    test_rollups()
+    test_recency_queries()
+    test_candidate_queue()
+
+    print("\n🎉 ¡Todas las pruebas de base de datos pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
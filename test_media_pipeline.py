@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el canal de imágenes
+"""
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+
+import requests
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from database import DatabaseManager
+from media_pipeline import PILLOW_AVAILABLE, MediaPipeline, image_format, process_image
+from outbox import Outbox
+
+def _png(width: int, height: int, color=(200, 30, 30)) -> bytes:
+    """Crea una imagen PNG RGB de un solo color"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\x00' + bytes(color) * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+class _FakeTwitter:
+    """Cliente de Twitter que registra las subidas y publicaciones"""
+
+    def __init__(self):
+        self.uploads = []
+        self.published = []
+
+    def upload_media(self, path: str, additional_owners=None):
+        self.uploads.append(path)
+        return {'media_id': f"m{len(self.uploads)}", 'expires_after_secs': 86400}
+
+    def publish(self, content: str, reply_to: str = None, media_ids=None):
+        self.published.append((content, media_ids))
+        return {'id': str(len(self.published)), 'text': content, 'public_metrics': {}}
+
+def _pipeline(db: DatabaseManager, twitter, cache_dir: str, images: dict) -> MediaPipeline:
+    """Crea un canal de imágenes que descarga de un diccionario URL -> contenido"""
+    pipeline = MediaPipeline(db, twitter, cache_dir=cache_dir, workers=2)
+    pipeline.downloads = []
+
+    def fake_get(url, timeout=None, stream=False):
+        pipeline.downloads.append(url)
+        response = requests.Response()
+        response.status_code = 200 if url in images else 404
+        response._content = images.get(url, b'')
+        response._content_consumed = True
+        response.url = url
+        return response
+
+    pipeline.session.get = fake_get
+    return pipeline
+
+def test_process_image():
+    """Prueba la detección de formato y la adaptación a los límites"""
+    print("🖼️ Probando procesado de imágenes...")
+
+    small = _png(8, 8)
+    assert image_format(small) == 'png' and image_format(b'GIF89a...') == 'gif'
+    assert image_format(b'<html>no es una imagen</html>') is None
+    assert process_image(b'<html></html>') is None
+    assert process_image(small) == (small, 'png')  # Ya cumple: sin cambios
+
+    if PILLOW_AVAILABLE:
+        content, extension = process_image(_png(3000, 1000), max_dimension=1500)
+        from PIL import Image
+        import io
+        assert extension == 'jpg' and Image.open(io.BytesIO(content)).size == (1500, 500)
+    else:
+        print("⏭️ Pillow no instalado, se omite el redimensionado")
+
+    print("✅ Procesado correcto")
+
+def test_cache_and_reuse():
+    """Prueba la caché por contenido y la reutilización de media_id"""
+    print("♻️ Probando caché de imágenes y media_id...")
+
+    image = _png(16, 16)
+    images = {"https://img/ai.jpg": image, "https://img/ai-copia.jpg": image, "https://img/otra.jpg": _png(4, 4)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        twitter = _FakeTwitter()
+        pipeline = _pipeline(db, twitter, f"{tmp}/media", images)
+        try:
+            # Precarga en los trabajadores: una descarga por URL aunque se pida dos veces
+            for future in pipeline.prefetch(["https://img/ai.jpg", "https://img/ai.jpg", None]):
+                future.result()
+            assert pipeline.downloads == ["https://img/ai.jpg"]
+
+            assert pipeline.get_media_id("https://img/ai.jpg") == "m1"
+            assert pipeline.downloads == ["https://img/ai.jpg"] and len(twitter.uploads) == 1
+
+            # Repetir la imagen del tema no cuesta descargas ni subidas
+            assert pipeline.get_media_id("https://img/ai.jpg") == "m1"
+            assert len(pipeline.downloads) == 1 and len(twitter.uploads) == 1
+
+            # Otra URL con el mismo contenido comparte archivo y media_id
+            assert pipeline.get_media_id("https://img/ai-copia.jpg") == "m1"
+            assert len(twitter.uploads) == 1 and len(list(Path(tmp, "media").iterdir())) == 1
+
+            # Un media_id a punto de caducar se vuelve a subir, sin volver a descargar
+            with db.backend.cursor() as cursor:
+                cursor.execute("UPDATE media_cache SET media_expires_at = '2000-01-01 00:00:00'")
+            assert pipeline.get_media_id("https://img/ai.jpg") == "m2"
+            assert len(pipeline.downloads) == 2 and len(twitter.uploads) == 2
+
+            assert pipeline.get_media_id("https://img/otra.jpg") == "m3"
+
+            # Una imagen que no se puede descargar no impide publicar
+            assert pipeline.get_media_id("https://img/rota.jpg") is None
+        finally:
+            pipeline.close()
+            db.close()
+
+    print("✅ Caché de imágenes correcta")
+
+def test_outbox_attaches_media():
+    """Prueba que la bandeja de salida adjunta la imagen del payload"""
+    print("📎 Probando imágenes en la bandeja de salida...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        twitter = _FakeTwitter()
+        pipeline = _pipeline(db, twitter, f"{tmp}/media", {"https://img/ai.jpg": _png(16, 16)})
+        outbox = Outbox(db, twitter, media=pipeline)
+        try:
+            assert outbox.send(outbox.enqueue("Tweet con imagen", {'media_url': "https://img/ai.jpg"})) == 'sent'
+            assert outbox.send(outbox.enqueue("Tweet sin imagen")) == 'sent'
+            assert twitter.published == [("Tweet con imagen", ["m1"]), ("Tweet sin imagen", None)]
+        finally:
+            pipeline.close()
+            db.close()
+
+    print("✅ Imágenes en la bandeja de salida correctas")
+
+def test_close_cancels_queued_downloads():
+    """Prueba que cerrar el canal cancela las descargas que aún no empezaron"""
+    print("🛑 Probando cierre del canal de imágenes...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        pipeline = _pipeline(db, _FakeTwitter(), f"{tmp}/media", {})
+        started = threading.Semaphore(0)
+        release = threading.Event()
+        fake_get = pipeline.session.get
+
+        def blocked_get(url, **kwargs):
+            started.release()
+            release.wait(5)
+            return fake_get(url, **kwargs)
+
+        pipeline.session.get = blocked_get
+        try:
+            futures = pipeline.prefetch(f"https://img/{i}.jpg" for i in range(5))
+            assert started.acquire(timeout=5) and started.acquire(timeout=5)
+            pipeline.close()
+            release.set()
+            # Los dos trabajadores terminan lo que tenían; el resto no llega a empezar
+            assert sum(future.cancelled() for future in futures) == 3
+        finally:
+            release.set()
+            db.close()
+
+    print("✅ Descargas pendientes canceladas")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del canal de imágenes...")
+    print("=" * 50)
+
+    test_process_image()
+    test_cache_and_reuse()
+    test_outbox_attaches_media()
+    test_close_cancels_queued_downloads()
+
+    print("\n🎉 ¡Todas las pruebas del canal de imágenes pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
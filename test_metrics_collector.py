@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el recolector de métricas por lotes
+"""
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from database import DatabaseManager
+from metrics_collector import MetricsCollector, next_sample_at
+from rate_limiter import LOOKUP_TWEETS_ENDPOINT, RateLimitExceeded
+
+class _FakeTwitter:
+    """Cliente de Twitter que registra las consultas por lotes"""
+
+    def __init__(self, deleted=(), fail_after: int = None):
+        self.calls = []
+        self.deleted = set(deleted)
+        self.fail_after = fail_after
+
+    def get_tweets_metrics(self, tweet_ids):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RateLimitExceeded(LOOKUP_TWEETS_ENDPOINT, 600)
+        assert len(tweet_ids) <= 100
+        self.calls.append(list(tweet_ids))
+        return {tweet_id: {'like_count': len(self.calls), 'retweet_count': 1}
+                for tweet_id in tweet_ids if tweet_id not in self.deleted}
+
+    def wait_time(self, endpoint: str = None) -> float:
+        return 0.0
+
+def _publish(db: DatabaseManager, count: int, published_at: datetime):
+    """Guarda tweets publicados en un momento dado"""
+    db.save_published_tweets_many([
+        {'tweet_id': str(i), 'content': f"Tweet {i}", 'published_at': published_at.strftime('%Y-%m-%d %H:%M:%S')}
+        for i in range(count)
+    ])
+
+def test_cadence():
+    """Prueba que la cadencia de muestreo decae con la edad del tweet"""
+    print("⏳ Probando cadencia de muestreo...")
+
+    published = datetime(2024, 1, 1)
+    intervals = [next_sample_at(published, published + age) - (published + age)
+                 for age in (timedelta(hours=1), timedelta(hours=12), timedelta(days=2),
+                             timedelta(days=5), timedelta(days=20))]
+    assert intervals == [timedelta(minutes=30), timedelta(hours=2), timedelta(hours=6),
+                         timedelta(days=1), timedelta(days=7)]
+
+    print("✅ Cadencia correcta")
+
+def test_batched_collection():
+    """Prueba que miles de tweets se cubren con pocas consultas"""
+    print("📊 Probando muestreo por lotes...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        now = datetime.utcnow().replace(microsecond=0)
+        _publish(db, 1200, now - timedelta(hours=1))
+        twitter = _FakeTwitter(deleted={"7"})
+        collector = MetricsCollector(db, twitter, max_requests=5, max_age_days=30)
+        try:
+            # Primer ciclo: 5 consultas de 100 tweets
+            results = collector.collect(now)
+            assert results == {'requests': 5, 'sampled': 499, 'missing': 1}
+            assert [len(call) for call in twitter.calls] == [100] * 5
+
+            # Segundo ciclo: el resto, sin repetir los ya muestreados
+            results = collector.collect(now)
+            assert results['requests'] == 5 and results['sampled'] == 500
+            results = collector.collect(now)
+            assert results['requests'] == 2 and results['sampled'] == 200
+            assert collector.collect(now)['requests'] == 0
+            sampled = [tweet_id for call in twitter.calls for tweet_id in call]
+            assert len(sampled) == len(set(sampled)) == 1200
+
+            # Media hora después todos vuelven a vencer, salvo el borrado
+            due = db.get_tweets_due_for_metrics(now + timedelta(minutes=31), now - timedelta(days=30), limit=2000)
+            assert len(due) == 1199 and "7" not in {tweet_id for tweet_id, _ in due}
+            assert db.get_engagement_series("3")['likes'].tolist() == [1]
+        finally:
+            db.close()
+
+    print("✅ Muestreo por lotes correcto")
+
+def test_rate_limited_cycle():
+    """Prueba que la cuota agotada corta el ciclo pero guarda lo obtenido"""
+    print("⏱️ Probando ciclo interrumpido por cuota...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        now = datetime.utcnow().replace(microsecond=0)
+        _publish(db, 300, now - timedelta(days=10))
+        twitter = _FakeTwitter(fail_after=2)
+        collector = MetricsCollector(db, twitter, max_requests=5)
+        try:
+            assert collector.collect(now) == {'requests': 2, 'sampled': 200, 'missing': 0}
+            # Los muestreados esperan una semana; los otros 100 siguen vencidos
+            assert len(db.get_tweets_due_for_metrics(now, now - timedelta(days=30), limit=1000)) == 100
+            assert len(db.get_tweets_due_for_metrics(now + timedelta(days=7), now - timedelta(days=30),
+                                                     limit=1000)) == 300
+        finally:
+            db.close()
+
+    print("✅ Ciclo interrumpido correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del recolector de métricas...")
+    print("=" * 50)
+
+    test_cadence()
+    test_batched_collection()
+    test_rate_limited_cycle()
+
+    print("\n🎉 ¡Todas las pruebas del recolector de métricas pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
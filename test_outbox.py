@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la bandeja de salida persistente
+"""
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import requests
+import tweepy
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from database import DatabaseManager
+from outbox import Outbox, outbox_fingerprint
+from rate_limiter import POST_TWEET_ENDPOINT, RateLimitExceeded
+
+def _http_error(error_class, status_code: int):
+    """Crea una excepción HTTP de tweepy"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'{"detail": "error de prueba"}'
+    return error_class(response)
+
+class _FakeTwitter:
+    """Cliente de Twitter con resultados programados"""
+
+    def __init__(self):
+        self.results = []
+        self.published = []
+        self.timeline = []
+        self.timeline_calls = 0
+
+    def publish(self, content: str, reply_to: str = None, media_ids=None):
+        result = self.results.pop(0) if self.results else None
+        if isinstance(result, Exception):
+            raise result
+        tweet = {'id': str(100 + len(self.published)), 'text': content, 'public_metrics': {}}
+        self.published.append(tweet)
+        return tweet
+
+    def get_own_recent_tweets(self, max_tweets: int = 20):
+        self.timeline_calls += 1
+        return self.timeline
+
+    def wait_time(self, endpoint: str = POST_TWEET_ENDPOINT) -> float:
+        return 900.0
+
+def _make_due(db: DatabaseManager):
+    """Adelanta todos los reintentos pendientes"""
+    with db.backend.cursor() as cursor:
+        cursor.execute("UPDATE outbox SET next_attempt_at = '2000-01-01 00:00:00' WHERE status = 'pending'")
+
+def _row(db: DatabaseManager, item_id: int):
+    """Lee el estado de un elemento"""
+    with db.backend.cursor(dict_rows=True) as cursor:
+        cursor.execute("SELECT status, attempts, ambiguous, tweet_id, next_attempt_at FROM outbox WHERE id = ?",
+                       (item_id,))
+        return dict(cursor.fetchone())
+
+def test_fingerprint():
+    """Prueba que la huella ignora los enlaces reescritos por Twitter"""
+    print("🔏 Probando huella de la bandeja de salida...")
+
+    original = "Nueva GPU & más https://example.com/gpu?utm_source=rss #tecnologia"
+    assert outbox_fingerprint(original) == outbox_fingerprint("Nueva GPU &amp; más https://t.co/AbC123 #tecnologia")
+    assert outbox_fingerprint(original) != outbox_fingerprint("Otra noticia https://t.co/AbC123")
+
+    print("✅ Huella correcta")
+
+def test_send_and_retry():
+    """Prueba el envío, los reintentos y la idempotencia"""
+    print("📬 Probando envío y reintentos...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        twitter = _FakeTwitter()
+        sent, failed = [], []
+        outbox = Outbox(db, twitter, on_sent=lambda item, tweet: sent.append((item['payload'], tweet['id'])),
+                        on_failed=lambda item: failed.append(item['id']), max_attempts=3, base_delay=60)
+        try:
+            # Envío directo
+            first = outbox.enqueue("Primer tweet", {'post_type': 'single', 'candidate_ids': [7]})
+            assert outbox.send(first) == 'sent'
+            assert sent == [({'post_type': 'single', 'candidate_ids': [7]}, "100")]
+            assert _row(db, first)['status'] == 'sent'
+
+            # Error antes de enviar: reintento con backoff, sin ambigüedad
+            twitter.results = [requests.exceptions.ConnectTimeout("sin conexión")]
+            second = outbox.enqueue("Segundo tweet")
+            assert outbox.enqueue("Segundo tweet") == second  # Idempotente mientras está en vuelo
+            assert outbox.send(second) == 'retried'
+            row = _row(db, second)
+            assert row['status'] == 'pending' and row['attempts'] == 1 and not row['ambiguous']
+            assert row['next_attempt_at'] > (datetime.utcnow() + timedelta(seconds=29)).strftime('%Y-%m-%d %H:%M:%S')
+            assert outbox.process() == {'sent': 0, 'retried': 0, 'failed': 0}  # Aún no vence
+
+            # Timeout de lectura: ambiguo, y el tweet sí se publicó
+            twitter.results = [requests.exceptions.ReadTimeout("sin respuesta")]
+            _make_due(db)
+            assert outbox.process() == {'sent': 0, 'retried': 1, 'failed': 0}
+            assert _row(db, second)['ambiguous']
+            twitter.timeline = [{'id': "555", 'text': "Segundo tweet"}]
+            _make_due(db)
+            assert outbox.process() == {'sent': 1, 'retried': 0, 'failed': 0}
+            assert twitter.timeline_calls == 1 and len(twitter.published) == 1
+            assert _row(db, second)['tweet_id'] == "555"
+
+            # La cuota agotada no cuenta como intento
+            twitter.results = [RateLimitExceeded(POST_TWEET_ENDPOINT, 600)]
+            third = outbox.enqueue("Tercer tweet")
+            assert outbox.send(third) == 'retried'
+            assert _row(db, third)['attempts'] == 0
+
+            # Rechazo definitivo de la API
+            twitter.results = [_http_error(tweepy.Forbidden, 403)]
+            _make_due(db)
+            assert outbox.process() == {'sent': 0, 'retried': 0, 'failed': 1}
+            assert failed == [third]
+            # Ya cerrado, el mismo texto puede volver a encolarse
+            again = outbox.enqueue("Tercer tweet")
+            assert again != third and outbox.send(again) == 'sent'
+
+            # Agotar los intentos
+            fourth = outbox.enqueue("Cuarto tweet")
+            twitter.results = [_http_error(tweepy.TwitterServerError, 503)] * 3
+            assert outbox.send(fourth) == 'retried'
+            for _ in range(2):
+                _make_due(db)
+                twitter.timeline = []
+                outbox.process()
+            assert _row(db, fourth)['status'] == 'failed' and fourth in failed
+
+            # Informe por hora
+            report = outbox.report(hours=1)
+            assert sum(row['sent'] for row in report) == 3
+            assert sum(row['failed'] for row in report) == 2
+            assert sum(row['attempts'] for row in report) == 1 + 3 + 1 + 1 + 3
+            assert report[-1]['success_rate'] == 0.6
+        finally:
+            db.close()
+
+    print("✅ Envío y reintentos correctos")
+
+def test_recover_abandoned():
+    """Prueba que un envío abandonado vuelve como ambiguo"""
+    print("🩹 Probando recuperación de envíos abandonados...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        twitter = _FakeTwitter()
+        outbox = Outbox(db, twitter, sending_timeout_minutes=10)
+        try:
+            item_id = outbox.enqueue("Tweet a medio enviar")
+            assert db.claim_outbox(item_id=item_id)[0]['attempts'] == 1
+            with db.backend.cursor() as cursor:
+                cursor.execute("UPDATE outbox SET updated_at = '2000-01-01 00:00:00'")
+
+            # El tweet no aparece en el timeline: se publica una sola vez
+            assert outbox.process() == {'sent': 1, 'retried': 0, 'failed': 0}
+            assert twitter.timeline_calls == 1 and len(twitter.published) == 1
+            assert db.count_pending_outbox() == 0
+        finally:
+            db.close()
+
+    print("✅ Recuperación correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de la bandeja de salida...")
+    print("=" * 50)
+
+    test_fingerprint()
+    test_send_and_retry()
+    test_recover_abandoned()
+
+    print("\n🎉 ¡Todas las pruebas de la bandeja de salida pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
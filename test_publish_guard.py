@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la guardia de tweets casi duplicados
+"""
+import sys
+import time
+import random
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from publish_guard import DuplicateTweetGuard
+
+PUBLISHED = "💡 HACK: Use Ctrl+F to find any text on any webpage! This universal search works everywhere.\n\n#tech #productivity"
+
+def test_rejects_near_duplicates():
+    """Prueba que se rechazan variaciones de un tweet publicado"""
+    print("🚫 Probando rechazo de duplicados...")
+
+    guard = DuplicateTweetGuard()
+    guard.add("1", PUBLISHED)
+
+    variation = "⚡ HACK: use Ctrl+F to find any text on any webpage! This universal search works everywhere 🎯"
+    assert guard.check(variation) == "1"
+    assert guard.check("🔒 PROTIP: Never commit passwords or API keys to version control!") is None
+
+    print("✅ Duplicados rechazados")
+
+def test_window_eviction():
+    """Prueba que solo se recuerdan los últimos N tweets"""
+    print("🪟 Probando ventana de tweets recientes...")
+
+    guard = DuplicateTweetGuard(max_tweets=3)
+    guard.add("1", PUBLISHED)
+    for i in range(2, 5):
+        guard.add(str(i), f"Noticia número {i} sobre un tema completamente distinto {i * 17}")
+
+    assert len(guard) == 3
+    assert guard.check(PUBLISHED) is None
+    assert "1" not in guard.ngrams
+
+    print("✅ Ventana funcionando")
+
+def test_check_is_fast():
+    """Prueba que la verificación es rápida con el histórico lleno"""
+    print("⏱️ Probando rendimiento de la verificación...")
+
+    rng = random.Random(3)
+    vocabulary = [f"palabra{i}" for i in range(3000)]
+    guard = DuplicateTweetGuard(max_tweets=200)
+    for i in range(200):
+        guard.add(str(i), ' '.join(rng.sample(vocabulary, 30)))
+
+    candidate = ' '.join(rng.sample(vocabulary, 30))
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        guard.check(candidate)
+    elapsed_us = (time.perf_counter() - start) / runs * 1_000_000
+
+    print(f"   {elapsed_us:.0f} µs por verificación")
+    assert elapsed_us < 5000
+
+    print("✅ Verificación rápida")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de la guardia de publicación...")
+    print("=" * 50)
+
+    test_rejects_near_duplicates()
+    test_window_eviction()
+    test_check_is_fast()
+
+    print("\n🎉 ¡Todas las pruebas de la guardia pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
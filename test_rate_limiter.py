@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el gestor de rate limits de Twitter
+"""
+import sys
+import time
+from pathlib import Path
+
+import requests
+import tweepy
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from rate_limiter import (DAILY_APP_BUCKET, DAILY_USER_BUCKET, POST_TWEET_ENDPOINT, RateLimiter,
+                          RateLimitExceeded, endpoint_key)
+from twitter_client import RateLimitedClient
+
+def _response(status_code: int, headers: dict, body: bytes = b'{"data": {"id": "1", "text": "hola"}}'):
+    """Crea una respuesta HTTP de requests"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    response._content = body
+    return response
+
+def test_endpoint_key():
+    """Prueba la normalización de endpoints"""
+    print("🔑 Probando claves de endpoint...")
+
+    assert endpoint_key("post", "/2/tweets") == POST_TWEET_ENDPOINT
+    assert endpoint_key("GET", "/2/tweets/1234567890") == "GET /2/tweets/:id"
+    assert endpoint_key("GET", "/2/users/42/tweets") == "GET /2/users/:id/tweets"
+    assert endpoint_key("GET", "/2/users/by/username/ztech") == "GET /2/users/by/username/:username"
+
+    print("✅ Claves de endpoint correctas")
+
+def test_buckets_from_headers():
+    """Prueba las cubetas alimentadas por cabeceras"""
+    print("🪣 Probando cubetas por endpoint...")
+
+    now = float(int(time.time()))
+    limiter = RateLimiter()
+    endpoint = "GET /2/tweets/:id"
+
+    # Sin información previa la llamada se permite
+    assert limiter.can_call(endpoint, now) and limiter.try_acquire(endpoint, now)
+
+    limiter.update_from_headers(endpoint, {
+        'x-rate-limit-limit': '15', 'x-rate-limit-remaining': '1', 'x-rate-limit-reset': str(int(now) + 600)
+    })
+    assert limiter.try_acquire(endpoint, now)
+    assert not limiter.try_acquire(endpoint, now)
+    assert limiter.wait_time(endpoint, now) == 600
+    assert limiter.wait_time("GET /2/users/me", now) == 0
+
+    # Al pasar el reset la cubeta se recarga con el límite
+    assert limiter.can_call(endpoint, now + 601)
+    assert limiter.status()[endpoint]['limit'] == 15
+
+    # Cabeceras ausentes o inválidas no cambian nada
+    limiter.update_from_headers("GET /2/users/me", {'x-rate-limit-remaining': 'n/a'})
+    assert "GET /2/users/me" not in limiter.status()
+
+    print("✅ Cubetas por endpoint correctas")
+
+def test_daily_post_cap():
+    """Prueba la cuota diaria de publicación local y la informada por la API"""
+    print("📅 Probando cuota diaria de publicación...")
+
+    now = float(int(time.time()))
+    limiter = RateLimiter(daily_post_cap=2)
+    assert limiter.try_acquire(POST_TWEET_ENDPOINT, now)
+    assert limiter.try_acquire(POST_TWEET_ENDPOINT, now + 60)
+    assert not limiter.can_call(POST_TWEET_ENDPOINT, now + 120)
+    # La ventana local empieza con la primera publicación
+    assert limiter.wait_time(POST_TWEET_ENDPOINT, now + 120) == 24 * 3600 - 120
+    # Otros endpoints no se ven afectados
+    assert limiter.can_call("GET /2/users/me", now + 120)
+
+    # La API informa una cuota mayor: manda sobre la local
+    limiter.update_from_headers(POST_TWEET_ENDPOINT, {
+        'x-app-limit-24hour-limit': '100', 'x-app-limit-24hour-remaining': '98',
+        'x-app-limit-24hour-reset': str(int(now) + 3600),
+        'x-user-limit-24hour-limit': '100', 'x-user-limit-24hour-remaining': '0',
+        'x-user-limit-24hour-reset': str(int(now) + 7200),
+    })
+    assert limiter.status()[DAILY_APP_BUCKET]['remaining'] == 98
+    # La cuota de usuario agotada manda hasta su reset
+    assert limiter.wait_time(POST_TWEET_ENDPOINT, now + 200) == 7000
+    assert limiter.status()[DAILY_USER_BUCKET]['remaining'] == 0
+    assert limiter.can_call(POST_TWEET_ENDPOINT, now + 7200)
+
+    print("✅ Cuota diaria de publicación correcta")
+
+def test_rate_limited_client():
+    """Prueba que el cliente no duerme el hilo y aprende de las respuestas"""
+    print("🐦 Probando cliente con rate limits...")
+
+    limiter = RateLimiter(daily_post_cap=0)
+    client = RateLimitedClient(bearer_token="x", consumer_key="k", consumer_secret="s",
+                               access_token="t", access_token_secret="ts", rate_limiter=limiter)
+    assert client.wait_on_rate_limit is False
+
+    reset = int(time.time()) + 900
+    responses = [
+        _response(201, {'x-rate-limit-limit': '200', 'x-rate-limit-remaining': '199', 'x-rate-limit-reset': str(reset),
+                        'x-user-limit-24hour-limit': '17', 'x-user-limit-24hour-remaining': '16',
+                        'x-user-limit-24hour-reset': str(reset)}),
+        _response(429, {'x-rate-limit-limit': '200', 'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(reset)},
+                  b'{"title": "Too Many Requests"}'),
+    ]
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append((method, url))
+        return responses.pop(0)
+
+    client.session.request = fake_request
+
+    assert client.create_tweet(text="hola").data['id'] == "1"
+    assert limiter.status()[DAILY_USER_BUCKET]['remaining'] == 16
+
+    # El 429 se propaga al momento, sin dormir, y agota la cubeta
+    started = time.perf_counter()
+    try:
+        client.create_tweet(text="otra")
+        raise AssertionError("Se esperaba TooManyRequests")
+    except tweepy.TooManyRequests:
+        pass
+    assert time.perf_counter() - started < 1
+
+    # La siguiente llamada se rechaza localmente, sin tráfico
+    try:
+        client.create_tweet(text="otra más")
+        raise AssertionError("Se esperaba RateLimitExceeded")
+    except RateLimitExceeded as e:
+        assert e.endpoint == POST_TWEET_ENDPOINT and 0 < e.retry_after <= 900
+    assert len(calls) == 2
+
+    print("✅ Cliente con rate limits correcto")
+
+def test_persisted_state():
+    """Prueba que el estado observado se guarda y se restaura en otra ejecución"""
+    print("💾 Probando estado persistido...")
+
+    saved = {}
+    now = time.time()
+    limiter = RateLimiter(daily_post_cap=17, on_update=saved.update)
+    limiter.update_from_headers(POST_TWEET_ENDPOINT, {
+        'x-rate-limit-limit': '200', 'x-rate-limit-remaining': '199', 'x-rate-limit-reset': str(int(now) + 600),
+        'x-app-limit-24hour-limit': '17', 'x-app-limit-24hour-remaining': '0',
+        'x-app-limit-24hour-reset': str(int(now) + 3600)
+    })
+    assert set(saved) == {POST_TWEET_ENDPOINT, DAILY_APP_BUCKET}
+    saved["GET /2/users/me"] = {'limit': 75, 'remaining': 0, 'reset': int(now) - 10}  # Ventana ya terminada
+
+    # Un proceso nuevo respeta la cuota diaria agotada sin llamar a la API
+    restored = RateLimiter(daily_post_cap=17)
+    assert restored.restore(saved, now) == 3
+    assert not restored.can_call(POST_TWEET_ENDPOINT, now)
+    assert restored.status()["GET /2/users/me"]['remaining'] == 75
+
+    # El límite diario local también se guarda al gastarlo, sin cabeceras de la API
+    saved = {}
+    limiter = RateLimiter(daily_post_cap=2, on_update=saved.update)
+    assert limiter.try_acquire(POST_TWEET_ENDPOINT, now)
+    assert saved[DAILY_APP_BUCKET]['remaining'] == 1
+    assert limiter.try_acquire(POST_TWEET_ENDPOINT, now + 60)
+    assert saved[DAILY_APP_BUCKET] == {'limit': 2, 'remaining': 0, 'reset': int(now + 24 * 3600)}
+    assert limiter.try_acquire("GET /2/users/me", now) and set(saved) == {DAILY_APP_BUCKET}
+
+    restored = RateLimiter(daily_post_cap=2)
+    restored.restore(saved, now + 120)
+    assert not restored.can_call(POST_TWEET_ENDPOINT, now + 120)
+    assert restored.can_call(POST_TWEET_ENDPOINT, now + 24 * 3600)
+
+    print("✅ Estado persistido correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del gestor de rate limits...")
+    print("=" * 50)
+
+    test_endpoint_key()
+    test_buckets_from_headers()
+    test_daily_post_cap()
+    test_rate_limited_client()
+    test_persisted_state()
+
+    print("\n🎉 ¡Todas las pruebas del gestor de rate limits pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el motor de retención y archivo
+"""
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from database import DatabaseManager
+from retention import RetentionEngine
+
+def _seed(db: DatabaseManager, old_rows: int = 1200, new_rows: int = 50):
+    """Inserta contenido procesado antiguo (repartido en varios días) y reciente"""
+    now = datetime.utcnow()
+    rows = [
+        (f"old_{i}", "RSS_test", f"Título antiguo {i}" + " relleno" * 40, -(i + 1),
+         (now - timedelta(days=60 + i % 3)).strftime('%Y-%m-%d %H:%M:%S'))
+        for i in range(old_rows)
+    ] + [
+        (f"new_{i}", "RSS_test", f"Título reciente {i}", i + 1, now.strftime('%Y-%m-%d %H:%M:%S'))
+        for i in range(new_rows)
+    ]
+    with db.backend.cursor() as cursor:
+        cursor.executemany("""
+            INSERT INTO processed_content (content_hash, source, title, simhash, processed_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        cursor.execute("INSERT INTO bot_stats (date, tweets_published) VALUES (?, ?)",
+                       ((now - timedelta(days=90)).date().isoformat(), 4))
+
+def _count(db: DatabaseManager, table: str) -> int:
+    with db.backend.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+def test_purge_archives_and_vacuums():
+    """Prueba el borrado por bloques con archivo y vacuum incremental"""
+    print("🗑️ Probando retención por bloques...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        try:
+            _seed(db)
+            conn = db.backend.connection()
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+            pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+
+            engine = RetentionEngine(db, archive_dir=f"{tmp}/archive", chunk_size=500)
+            deleted = engine.run({'processed_content': 30, 'published_tweets': 0, 'bot_stats': 30})
+
+            assert deleted == {'processed_content': 1200, 'bot_stats': 1}
+            assert _count(db, 'processed_content') == 50
+            assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+            assert conn.execute("PRAGMA page_count").fetchone()[0] < pages_before
+
+            archives = sorted(p.name for p in Path(tmp, "archive", "processed_content").iterdir())
+            assert len(archives) == 3
+            assert all(name.endswith(engine.archive_suffix) for name in archives)
+        finally:
+            db.close()
+
+    print("✅ Retención aplicada y espacio liberado")
+
+def test_reimport_warms_dedup_state():
+    """Prueba que el archivo se puede reimportar sin duplicar filas"""
+    print("📥 Probando reimportación del archivo...")
+
+    for suffix in ('.jsonl.zst', '.jsonl.gz'):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(f"{tmp}/ztech_bot.db")
+            try:
+                _seed(db, old_rows=30, new_rows=0)
+                engine = RetentionEngine(db, archive_dir=f"{tmp}/archive", chunk_size=7)
+                if suffix == '.jsonl.gz':
+                    engine.archive_suffix = suffix
+                elif not engine.archive_suffix == suffix:
+                    print("⏭️ zstandard no instalado, se omite .jsonl.zst")
+                    continue
+
+                engine.run({'processed_content': 30})
+                assert not db.is_content_processed("old_5")
+
+                assert engine.import_archive(f"{tmp}/archive") == 30
+                assert engine.import_archive(f"{tmp}/archive") == 30
+                assert _count(db, 'processed_content') == 30
+                assert db.is_content_processed("old_5")
+                assert not db.was_processed_since("old_5", days=30)
+                assert ("old_5", (1 << 64) - 6) in db.get_recent_simhashes(limit=100)
+            finally:
+                db.close()
+
+    print("✅ Archivo reimportado")
+
+def test_reimport_engagement_samples_once():
+    """Prueba que reimportar muestras de engagement no las duplica"""
+    print("📈 Probando reimportación de muestras de engagement...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        try:
+            old = (datetime.utcnow() - timedelta(days=60)).strftime('%Y-%m-%d %H:%M:%S')
+            with db.backend.cursor() as cursor:
+                cursor.executemany("INSERT INTO engagement_samples (tweet_id, sampled_at, likes) VALUES (?, ?, ?)",
+                                   [("1", old, 5), ("2", old, 7)])
+
+            engine = RetentionEngine(db, archive_dir=f"{tmp}/archive")
+            engine.archive_suffix = '.jsonl.gz'
+            assert engine.run({'engagement_samples': 30}) == {'engagement_samples': 2}
+
+            engine.import_archive(f"{tmp}/archive")
+            engine.import_archive(f"{tmp}/archive")
+            assert _count(db, 'engagement_samples') == 2
+        finally:
+            db.close()
+
+    print("✅ Muestras de engagement reimportadas una sola vez")
+
+def test_outbox_expires_finished_items():
+    """Prueba que la bandeja de salida caduca por finished_at y conserva los elementos en vuelo"""
+    print("📬 Probando retención de la bandeja de salida...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        try:
+            old = (datetime.utcnow() - timedelta(days=60)).strftime('%Y-%m-%d %H:%M:%S')
+            with db.backend.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO outbox (fingerprint, content, status, next_attempt_at, created_at, finished_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [("f1", "Enviado", "sent", old, old, old),
+                      ("f2", "Fallido", "failed", old, old, old),
+                      ("f3", "Pendiente", "pending", old, old, None),
+                      ("f4", "Enviándose", "sending", old, old, None)])
+
+            plan = db.backend.connection().execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM outbox WHERE finished_at < ? ORDER BY finished_at", (old,)
+            ).fetchall()
+            assert "idx_outbox_finished_at" in str(plan)
+
+            engine = RetentionEngine(db, archive_dir=f"{tmp}/archive")
+            engine.archive_suffix = '.jsonl.gz'
+            assert engine.run({'outbox': 30}) == {'outbox': 2}
+            with db.backend.cursor() as cursor:
+                cursor.execute("SELECT status FROM outbox ORDER BY id")
+                assert [row[0] for row in cursor.fetchall()] == ["pending", "sending"]
+
+            # El archivo de la bandeja no se reimporta: sus filas no tienen clave única
+            assert engine.import_archive(f"{tmp}/archive") == 0
+            assert _count(db, 'outbox') == 2
+        finally:
+            db.close()
+
+    print("✅ Bandeja de salida caducada sin tocar los elementos en vuelo")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de retención...")
+    print("=" * 50)
+
+    test_purge_archives_and_vacuums()
+    test_reimport_warms_dedup_state()
+    test_reimport_engagement_samples_once()
+    test_outbox_expires_finished_items()
+
+    print("\n🎉 ¡Todas las pruebas de retención pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
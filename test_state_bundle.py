@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el paquete de estado y el estado incremental de los feeds
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import state_bundle
+from bot import ZTechBot
+from config import Config
+from content_sources import RSSContentSource
+from database import DatabaseManager
+from state_bundle import export_state, import_state
+from write_behind import WriteBehindQueue
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>Nueva GPU anunciada</title><link>https://example.com/gpu?utm_source=rss</link>
+<description>Detalles de la GPU</description><pubDate>Mon, 01 Jan 2024 12:00:00 GMT</pubDate></item>
+<item><title>Rust 2.0 publicado</title><link>https://example.com/rust</link>
+<description>Hoja de ruta</description><pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+class _FakeResponse:
+    """Respuesta HTTP mínima para el feed de prueba"""
+
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+def _seed(db: DatabaseManager):
+    """Guarda estado caliente representativo"""
+    now = datetime.utcnow()
+    db.save_processed_content_many([
+        {'content_hash': f"hash_{i}", 'source': 'RSS_test', 'link': f"https://www.example.com/{i}/?utm_medium=x",
+         'simhash': (1 << 63) + i}
+        for i in range(2000)
+    ])
+    db.save_published_tweets_many([
+        {'tweet_id': str(i), 'content': f"Tweet número {i}", 'post_type': 'single'} for i in range(300)
+    ])
+    db.enqueue_candidates([
+        {'content_hash': 'pendiente', 'story': {'size': 2, 'articles': []}, 'tweet_text': "Tweet preparado",
+         'priority': 2, 'expires_at': now + timedelta(hours=6)},
+        {'content_hash': 'vencido', 'story': {'size': 1, 'articles': []}, 'priority': 9,
+         'expires_at': now - timedelta(hours=1)},
+    ])
+    db.enqueue_outbox("Tweet pendiente de reintento", "huella_pendiente", {'post_type': 'single'})
+    db.finish_outbox(db.enqueue_outbox("Tweet enviado", "huella_enviada"), 'sent', tweet_id="1")
+    db.save_feed_states({'https://example.com/feed': {
+        'etag': '"abc"', 'last_modified': 'Mon, 01 Jan 2024 12:00:00 GMT', 'watermark': '2024-01-01 12:00:00'
+    }})
+    with db.backend.cursor() as cursor:
+        cursor.execute("INSERT INTO bot_config (key, value) VALUES (?, ?)", ('circuit_newsapi', 'open'))
+
+def _roundtrip(tmp: str, compressed_with_zstd: bool):
+    """Exporta desde una base con datos y restaura en una vacía"""
+    bundle = f"{tmp}/state/ztech_state.bundle"
+    source = DatabaseManager(f"{tmp}/origen_{compressed_with_zstd}.db")
+    try:
+        _seed(source)
+        counts = export_state(source, bundle, dedup_days=30, tweet_limit=200)
+    finally:
+        source.close()
+
+    assert counts['processed_content'] == 2000
+    assert counts['published_tweets'] == 200
+    assert counts['content_candidates'] == 1
+    assert counts['outbox'] == 1
+    magic = b'\x28\xb5\x2f\xfd' if compressed_with_zstd else b'\x1f\x8b'
+    assert Path(bundle).read_bytes().startswith(magic)
+
+    target = DatabaseManager(f"{tmp}/destino_{compressed_with_zstd}.db")
+    try:
+        started = time.perf_counter()
+        import_state(target, bundle)
+        assert time.perf_counter() - started < 1.0
+        # Importar dos veces no duplica nada
+        import_state(target, bundle)
+
+        assert target.get_processed_keys(["hash_5", "example.com/7", "nuevo"]) == {"hash_5", "example.com/7"}
+        assert dict(target.get_recent_simhashes(limit=5000))["hash_9"] == (1 << 63) + 9
+        assert len(target.get_recent_tweet_texts(limit=1000)) == 200
+        assert target.get_last_post_time() is not None
+        assert target.claim_candidate()['tweet_text'] == "Tweet preparado"
+        assert target.claim_candidate() is None
+        assert target.get_feed_states()['https://example.com/feed']['etag'] == '"abc"'
+        assert target.claim_outbox()[0]['payload'] == {'post_type': 'single'}
+        with target.backend.cursor() as cursor:
+            cursor.execute("SELECT value FROM bot_config WHERE key = 'circuit_newsapi'")
+            assert cursor.fetchone()[0] == 'open'
+    finally:
+        target.close()
+
+def test_bundle_roundtrip():
+    """Prueba que el estado caliente sobrevive a una base de datos nueva"""
+    print("📦 Probando paquete de estado...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = DatabaseManager(f"{tmp}/vacia.db")
+        assert import_state(empty, f"{tmp}/no_existe.bundle") == {}
+        empty.close()
+        _roundtrip(tmp, compressed_with_zstd=state_bundle.ZSTANDARD_AVAILABLE)
+
+        # Sin zstandard se usa gzip y se detecta al leer
+        available = state_bundle.ZSTANDARD_AVAILABLE
+        state_bundle.ZSTANDARD_AVAILABLE = False
+        try:
+            _roundtrip(tmp, compressed_with_zstd=False)
+        finally:
+            state_bundle.ZSTANDARD_AVAILABLE = available
+
+    print("✅ Paquete de estado correcto")
+
+def test_feed_validators_and_watermark():
+    """Prueba las peticiones condicionales y la marca de agua de un feed"""
+    print("📡 Probando estado incremental de feeds...")
+
+    source = RSSContentSource("https://example.com/feed")
+    requests_seen = []
+
+    def fake_get(url, timeout=None, headers=None):
+        requests_seen.append(headers)
+        if headers.get('If-None-Match') == '"v1"' and len(requests_seen) == 2:
+            return _FakeResponse(304)
+        return _FakeResponse(200, FEED, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 12:00:00 GMT'})
+
+    source.session.get = fake_get
+
+    articles = source.fetch_content()
+    assert [article['title'] for article in articles] == ["Nueva GPU anunciada", "Rust 2.0 publicado"]
+    assert requests_seen[0] == {}
+
+    # Si la ingesta falla antes de guardar el estado, la siguiente descarga repite los artículos
+    assert source.get_state()['watermark'] == '2024-01-01 12:00:00' and source.watermark is None
+    assert len(source.fetch_content()) == 2
+    assert requests_seen[1] == {}
+    source.commit_state()
+
+    # Sin cambios: 304 y nada que procesar
+    assert source.fetch_content() == []
+    assert requests_seen[2]['If-None-Match'] == '"v1"'
+
+    # El feed vuelve a responder completo en otro proceso: lo anterior a la marca de agua se descarta y
+    # el artículo de la misma fecha vuelve (los hashes vistos solo viven en memoria; la base lo deduplica)
+    state = source.get_state()
+    assert state['watermark'] == '2024-01-01 12:00:00'
+    restored = RSSContentSource("https://example.com/feed")
+    restored.load_state(state)
+    restored.session.get = fake_get
+    assert [article['title'] for article in restored.fetch_content()] == ["Nueva GPU anunciada"]
+    assert requests_seen[3]['If-Modified-Since'] == 'Mon, 01 Jan 2024 12:00:00 GMT'
+
+    # Un artículo nuevo con la misma fecha que la marca de agua no se pierde
+    restored.commit_state()
+    same_minute = FEED.replace(b"<item>", b"<item><title>Chip nuevo</title><link>https://example.com/chip</link>"
+                               b"<pubDate>Mon, 01 Jan 2024 12:00:00 GMT</pubDate></item><item>", 1)
+    restored.session.get = lambda url, timeout=None, headers=None: _FakeResponse(200, same_minute)
+    assert [article['title'] for article in restored.fetch_content()] == ["Chip nuevo"]
+    restored.commit_state()
+    assert restored.fetch_content() == []
+
+    print("✅ Estado incremental de feeds correcto")
+
+def test_close_exports_once():
+    """Prueba que cerrar el bot dos veces guarda el paquete una sola vez"""
+    print("🔒 Probando cierre repetido del bot...")
+
+    saved_path = Config.STATE_BUNDLE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.STATE_BUNDLE_PATH = f"{tmp}/state.bundle"
+        # Bot sin clientes externos: solo lo que usa close()
+        bot = ZTechBot.__new__(ZTechBot)
+        bot.db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        bot.writer = WriteBehindQueue(bot.db)
+        bot.media = None
+        bot._executor = None
+        bot._closed = False
+        try:
+            bot.close()
+            bundle = Path(Config.STATE_BUNDLE_PATH)
+            assert bundle.exists()
+
+            # run_continuous y main() cierran los dos: el segundo cierre no hace nada
+            bundle.unlink()
+            bot.close()
+            assert not bundle.exists()
+        finally:
+            Config.STATE_BUNDLE_PATH = saved_path
+            bot.db.close()
+
+    print("✅ Cierre repetido correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del paquete de estado...")
+    print("=" * 50)
+
+    test_bundle_roundtrip()
+    test_feed_validators_and_watermark()
+    test_close_exports_once()
+
+    print("\n🎉 ¡Todas las pruebas del paquete de estado pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la agrupación de noticias en historias (MinHash + LSH)
+"""
+import sys
+import time
+import random
+import tempfile
+import threading
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from story_clustering import MinHasher, StoryClusterer, title_shingles
+from content_processor import ContentProcessor
+from content_dedup import compute_simhash
+from database import DatabaseManager
+from write_behind import WriteBehindQueue
+from bot import ZTechBot
+
+ARTICLES = [
+    {'title': 'Apple unveils iPhone 16 with new camera button and A18 chip', 'source': 'TechCrunch',
+     'link': 'https://techcrunch.com/iphone16', 'content_hash': 'a1'},
+    {'title': 'Samsung unveils Galaxy S25 with new camera', 'source': 'Engadget',
+     'link': 'https://engadget.com/s25', 'content_hash': 'b1'},
+    {'title': 'Apple announces iPhone 16 with a new camera button and the A18 chip', 'source': 'The Verge',
+     'link': 'https://theverge.com/iphone16', 'content_hash': 'a2'},
+    {'title': 'iPhone 16: Apple unveils new camera button and A18 chip', 'source': 'Wired',
+     'link': 'https://wired.com/iphone16', 'content_hash': 'a3'},
+    {'title': 'Rust 2.0 roadmap published by the core team', 'source': 'Dev.to',
+     'link': 'https://dev.to/rust2', 'content_hash': 'c1'},
+]
+
+def test_minhash_similarity():
+    """Prueba que la firma MinHash estima la similitud de Jaccard"""
+    print("🔢 Probando firmas MinHash...")
+
+    hasher = MinHasher(num_perm=256)
+    first = title_shingles(ARTICLES[0]['title'])
+    second = title_shingles(ARTICLES[2]['title'])
+    jaccard = len(first & second) / len(first | second)
+    estimate = MinHasher.similarity(hasher.signature(first), hasher.signature(second))
+
+    print(f"   Jaccard real: {jaccard:.2f}, estimado: {estimate:.2f}")
+    assert abs(jaccard - estimate) < 0.15
+
+    print("✅ MinHash funcionando")
+
+def test_cluster_stories():
+    """Prueba la agrupación de un lote de artículos"""
+    print("🧩 Probando agrupación de historias...")
+
+    stories = StoryClusterer().cluster(ARTICLES)
+
+    assert len(stories) == 3
+    top_story = stories[0]
+    assert top_story['size'] == 3
+    assert top_story['sources'] == 3
+    assert {a['content_hash'] for a in top_story['articles']} == {'a1', 'a2', 'a3'}
+    assert top_story['representative']['cluster_size'] == 3
+    assert top_story['representative']['content_hash'] == 'a1'
+
+    print("✅ Historias agrupadas correctamente")
+
+def test_curated_tweet_uses_stories():
+    """Prueba que el tweet curado prioriza las historias más grandes"""
+    print("📚 Probando tweet curado con historias...")
+
+    stories = StoryClusterer().cluster(ARTICLES)
+    tweet = ContentProcessor().create_curated_tweet(stories)
+
+    assert tweet
+    assert 'techcrunch.com/iphone16' in tweet
+    assert 'theverge.com/iphone16' not in tweet
+    assert '#tecnologia' in tweet
+
+    # Una cuenta en inglés publica el resumen en inglés (también si no cabe y se usa la historia principal)
+    for selected in (stories, stories[:1]):
+        tweet = ContentProcessor().create_curated_tweet(selected, language='en')
+        assert 'techcrunch.com/iphone16' in tweet and '#technology' in tweet
+        assert '#tecnologia' not in tweet and 'Resumen' not in tweet
+    assert tweet.startswith("📚 Today's tech roundup")
+
+    print("✅ Tweet curado generado a partir de historias")
+
+def test_mark_stories_processed():
+    """Prueba que marcar una historia guarda todos sus artículos y sus huellas"""
+    print("🗂️ Probando el marcado de historias procesadas...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Bot sin clientes externos: solo la base de datos y el índice SimHash
+        bot = ZTechBot.__new__(ZTechBot)
+        bot.db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        bot.writer = WriteBehindQueue(bot.db)
+        bot._simhash_index = None
+        bot._lock = threading.RLock()
+        try:
+            articles = [dict(article, simhash=compute_simhash(article['title'])) for article in ARTICLES]
+            top_story = StoryClusterer().cluster(articles)[0]
+            hashes = [article['content_hash'] for article in top_story['articles']]
+            assert not bot._is_story_processed(top_story, bot.db.get_processed_keys(hashes))
+
+            bot._mark_stories_processed([top_story])
+            bot.writer.flush()
+            assert bot.db.get_processed_keys(hashes) == {'a1', 'a2', 'a3'}
+            assert len(bot._get_simhash_index()) == 3
+            # Sin claves en la base, el índice SimHash en memoria también la reconoce
+            assert bot._is_story_processed(top_story, set())
+        finally:
+            bot.writer.close()
+            bot.db.close()
+
+    print("✅ Historia marcada como procesada")
+
+def test_cluster_scales_linearly():
+    """Prueba que agrupar un lote grande es rápido"""
+    print("⏱️ Probando rendimiento con lote grande...")
+
+    rng = random.Random(7)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    articles = [
+        {'title': ' '.join(rng.sample(vocabulary, 8)), 'content_hash': str(i)}
+        for i in range(1000)
+    ]
+    start = time.perf_counter()
+    stories = StoryClusterer().cluster(articles)
+    elapsed = time.perf_counter() - start
+
+    print(f"   1000 artículos -> {len(stories)} historias en {elapsed:.2f}s")
+    assert len(stories) == 1000
+    assert elapsed < 10
+
+    print("✅ Rendimiento adecuado")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de agrupación de historias...")
+    print("=" * 50)
+
+    test_minhash_similarity()
+    test_cluster_stories()
+    test_curated_tweet_uses_stories()
+    test_mark_stories_processed()
+    test_cluster_scales_linearly()
+
+    print("\n🎉 ¡Todas las pruebas de agrupación pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
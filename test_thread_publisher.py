@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la publicación de hilos
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import requests
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from content_processor import ContentProcessor
+from database import DatabaseManager
+from outbox import Outbox
+from thread_publisher import ThreadPublisher, split_thread
+
+LONG_TEXT = " ".join(f"La frase número {i} explica una parte de la historia." for i in range(1, 16)) + " #tecnologia"
+
+class _FakeTwitter:
+    """Cliente de Twitter que registra la cadena de respuestas"""
+
+    def __init__(self):
+        self.results = []
+        self.published = []
+
+    def publish(self, content: str, reply_to: str = None, media_ids=None):
+        result = self.results.pop(0) if self.results else None
+        if isinstance(result, Exception):
+            raise result
+        tweet = {'id': str(100 + len(self.published)), 'text': content, 'public_metrics': {}}
+        self.published.append((tweet['id'], content, reply_to))
+        return tweet
+
+    def get_own_recent_tweets(self, max_tweets: int = 20):
+        return []
+
+    def wait_time(self, endpoint: str = None) -> float:
+        return 0.0
+
+def test_split_thread():
+    """Prueba la división en partes numeradas por frases"""
+    print("✂️ Probando división de hilos...")
+
+    assert split_thread("Tweet corto #ai") == ["Tweet corto #ai"]
+
+    parts = split_thread(LONG_TEXT)
+    assert len(parts) == 3 and all(len(part) <= 280 for part in parts)
+    assert [part.rsplit(' ', 1)[1] for part in parts] == ["1/3", "2/3", "3/3"]
+    # Cada parte termina en un final de frase y no se pierde texto
+    assert all(part.rsplit(' ', 1)[0].endswith('.') for part in parts[:-1])
+    assert " ".join(part.rsplit(' ', 1)[0] for part in parts) == LONG_TEXT
+
+    # Frases sin puntuación más largas que un tweet se cortan entre palabras
+    parts = split_thread("palabra " * 100, max_length=100)
+    assert all(len(part) <= 100 for part in parts) and "palabr " not in " ".join(parts)
+
+    # Tope de partes
+    assert len(split_thread(LONG_TEXT * 3, max_parts=5)) == 5
+
+    print("✅ División correcta")
+
+def test_create_thread_tweet():
+    """Prueba que el hilo de noticias usa la misma división"""
+    print("🧵 Probando hilo de noticias...")
+
+    articles = [{'title': f"Noticia {i} sobre un lanzamiento tecnológico muy comentado en la semana " * 2,
+                 'link': f"https://example.com/noticia-{i}"} for i in range(1, 4)]
+    parts = ContentProcessor().create_thread_tweet(articles)
+    assert len(parts) > 1 and all(len(part) <= 280 for part in parts)
+    assert parts[0].startswith("🧵") and parts[-1].endswith(f"{len(parts)}/{len(parts)}")
+    assert all(f"https://example.com/noticia-{i}" in " ".join(parts) for i in range(1, 4))
+
+    print("✅ Hilo de noticias correcto")
+
+def test_publish_and_resume():
+    """Prueba la cadena de respuestas y la reanudación tras un fallo"""
+    print("🔁 Probando publicación y reanudación de hilos...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        twitter = _FakeTwitter()
+        sent = []
+        outbox = Outbox(db, twitter, on_sent=lambda item, tweet: sent.append(item['payload']))
+        threads = ThreadPublisher(outbox)
+        try:
+            # La segunda parte falla antes de enviarse: la primera no se repite
+            twitter.results = [None, requests.exceptions.ConnectTimeout("sin conexión")]
+            item_id = threads.enqueue(LONG_TEXT, {'post_type': 'hacks'})
+            assert outbox.send(item_id) == 'retried'
+            assert [reply_to for _, _, reply_to in twitter.published] == [None]
+            assert sent[0]['post_type'] == 'hacks' and sent[0]['thread']['position'] == 0
+
+            with db.backend.cursor() as cursor:
+                cursor.execute("UPDATE outbox SET next_attempt_at = '2000-01-01 00:00:00' WHERE status = 'pending'")
+            assert outbox.process() == {'sent': 1, 'retried': 0, 'failed': 0}
+
+            # Tres tweets, cada uno respondiendo al anterior
+            ids = [tweet_id for tweet_id, _, _ in twitter.published]
+            assert [reply_to for _, _, reply_to in twitter.published] == [None] + ids[:-1]
+            assert [content for _, content, _ in twitter.published] == split_thread(LONG_TEXT)
+            assert all(payload['thread']['root_id'] == ids[0] for payload in sent[1:])
+            assert db.count_pending_outbox() == 0
+
+            # Un texto corto no es un hilo
+            assert outbox.send(threads.enqueue("Tweet corto #ai")) == 'sent'
+            assert 'thread' not in sent[-1]
+        finally:
+            db.close()
+
+    print("✅ Publicación y reanudación correctas")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de hilos...")
+    print("=" * 50)
+
+    test_split_thread()
+    test_create_thread_tweet()
+    test_publish_and_resume()
+
+    print("\n🎉 ¡Todas las pruebas de hilos pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la autenticación perezosa del cliente de Twitter
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from config import Config
+from twitter_client import TwitterClient
+
+class _FakeClient:
+    """Cliente v2 mínimo que cuenta las llamadas a get_me()"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_me(self):
+        self.calls += 1
+        return SimpleNamespace(data=SimpleNamespace(id=42, username="ztech"))
+
+def _client_with(fake: _FakeClient) -> TwitterClient:
+    """Crea un cliente que usa el cliente falso en lugar de tweepy"""
+    twitter = TwitterClient()
+    twitter._client = fake
+    twitter._api = object()
+    return twitter
+
+def test_lazy_construction():
+    """Prueba que crear el cliente no construye nada ni hace peticiones"""
+    print("💤 Probando construcción perezosa...")
+
+    twitter = TwitterClient()
+    assert twitter._client is None and twitter._api is None and twitter.identity is None
+
+    print("✅ El cliente no se autentica al construirse")
+
+def test_identity_cache():
+    """Prueba la caché en disco de la identidad verificada"""
+    print("🪪 Probando caché de identidad...")
+
+    original = (Config.TWITTER_IDENTITY_CACHE, Config.TWITTER_IDENTITY_TTL_HOURS, Config.TWITTER_ACCESS_TOKEN)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = Path(tmp, "state", "twitter_identity.json")
+        Config.TWITTER_IDENTITY_CACHE = str(cache)
+        Config.TWITTER_IDENTITY_TTL_HOURS = 24
+        Config.TWITTER_ACCESS_TOKEN = "token_a"
+        try:
+            fake = _FakeClient()
+
+            # El primer uso real verifica contra la API y guarda la identidad
+            twitter = _client_with(fake)
+            assert twitter.client is fake
+            assert twitter.identity['username'] == "ztech" and fake.calls == 1
+            assert "token_a" not in cache.read_text()
+
+            # Un proceso nuevo reutiliza la caché
+            assert _client_with(fake).validate_credentials()
+            assert fake.calls == 1
+
+            # Forzar la verificación ignora la caché
+            assert _client_with(fake).validate_credentials(force=True)
+            assert fake.calls == 2
+
+            # Otras credenciales no usan la identidad cacheada
+            Config.TWITTER_ACCESS_TOKEN = "token_b"
+            _client_with(fake).get_identity()
+            assert fake.calls == 3
+
+            # La identidad caducada se vuelve a verificar
+            identity = json.loads(cache.read_text())
+            identity['verified_at'] = time.time() - 25 * 3600
+            cache.write_text(json.dumps(identity))
+            _client_with(fake).get_identity()
+            assert fake.calls == 4
+
+            # Una caché corrupta no rompe la autenticación
+            cache.write_text("{no es json")
+            assert _client_with(fake).get_identity()['id'] == "42"
+            assert fake.calls == 5
+        finally:
+            Config.TWITTER_IDENTITY_CACHE, Config.TWITTER_IDENTITY_TTL_HOURS, Config.TWITTER_ACCESS_TOKEN = original
+
+    print("✅ Caché de identidad correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del cliente de Twitter...")
+    print("=" * 50)
+
+    test_lazy_construction()
+    test_identity_cache()
+
+    print("\n🎉 ¡Todas las pruebas del cliente de Twitter pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el sustituto local de la API de Twitter
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from config import Config
+from database import DatabaseManager
+from outbox import Outbox
+from rate_limiter import POST_TWEET_ENDPOINT, RateLimitExceeded
+from twitter_client import TwitterClient
+from twitter_standin import TwitterStandIn
+
+_OVERRIDES = ('TWITTER_API_BASE_URL', 'TWITTER_API_KEY', 'TWITTER_API_SECRET', 'TWITTER_BEARER_TOKEN',
+              'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET', 'TWITTER_IDENTITY_CACHE',
+              'TWITTER_DAILY_POST_CAP')
+
+def _client(standin: TwitterStandIn) -> TwitterClient:
+    """Crea un cliente real apuntado al sustituto"""
+    Config.TWITTER_API_BASE_URL = standin.base_url
+    for name in _OVERRIDES[1:6]:
+        setattr(Config, name, 'dry-run')
+    Config.TWITTER_IDENTITY_CACHE = ''
+    Config.TWITTER_DAILY_POST_CAP = 0
+    return TwitterClient()
+
+def _with_config(test):
+    """Restaura la configuración modificada por la prueba"""
+    def wrapper():
+        saved = {name: getattr(Config, name) for name in _OVERRIDES}
+        try:
+            test()
+        finally:
+            for name, value in saved.items():
+                setattr(Config, name, value)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+@_with_config
+def test_client_roundtrip():
+    """Prueba el cliente completo contra el sustituto"""
+    print("🧪 Probando el cliente contra el sustituto...")
+
+    with TwitterStandIn(username='ztech') as standin:
+        twitter = _client(standin)
+        assert twitter.validate_credentials() and twitter.identity['username'] == 'ztech'
+
+        root = twitter.publish("Hola desde el sustituto local")
+        reply = twitter.publish("Segunda parte del hilo", reply_to=root['id'])
+        assert standin.tweets[reply['id']]['in_reply_to'] == root['id']
+
+        image = Path(tempfile.mkdtemp()) / "imagen.png"
+        image.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\x00' * 64)
+        media = twitter.upload_media(str(image))
+        with_media = twitter.publish("Tweet con imagen", media_ids=[media['media_id']])
+        assert standin.tweets[with_media['id']]['media_ids'] == [media['media_id']]
+
+        metrics = twitter.get_tweets_metrics([root['id'], reply['id'], '1'])
+        assert set(metrics) == {root['id'], reply['id']} and 'like_count' in metrics[root['id']]
+        assert [tweet['id'] for tweet in twitter.get_own_recent_tweets(5)] == \
+            [with_media['id'], reply['id'], root['id']]
+        assert len(twitter.search_tweets("sustituto")) == 1
+
+        # La API rechaza duplicados: el cliente lo ve como un error 403
+        try:
+            twitter.publish("Hola desde el sustituto local")
+            assert False, "El duplicado debería rechazarse"
+        except Exception as e:
+            assert 'duplicate' in str(e)
+
+    print("✅ Cliente contra el sustituto correcto")
+
+@_with_config
+def test_rate_limit_headers():
+    """Prueba que el cliente aprende la cuota de las cabeceras del sustituto"""
+    print("⏱️ Probando cabeceras de rate limit...")
+
+    with TwitterStandIn(limits={POST_TWEET_ENDPOINT: 2}) as standin:
+        twitter = _client(standin)
+        twitter.publish("Primero")
+        twitter.publish("Segundo")
+        assert twitter.wait_time() > 0
+
+        # El tercero se rechaza en local, sin llegar al servidor
+        sent = standin.requests.count(POST_TWEET_ENDPOINT)
+        try:
+            twitter.publish("Tercero")
+            assert False, "La cuota agotada debería rechazarse en local"
+        except RateLimitExceeded:
+            pass
+        assert standin.requests.count(POST_TWEET_ENDPOINT) == sent == 2
+
+    print("✅ Cabeceras de rate limit correctas")
+
+@_with_config
+def test_injected_errors():
+    """Prueba la bandeja de salida frente a errores inyectados"""
+    print("💥 Probando errores inyectados...")
+
+    with tempfile.TemporaryDirectory() as tmp, TwitterStandIn() as standin:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        outbox = Outbox(db, _client(standin), base_delay=0)
+        try:
+            # 503 sin publicar: se reintenta y sale una vez
+            standin.fail_next(503, endpoint=POST_TWEET_ENDPOINT)
+            assert outbox.send(outbox.enqueue("Tweet tras un 503")) == 'retried'
+            assert outbox.process() == {'sent': 1, 'retried': 0, 'failed': 0}
+
+            # Respuesta perdida tras publicar: el timeline evita el duplicado
+            standin.fail_next(503, endpoint=POST_TWEET_ENDPOINT, commit=True)
+            assert outbox.send(outbox.enqueue("Tweet con respuesta perdida")) == 'retried'
+            assert outbox.process()['sent'] == 1
+
+            texts = [tweet['text'] for tweet in standin.tweets.values()]
+            assert texts == ["Tweet tras un 503", "Tweet con respuesta perdida"]
+        finally:
+            db.close()
+
+    print("✅ Errores inyectados correctos")
+
+@_with_config
+def test_cached_rate_limit_status():
+    """Prueba que las estadísticas de rate limits no llaman a la API"""
+    print("📊 Probando estado de rate limits en caché...")
+
+    with tempfile.TemporaryDirectory() as tmp, TwitterStandIn(daily_post_limit=17) as standin:
+        db = DatabaseManager(f"{tmp}/ztech_bot.db")
+        try:
+            twitter = _client(standin)
+            twitter.publish("Tweet que informa las cuotas")
+            calls = len(standin.requests)
+            status = twitter.get_rate_limit_status()
+            assert len(standin.requests) == calls
+            assert status[POST_TWEET_ENDPOINT]['remaining'] == 99
+
+            # Con base de datos, otra ejecución conoce las cuotas sin llamar a la API
+            twitter = TwitterClient(db)
+            twitter.publish("Tweet de la primera ejecución")
+            status = TwitterClient(db).get_rate_limit_status()
+            assert status[POST_TWEET_ENDPOINT]['remaining'] == 98
+            assert status["POST /2/tweets (24h usuario)"]['remaining'] == 15
+            assert len(standin.requests) == calls + 2
+
+            # El refresco explícito sí consulta a la API
+            refreshed = TwitterClient(db).get_rate_limit_status(refresh=True)
+            assert refreshed["GET /1.1/application/rate_limit_status"]['remaining'] == 179
+            assert "GET /1.1/application/rate_limit_status" in db.get_rate_limits()
+        finally:
+            db.close()
+
+    print("✅ Estado de rate limits en caché correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas del sustituto de la API de Twitter...")
+    print("=" * 50)
+
+    test_client_roundtrip()
+    test_rate_limit_headers()
+    test_injected_errors()
+    test_cached_rate_limit_status()
+
+    print("\n🎉 ¡Todas las pruebas del sustituto pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la cola de escritura diferida
+"""
+import sys
+import time
+import sqlite3
+from pathlib import Path
+
+# Agregar src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from database import DatabaseManager
+from write_behind import WriteBehindQueue
+
+DB_PATH = "test_write_behind.db"
+
+def _fresh_db() -> DatabaseManager:
+    """Crea una base de datos de prueba vacía"""
+    _remove_db()
+    return DatabaseManager(DB_PATH)
+
+def _remove_db():
+    """Elimina la base de datos de prueba y sus archivos WAL"""
+    for suffix in ("", "-wal", "-shm"):
+        Path(DB_PATH + suffix).unlink(missing_ok=True)
+
+def test_read_your_writes():
+    """Prueba que las consultas de deduplicación ven las escrituras pendientes"""
+    print("👀 Probando lectura de escrituras pendientes...")
+
+    db = _fresh_db()
+    writer = WriteBehindQueue(db, flush_interval=60)
+    try:
+        writer.save_processed_content_many([
+            {'content_hash': 'hash_1', 'source': 'RSS_test', 'source_url': 'https://feed/rss',
+             'link': 'https://example.com/1?utm_source=rss'},
+            {'content_hash': 'hash_2', 'source': 'RSS_test'},
+        ])
+        writer.save_processed_content('generated_x', 'generated', refresh=True)
+
+        assert not db.is_content_processed('hash_1')
+        assert writer.get_processed_keys(['hash_1', 'example.com/1', 'hash_3']) == {'hash_1', 'example.com/1'}
+        # La URL del feed no marca como procesados los demás artículos del feed
+        assert writer.get_processed_keys(['https://feed/rss']) == set()
+        assert writer.was_processed_since('generated_x', days=30)
+
+        assert writer.flush()
+        assert len(writer) == 0
+        assert db.is_content_processed('hash_1')
+        assert db.was_processed_since('generated_x', days=1)
+        assert writer._pending_keys == {}
+    finally:
+        writer.close()
+        db.close()
+        _remove_db()
+
+    print("✅ Escrituras pendientes visibles")
+
+def test_close_flushes_batches():
+    """Prueba que al cerrar se confirma todo y las estadísticas se acumulan"""
+    print("📦 Probando cierre de la cola...")
+
+    db = _fresh_db()
+    writer = WriteBehindQueue(db, flush_interval=60)
+    try:
+        for i in range(20):
+            writer.save_published_tweet(str(i), f"Tweet {i}", engagement_data={'like_count': i})
+        writer.update_daily_stats(tweets_published=1, content_processed=3)
+        writer.update_daily_stats(tweets_published=2, errors_count=1)
+        writer.close()
+
+        assert len(db.get_published_tweets(limit=50)) == 20
+        stats = db.get_daily_stats(days=1)
+        assert (stats[0]['tweets_published'], stats[0]['content_processed'], stats[0]['errors_count']) == (3, 3, 1)
+
+        try:
+            writer.save_published_tweet("99", "Tarde")
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("La cola cerrada aceptó una escritura")
+    finally:
+        db.close()
+        _remove_db()
+
+    print("✅ Cola confirmada al cerrar")
+
+def test_locked_database_does_not_block():
+    """Prueba que encolar no espera a una base de datos bloqueada"""
+    print("🔒 Probando escrituras con la base de datos bloqueada...")
+
+    db = _fresh_db()
+    writer = WriteBehindQueue(db, flush_interval=0.05)
+    blocker = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        blocker.execute("BEGIN EXCLUSIVE")
+
+        start = time.perf_counter()
+        writer.save_published_tweet("1", "Publicado con el disco bloqueado")
+        writer.save_processed_content("hash_locked", "RSS_test")
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.05
+        assert writer.was_processed_since("hash_locked", days=1)
+
+        time.sleep(0.2)
+        blocker.execute("COMMIT")
+        assert writer.flush(timeout=10)
+        assert db.is_content_processed("hash_locked")
+    finally:
+        blocker.close()
+        writer.close()
+        db.close()
+        _remove_db()
+
+    print("✅ La publicación no espera al disco")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 Iniciando pruebas de la cola de escritura diferida...")
+    print("=" * 50)
+
+    test_read_your_writes()
+    test_close_flushes_batches()
+    test_locked_database_does_not_block()
+
+    print("\n🎉 ¡Todas las pruebas de escritura diferida pasaron!")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())